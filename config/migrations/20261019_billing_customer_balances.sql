@@ -0,0 +1,30 @@
+-- Materialized per-customer open balance used by the collections queue.
+-- Backfills from existing invoices; safe to re-run (rows are recomputed).
+
+CREATE TABLE IF NOT EXISTS customer_balances (
+    tenant_id           UUID          NOT NULL,
+    customer_id         UUID          NOT NULL,
+    outstanding_zar     NUMERIC(12,2) NOT NULL DEFAULT 0,
+    oldest_due_date     DATE,
+    open_invoice_count  INTEGER       NOT NULL DEFAULT 0,
+    updated_at          TIMESTAMPTZ   DEFAULT now(),
+    PRIMARY KEY (tenant_id, customer_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_customer_balances_tenant_oldest_due
+    ON customer_balances (tenant_id, oldest_due_date)
+    WHERE oldest_due_date IS NOT NULL;
+
+INSERT INTO customer_balances (tenant_id, customer_id, outstanding_zar, oldest_due_date, open_invoice_count)
+SELECT tenant_id,
+       customer_id,
+       COALESCE(SUM(total_zar - amount_paid_zar) FILTER (WHERE status IN ('sent', 'partially_paid', 'overdue')), 0),
+       MIN(due_date) FILTER (WHERE status IN ('sent', 'partially_paid', 'overdue')),
+       COUNT(*) FILTER (WHERE status IN ('sent', 'partially_paid', 'overdue'))
+FROM invoices
+GROUP BY tenant_id, customer_id
+ON CONFLICT (tenant_id, customer_id) DO UPDATE
+SET outstanding_zar    = EXCLUDED.outstanding_zar,
+    oldest_due_date    = EXCLUDED.oldest_due_date,
+    open_invoice_count = EXCLUDED.open_invoice_count,
+    updated_at         = now();
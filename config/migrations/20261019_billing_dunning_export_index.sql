@@ -0,0 +1,5 @@
+-- Tenant + created_at range scans for billing exports of dunning_actions.
+-- Run outside a transaction block.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_dunning_actions_tenant_created
+    ON dunning_actions (tenant_id, created_at, id);
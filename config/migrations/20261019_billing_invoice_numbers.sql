@@ -0,0 +1,29 @@
+-- One invoice per number per tenant.
+--
+-- ``invoices`` is partitioned by created_at, so ix_invoices_tenant_number
+-- cannot be unique.  Numbers are claimed in this unpartitioned table
+-- instead, in the same transaction as the invoice insert
+-- (services/billing/database.py: claim_invoice_number); payment imports
+-- also resolve numbers through it.
+--
+-- Backfill keeps the oldest invoice per number; the final query lists any
+-- later duplicates, which need manual reconciliation.  Safe to re-run.
+
+CREATE TABLE IF NOT EXISTS invoice_numbers (
+    tenant_id           UUID         NOT NULL,
+    number              VARCHAR(50)  NOT NULL,
+    invoice_id          UUID         NOT NULL,
+    invoice_created_at  TIMESTAMPTZ  NOT NULL,
+    PRIMARY KEY (tenant_id, number)
+);
+
+INSERT INTO invoice_numbers (tenant_id, number, invoice_id, invoice_created_at)
+SELECT tenant_id, number, id, created_at
+FROM invoices
+ORDER BY created_at, id
+ON CONFLICT DO NOTHING;
+
+SELECT i.tenant_id, i.number, i.id AS unclaimed_invoice_id, n.invoice_id AS claimed_by
+FROM invoices i
+JOIN invoice_numbers n ON n.tenant_id = i.tenant_id AND n.number = i.number
+WHERE n.invoice_id <> i.id;
@@ -0,0 +1,86 @@
+-- Composite indexes backing keyset pagination on billing invoices/payments.
+-- Lists order by (created_at DESC, id DESC) within each filter.
+--
+-- Partition-aware, and never blocks writes:
+--   * plain tables:       CREATE INDEX CONCURRENTLY
+--   * partitioned tables: CREATE INDEX ... ON ONLY the parent (and each
+--     hash-partitioned month), CREATE INDEX CONCURRENTLY on every leaf
+--     partition, then ALTER INDEX ... ATTACH PARTITION bottom-up, which
+--     marks the parent index valid once all partitions are attached.
+-- Postgres rejects CONCURRENTLY on a partitioned table, hence the split.
+--
+-- psql script (uses \gexec); run outside a transaction block:
+--   psql "$DATABASE_URL" -f config/migrations/20261019_billing_keyset_indexes.sql
+-- Safe to run multiple times.  If a CONCURRENTLY build fails, drop the
+-- invalid leaf index it leaves behind before re-running.
+
+CREATE TEMP TABLE billing_index_specs (tbl text, name text, cols text);
+INSERT INTO billing_index_specs VALUES
+    ('invoices', 'ix_invoices_tenant_created',          'tenant_id, created_at, id'),
+    ('invoices', 'ix_invoices_tenant_status_created',   'tenant_id, status, created_at, id'),
+    ('invoices', 'ix_invoices_tenant_customer_created', 'tenant_id, customer_id, created_at, id'),
+    ('payments', 'ix_payments_tenant_created',          'tenant_id, created_at, id'),
+    ('payments', 'ix_payments_tenant_status_created',   'tenant_id, status, created_at, id'),
+    ('payments', 'ix_payments_tenant_customer_created', 'tenant_id, customer_id, created_at, id'),
+    ('payments', 'ix_payments_invoice_created',         'invoice_id, created_at, id');
+
+-- Plain (not yet partitioned) tables.
+SELECT format('CREATE INDEX CONCURRENTLY IF NOT EXISTS %I ON %s (%s)', s.name, t.oid::regclass, s.cols)
+FROM billing_index_specs s
+JOIN pg_class t ON t.oid = to_regclass(s.tbl)
+WHERE t.relkind = 'r'
+\gexec
+
+-- Partitioned tables: every table in the partition tree of each index that
+-- is not yet valid on the parent.  Partition indexes are named
+-- <partition>_<suffix>, e.g. invoices_p202610_tenant_created.
+CREATE TEMP TABLE billing_index_tree AS
+SELECT s.name AS root_index,
+       p.relid,
+       p.parentrelid,
+       p.isleaf,
+       p.level,
+       CASE WHEN p.level = 0 THEN s.name
+            ELSE left(c.relname || substr(s.name, length('ix_' || s.tbl) + 1), 63)
+       END AS index_name,
+       s.cols
+FROM billing_index_specs s
+JOIN pg_class t ON t.oid = to_regclass(s.tbl) AND t.relkind = 'p'
+CROSS JOIN LATERAL pg_partition_tree(t.oid) p
+JOIN pg_class c ON c.oid = p.relid
+WHERE NOT EXISTS (
+    SELECT 1 FROM pg_index i WHERE i.indexrelid = to_regclass(s.name) AND i.indisvalid
+);
+
+-- 1. Parent and intermediate indexes (catalog only, no build).
+SELECT format('CREATE INDEX IF NOT EXISTS %I ON ONLY %s (%s)', index_name, relid::regclass, cols)
+FROM billing_index_tree
+WHERE NOT isleaf
+ORDER BY level
+\gexec
+
+-- 2. Leaf partition indexes, built without blocking writes.
+SELECT format('CREATE INDEX CONCURRENTLY IF NOT EXISTS %I ON %s (%s)', index_name, relid::regclass, cols)
+FROM billing_index_tree
+WHERE isleaf
+\gexec
+
+-- 3. Attach, deepest level first, so each parent becomes valid in turn.
+SELECT format('ALTER INDEX %I ATTACH PARTITION %I', parent.index_name, child.index_name)
+FROM billing_index_tree child
+JOIN billing_index_tree parent
+  ON parent.root_index = child.root_index AND parent.relid = child.parentrelid
+ORDER BY child.level DESC
+\gexec
+
+-- Superseded by the (…, created_at, id) indexes above.  A partitioned index
+-- cannot be dropped CONCURRENTLY; the plain DROP holds its lock only briefly.
+SELECT format(
+           CASE c.relkind WHEN 'I' THEN 'DROP INDEX IF EXISTS %s' ELSE 'DROP INDEX CONCURRENTLY IF EXISTS %s' END,
+           c.oid::regclass
+       )
+FROM unnest(ARRAY['ix_invoices_tenant_status', 'ix_invoices_tenant_customer', 'ix_payments_tenant_customer']) AS n(name)
+JOIN pg_class c ON c.oid = to_regclass(n.name)
+\gexec
+
+DROP TABLE billing_index_tree, billing_index_specs;
@@ -0,0 +1,29 @@
+-- One payment per Paystack reference per tenant (webhook idempotency).
+--
+-- ``payments`` is partitioned by created_at, so a unique index on
+-- (tenant_id, paystack_ref) is not possible there.  The reference is claimed
+-- in this unpartitioned table instead, in the same transaction as the
+-- payment insert (services/billing/webhook_worker.py).
+--
+-- Backfill keeps the oldest payment per reference; the final query lists
+-- any later duplicates, which need manual reconciliation.  Safe to re-run.
+
+CREATE TABLE IF NOT EXISTS payment_paystack_refs (
+    tenant_id           UUID         NOT NULL,
+    paystack_ref        VARCHAR(200) NOT NULL,
+    payment_id          UUID         NOT NULL,
+    payment_created_at  TIMESTAMPTZ  NOT NULL,
+    PRIMARY KEY (tenant_id, paystack_ref)
+);
+
+INSERT INTO payment_paystack_refs (tenant_id, paystack_ref, payment_id, payment_created_at)
+SELECT tenant_id, paystack_ref, id, created_at
+FROM payments
+WHERE paystack_ref IS NOT NULL
+ORDER BY created_at, id
+ON CONFLICT DO NOTHING;
+
+SELECT p.tenant_id, p.paystack_ref, p.id AS unclaimed_payment_id, r.payment_id AS claimed_by
+FROM payments p
+JOIN payment_paystack_refs r ON r.tenant_id = p.tenant_id AND r.paystack_ref = p.paystack_ref
+WHERE r.payment_id <> p.id;
@@ -0,0 +1,30 @@
+-- Widen the invoices / payments primary keys to (id, created_at, tenant_id).
+--
+-- Monthly partitions may be sub-partitioned by HASH (tenant_id)
+-- (BILLING_PARTITION_HASH_BUCKETS, services/billing/partitions.py), and
+-- Postgres requires every partition key column in the primary key.  Works on
+-- plain and partitioned tables (the new key propagates to the partitions);
+-- rewrites the key index, so run it in a maintenance window.  Safe to re-run.
+
+DO $$
+DECLARE
+    t text;
+    pk text;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['invoices', 'payments'] LOOP
+        SELECT c.conname INTO pk
+        FROM pg_constraint c
+        WHERE c.conrelid = t::regclass AND c.contype = 'p';
+
+        IF pk IS NOT NULL AND NOT EXISTS (
+            SELECT 1
+            FROM pg_constraint c
+            JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+            WHERE c.conrelid = t::regclass AND c.contype = 'p' AND a.attname = 'tenant_id'
+        ) THEN
+            EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', t, pk);
+            EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I PRIMARY KEY (id, created_at, tenant_id)', t, t || '_pkey');
+            RAISE NOTICE 'widened primary key of %', t;
+        END IF;
+    END LOOP;
+END $$;
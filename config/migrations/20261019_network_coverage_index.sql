@@ -0,0 +1,39 @@
+-- FNO coverage footprints and serviceable points (coverage index).
+-- Safe to run multiple times.
+
+CREATE TABLE IF NOT EXISTS coverage_footprints (
+    id                 UUID PRIMARY KEY,
+    tenant_id          UUID             NOT NULL,
+    fno_provider       fno_provider     NOT NULL,
+    name               VARCHAR(200)     NOT NULL,
+    technology         technology_type  NOT NULL,
+    max_download_mbps  INTEGER          NOT NULL DEFAULT 1000,
+    geometry           JSONB            NOT NULL,
+    min_lon            DOUBLE PRECISION NOT NULL,
+    min_lat            DOUBLE PRECISION NOT NULL,
+    max_lon            DOUBLE PRECISION NOT NULL,
+    max_lat            DOUBLE PRECISION NOT NULL,
+    source             VARCHAR(255),
+    is_active          BOOLEAN          NOT NULL DEFAULT TRUE,
+    created_at         TIMESTAMPTZ      NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_coverage_footprints_tenant
+    ON coverage_footprints (tenant_id, fno_provider);
+
+CREATE TABLE IF NOT EXISTS coverage_points (
+    id                 UUID PRIMARY KEY,
+    tenant_id          UUID             NOT NULL,
+    fno_provider       fno_provider     NOT NULL,
+    latitude           DOUBLE PRECISION NOT NULL,
+    longitude          DOUBLE PRECISION NOT NULL,
+    address            VARCHAR(500),
+    technology         technology_type  NOT NULL,
+    max_download_mbps  INTEGER          NOT NULL DEFAULT 1000,
+    serviceable        BOOLEAN          NOT NULL DEFAULT TRUE,
+    source             VARCHAR(255),
+    created_at         TIMESTAMPTZ      NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_coverage_points_tenant
+    ON coverage_points (tenant_id, fno_provider);
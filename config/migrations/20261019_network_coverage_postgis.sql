@@ -0,0 +1,18 @@
+-- Optional: PostGIS geometry columns for COVERAGE_INDEX_BACKEND=postgis.
+-- Requires 20261019_network_coverage_index.sql. Safe to run multiple times.
+
+CREATE EXTENSION IF NOT EXISTS postgis;
+
+ALTER TABLE coverage_footprints
+    ADD COLUMN IF NOT EXISTS geom geometry(MultiPolygon, 4326)
+    GENERATED ALWAYS AS (ST_Multi(ST_SetSRID(ST_GeomFromGeoJSON(geometry::text), 4326))) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_coverage_footprints_geom
+    ON coverage_footprints USING GIST (geom);
+
+ALTER TABLE coverage_points
+    ADD COLUMN IF NOT EXISTS geog geography(Point, 4326)
+    GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_coverage_points_geog
+    ON coverage_points USING GIST (geog);
@@ -0,0 +1,4 @@
+-- FNO order placement marker (network worker, jobs.execute_fno_order).
+-- Safe to run multiple times.
+
+ALTER TABLE fno_orders ADD COLUMN IF NOT EXISTS submit_attempted_at TIMESTAMPTZ;
@@ -0,0 +1,29 @@
+-- FNO order status tracking (network worker, order_tracking.py).
+-- Safe to run multiple times.
+
+ALTER TABLE fno_orders ADD COLUMN IF NOT EXISTS fno_status     VARCHAR(50);
+ALTER TABLE fno_orders ADD COLUMN IF NOT EXISTS next_poll_at   TIMESTAMPTZ;
+ALTER TABLE fno_orders ADD COLUMN IF NOT EXISTS last_polled_at TIMESTAMPTZ;
+ALTER TABLE fno_orders ADD COLUMN IF NOT EXISTS poll_failures  INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS ix_fno_orders_next_poll
+    ON fno_orders (next_poll_at)
+    WHERE next_poll_at IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS fno_order_events (
+    id              UUID PRIMARY KEY,
+    tenant_id       UUID          NOT NULL,
+    order_id        UUID          NOT NULL REFERENCES fno_orders(id) ON DELETE CASCADE,
+    from_status     order_status,
+    to_status       order_status  NOT NULL,
+    fno_status      VARCHAR(50),
+    scheduled_date  TIMESTAMPTZ,
+    source          VARCHAR(20)   NOT NULL DEFAULT 'poll',
+    payload         JSONB,
+    created_at      TIMESTAMPTZ   NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_fno_order_events_order
+    ON fno_order_events (order_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_fno_order_events_tenant
+    ON fno_order_events (tenant_id, created_at);
@@ -0,0 +1,51 @@
+-- Durable job queue for FNO orders and automation jobs (network worker).
+-- Safe to run multiple times.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'queue_job_kind') THEN
+        CREATE TYPE queue_job_kind AS ENUM ('fno_order', 'automation_job');
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'queue_job_status') THEN
+        CREATE TYPE queue_job_status AS ENUM ('queued', 'running', 'completed', 'dead');
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS network_queue_jobs (
+    id            UUID PRIMARY KEY,
+    tenant_id     UUID             NOT NULL,
+    kind          queue_job_kind   NOT NULL,
+    ref_id        UUID             NOT NULL,
+    fno_provider  fno_provider     NOT NULL,
+    priority      INTEGER          NOT NULL DEFAULT 0,
+    status        queue_job_status NOT NULL DEFAULT 'queued',
+    attempts      INTEGER          NOT NULL DEFAULT 0,
+    max_attempts  INTEGER          NOT NULL DEFAULT 5,
+    run_at        TIMESTAMPTZ      NOT NULL DEFAULT now(),
+    locked_by     VARCHAR(100),
+    locked_until  TIMESTAMPTZ,
+    last_error    TEXT,
+    created_at    TIMESTAMPTZ      NOT NULL DEFAULT now(),
+    completed_at  TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS ix_network_queue_jobs_ready
+    ON network_queue_jobs (fno_provider, priority, run_at)
+    WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS ix_network_queue_jobs_ref
+    ON network_queue_jobs (kind, ref_id);
+CREATE INDEX IF NOT EXISTS ix_network_queue_jobs_tenant
+    ON network_queue_jobs (tenant_id, status);
+
+-- Orders/jobs that were left queued by the old in-process BackgroundTasks.
+INSERT INTO network_queue_jobs (id, tenant_id, kind, ref_id, fno_provider)
+SELECT gen_random_uuid(), o.tenant_id, 'fno_order', o.id, o.fno_provider
+FROM fno_orders o
+WHERE o.status = 'submitted'
+  AND NOT EXISTS (SELECT 1 FROM network_queue_jobs q WHERE q.kind = 'fno_order' AND q.ref_id = o.id);
+
+INSERT INTO network_queue_jobs (id, tenant_id, kind, ref_id, fno_provider)
+SELECT gen_random_uuid(), j.tenant_id, 'automation_job', j.id, j.fno_provider
+FROM automation_jobs j
+WHERE j.status = 'queued'
+  AND NOT EXISTS (SELECT 1 FROM network_queue_jobs q WHERE q.kind = 'automation_job' AND q.ref_id = j.id);
@@ -0,0 +1,12 @@
+-- radacct indexes for the network service's incremental session index.
+-- Safe to run multiple times. On a large live radacct run each statement
+-- with CONCURRENTLY (outside a transaction) instead.
+
+-- Incremental poll: rows touched since the update watermark.
+CREATE INDEX IF NOT EXISTS idx_radacct_updatetime
+    ON radacct (acctupdatetime);
+
+-- Open sessions per tenant / user (initial load, reconciliation, fallback queries).
+CREATE INDEX IF NOT EXISTS idx_radacct_open_tenant_username
+    ON radacct (tenant_id, username)
+    WHERE acctstoptime IS NULL;
@@ -0,0 +1,33 @@
+-- Queue of RADIUS Disconnect-Request / CoA-Request work items written by
+-- bulk suspend/reinstate in the Network service.  Safe to run multiple times.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'radius_coa_action') THEN
+        CREATE TYPE radius_coa_action AS ENUM ('disconnect', 'coa');
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'radius_coa_status') THEN
+        CREATE TYPE radius_coa_status AS ENUM ('pending', 'acked', 'nacked', 'failed');
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS radius_coa_requests (
+    id                 UUID PRIMARY KEY,
+    tenant_id          UUID              NOT NULL,
+    service_id         UUID              NOT NULL,
+    radius_account_id  UUID              NOT NULL,
+    username           VARCHAR(100)      NOT NULL,
+    nas_ip_address     VARCHAR(45),
+    action             radius_coa_action NOT NULL,
+    reason             VARCHAR(255),
+    status             radius_coa_status NOT NULL DEFAULT 'pending',
+    attempts           INTEGER           NOT NULL DEFAULT 0,
+    last_error         TEXT,
+    created_at         TIMESTAMPTZ       NOT NULL DEFAULT now(),
+    sent_at            TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS ix_radius_coa_requests_pending
+    ON radius_coa_requests (status, created_at);
+CREATE INDEX IF NOT EXISTS ix_radius_coa_requests_tenant
+    ON radius_coa_requests (tenant_id, created_at);
@@ -0,0 +1,34 @@
+-- radcheck / radreply / radusergroup sync from radius_accounts
+-- (network worker, radius_sync.py).  Safe to run multiple times.
+
+CREATE TABLE IF NOT EXISTS radius_sync_pending (
+    tenant_id   UUID         NOT NULL,
+    username    VARCHAR(100) NOT NULL,
+    due_at      TIMESTAMPTZ  NOT NULL,
+    changed_at  TIMESTAMPTZ  NOT NULL DEFAULT now(),
+    attempts    INTEGER      NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, username)
+);
+
+CREATE INDEX IF NOT EXISTS ix_radius_sync_pending_due
+    ON radius_sync_pending (due_at);
+
+-- The sync upserts on (tenant_id, username, attribute / groupname); keep the
+-- newest row of any existing duplicates so the unique indexes can be built.
+DELETE FROM radcheck a USING radcheck b
+ WHERE a.tenant_id = b.tenant_id AND a.username = b.username
+   AND a.attribute = b.attribute AND a.id < b.id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_radcheck_tenant_username_attribute
+    ON radcheck (tenant_id, username, attribute);
+
+DELETE FROM radreply a USING radreply b
+ WHERE a.tenant_id = b.tenant_id AND a.username = b.username
+   AND a.attribute = b.attribute AND a.id < b.id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_radreply_tenant_username_attribute
+    ON radreply (tenant_id, username, attribute);
+
+DELETE FROM radusergroup a USING radusergroup b
+ WHERE a.tenant_id = b.tenant_id AND a.username = b.username
+   AND a.groupname = b.groupname AND a.id < b.id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_radusergroup_tenant_username_group
+    ON radusergroup (tenant_id, username, groupname);
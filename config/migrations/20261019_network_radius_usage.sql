@@ -0,0 +1,57 @@
+-- Hourly / daily RADIUS usage rollups (network worker, radius_usage.py).
+-- Safe to run multiple times.
+
+CREATE TABLE IF NOT EXISTS radius_usage_hourly (
+    tenant_id        UUID         NOT NULL,
+    username         VARCHAR(255) NOT NULL,
+    hour             TIMESTAMPTZ  NOT NULL,
+    service_id       UUID,
+    input_octets     BIGINT       NOT NULL DEFAULT 0,
+    output_octets    BIGINT       NOT NULL DEFAULT 0,
+    session_seconds  BIGINT       NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, username, hour)
+);
+
+CREATE INDEX IF NOT EXISTS ix_radius_usage_hourly_tenant_hour
+    ON radius_usage_hourly (tenant_id, hour);
+
+CREATE TABLE IF NOT EXISTS radius_usage_daily (
+    tenant_id        UUID         NOT NULL,
+    username         VARCHAR(255) NOT NULL,
+    day              DATE         NOT NULL,
+    service_id       UUID,
+    input_octets     BIGINT       NOT NULL DEFAULT 0,
+    output_octets    BIGINT       NOT NULL DEFAULT 0,
+    session_seconds  BIGINT       NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, username, day)
+);
+
+CREATE INDEX IF NOT EXISTS ix_radius_usage_daily_tenant_day
+    ON radius_usage_daily (tenant_id, day);
+
+CREATE TABLE IF NOT EXISTS radius_usage_checkpoints (
+    radacctid        BIGINT       PRIMARY KEY,
+    input_octets     BIGINT       NOT NULL DEFAULT 0,
+    output_octets    BIGINT       NOT NULL DEFAULT 0,
+    session_seconds  BIGINT       NOT NULL DEFAULT 0,
+    last_update      TIMESTAMPTZ  NOT NULL,
+    closed           BOOLEAN      NOT NULL DEFAULT FALSE
+);
+
+CREATE INDEX IF NOT EXISTS ix_radius_usage_checkpoints_closed
+    ON radius_usage_checkpoints (last_update)
+    WHERE closed;
+
+CREATE TABLE IF NOT EXISTS radius_usage_cursor (
+    name             VARCHAR(50)  PRIMARY KEY,
+    last_update      TIMESTAMPTZ  NOT NULL,
+    last_radacctid   BIGINT       NOT NULL DEFAULT 0,
+    updated_at       TIMESTAMPTZ  NOT NULL DEFAULT now()
+);
+
+-- Keyset scan of radacct by (acctupdatetime, radacctid).
+CREATE INDEX IF NOT EXISTS idx_radacct_updatetime_id
+    ON radacct (acctupdatetime, radacctid);
+
+-- Superseded by idx_radacct_updatetime_id (also serves the session index poll).
+DROP INDEX IF EXISTS idx_radacct_updatetime;
@@ -8,7 +8,9 @@ from typing import Generator
 from sqlalchemy.orm import Session, sessionmaker
 
 from services.common.db import get_engine
-from services.billing.models import Base, InvoiceSequence
+from services.common.money import compute_vat as _compute_vat
+from services.billing.models import Base, Invoice, InvoiceNumber, InvoiceSequence
+from services.billing.partitions import ensure_partitions
 
 
 _session_factory: sessionmaker | None = None
@@ -42,6 +44,7 @@ def init_tables() -> None:
     """Create all Billing tables if they don't exist (dev convenience)."""
     engine = get_engine()
     Base.metadata.create_all(bind=engine)
+    ensure_partitions()
 
 
 def next_invoice_number(session: Session, tenant_id: uuid.UUID) -> str:
@@ -68,6 +71,23 @@ def next_invoice_number(session: Session, tenant_id: uuid.UUID) -> str:
     return f"INV-{short_tenant}-{seq.last_number:06d}"
 
 
+def claim_invoice_number(session: Session, invoice: Invoice) -> None:
+    """Record ``invoice.number`` in ``invoice_numbers`` in the current transaction.
+
+    Flushes the invoice first (for its ``created_at``) and then the claim, so
+    a duplicate number raises ``IntegrityError`` here and the whole
+    transaction, invoice included, rolls back.
+    """
+    session.flush()
+    session.add(InvoiceNumber(
+        tenant_id=invoice.tenant_id,
+        number=invoice.number,
+        invoice_id=invoice.id,
+        invoice_created_at=invoice.created_at,
+    ))
+    session.flush()
+
+
 def compute_vat(subtotal: Decimal) -> Decimal:
     """Compute 15% SA VAT on a subtotal."""
-    return (subtotal * VAT_RATE).quantize(Decimal("0.01"))
+    return _compute_vat(subtotal, VAT_RATE)
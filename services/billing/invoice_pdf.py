@@ -0,0 +1,264 @@
+"""Invoice PDF rendering with a process pool and a content-addressed store.
+
+Rendering is CPU-bound, so it runs in a ``ProcessPoolExecutor`` of
+``BILLING_PDF_WORKERS`` processes rather than in request threads.  The parent
+builds a plain-data *render payload* from each ``Invoice``; its SHA-256 (plus
+``TEMPLATE_VERSION``) is the document's content hash and its file name under
+``BILLING_PDF_DIR``:
+
+    <BILLING_PDF_DIR>/<hash[:2]>/<hash>.pdf
+
+A payload whose file already exists is never rendered again, so re-sends and
+re-downloads are free and a billing-run re-render only touches invoices that
+changed.  The payload holds only what the issued document shows — not the
+invoice ``status`` or ``amount_paid_zar`` — so sending a draft or recording
+a payment does not produce a new document.  ReportLab runs in ``invariant``
+mode, so the same payload always produces the same bytes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from services.billing.models import Invoice, InvoiceDocument
+
+logger = logging.getLogger("billing.invoice_pdf")
+
+PDF_DIR = Path(os.getenv("BILLING_PDF_DIR", "/var/lib/omnidome/billing/pdfs"))
+PDF_WORKERS = int(os.getenv("BILLING_PDF_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+PDF_BATCH_CHUNK = 200
+TEMPLATE_VERSION = "2"
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+# ---------------------------------------------------------------------------
+# Payload & storage
+# ---------------------------------------------------------------------------
+
+def render_payload(inv: Invoice) -> dict:
+    return {
+        "template": TEMPLATE_VERSION,
+        "tenant_id": str(inv.tenant_id),
+        "customer_id": str(inv.customer_id),
+        "number": inv.number,
+        "issued": inv.created_at.date().isoformat() if inv.created_at else None,
+        "due_date": inv.due_date.isoformat(),
+        "line_items": inv.line_items or [],
+        "subtotal_zar": str(inv.subtotal_zar),
+        "vat_zar": str(inv.vat_zar),
+        "total_zar": str(inv.total_zar),
+        "notes": inv.notes,
+        "credit_note": inv.credit_note_of is not None,
+    }
+
+
+def content_hash(payload: dict) -> str:
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def document_path(digest: str) -> Path:
+    return PDF_DIR / digest[:2] / f"{digest}.pdf"
+
+
+def _store(digest: str, data: bytes) -> Path:
+    path = document_path(digest)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Rendering (runs in worker processes)
+# ---------------------------------------------------------------------------
+
+def render_pdf(payload: dict) -> bytes:
+    """Draw one invoice; pure function of ``payload``."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4, invariant=1)
+    width, height = A4
+    title = "CREDIT NOTE" if payload["credit_note"] else "TAX INVOICE"
+
+    c.setTitle(f"{title} {payload['number']}")
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(20 * mm, height - 25 * mm, title)
+    c.setFont("Helvetica", 10)
+    y = height - 35 * mm
+    for label, value in (
+        ("Number", payload["number"]),
+        ("Issued", payload["issued"] or ""),
+        ("Due", payload["due_date"]),
+        ("Customer", payload["customer_id"]),
+    ):
+        c.drawString(20 * mm, y, f"{label}:")
+        c.drawString(45 * mm, y, value)
+        y -= 5 * mm
+
+    y -= 5 * mm
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(20 * mm, y, "Description")
+    c.drawRightString(140 * mm, y, "Qty")
+    c.drawRightString(165 * mm, y, "Unit (R)")
+    c.drawRightString(190 * mm, y, "Total (R)")
+    c.setFont("Helvetica", 10)
+    for item in payload["line_items"]:
+        y -= 6 * mm
+        if y < 40 * mm:
+            c.showPage()
+            c.setFont("Helvetica", 10)
+            y = height - 25 * mm
+        c.drawString(20 * mm, y, str(item.get("description", ""))[:70])
+        c.drawRightString(140 * mm, y, str(item.get("quantity", 1)))
+        c.drawRightString(165 * mm, y, str(item.get("unit_price_zar", "")))
+        c.drawRightString(190 * mm, y, str(item.get("total_zar", "")))
+
+    y -= 12 * mm
+    for label, key in (
+        ("Subtotal", "subtotal_zar"),
+        ("VAT (15%)", "vat_zar"),
+        ("Total", "total_zar"),
+    ):
+        c.drawRightString(165 * mm, y, label)
+        c.drawRightString(190 * mm, y, payload[key])
+        y -= 5 * mm
+
+    if payload["notes"]:
+        y -= 5 * mm
+        c.drawString(20 * mm, y, str(payload["notes"])[:100])
+
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: never fork a process that is running threads and an event loop
+        _executor = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+# ---------------------------------------------------------------------------
+# Batch rendering
+# ---------------------------------------------------------------------------
+
+def _record(session: Session, rows: list[dict]) -> None:
+    if not rows:
+        return
+    stmt = pg_insert(InvoiceDocument).values(rows)
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=["invoice_id"],
+        set_={
+            "content_hash": stmt.excluded.content_hash,
+            "size_bytes": stmt.excluded.size_bytes,
+            "rendered_at": stmt.excluded.rendered_at,
+        },
+    ))
+
+
+def render_invoices(session: Session, invoices: Iterable[Invoice]) -> dict:
+    """Render (or reuse) PDFs for ``invoices`` and record them; returns counts."""
+    counts = {"requested": 0, "rendered": 0, "cached": 0, "failed": 0}
+    batch: list[tuple[Invoice, dict, str]] = []
+
+    def _flush() -> None:
+        todo = [(inv, payload, digest) for inv, payload, digest in batch
+                if not document_path(digest).exists()]
+        todo_digests = {digest for _, _, digest in todo}
+        counts["cached"] += len(batch) - len(todo)
+
+        done: set[str] = set()
+        unique = {digest: payload for _, payload, digest in todo}
+        futures = {digest: get_executor().submit(render_pdf, payload) for digest, payload in unique.items()}
+        for digest, fut in futures.items():
+            try:
+                _store(digest, fut.result())
+                done.add(digest)
+            except Exception as exc:
+                logger.error("PDF render failed for %s: %s", digest, exc)
+
+        now = datetime.now(timezone.utc)
+        rows = []
+        for inv, _payload, digest in batch:
+            if digest in todo_digests and digest not in done:
+                counts["failed"] += 1
+                continue
+            if digest in todo_digests:
+                counts["rendered"] += 1
+            rows.append({
+                "invoice_id": inv.id,
+                "tenant_id": inv.tenant_id,
+                "content_hash": digest,
+                "size_bytes": document_path(digest).stat().st_size,
+                "rendered_at": now,
+            })
+        _record(session, rows)
+        batch.clear()
+
+    for inv in invoices:
+        counts["requested"] += 1
+        payload = render_payload(inv)
+        batch.append((inv, payload, content_hash(payload)))
+        if len(batch) >= PDF_BATCH_CHUNK:
+            _flush()
+    if batch:
+        _flush()
+
+    logger.info(
+        "Invoice PDFs: %d requested, %d rendered, %d cached, %d failed",
+        counts["requested"], counts["rendered"], counts["cached"], counts["failed"],
+    )
+    return counts
+
+
+def ensure_invoice_pdf(session: Session, inv: Invoice) -> Path:
+    """Path of the current PDF for ``inv``, rendering it first if needed."""
+    digest = content_hash(render_payload(inv))
+    path = document_path(digest)
+    if not path.exists() or _stale(session, inv.id, digest):
+        render_invoices(session, [inv])
+    if not path.exists():
+        raise RuntimeError(f"PDF render failed for invoice {inv.number}")
+    return path
+
+
+def _stale(session: Session, invoice_id: uuid.UUID, digest: str) -> bool:
+    current = session.get(InvoiceDocument, invoice_id)
+    return current is None or current.content_hash != digest
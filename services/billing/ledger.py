@@ -0,0 +1,98 @@
+"""Per-customer balance ledger (``customer_balances``).
+
+Every write that changes what a customer owes — sending an invoice, recording
+a payment, issuing a credit note — calls :func:`refresh_customer_balances`
+for the affected customers inside the same transaction.  The refresh is
+set-based (a constant number of statements per chunk of customers) and
+recomputes from the invoices themselves, so the ledger cannot drift from the
+source of truth:
+
+  1. make sure a ledger row exists for every customer (``ON CONFLICT DO NOTHING``)
+  2. lock those rows in a stable order (serialises concurrent writers for
+     the same customer; later statements see their committed changes)
+  3. aggregate the open invoices once and write the totals back
+"""
+
+from __future__ import annotations
+
+import uuid
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from services.billing.models import CustomerBalance, Invoice
+
+OPEN_INVOICE_STATUSES = ("sent", "partially_paid", "overdue")
+REFRESH_CHUNK_SIZE = 1000
+
+
+def refresh_customer_balances(
+    session: Session,
+    tenant_id: uuid.UUID,
+    customer_ids: Iterable[uuid.UUID],
+) -> None:
+    """Recompute the ledger rows of ``customer_ids`` in the caller's transaction."""
+    ids = sorted(set(customer_ids), key=str)
+    if not ids:
+        return
+    session.flush()
+    for start in range(0, len(ids), REFRESH_CHUNK_SIZE):
+        _refresh_chunk(session, tenant_id, ids[start:start + REFRESH_CHUNK_SIZE])
+
+
+def _refresh_chunk(session: Session, tenant_id: uuid.UUID, ids: list[uuid.UUID]) -> None:
+    session.execute(
+        pg_insert(CustomerBalance)
+        .values([{"tenant_id": tenant_id, "customer_id": cid} for cid in ids])
+        .on_conflict_do_nothing(index_elements=["tenant_id", "customer_id"])
+    )
+
+    balances = (
+        session.query(CustomerBalance)
+        .filter(CustomerBalance.tenant_id == tenant_id, CustomerBalance.customer_id.in_(ids))
+        .order_by(CustomerBalance.customer_id)
+        .with_for_update()
+        .populate_existing()
+        .all()
+    )
+
+    totals = {
+        row.customer_id: row
+        for row in (
+            session.query(
+                Invoice.customer_id,
+                func.sum(Invoice.total_zar - Invoice.amount_paid_zar).label("outstanding"),
+                func.min(Invoice.due_date).label("oldest_due"),
+                func.count(Invoice.id).label("inv_count"),
+            )
+            .filter(
+                Invoice.tenant_id == tenant_id,
+                Invoice.customer_id.in_(ids),
+                Invoice.status.in_(OPEN_INVOICE_STATUSES),
+            )
+            .group_by(Invoice.customer_id)
+            .all()
+        )
+    }
+
+    for balance in balances:
+        row = totals.get(balance.customer_id)
+        balance.outstanding_zar = row.outstanding if row else Decimal("0.00")
+        balance.oldest_due_date = row.oldest_due if row else None
+        balance.open_invoice_count = row.inv_count if row else 0
+    session.flush()
+
+
+def get_customer_balance(
+    session: Session,
+    tenant_id: uuid.UUID,
+    customer_id: uuid.UUID,
+) -> Optional[CustomerBalance]:
+    return (
+        session.query(CustomerBalance)
+        .filter(CustomerBalance.tenant_id == tenant_id, CustomerBalance.customer_id == customer_id)
+        .first()
+    )
@@ -5,17 +5,25 @@ Port: 8003
 
 import logging
 import os
+from typing import Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Query
 from starlette.requests import Request
 
 from services.common.entitlements import EntitlementGuard
-from services.billing.database import init_tables
+from services.billing.database import get_session, init_tables
+from services.billing.models import SchedulerRun
 from services.billing.routes.invoices import router as invoices_router
 from services.billing.routes.payments import router as payments_router
 from services.billing.routes.paystack import router as paystack_router
 from services.billing.routes.collections import router as collections_router
 from services.billing.routes.reports import router as reports_router
+from services.billing.routes.exports import router as exports_router
+from services.billing.invoice_pdf import shutdown_executor
+from services.billing.network_client import start_outbox_relay, stop_outbox_relay
+from services.billing.scheduler import scheduler, scheduler_enabled
+from services.billing.schemas import SchedulerRunRead
+from services.billing.webhook_worker import start_webhook_workers, stop_webhook_workers
 
 logger = logging.getLogger("billing")
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
@@ -43,6 +51,18 @@ async def startup() -> None:
     if os.getenv("AUTO_CREATE_TABLES", "false").lower() == "true":
         init_tables()
         logger.info("Billing tables ensured")
+    if scheduler_enabled():
+        scheduler.start()
+    start_webhook_workers()
+    start_outbox_relay()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await stop_webhook_workers()
+    await scheduler.stop()
+    await stop_outbox_relay()
+    shutdown_executor()
 
 
 @app.middleware("http")
@@ -68,20 +88,39 @@ app.include_router(payments_router)
 app.include_router(paystack_router)
 app.include_router(collections_router)
 app.include_router(reports_router)
+app.include_router(exports_router)
 
 
 # ---------------------------------------------------------------------------
-# Dunning cron endpoint (call from external scheduler)
+# Dunning — manual trigger and scheduler run history
 # ---------------------------------------------------------------------------
 
 @app.post("/dunning/process", tags=["Dunning"])
-async def run_dunning():
-    """Process all pending dunning actions.  Call this from a cron/scheduler."""
+def run_dunning():
+    """Process all pending dunning actions now.
+
+    The in-service scheduler does this automatically; this endpoint remains
+    for manual catch-up runs and for deployments with the scheduler disabled.
+    """
     from services.billing.routes.collections import process_pending_dunning
     count = process_pending_dunning()
     return {"processed": count}
 
 
+@app.get("/dunning/runs", response_model=list[SchedulerRunRead], tags=["Dunning"])
+def list_scheduler_runs(
+    job_name: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Recent scheduler runs (newest first) for throughput and lag tracking."""
+    with get_session() as session:
+        q = session.query(SchedulerRun)
+        if job_name:
+            q = q.filter(SchedulerRun.job_name == job_name)
+        runs = q.order_by(SchedulerRun.started_at.desc()).limit(limit).all()
+        return [SchedulerRunRead.model_validate(r) for r in runs]
+
+
 # ---------------------------------------------------------------------------
 # Entrypoint
 # ---------------------------------------------------------------------------
@@ -1,7 +1,7 @@
 """SQLAlchemy models for the Billing service."""
 
 import uuid
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from decimal import Decimal
 from typing import Optional
 
@@ -11,13 +11,14 @@ from sqlalchemy import (
     Date,
     DateTime,
     Enum as SAEnum,
-    ForeignKey,
     Index,
     Integer,
     Numeric,
+    PrimaryKeyConstraint,
     String,
     Text,
     func,
+    text,
 )
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
@@ -27,6 +28,10 @@ class Base(DeclarativeBase):
     pass
 
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 # ---------------------------------------------------------------------------
 # Enums
 # ---------------------------------------------------------------------------
@@ -56,17 +61,37 @@ ARRANGEMENT_STATUS = SAEnum(
     name="arrangement_status", create_type=True,
 )
 
+NETWORK_ACTION = SAEnum(
+    "suspend", "reinstate",
+    name="network_action", create_type=True,
+)
+
+OUTBOX_STATUS = SAEnum(
+    "pending", "sent", "dead",
+    name="outbox_status", create_type=True,
+)
+
+PAYSTACK_EVENT_STATUS = SAEnum(
+    "pending", "applied", "ignored", "dead",
+    name="paystack_event_status", create_type=True,
+)
+
 
 # ---------------------------------------------------------------------------
 # Invoice
 # ---------------------------------------------------------------------------
+#
+# ``invoices`` and ``payments`` are range-partitioned by ``created_at`` month
+# (see ``partitions.py``), optionally sub-partitioned by ``tenant_id`` hash.
+# Postgres requires every partition key in every primary key / unique
+# constraint and cannot reference a partitioned table by ``id`` alone, so
+# both use ``(id, created_at, tenant_id)`` as primary key and the invoice
+# links below are ORM-level joins rather than database foreign keys.
 
 class Invoice(Base):
     __tablename__ = "invoices"
 
-    id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
-    )
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), default=uuid.uuid4)
     tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
     customer_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
     number: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -78,22 +103,73 @@ class Invoice(Base):
     due_date: Mapped[date] = mapped_column(Date, nullable=False)
     line_items: Mapped[Optional[list]] = mapped_column(JSONB, nullable=True, default=list)
     notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    credit_note_of: Mapped[Optional[uuid.UUID]] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("invoices.id"), nullable=True
+    credit_note_of: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, server_default=func.now()
     )
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
-    payments: Mapped[list["Payment"]] = relationship(back_populates="invoice", cascade="all, delete-orphan")
-    dunning_actions: Mapped[list["DunningAction"]] = relationship(back_populates="invoice", cascade="all, delete-orphan")
+    payments: Mapped[list["Payment"]] = relationship(
+        back_populates="invoice",
+        primaryjoin="Invoice.id == foreign(Payment.invoice_id)",
+        cascade="all, delete-orphan",
+    )
+    dunning_actions: Mapped[list["DunningAction"]] = relationship(
+        back_populates="invoice",
+        primaryjoin="Invoice.id == foreign(DunningAction.invoice_id)",
+        cascade="all, delete-orphan",
+    )
 
+    # Composite (…, created_at, id) indexes back keyset pagination for each
+    # list filter; they also cover the plain tenant/status/customer lookups.
     __table_args__ = (
-        Index("ix_invoices_tenant_status", "tenant_id", "status"),
-        Index("ix_invoices_tenant_customer", "tenant_id", "customer_id"),
-        Index("ix_invoices_tenant_number", "tenant_id", "number", unique=True),
+        PrimaryKeyConstraint("id", "created_at", "tenant_id", name="invoices_pkey"),
+        Index("ix_invoices_tenant_created", "tenant_id", "created_at", "id"),
+        Index("ix_invoices_tenant_status_created", "tenant_id", "status", "created_at", "id"),
+        Index("ix_invoices_tenant_customer_created", "tenant_id", "customer_id", "created_at", "id"),
+        # Not unique: a partitioned unique index would have to include
+        # created_at.  Uniqueness lives in ``invoice_numbers`` below.
+        Index("ix_invoices_tenant_number", "tenant_id", "number"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
 
+class InvoiceNumber(Base):
+    """Claims a ``(tenant_id, number)`` pair for exactly one invoice.
+
+    Plain (unpartitioned) table whose primary key enforces what a unique index
+    on ``invoices`` no longer can.  Written in the same transaction as the
+    invoice by ``database.claim_invoice_number``; also the number -> invoice
+    lookup, carrying ``created_at`` so the invoice fetch prunes partitions.
+    """
+    __tablename__ = "invoice_numbers"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    number: Mapped[str] = mapped_column(String(50), primary_key=True)
+    invoice_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    invoice_created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+# ---------------------------------------------------------------------------
+# Rendered invoice document (PDF stored by content hash)
+# ---------------------------------------------------------------------------
+
+class InvoiceDocument(Base):
+    """Latest rendered PDF for an invoice.
+
+    ``content_hash`` is the SHA-256 of the render input (invoice data plus
+    template version) and names the stored file, so unchanged invoices are
+    never rendered twice and identical inputs share one file.
+    """
+    __tablename__ = "invoice_documents"
+
+    invoice_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    rendered_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 # ---------------------------------------------------------------------------
 # Invoice Sequence (for per-tenant sequential numbering)
 # ---------------------------------------------------------------------------
@@ -112,13 +188,9 @@ class InvoiceSequence(Base):
 class Payment(Base):
     __tablename__ = "payments"
 
-    id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
-    )
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), default=uuid.uuid4)
     tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
-    invoice_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("invoices.id", ondelete="CASCADE"), nullable=False
-    )
+    invoice_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
     customer_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
     amount_zar: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
     method: Mapped[str] = mapped_column(PAYMENT_METHOD, nullable=False)
@@ -126,15 +198,45 @@ class Payment(Base):
     paystack_ref: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
     status: Mapped[str] = mapped_column(PAYMENT_STATUS, nullable=False, default="pending")
     metadata_: Mapped[Optional[dict]] = mapped_column("metadata", JSONB, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, server_default=func.now()
+    )
 
-    invoice: Mapped["Invoice"] = relationship(back_populates="payments")
+    invoice: Mapped["Invoice"] = relationship(
+        back_populates="payments",
+        primaryjoin="foreign(Payment.invoice_id) == Invoice.id",
+    )
 
     __table_args__ = (
-        Index("ix_payments_tenant_customer", "tenant_id", "customer_id"),
+        PrimaryKeyConstraint("id", "created_at", "tenant_id", name="payments_pkey"),
+        Index("ix_payments_tenant_created", "tenant_id", "created_at", "id"),
+        Index("ix_payments_tenant_status_created", "tenant_id", "status", "created_at", "id"),
+        Index("ix_payments_tenant_customer_created", "tenant_id", "customer_id", "created_at", "id"),
+        Index("ix_payments_invoice_created", "invoice_id", "created_at", "id"),
+        # Not unique (see Invoice); uniqueness lives in ``payment_paystack_refs``.
+        Index(
+            "ix_payments_tenant_paystack_ref", "tenant_id", "paystack_ref",
+            postgresql_where=text("paystack_ref IS NOT NULL"),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
 
+class PaystackReference(Base):
+    """Claims a ``(tenant_id, paystack_ref)`` pair for exactly one payment.
+
+    The unpartitioned counterpart of ``InvoiceNumber`` for Paystack webhook
+    idempotency: the webhook worker inserts the claim before the payment, in
+    the same transaction, and skips the payment when the claim already exists.
+    """
+    __tablename__ = "payment_paystack_refs"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    paystack_ref: Mapped[str] = mapped_column(String(200), primary_key=True)
+    payment_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    payment_created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
 # ---------------------------------------------------------------------------
 # Dunning Action
 # ---------------------------------------------------------------------------
@@ -146,9 +248,7 @@ class DunningAction(Base):
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
     tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
-    invoice_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("invoices.id", ondelete="CASCADE"), nullable=False
-    )
+    invoice_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
     customer_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
     action_type: Mapped[str] = mapped_column(DUNNING_ACTION_TYPE, nullable=False)
     scheduled_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
@@ -156,7 +256,14 @@ class DunningAction(Base):
     result: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
-    invoice: Mapped["Invoice"] = relationship(back_populates="dunning_actions")
+    invoice: Mapped["Invoice"] = relationship(
+        back_populates="dunning_actions",
+        primaryjoin="foreign(DunningAction.invoice_id) == Invoice.id",
+    )
+
+    __table_args__ = (
+        Index("ix_dunning_actions_tenant_created", "tenant_id", "created_at", "id"),
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -180,3 +287,127 @@ class PaymentArrangement(Base):
     notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# ---------------------------------------------------------------------------
+# Customer balance ledger (materialized per-customer open balance)
+# ---------------------------------------------------------------------------
+
+class CustomerBalance(Base):
+    """Running open balance per customer, maintained by ``ledger.refresh_customer_balances``.
+
+    Covers invoices in ``sent``, ``partially_paid`` and ``overdue`` status.
+    ``oldest_due_date`` is NULL when the customer has nothing open, so the
+    collections queue is a range scan on ``(tenant_id, oldest_due_date)``.
+    """
+    __tablename__ = "customer_balances"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    customer_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    outstanding_zar: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False, default=Decimal("0.00"))
+    oldest_due_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    open_invoice_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index(
+            "ix_customer_balances_tenant_oldest_due", "tenant_id", "oldest_due_date",
+            postgresql_where=text("oldest_due_date IS NOT NULL"),
+        ),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Scheduler run summary (one row per job execution)
+# ---------------------------------------------------------------------------
+
+class SchedulerRun(Base):
+    __tablename__ = "billing_scheduler_runs"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    job_name: Mapped[str] = mapped_column(String(50), nullable=False)
+    instance_id: Mapped[str] = mapped_column(String(100), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="completed")
+    processed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    batches: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    lag_seconds: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    finished_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_billing_scheduler_runs_job_started", "job_name", "started_at"),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Paystack webhook event inbox
+# ---------------------------------------------------------------------------
+
+class PaystackEvent(Base):
+    """Raw Paystack webhook event, persisted before it is applied.
+
+    ``(event, reference)`` is unique, so Paystack's retries of the same
+    delivery collapse into one row and are applied at most once.
+    """
+    __tablename__ = "paystack_events"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    event: Mapped[str] = mapped_column(String(100), nullable=False)
+    reference: Mapped[str] = mapped_column(String(200), nullable=False)
+    tenant_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    invoice_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    status: Mapped[str] = mapped_column(PAYSTACK_EVENT_STATUS, nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ux_paystack_events_event_reference", "event", "reference", unique=True),
+        Index("ix_paystack_events_pending", "status", "next_attempt_at"),
+        Index("ix_paystack_events_invoice", "invoice_id", "received_at"),
+        Index("ix_paystack_events_tenant_status", "tenant_id", "status"),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Network-service outbox (suspend / reinstate calls that must survive crashes)
+# ---------------------------------------------------------------------------
+
+class NetworkOutbox(Base):
+    """Pending suspend/reinstate request for the Network service.
+
+    Written in the same transaction as the billing change that caused it and
+    delivered by the outbox relay, so a crash never loses the call.
+    """
+    __tablename__ = "billing_network_outbox"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    customer_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    action: Mapped[str] = mapped_column(NETWORK_ACTION, nullable=False)
+    reason: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    status: Mapped[str] = mapped_column(OUTBOX_STATUS, nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_billing_network_outbox_pending", "status", "next_attempt_at"),
+        Index("ix_billing_network_outbox_customer", "tenant_id", "customer_id", "created_at"),
+    )
@@ -0,0 +1,305 @@
+"""Async client and outbox relay for Billing → Network service calls.
+
+Billing never calls the Network service inline.  Suspend/reinstate intents
+are written to ``billing_network_outbox`` inside the caller's transaction
+(:func:`enqueue_network_action`) and delivered by the outbox relay, which
+runs as a background task in the billing process and uses one shared,
+pooled ``httpx.AsyncClient``.
+
+Bulk contract with the Network service::
+
+    POST {NETWORK_SERVICE_URL}/services/bulk/{suspend|reinstate}
+    X-Tenant-Id: <tenant>
+    {"customer_ids": ["<uuid>", ...], "reason": "<text>"}
+
+    200 {"action": "...", "results": [{"customer_id": "<uuid>", ...}, ...]}
+
+If the Network service does not expose the bulk route yet (404/405) the
+client falls back to the per-customer ``/services/{action}-by-customer``
+endpoints.  Transport errors, 429 and 5xx responses are retried with
+exponential backoff; rows that keep failing are marked ``dead``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+import httpx
+from sqlalchemy import and_, event, exists
+from sqlalchemy.orm import Session, aliased
+
+from services.billing.database import get_session
+from services.billing.models import NetworkOutbox
+
+logger = logging.getLogger("billing.network_client")
+
+NETWORK_URL = os.getenv("NETWORK_SERVICE_URL", "http://network:8005")
+NETWORK_TIMEOUT_SECONDS = float(os.getenv("BILLING_NETWORK_TIMEOUT_SECONDS", "10"))
+NETWORK_MAX_CONNECTIONS = int(os.getenv("BILLING_NETWORK_MAX_CONNECTIONS", "20"))
+NETWORK_RETRIES = int(os.getenv("BILLING_NETWORK_RETRIES", "3"))
+OUTBOX_BATCH_SIZE = int(os.getenv("BILLING_OUTBOX_BATCH_SIZE", "200"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("BILLING_OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_POLL_SECONDS = float(os.getenv("BILLING_OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_LEASE_SECONDS = 120
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _forward_headers(tenant_id: uuid.UUID) -> dict:
+    return {
+        "X-User-Id": "00000000-0000-0000-0000-000000000000",
+        "X-Tenant-Id": str(tenant_id),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Shared async client
+# ---------------------------------------------------------------------------
+
+class NetworkServiceError(Exception):
+    pass
+
+
+class NetworkClient:
+    """Pooled async client for the Network service with retry + backoff."""
+
+    def __init__(self, base_url: str = NETWORK_URL):
+        self.base_url = base_url.rstrip("/")
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=NETWORK_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=NETWORK_MAX_CONNECTIONS,
+                    max_keepalive_connections=NETWORK_MAX_CONNECTIONS,
+                ),
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _post(self, path: str, tenant_id: uuid.UUID, payload: dict) -> httpx.Response:
+        last_exc: Optional[Exception] = None
+        for attempt in range(NETWORK_RETRIES + 1):
+            try:
+                resp = await self.client.post(path, json=payload, headers=_forward_headers(tenant_id))
+                if resp.status_code not in RETRYABLE_STATUS:
+                    return resp
+                last_exc = NetworkServiceError(f"{path} returned {resp.status_code}")
+            except httpx.TransportError as exc:
+                last_exc = exc
+            if attempt < NETWORK_RETRIES:
+                await asyncio.sleep(min(0.5 * 2 ** attempt, 8) + random.uniform(0, 0.25))
+        raise NetworkServiceError(str(last_exc))
+
+    async def bulk_action(
+        self,
+        action: str,
+        tenant_id: uuid.UUID,
+        customer_ids: list[uuid.UUID],
+        reason: Optional[str] = None,
+    ) -> dict:
+        """Suspend or reinstate many customers of one tenant in one call."""
+        payload = {"customer_ids": [str(c) for c in customer_ids], "reason": reason}
+        resp = await self._post(f"/services/bulk/{action}", tenant_id, payload)
+        if resp.status_code in (404, 405):
+            return await self._per_customer(action, tenant_id, customer_ids, reason)
+        if resp.status_code >= 400:
+            raise NetworkServiceError(f"bulk {action} returned {resp.status_code}: {resp.text[:200]}")
+        return resp.json()
+
+    async def _per_customer(
+        self,
+        action: str,
+        tenant_id: uuid.UUID,
+        customer_ids: list[uuid.UUID],
+        reason: Optional[str],
+    ) -> dict:
+        sem = asyncio.Semaphore(NETWORK_MAX_CONNECTIONS)
+
+        async def _one(customer_id: uuid.UUID) -> dict:
+            async with sem:
+                resp = await self._post(
+                    f"/services/{action}-by-customer",
+                    tenant_id,
+                    {"customer_id": str(customer_id), "reason": reason or f"billing {action}"},
+                )
+                if resp.status_code >= 400:
+                    raise NetworkServiceError(f"{action} {customer_id} returned {resp.status_code}")
+                return resp.json()
+
+        results = await asyncio.gather(*[_one(c) for c in customer_ids])
+        return {"action": action, "results": list(results)}
+
+
+network_client = NetworkClient()
+
+
+# ---------------------------------------------------------------------------
+# Outbox — enqueue (transactional, sync)
+# ---------------------------------------------------------------------------
+
+def enqueue_network_action(
+    session: Session,
+    tenant_id: uuid.UUID,
+    customer_ids: Iterable[uuid.UUID],
+    action: str,
+    reason: Optional[str] = None,
+) -> None:
+    """Record suspend/reinstate intents in the caller's transaction."""
+    for customer_id in customer_ids:
+        session.add(NetworkOutbox(
+            tenant_id=tenant_id,
+            customer_id=customer_id,
+            action=action,
+            reason=reason,
+            status="pending",
+            attempts=0,
+        ))
+    event.listen(session, "after_commit", lambda _session: notify_outbox(), once=True)
+
+
+# ---------------------------------------------------------------------------
+# Outbox — relay
+# ---------------------------------------------------------------------------
+
+_relay_task: Optional[asyncio.Task] = None
+_relay_loop: Optional[asyncio.AbstractEventLoop] = None
+_wakeup: Optional[asyncio.Event] = None
+
+
+def notify_outbox() -> None:
+    """Wake the relay early; safe to call from request threads."""
+    if _relay_loop is not None and _wakeup is not None:
+        _relay_loop.call_soon_threadsafe(_wakeup.set)
+
+
+def _claim_batch(batch_size: int) -> list[tuple]:
+    """Lease due rows (oldest intent per customer only, to keep order)."""
+    now = datetime.now(timezone.utc)
+    earlier = aliased(NetworkOutbox)
+    with get_session() as session:
+        rows = (
+            session.query(NetworkOutbox)
+            .filter(
+                NetworkOutbox.status == "pending",
+                NetworkOutbox.next_attempt_at <= now,
+                ~exists().where(and_(
+                    earlier.tenant_id == NetworkOutbox.tenant_id,
+                    earlier.customer_id == NetworkOutbox.customer_id,
+                    earlier.status == "pending",
+                    earlier.created_at < NetworkOutbox.created_at,
+                )),
+            )
+            .order_by(NetworkOutbox.created_at.asc())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for row in rows:
+            row.attempts += 1
+            row.next_attempt_at = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+        return [(r.id, r.tenant_id, r.customer_id, r.action, r.reason, r.attempts) for r in rows]
+
+
+def _mark_sent(ids: list[uuid.UUID]) -> None:
+    with get_session() as session:
+        (
+            session.query(NetworkOutbox)
+            .filter(NetworkOutbox.id.in_(ids))
+            .update(
+                {"status": "sent", "sent_at": datetime.now(timezone.utc), "last_error": None},
+                synchronize_session=False,
+            )
+        )
+
+
+def _mark_failed(rows: list[tuple], error: str) -> None:
+    now = datetime.now(timezone.utc)
+    with get_session() as session:
+        for row_id, _tenant, _customer, _action, _reason, attempts in rows:
+            values: dict = {"last_error": error[:2000]}
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                values["status"] = "dead"
+            else:
+                values["next_attempt_at"] = now + timedelta(seconds=min(10 * 2 ** (attempts - 1), 3600))
+            session.query(NetworkOutbox).filter(NetworkOutbox.id == row_id).update(
+                values, synchronize_session=False,
+            )
+
+
+async def relay_outbox_batch(batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Deliver one batch of outbox rows, grouped into bulk calls per tenant/action."""
+    rows = await asyncio.to_thread(_claim_batch, batch_size)
+    if not rows:
+        return 0
+
+    groups: dict[tuple, list[tuple]] = defaultdict(list)
+    for row in rows:
+        _id, tenant_id, _customer, action, reason, _attempts = row
+        groups[(tenant_id, action, reason)].append(row)
+
+    async def _deliver(key: tuple, group: list[tuple]) -> None:
+        tenant_id, action, reason = key
+        try:
+            await network_client.bulk_action(action, tenant_id, [r[2] for r in group], reason)
+            await asyncio.to_thread(_mark_sent, [r[0] for r in group])
+            logger.info("Network %s delivered for %d customers (tenant %s)", action, len(group), tenant_id)
+        except Exception as exc:
+            logger.warning("Network %s failed for %d customers: %s", action, len(group), exc)
+            await asyncio.to_thread(_mark_failed, group, str(exc))
+
+    await asyncio.gather(*[_deliver(k, g) for k, g in groups.items()])
+    return len(rows)
+
+
+async def _relay() -> None:
+    assert _wakeup is not None
+    while True:
+        try:
+            count = await relay_outbox_batch()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Network outbox relay failed: %s", exc)
+            count = 0
+        if count < OUTBOX_BATCH_SIZE:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            _wakeup.clear()
+
+
+def start_outbox_relay() -> None:
+    global _relay_task, _relay_loop, _wakeup
+    if _relay_task is None:
+        _relay_loop = asyncio.get_running_loop()
+        _wakeup = asyncio.Event()
+        _relay_task = asyncio.create_task(_relay(), name="billing-network-outbox")
+
+
+async def stop_outbox_relay() -> None:
+    global _relay_task, _relay_loop
+    if _relay_task is not None:
+        _relay_task.cancel()
+        try:
+            await _relay_task
+        except asyncio.CancelledError:
+            pass
+        _relay_task = None
+    _relay_loop = None
+    await network_client.close()
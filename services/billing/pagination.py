@@ -0,0 +1,147 @@
+"""Keyset (cursor) pagination and total-count helpers for Billing list endpoints.
+
+List endpoints order by ``(created_at DESC, id DESC)``.  A cursor encodes the
+last row of the previous page, so page N is a bounded index range scan on the
+matching ``(tenant_id, ..., created_at, id)`` composite index instead of an
+``OFFSET`` that has to walk every preceding row.
+
+Total counts are optional:
+
+  - ``exact``      ``COUNT(*)`` over the filtered set, cached briefly per query
+  - ``estimated``  the planner's row estimate from ``EXPLAIN`` (O(1))
+  - ``none``       no count at all
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Query, Session
+
+from services.billing.schemas import PaginatedResponse
+
+COUNT_MODES = ("exact", "estimated", "none")
+COUNT_CACHE_TTL_SECONDS = float(os.getenv("BILLING_COUNT_CACHE_TTL_SECONDS", "30"))
+COUNT_CACHE_MAX_ENTRIES = 2048
+
+_count_cache: dict[str, tuple[float, int]] = {}
+_count_cache_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Cursor encoding
+# ---------------------------------------------------------------------------
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["c"]), uuid.UUID(data["i"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+# ---------------------------------------------------------------------------
+# Counting
+# ---------------------------------------------------------------------------
+
+def _compile(session: Session, q: Query) -> str:
+    stmt = q.order_by(None).statement
+    return str(stmt.compile(dialect=session.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+
+
+def exact_count(session: Session, q: Query) -> int:
+    """``COUNT(*)`` of the filtered query, cached for a short TTL per query text."""
+    key = _compile(session, q)
+    now = time.monotonic()
+    with _count_cache_lock:
+        hit = _count_cache.get(key)
+        if hit and hit[0] > now:
+            return hit[1]
+
+    total = q.order_by(None).count()
+
+    with _count_cache_lock:
+        if len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+            expired = [k for k, (exp, _) in _count_cache.items() if exp <= now]
+            for k in expired or list(_count_cache)[: COUNT_CACHE_MAX_ENTRIES // 4]:
+                _count_cache.pop(k, None)
+        _count_cache[key] = (now + COUNT_CACHE_TTL_SECONDS, total)
+    return total
+
+
+def estimated_count(session: Session, q: Query) -> int:
+    """Planner row estimate for the filtered query (no table scan)."""
+    sql = "EXPLAIN (FORMAT JSON) " + _compile(session, q)
+    plan = session.connection().exec_driver_sql(sql).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+# ---------------------------------------------------------------------------
+# Pagination
+# ---------------------------------------------------------------------------
+
+def paginate(
+    session: Session,
+    q: Query,
+    created_col: Any,
+    id_col: Any,
+    serialize: Callable[[Any], Any],
+    page: int,
+    page_size: int,
+    cursor: Optional[str] = None,
+    count: str = "exact",
+) -> PaginatedResponse:
+    """Return one page of ``q`` ordered newest first.
+
+    With a ``cursor`` the page starts strictly after the cursor row and
+    ``page`` is ignored; without one the classic ``page`` offset is used.
+    Every response carries ``next_cursor`` so clients can switch to keyset
+    paging after the first page.
+    """
+    total: Optional[int] = None
+    if count == "exact":
+        total = exact_count(session, q)
+    elif count == "estimated":
+        total = estimated_count(session, q)
+
+    q = q.order_by(created_col.desc(), id_col.desc())
+    if cursor:
+        after_created, after_id = decode_cursor(cursor)
+        q = q.filter(tuple_(created_col, id_col) < tuple_(after_created, after_id))
+    elif page > 1:
+        q = q.offset((page - 1) * page_size)
+
+    rows = q.limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return PaginatedResponse(
+        items=[serialize(r) for r in rows],
+        total=total,
+        total_estimated=count == "estimated",
+        page=page,
+        page_size=page_size,
+        pages=max(1, (total + page_size - 1) // page_size) if total is not None else None,
+        next_cursor=next_cursor,
+    )
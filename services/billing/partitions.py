@@ -0,0 +1,327 @@
+"""Monthly range partitions for ``invoices`` and ``payments``.
+
+Both tables are ``PARTITION BY RANGE (created_at)`` with one partition per
+calendar month (UTC) named ``<table>_pYYYYMM`` plus a ``<table>_default``
+catch-all.  With ``BILLING_PARTITION_HASH_BUCKETS`` > 0 every new month is
+itself ``PARTITION BY HASH (tenant_id)`` into that many buckets
+(``<table>_pYYYYMM_h<n>``): the ``tenant_id = ?`` filter of every list and
+report then prunes to one bucket per month.  The primary key is
+``(id, created_at, tenant_id)`` so it contains both partition keys;
+installs partitioned before that need
+``config/migrations/20261019_billing_tenant_pk.sql`` first, and until then
+new months are created without buckets.
+
+Future months are created ``BILLING_PARTITION_MONTHS_AHEAD`` in advance by
+the billing scheduler (``partitions`` job), so the default partition should
+stay empty.
+
+Command line::
+
+    python -m services.billing.partitions ensure [--months-ahead N]
+    python -m services.billing.partitions migrate [--drop-old]
+    python -m services.billing.partitions list
+
+``migrate`` converts existing plain tables in one transaction: the old table
+is renamed to ``<table>_unpartitioned``, foreign keys pointing at it are
+dropped (Postgres cannot reference a partitioned table by ``id`` alone),
+the partitioned table is created from the model, partitions are created for
+every month that has data and the rows are copied across.  Finally the
+``invoice_numbers`` / ``payment_paystack_refs`` claim tables, which carry the
+uniqueness the partitioned tables cannot, are created and backfilled.  Run it
+in a maintenance window with the billing service stopped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from services.common.db import get_engine
+from services.billing.models import Invoice, InvoiceNumber, Payment, PaystackReference
+
+logger = logging.getLogger("billing.partitions")
+
+PARTITIONED_MODELS = (Invoice, Payment)
+CLAIM_MODELS = (InvoiceNumber, PaystackReference)
+PARTITION_MONTHS_AHEAD = int(os.getenv("BILLING_PARTITION_MONTHS_AHEAD", "3"))
+HASH_BUCKETS = int(os.getenv("BILLING_PARTITION_HASH_BUCKETS", "0"))
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(d: date, months: int) -> date:
+    total = d.year * 12 + (d.month - 1) + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _bound(month: date) -> str:
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    kind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table}
+    ).scalar()
+    return kind == "p"
+
+
+def list_partitions(conn: Connection, table: str) -> list[str]:
+    rows = conn.execute(
+        text(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:t)
+            ORDER BY c.relname
+            """
+        ),
+        {"t": table},
+    )
+    return [r[0] for r in rows]
+
+
+def primary_key_has_tenant(conn: Connection, table: str) -> bool:
+    return bool(conn.execute(
+        text(
+            """
+            SELECT EXISTS (
+                SELECT 1
+                FROM pg_constraint c
+                JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+                WHERE c.conrelid = to_regclass(:t) AND c.contype = 'p' AND a.attname = 'tenant_id'
+            )
+            """
+        ),
+        {"t": table},
+    ).scalar())
+
+
+# ---------------------------------------------------------------------------
+# Partition creation
+# ---------------------------------------------------------------------------
+
+def create_month_partition(
+    conn: Connection,
+    table: str,
+    month: date,
+    hash_buckets: int = HASH_BUCKETS,
+) -> bool:
+    """Create the partition for ``month`` if missing; True if it was created."""
+    name = partition_name(table, month)
+    if conn.execute(text("SELECT to_regclass(:n)"), {"n": name}).scalar() is not None:
+        return False
+
+    bounds = f"FROM ('{_bound(month)}') TO ('{_bound(add_months(month, 1))}')"
+    if hash_buckets > 0 and not primary_key_has_tenant(conn, table):
+        logger.warning("%s primary key lacks tenant_id; creating %s without hash buckets", table, name)
+        hash_buckets = 0
+    if hash_buckets > 0:
+        conn.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds} PARTITION BY HASH (tenant_id)"
+        ))
+        for remainder in range(hash_buckets):
+            conn.execute(text(
+                f"CREATE TABLE {name}_h{remainder} PARTITION OF {name} "
+                f"FOR VALUES WITH (MODULUS {hash_buckets}, REMAINDER {remainder})"
+            ))
+    else:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}"))
+    logger.info("Created partition %s", name)
+    return True
+
+
+def ensure_default_partition(conn: Connection, table: str) -> None:
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+
+
+def ensure_partitions(
+    conn: Optional[Connection] = None,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    first_month: Optional[date] = None,
+) -> int:
+    """Create missing monthly partitions up to ``months_ahead``; returns the count created."""
+    if conn is None:
+        with get_engine().begin() as own:
+            return ensure_partitions(own, months_ahead, first_month)
+
+    current = month_start(datetime.now(timezone.utc).date())
+    start = month_start(first_month) if first_month else current
+    created = 0
+    for model in PARTITIONED_MODELS:
+        table = model.__tablename__
+        if not is_partitioned(conn, table):
+            logger.warning("%s is not partitioned; run 'partitions migrate'", table)
+            continue
+        ensure_default_partition(conn, table)
+        month = start
+        while month <= add_months(current, months_ahead):
+            created += create_month_partition(conn, table, month)
+            month = add_months(month, 1)
+    return created
+
+
+def ensure_partitions_job(batch_size: int) -> int:
+    """Scheduler entry point (``batch_size`` is unused)."""
+    return ensure_partitions()
+
+
+# ---------------------------------------------------------------------------
+# Migration of existing plain tables
+# ---------------------------------------------------------------------------
+
+def _drop_referencing_fks(conn: Connection, table: str) -> None:
+    """Drop foreign keys pointing *at* ``table``.
+
+    Its own outgoing foreign keys stay on the renamed ``_unpartitioned`` copy.
+    """
+    rows = conn.execute(
+        text(
+            """
+            SELECT conrelid::regclass::text, conname
+            FROM pg_constraint
+            WHERE contype = 'f' AND confrelid = to_regclass(:t)
+            """
+        ),
+        {"t": table},
+    ).all()
+    for owner, name in rows:
+        logger.warning("Dropping foreign key %s on %s", name, owner)
+        conn.execute(text(f'ALTER TABLE {owner} DROP CONSTRAINT "{name}"'))
+
+
+def migrate_table(conn: Connection, model, drop_old: bool = False) -> int:
+    """Convert one plain table to a partitioned table; returns rows copied."""
+    table = model.__tablename__
+    old = f"{table}_unpartitioned"
+    if is_partitioned(conn, table):
+        logger.info("%s is already partitioned", table)
+        return 0
+
+    _drop_referencing_fks(conn, table)
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+    # Free the index/constraint names for the new table.
+    for (index_name,) in conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = :t"), {"t": old}
+    ).all():
+        conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name[:50]}_old"'))
+
+    model.__table__.create(conn, checkfirst=True)
+
+    oldest = conn.execute(text(f"SELECT min(created_at) FROM {old}")).scalar()
+    first = month_start(oldest.astimezone(timezone.utc).date()) if oldest else None
+    ensure_default_partition(conn, table)
+    current = month_start(datetime.now(timezone.utc).date())
+    month = first or current
+    while month <= add_months(current, PARTITION_MONTHS_AHEAD):
+        create_month_partition(conn, table, month)
+        month = add_months(month, 1)
+
+    old_columns = {
+        r[0] for r in conn.execute(
+            text("SELECT column_name FROM information_schema.columns WHERE table_name = :t"),
+            {"t": old},
+        )
+    }
+    columns = ", ".join(f'"{c.name}"' for c in model.__table__.columns if c.name in old_columns)
+    copied = conn.execute(text(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {old}")).rowcount
+    logger.info("Copied %d rows into partitioned %s", copied, table)
+
+    if drop_old:
+        conn.execute(text(f"DROP TABLE {old}"))
+    return copied
+
+
+def backfill_claims(conn: Connection) -> None:
+    """Create the claim tables and claim every existing number / reference.
+
+    Oldest row wins; rows left unclaimed are duplicates that need manual
+    reconciliation and are logged.
+    """
+    for model in CLAIM_MODELS:
+        model.__table__.create(conn, checkfirst=True)
+    conn.execute(text(
+        """
+        INSERT INTO invoice_numbers (tenant_id, number, invoice_id, invoice_created_at)
+        SELECT tenant_id, number, id, created_at FROM invoices
+        ORDER BY created_at, id
+        ON CONFLICT DO NOTHING
+        """
+    ))
+    conn.execute(text(
+        """
+        INSERT INTO payment_paystack_refs (tenant_id, paystack_ref, payment_id, payment_created_at)
+        SELECT tenant_id, paystack_ref, id, created_at FROM payments
+        WHERE paystack_ref IS NOT NULL
+        ORDER BY created_at, id
+        ON CONFLICT DO NOTHING
+        """
+    ))
+    duplicates = conn.execute(text(
+        """
+        SELECT 'invoice number', i.tenant_id::text, i.number, i.id::text
+        FROM invoices i
+        JOIN invoice_numbers n ON n.tenant_id = i.tenant_id AND n.number = i.number
+        WHERE n.invoice_id <> i.id
+        UNION ALL
+        SELECT 'paystack_ref', p.tenant_id::text, p.paystack_ref, p.id::text
+        FROM payments p
+        JOIN payment_paystack_refs r ON r.tenant_id = p.tenant_id AND r.paystack_ref = p.paystack_ref
+        WHERE r.payment_id <> p.id
+        """
+    )).all()
+    for kind, tenant_id, value, row_id in duplicates:
+        logger.warning("Duplicate %s %s (tenant %s) on row %s left unclaimed", kind, value, tenant_id, row_id)
+
+
+def migrate(drop_old: bool = False) -> None:
+    with get_engine().begin() as conn:
+        for model in PARTITIONED_MODELS:
+            migrate_table(conn, model, drop_old=drop_old)
+        backfill_claims(conn)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage billing table partitions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ensure_cmd = sub.add_parser("ensure", help="create missing future partitions")
+    ensure_cmd.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    migrate_cmd = sub.add_parser("migrate", help="convert plain tables to partitioned tables")
+    migrate_cmd.add_argument("--drop-old", action="store_true")
+    sub.add_parser("list", help="list partitions")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+    if args.command == "ensure":
+        print(f"created {ensure_partitions(months_ahead=args.months_ahead)} partitions")
+    elif args.command == "migrate":
+        migrate(drop_old=args.drop_old)
+    else:
+        with get_engine().connect() as conn:
+            for model in PARTITIONED_MODELS:
+                for name in list_partitions(conn, model.__tablename__):
+                    print(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""Streaming bulk import of EFT / debit-order payment files.
+
+The upload is consumed incrementally (``request.stream()``), decoded and split
+into lines as bytes arrive, and applied in chunks of ``BILLING_IMPORT_CHUNK_SIZE``
+lines.  Each chunk is one transaction:
+
+  1. one prefetch of the referenced invoices by number via the
+     ``invoice_numbers`` claim table (``FOR UPDATE``) and
+     of already-imported ``(invoice, reference)`` pairs
+  2. matching and validation in memory against running balances
+  3. one multi-row ``INSERT`` of payments and one executemany ``UPDATE`` of
+     the touched invoices, then a ledger refresh for their customers
+
+Supported formats (header row required, column names case-insensitive):
+
+  ``csv``        invoice_number (or reference), amount, [bank_reference], [date]
+  ``statement``  date, description, amount — a bank statement export; the
+                 invoice number is taken from the description and rows with
+                 a non-positive amount (debits) are skipped
+
+Every input line produces one result record (``applied``, ``duplicate``,
+``skipped``, ``rejected`` or ``error``) so the report can be reconciled
+against the source file line by line.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import logging
+import os
+import re
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import IO, AsyncIterator, Optional
+
+from sqlalchemy import and_, insert, update
+
+from services.common.streams import iter_lines
+from services.billing.database import get_session
+from services.billing.ledger import refresh_customer_balances
+from services.billing.models import Invoice, InvoiceNumber, Payment
+
+logger = logging.getLogger("billing.payment_import")
+
+IMPORT_CHUNK_SIZE = int(os.getenv("BILLING_IMPORT_CHUNK_SIZE", "500"))
+IMPORT_FORMATS = ("csv", "statement")
+INVOICE_NUMBER_RE = re.compile(r"\bINV-[A-Z0-9]{1,4}-\d{6}\b", re.IGNORECASE)
+
+_CSV_NUMBER_COLUMNS = ("invoice_number", "invoice", "reference")
+_CSV_BANK_REF_COLUMNS = ("bank_reference", "transaction_id", "reference_no")
+
+
+@dataclass
+class ImportLine:
+    line: int
+    invoice_number: Optional[str] = None
+    amount_zar: Optional[Decimal] = None
+    bank_reference: Optional[str] = None
+    error: Optional[str] = None
+    skip: Optional[str] = None
+
+
+@dataclass
+class ImportSummary:
+    lines: int = 0
+    applied: int = 0
+    applied_zar: Decimal = Decimal("0.00")
+    counts: dict = field(default_factory=dict)
+
+    def add(self, result: dict) -> None:
+        self.lines += 1
+        self.counts[result["status"]] = self.counts.get(result["status"], 0) + 1
+        if result["status"] == "applied":
+            self.applied += 1
+            self.applied_zar += Decimal(result["amount_zar"])
+
+    def as_dict(self) -> dict:
+        return {
+            "summary": True,
+            "lines": self.lines,
+            "applied": self.applied,
+            "applied_zar": str(self.applied_zar),
+            "by_status": self.counts,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Incremental parsing
+# ---------------------------------------------------------------------------
+
+def parse_amount(raw: str) -> Decimal:
+    value = raw.strip().replace("R", "").replace(" ", "")
+    if "," in value and "." not in value:
+        value = value.replace(",", ".")
+    else:
+        value = value.replace(",", "")
+    amount = Decimal(value)
+    if not amount.is_finite():  # NaN/Infinity parse, and NaN compares by raising
+        raise InvalidOperation(f"non-finite amount {raw!r}")
+    return amount.quantize(Decimal("0.01"))
+
+
+def _column(header: list[str], names: tuple[str, ...]) -> Optional[int]:
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+class LineParser:
+    """Turns raw lines of one upload into :class:`ImportLine` records."""
+
+    def __init__(self, fmt: str):
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"format must be one of {IMPORT_FORMATS}")
+        self.fmt = fmt
+        self.header: Optional[list[str]] = None
+
+    def _set_header(self, fields: list[str]) -> None:
+        header = [f.strip().lower().replace(" ", "_") for f in fields]
+        if self.fmt == "csv":
+            self.number_col = _column(header, _CSV_NUMBER_COLUMNS)
+            self.bank_ref_col = _column(header, _CSV_BANK_REF_COLUMNS)
+        else:
+            self.number_col = _column(header, ("description", "narrative", "details"))
+            self.bank_ref_col = _column(header, ("reference", "transaction_id"))
+        self.amount_col = _column(header, ("amount", "amount_zar", "credit"))
+        if self.number_col is None or self.amount_col is None:
+            raise ValueError(f"Header is missing required columns for format '{self.fmt}'")
+        self.header = header
+
+    def parse(self, line_no: int, raw: str) -> Optional[ImportLine]:
+        """Return a record for a data line, or ``None`` for the header/blank lines."""
+        if not raw.strip():
+            return None
+        fields = next(csv.reader([raw]))
+        if self.header is None:
+            self._set_header(fields)
+            return None
+
+        rec = ImportLine(line=line_no)
+        try:
+            source = fields[self.number_col].strip()
+            rec.amount_zar = parse_amount(fields[self.amount_col])
+            if self.bank_ref_col is not None and self.bank_ref_col < len(fields):
+                rec.bank_reference = fields[self.bank_ref_col].strip()[:200] or None
+        except (IndexError, InvalidOperation):
+            rec.error = "Malformed line"
+            return rec
+
+        if self.fmt == "statement":
+            if rec.amount_zar <= 0:
+                rec.skip = "Not a credit"
+                return rec
+            match = INVOICE_NUMBER_RE.search(source)
+            if not match:
+                rec.skip = "No invoice number in description"
+                return rec
+            rec.invoice_number = match.group(0).upper()
+            rec.bank_reference = rec.bank_reference or source[:200]
+        else:
+            rec.invoice_number = source
+            if rec.amount_zar <= 0:
+                rec.error = "Amount must be positive"
+        return rec
+
+
+# ---------------------------------------------------------------------------
+# Chunk application (sync, one transaction per chunk)
+# ---------------------------------------------------------------------------
+
+def _result(rec: ImportLine, status: str, **extra) -> dict:
+    out = {
+        "line": rec.line,
+        "status": status,
+        "invoice_number": rec.invoice_number,
+        "amount_zar": str(rec.amount_zar) if rec.amount_zar is not None else None,
+    }
+    out.update(extra)
+    return out
+
+
+def apply_chunk(tenant_id: uuid.UUID, method: str, records: list[ImportLine]) -> list[dict]:
+    """Match and apply one chunk of parsed lines; returns one result per line."""
+    results: dict[int, dict] = {}
+    candidates: list[ImportLine] = []
+    for rec in records:
+        if rec.error:
+            results[rec.line] = _result(rec, "error", detail=rec.error)
+        elif rec.skip:
+            results[rec.line] = _result(rec, "skipped", detail=rec.skip)
+        else:
+            candidates.append(rec)
+
+    if candidates:
+        try:
+            results.update(_apply_candidates(tenant_id, method, candidates))
+        except Exception as exc:
+            logger.error("Payment import chunk failed (lines %d-%d): %s",
+                         candidates[0].line, candidates[-1].line, exc)
+            for rec in candidates:
+                results[rec.line] = _result(rec, "error", detail="Chunk failed; not applied")
+
+    return [results[rec.line] for rec in records]
+
+
+def _apply_candidates(tenant_id: uuid.UUID, method: str, candidates: list[ImportLine]) -> dict[int, dict]:
+    results: dict[int, dict] = {}
+    with get_session() as session:
+        numbers = {rec.invoice_number for rec in candidates}
+        # Resolve numbers through the invoice_numbers claim table: its primary
+        # key makes the number -> invoice mapping unique, and the claimed
+        # (id, created_at, tenant_id) is the invoice primary key, so the
+        # locked fetch prunes month and tenant hash partitions.
+        invoices = {
+            number: inv
+            for number, inv in (
+                session.query(InvoiceNumber.number, Invoice)
+                .join(
+                    Invoice,
+                    and_(
+                        Invoice.id == InvoiceNumber.invoice_id,
+                        Invoice.created_at == InvoiceNumber.invoice_created_at,
+                        Invoice.tenant_id == InvoiceNumber.tenant_id,
+                    ),
+                )
+                .filter(InvoiceNumber.tenant_id == tenant_id, InvoiceNumber.number.in_(numbers))
+                .order_by(Invoice.id)
+                .with_for_update(of=Invoice)
+                .all()
+            )
+        }
+
+        refs = {rec.bank_reference for rec in candidates if rec.bank_reference}
+        seen: set[tuple[uuid.UUID, str]] = set()
+        if refs and invoices:
+            seen = {
+                (row.invoice_id, row.reference)
+                for row in (
+                    session.query(Payment.invoice_id, Payment.reference)
+                    .filter(
+                        Payment.tenant_id == tenant_id,
+                        Payment.invoice_id.in_([inv.id for inv in invoices.values()]),
+                        Payment.reference.in_(refs),
+                    )
+                    .all()
+                )
+            }
+
+        paid = {inv.id: inv.amount_paid_zar for inv in invoices.values()}
+        payments: list[dict] = []
+        for rec in candidates:
+            inv = invoices.get(rec.invoice_number)
+            if inv is None:
+                results[rec.line] = _result(rec, "rejected", detail="Invoice not found")
+                continue
+            if rec.bank_reference and (inv.id, rec.bank_reference) in seen:
+                results[rec.line] = _result(rec, "duplicate", detail="Reference already imported")
+                continue
+            if inv.status in ("paid", "voided", "draft"):
+                results[rec.line] = _result(rec, "rejected", detail=f"Invoice is {inv.status}")
+                continue
+            outstanding = inv.total_zar - paid[inv.id]
+            if rec.amount_zar > outstanding:
+                results[rec.line] = _result(
+                    rec, "rejected", detail=f"Amount exceeds outstanding balance of R{outstanding}",
+                )
+                continue
+
+            payment_id = uuid.uuid4()
+            paid[inv.id] += rec.amount_zar
+            if rec.bank_reference:
+                seen.add((inv.id, rec.bank_reference))
+            payments.append({
+                "id": payment_id,
+                "tenant_id": tenant_id,
+                "invoice_id": inv.id,
+                "customer_id": inv.customer_id,
+                "amount_zar": rec.amount_zar,
+                "method": method,
+                "reference": rec.bank_reference,
+                "status": "completed",
+            })
+            results[rec.line] = _result(rec, "applied", payment_id=str(payment_id))
+
+        if payments:
+            session.execute(insert(Payment), payments)
+            touched = [inv for inv in invoices.values() if paid[inv.id] != inv.amount_paid_zar]
+            session.execute(update(Invoice), [
+                {
+                    "id": inv.id,
+                    "created_at": inv.created_at,
+                    "amount_paid_zar": paid[inv.id],
+                    "status": "paid" if paid[inv.id] >= inv.total_zar else "partially_paid",
+                }
+                for inv in touched
+            ])
+            refresh_customer_balances(session, tenant_id, [inv.customer_id for inv in touched])
+
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+async def import_payment_stream(
+    stream: AsyncIterator[bytes],
+    tenant_id: uuid.UUID,
+    fmt: str,
+    method: str,
+    report: IO[bytes],
+) -> ImportSummary:
+    """Parse and apply an upload chunk by chunk, writing NDJSON results to ``report``."""
+    parser = LineParser(fmt)
+    summary = ImportSummary()
+    batch: list[ImportLine] = []
+
+    async def _flush() -> None:
+        results = await asyncio.to_thread(apply_chunk, tenant_id, method, batch)
+        for result in results:
+            summary.add(result)
+            report.write(json.dumps(result).encode() + b"\n")
+        batch.clear()
+
+    line_no = 0
+    async for raw in iter_lines(stream):
+        line_no += 1
+        rec = parser.parse(line_no, raw)
+        if rec is None:
+            continue
+        batch.append(rec)
+        if len(batch) >= IMPORT_CHUNK_SIZE:
+            await _flush()
+    if batch:
+        await _flush()
+
+    if parser.header is None:
+        raise ValueError("Empty file")
+
+    logger.info(
+        "Payment import (%s) for tenant %s: %d lines, %d applied (R%s)",
+        fmt, tenant_id, summary.lines, summary.applied, summary.applied_zar,
+    )
+    return summary
@@ -3,22 +3,29 @@
 import logging
 import os
 import uuid
-from datetime import date, datetime
-from decimal import Decimal
+from datetime import date, datetime, timedelta, timezone
 from typing import Optional
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, or_
 
 from services.common.auth import AuthContext, get_auth_context
 from services.billing.database import get_session
-from services.billing.models import DunningAction, Invoice, PaymentArrangement
+from services.billing.ledger import get_customer_balance
+from services.billing.models import (
+    CustomerBalance,
+    DunningAction,
+    Invoice,
+    NetworkOutbox,
+    PaymentArrangement,
+)
+from services.billing.network_client import enqueue_network_action
 from services.billing.schemas import (
     ArrangementCreate,
     ArrangementRead,
     CollectionsQueueItem,
     DunningActionRead,
+    NetworkActionRead,
     PaginatedResponse,
 )
 
@@ -26,8 +33,6 @@ logger = logging.getLogger("billing.collections")
 
 router = APIRouter(tags=["Collections"])
 
-NETWORK_URL = os.getenv("NETWORK_SERVICE_URL", "http://network:8005")
-
 
 # ---------------------------------------------------------------------------
 # GET /collections/queue — List overdue accounts
@@ -37,30 +42,32 @@ NETWORK_URL = os.getenv("NETWORK_SERVICE_URL", "http://network:8005")
 def collections_queue(
     ctx: AuthContext = Depends(get_auth_context),
     min_days: int = Query(1, ge=0),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
 ):
+    """Customers with open balances, most days overdue first.
+
+    Reads the ``customer_balances`` ledger: an index range scan on
+    ``(tenant_id, oldest_due_date)`` rather than aggregating every open invoice.
+    """
     with get_session() as session:
         today = date.today()
-        overdue_invoices = (
-            session.query(
-                Invoice.customer_id,
-                func.sum(Invoice.total_zar - Invoice.amount_paid_zar).label("total_overdue"),
-                func.min(Invoice.due_date).label("oldest_due"),
-                func.count(Invoice.id).label("inv_count"),
-            )
+        cutoff = today - timedelta(days=max(min_days, 1))
+        rows = (
+            session.query(CustomerBalance)
             .filter(
-                Invoice.tenant_id == ctx.tenant_id,
-                Invoice.status.in_(["sent", "partially_paid", "overdue"]),
-                Invoice.due_date < today,
+                CustomerBalance.tenant_id == ctx.tenant_id,
+                CustomerBalance.oldest_due_date <= cutoff,
             )
-            .group_by(Invoice.customer_id)
+            .order_by(CustomerBalance.oldest_due_date.asc(), CustomerBalance.customer_id.asc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
             .all()
         )
 
         items = []
-        for row in overdue_invoices:
-            days_overdue = (today - row.oldest_due).days
-            if days_overdue < min_days:
-                continue
+        for row in rows:
+            days_overdue = (today - row.oldest_due_date).days
 
             # Determine dunning stage
             if days_overdue >= 30:
@@ -74,14 +81,13 @@ def collections_queue(
 
             items.append(CollectionsQueueItem(
                 customer_id=row.customer_id,
-                total_overdue_zar=row.total_overdue,
-                oldest_overdue_date=row.oldest_due,
+                total_overdue_zar=row.outstanding_zar,
+                oldest_overdue_date=row.oldest_due_date,
                 days_overdue=days_overdue,
-                invoice_count=row.inv_count,
+                invoice_count=row.open_invoice_count,
                 dunning_stage=stage,
             ))
 
-        items.sort(key=lambda x: x.days_overdue, reverse=True)
         return items
 
 
@@ -100,18 +106,9 @@ def create_arrangement(
     ctx: AuthContext = Depends(get_auth_context),
 ):
     with get_session() as session:
-        # Verify customer has overdue invoices
-        overdue = (
-            session.query(func.sum(Invoice.total_zar - Invoice.amount_paid_zar))
-            .filter(
-                Invoice.tenant_id == ctx.tenant_id,
-                Invoice.customer_id == customer_id,
-                Invoice.status.in_(["sent", "partially_paid", "overdue"]),
-            )
-            .scalar()
-        ) or Decimal("0.00")
-
-        if overdue <= 0:
+        # Verify customer has an open balance
+        balance = get_customer_balance(session, ctx.tenant_id, customer_id)
+        if balance is None or balance.outstanding_zar <= 0:
             raise HTTPException(status_code=400, detail="Customer has no overdue balance")
 
         arrangement = PaymentArrangement(
@@ -138,10 +135,10 @@ def manual_suspend(
     customer_id: uuid.UUID,
     ctx: AuthContext = Depends(get_auth_context),
 ):
-    _suspend_customer(ctx.tenant_id, customer_id)
-
-    # Mark overdue invoices
     with get_session() as session:
+        enqueue_network_action(session, ctx.tenant_id, [customer_id], "suspend", reason="manual suspend")
+
+        # Mark overdue invoices
         (
             session.query(Invoice)
             .filter(
@@ -165,7 +162,8 @@ def reinstate_customer(
     customer_id: uuid.UUID,
     ctx: AuthContext = Depends(get_auth_context),
 ):
-    _reinstate_customer(ctx.tenant_id, customer_id)
+    with get_session() as session:
+        enqueue_network_action(session, ctx.tenant_id, [customer_id], "reinstate", reason="manual reinstate")
     return {"status": "reinstated", "customer_id": str(customer_id)}
 
 
@@ -194,60 +192,58 @@ def list_dunning_actions(
 
 
 # ---------------------------------------------------------------------------
-# Network service integration helpers
+# GET /collections/network-actions — Suspend/reinstate delivery status
 # ---------------------------------------------------------------------------
 
-def _forward_headers(tenant_id: uuid.UUID) -> dict:
-    return {
-        "X-User-Id": "00000000-0000-0000-0000-000000000000",
-        "X-Tenant-Id": str(tenant_id),
-    }
-
-
-def _suspend_customer(tenant_id: uuid.UUID, customer_id: uuid.UUID) -> None:
-    """Call network service to suspend all services for a customer."""
-    try:
-        with httpx.Client(timeout=5.0) as client:
-            resp = client.post(
-                f"{NETWORK_URL}/services/suspend-by-customer",
-                json={"customer_id": str(customer_id)},
-                headers=_forward_headers(tenant_id),
-            )
-            logger.info(
-                "Suspend request for customer %s: status=%s", customer_id, resp.status_code
-            )
-    except Exception as exc:
-        logger.error("Suspend call failed for customer %s: %s", customer_id, exc)
-
-
-def _reinstate_customer(tenant_id: uuid.UUID, customer_id: uuid.UUID) -> None:
-    """Call network service to reinstate all services for a customer."""
-    try:
-        with httpx.Client(timeout=5.0) as client:
-            resp = client.post(
-                f"{NETWORK_URL}/services/reinstate-by-customer",
-                json={"customer_id": str(customer_id)},
-                headers=_forward_headers(tenant_id),
-            )
-            logger.info(
-                "Reinstate request for customer %s: status=%s", customer_id, resp.status_code
-            )
-    except Exception as exc:
-        logger.error("Reinstate call failed for customer %s: %s", customer_id, exc)
+@router.get("/collections/network-actions", response_model=list[NetworkActionRead])
+def list_network_actions(
+    ctx: AuthContext = Depends(get_auth_context),
+    customer_id: Optional[uuid.UUID] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    limit: int = Query(100, ge=1, le=500),
+):
+    with get_session() as session:
+        q = session.query(NetworkOutbox).filter(NetworkOutbox.tenant_id == ctx.tenant_id)
+        if customer_id:
+            q = q.filter(NetworkOutbox.customer_id == customer_id)
+        if status_filter:
+            q = q.filter(NetworkOutbox.status == status_filter)
+        rows = q.order_by(NetworkOutbox.created_at.desc()).limit(limit).all()
+        return [NetworkActionRead.model_validate(r) for r in rows]
 
 
 # ---------------------------------------------------------------------------
-# Dunning processor (called by scheduler / background task)
+# Dunning processor (called by the in-service scheduler / manual trigger)
 # ---------------------------------------------------------------------------
 
-def process_pending_dunning() -> int:
+DUNNING_BATCH_SIZE = int(os.getenv("BILLING_DUNNING_BATCH_SIZE", "200"))
+ARRANGEMENT_GRACE_DAYS = int(os.getenv("BILLING_ARRANGEMENT_GRACE_DAYS", "7"))
+
+
+def process_pending_dunning(batch_size: int = DUNNING_BATCH_SIZE) -> int:
     """Execute all pending dunning actions whose scheduled_at has passed.
 
-    Returns the number of actions executed.  In production this would be
-    triggered by a cron job or background scheduler (e.g. APScheduler).
+    Works through the backlog in short per-batch transactions so a large
+    backlog never holds one long transaction open.  Returns the number of
+    actions executed.
+    """
+    executed = 0
+    while True:
+        count = process_dunning_batch(batch_size)
+        executed += count
+        if count < batch_size:
+            return executed
+
+
+def process_dunning_batch(batch_size: int) -> int:
+    """Claim and execute up to ``batch_size`` due dunning actions.
+
+    Rows are claimed with ``FOR UPDATE SKIP LOCKED`` so concurrent callers
+    (scheduler leader plus a manual ``/dunning/process``) never execute the
+    same action twice.
     """
     executed = 0
-    now = datetime.utcnow()
+    now = datetime.now(timezone.utc)
 
     with get_session() as session:
         pending = (
@@ -257,6 +253,8 @@ def process_pending_dunning() -> int:
                 DunningAction.scheduled_at <= now,
             )
             .order_by(DunningAction.scheduled_at.asc())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
             .all()
         )
 
@@ -274,7 +272,10 @@ def process_pending_dunning() -> int:
                     # Check if invoice is still unpaid
                     inv = session.query(Invoice).filter(Invoice.id == action.invoice_id).first()
                     if inv and inv.status not in ("paid", "voided"):
-                        _suspend_customer(action.tenant_id, action.customer_id)
+                        enqueue_network_action(
+                            session, action.tenant_id, [action.customer_id], "suspend",
+                            reason="dunning auto_suspend",
+                        )
                         inv.status = "overdue"
                         action.result = "suspended"
                     else:
@@ -292,3 +293,114 @@ def process_pending_dunning() -> int:
                 action.executed_at = now
 
     return executed
+
+
+def dunning_lag_seconds() -> Optional[int]:
+    """Age in seconds of the oldest due-but-unexecuted dunning action."""
+    now = datetime.now(timezone.utc)
+    with get_session() as session:
+        oldest = (
+            session.query(func.min(DunningAction.scheduled_at))
+            .filter(
+                DunningAction.executed_at.is_(None),
+                DunningAction.scheduled_at <= now,
+            )
+            .scalar()
+        )
+    return int((now - oldest).total_seconds()) if oldest else None
+
+
+# ---------------------------------------------------------------------------
+# Overdue status sweep
+# ---------------------------------------------------------------------------
+
+def sweep_overdue_batch(batch_size: int) -> int:
+    """Flip up to ``batch_size`` past-due sent/partially-paid invoices to overdue."""
+    today = date.today()
+    with get_session() as session:
+        ids = [
+            row.id
+            for row in session.query(Invoice.id)
+            .filter(
+                Invoice.status.in_(["sent", "partially_paid"]),
+                Invoice.due_date < today,
+            )
+            .order_by(Invoice.due_date.asc())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        ]
+        if not ids:
+            return 0
+        (
+            session.query(Invoice)
+            .filter(Invoice.id.in_(ids))
+            .update({"status": "overdue"}, synchronize_session=False)
+        )
+    return len(ids)
+
+
+def overdue_lag_seconds() -> Optional[int]:
+    """Age in seconds of the oldest past-due invoice not yet marked overdue."""
+    today = date.today()
+    with get_session() as session:
+        oldest = (
+            session.query(func.min(Invoice.due_date))
+            .filter(
+                Invoice.status.in_(["sent", "partially_paid"]),
+                Invoice.due_date < today,
+            )
+            .scalar()
+        )
+    return (today - oldest).days * 86400 if oldest else None
+
+
+# ---------------------------------------------------------------------------
+# Payment arrangement checks
+# ---------------------------------------------------------------------------
+
+def check_arrangements_batch(batch_size: int) -> int:
+    """Complete fully-paid arrangements and default ones past their grace period."""
+    cutoff = date.today() - timedelta(days=ARRANGEMENT_GRACE_DAYS)
+    updated = 0
+    with get_session() as session:
+        due = (
+            session.query(PaymentArrangement)
+            .filter(
+                PaymentArrangement.status == "active",
+                or_(
+                    PaymentArrangement.installments_paid >= PaymentArrangement.installments_count,
+                    PaymentArrangement.next_due_date < cutoff,
+                ),
+            )
+            .order_by(PaymentArrangement.next_due_date.asc())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for arrangement in due:
+            if arrangement.installments_paid >= arrangement.installments_count:
+                arrangement.status = "completed"
+            else:
+                arrangement.status = "defaulted"
+                logger.info(
+                    "Arrangement %s for customer %s defaulted (due %s)",
+                    arrangement.id, arrangement.customer_id, arrangement.next_due_date,
+                )
+            updated += 1
+    return updated
+
+
+def arrangements_lag_seconds() -> Optional[int]:
+    """Age in seconds of the oldest active arrangement past its grace period."""
+    cutoff = date.today() - timedelta(days=ARRANGEMENT_GRACE_DAYS)
+    with get_session() as session:
+        oldest = (
+            session.query(func.min(PaymentArrangement.next_due_date))
+            .filter(
+                PaymentArrangement.status == "active",
+                PaymentArrangement.next_due_date < cutoff,
+            )
+            .scalar()
+        )
+    return (cutoff - oldest).days * 86400 if oldest else None
@@ -0,0 +1,40 @@
+"""Billing exports — streamed Parquet / Arrow / gzip CSV for finance and BI."""
+
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from services.common.auth import AuthContext, get_auth_context
+from services.billing.export import EXPORT_FORMATS, columnar_available, stream_export
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+
+# ---------------------------------------------------------------------------
+# GET /exports/{dataset} — Stream a tenant's table for a created_at range
+# ---------------------------------------------------------------------------
+
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    ctx: AuthContext = Depends(get_auth_context),
+    fmt: str = Query("parquet", alias="format", pattern="^(parquet|arrow|csv\\.gz)$"),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to", description="Inclusive"),
+):
+    if dataset not in ("invoices", "payments", "dunning_actions"):
+        raise HTTPException(status_code=404, detail="Unknown dataset")
+    if fmt != "csv.gz" and not columnar_available():
+        raise HTTPException(status_code=501, detail="pyarrow is not installed; use format=csv.gz")
+    if date_from and date_to and date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+
+    media_type, ext = EXPORT_FORMATS[fmt]
+    span = f"{date_from or 'start'}_{date_to or 'now'}"
+    return StreamingResponse(
+        stream_export(dataset, fmt, ctx.tenant_id, date_from, date_to),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}_{span}.{ext}"'},
+    )
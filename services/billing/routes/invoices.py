@@ -7,14 +7,23 @@ from decimal import Decimal
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
 
 from services.common.auth import AuthContext, get_auth_context
-from services.billing.database import compute_vat, get_session, next_invoice_number
-from services.billing.models import DunningAction, Invoice
+from services.common.money import batch_invoice_totals, sum_line_totals
+from services.billing.database import (
+    VAT_RATE, claim_invoice_number, compute_vat, get_session, next_invoice_number,
+)
+from services.billing.invoice_pdf import ensure_invoice_pdf, render_invoices
+from services.billing.ledger import refresh_customer_balances
+from services.billing.models import DunningAction, Invoice, InvoiceDocument
+from services.billing.pagination import paginate
 from services.billing.schemas import (
     CreditNoteRequest,
     InvoiceGenerateRequest,
     InvoiceRead,
+    InvoiceRenderRequest,
+    InvoiceRenderResult,
     InvoiceSendRequest,
     LineItem,
     PaginatedResponse,
@@ -60,18 +69,22 @@ def generate_invoices(
             )
             customer_ids = [r[0] for r in rows]
 
-        for cid in customer_ids:
-            number = next_invoice_number(session, ctx.tenant_id)
-            due = body.billing_date + timedelta(days=DEFAULT_DUE_DAYS)
+        due = body.billing_date + timedelta(days=DEFAULT_DUE_DAYS)
+
+        # Placeholder line items — real system would pull from subscriptions
+        run_line_items = [
+            [{"description": "Monthly internet service", "quantity": 1,
+              "unit_price_zar": "0.00", "total_zar": "0.00"}]
+            for _ in customer_ids
+        ]
+        # Totals for the whole run in one batch (integer cents).
+        run_totals = batch_invoice_totals(
+            [[(Decimal(li["unit_price_zar"]), li["quantity"]) for li in items] for items in run_line_items],
+            VAT_RATE,
+        )
 
-            # Placeholder line item — real system would pull from subscriptions
-            line_items = [
-                {"description": "Monthly internet service", "quantity": 1,
-                 "unit_price_zar": "0.00", "total_zar": "0.00"}
-            ]
-            subtotal = Decimal("0.00")
-            vat = compute_vat(subtotal)
-            total = subtotal + vat
+        for cid, line_items, (subtotal, vat, total) in zip(customer_ids, run_line_items, run_totals):
+            number = next_invoice_number(session, ctx.tenant_id)
 
             inv = Invoice(
                 tenant_id=ctx.tenant_id,
@@ -85,7 +98,7 @@ def generate_invoices(
                 line_items=line_items,
             )
             session.add(inv)
-            session.flush()
+            claim_invoice_number(session, inv)
             session.refresh(inv)
 
             # Schedule dunning actions
@@ -115,6 +128,29 @@ def _schedule_dunning(session, inv: Invoice) -> None:
         ))
 
 
+# ---------------------------------------------------------------------------
+# POST /invoices/render — Batch-render PDFs for a billing run
+# ---------------------------------------------------------------------------
+
+@router.post("/render", response_model=InvoiceRenderResult)
+def render_invoice_pdfs(
+    body: InvoiceRenderRequest,
+    ctx: AuthContext = Depends(get_auth_context),
+):
+    """Render PDFs in the renderer process pool; unchanged invoices are reused."""
+    with get_session() as session:
+        q = session.query(Invoice).filter(Invoice.tenant_id == ctx.tenant_id)
+        if body.invoice_ids:
+            q = q.filter(Invoice.id.in_(body.invoice_ids))
+        else:
+            q = (
+                q.outerjoin(InvoiceDocument, InvoiceDocument.invoice_id == Invoice.id)
+                .filter(Invoice.status != "voided", InvoiceDocument.invoice_id.is_(None))
+            )
+        invoices = q.order_by(Invoice.created_at, Invoice.id).limit(body.limit).all()
+        return InvoiceRenderResult(**render_invoices(session, invoices))
+
+
 # ---------------------------------------------------------------------------
 # GET /invoices — List with filters and pagination
 # ---------------------------------------------------------------------------
@@ -130,6 +166,8 @@ def list_invoices(
     due_to: Optional[date] = Query(None),
     min_amount: Optional[Decimal] = Query(None),
     max_amount: Optional[Decimal] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: str = Query("exact", pattern="^(exact|estimated|none)$"),
 ):
     with get_session() as session:
         q = session.query(Invoice).filter(Invoice.tenant_id == ctx.tenant_id)
@@ -147,21 +185,9 @@ def list_invoices(
         if max_amount is not None:
             q = q.filter(Invoice.total_zar <= max_amount)
 
-        total = q.count()
-        pages = max(1, (total + page_size - 1) // page_size)
-        items = (
-            q.order_by(Invoice.created_at.desc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-            .all()
-        )
-
-        return PaginatedResponse(
-            items=[InvoiceRead.model_validate(i) for i in items],
-            total=total,
-            page=page,
-            page_size=page_size,
-            pages=pages,
+        return paginate(
+            session, q, Invoice.created_at, Invoice.id, InvoiceRead.model_validate,
+            page=page, page_size=page_size, cursor=cursor, count=count,
         )
 
 
@@ -185,6 +211,38 @@ def get_invoice(
         return InvoiceRead.model_validate(inv)
 
 
+# ---------------------------------------------------------------------------
+# GET /invoices/{id}/pdf — Download rendered PDF
+# ---------------------------------------------------------------------------
+
+@router.get("/{invoice_id}/pdf")
+def download_invoice_pdf(
+    invoice_id: uuid.UUID,
+    ctx: AuthContext = Depends(get_auth_context),
+):
+    with get_session() as session:
+        inv = (
+            session.query(Invoice)
+            .filter(Invoice.id == invoice_id, Invoice.tenant_id == ctx.tenant_id)
+            .first()
+        )
+        if not inv:
+            raise HTTPException(status_code=404, detail="Invoice not found")
+        try:
+            path = ensure_invoice_pdf(session, inv)
+        except RuntimeError as exc:
+            logger.error("%s", exc)
+            raise HTTPException(status_code=503, detail="PDF rendering unavailable")
+        filename = f"{inv.number}.pdf"
+
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=filename,
+        headers={"Cache-Control": "private, max-age=3600", "ETag": f'"{path.stem}"'},
+    )
+
+
 # ---------------------------------------------------------------------------
 # POST /invoices/{id}/send — Send invoice via email/SMS
 # ---------------------------------------------------------------------------
@@ -206,14 +264,24 @@ def send_invoice(
         if inv.status == "voided":
             raise HTTPException(status_code=400, detail="Cannot send a voided invoice")
 
-        # In production: dispatch to email/SMS provider here
-        logger.info("Sending invoice %s via %s to customer %s", inv.number, body.channel, inv.customer_id)
-
         if inv.status == "draft":
             inv.status = "sent"
+            refresh_customer_balances(session, ctx.tenant_id, [inv.customer_id])
             session.flush()
             session.refresh(inv)
 
+        try:
+            pdf_path = ensure_invoice_pdf(session, inv)
+        except RuntimeError as exc:
+            logger.error("%s", exc)
+            raise HTTPException(status_code=503, detail="PDF rendering unavailable")
+
+        # In production: dispatch to email/SMS provider here
+        logger.info(
+            "Sending invoice %s via %s to customer %s (%s)",
+            inv.number, body.channel, inv.customer_id, pdf_path.name,
+        )
+
         return InvoiceRead.model_validate(inv)
 
 
@@ -241,8 +309,8 @@ def create_credit_note(
         # Build credit note line items
         if body.line_items:
             li_dicts = [li.model_dump(mode="json") for li in body.line_items]
-            subtotal = sum(
-                Decimal(str(li.unit_price_zar)) * li.quantity for li in body.line_items
+            subtotal = sum_line_totals(
+                (Decimal(str(li.unit_price_zar)), li.quantity) for li in body.line_items
             )
         else:
             li_dicts = original.line_items or []
@@ -268,11 +336,13 @@ def create_credit_note(
             credit_note_of=original.id,
         )
         session.add(cn)
+        claim_invoice_number(session, cn)
 
         # Void original if fully credited
         if abs(total) >= original.total_zar:
             original.status = "voided"
 
+        refresh_customer_balances(session, ctx.tenant_id, [original.customer_id])
         session.flush()
         session.refresh(cn)
         return InvoiceRead.model_validate(cn)
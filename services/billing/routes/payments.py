@@ -1,18 +1,27 @@
 """Payment routes — record payments, list payment history."""
 
+import json
+import tempfile
 import uuid
 from decimal import Decimal
-from typing import Optional
+from typing import Iterator, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 
 from services.common.auth import AuthContext, get_auth_context
 from services.billing.database import get_session
+from services.billing.ledger import refresh_customer_balances
 from services.billing.models import Invoice, Payment
+from services.billing.pagination import paginate
+from services.billing.payment_import import import_payment_stream
 from services.billing.schemas import PaymentCreate, PaymentRead, PaginatedResponse
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
+# Import reports stay in memory up to this size, then spill to disk.
+IMPORT_REPORT_SPOOL_BYTES = 4 * 1024 * 1024
+
 
 # ---------------------------------------------------------------------------
 # POST /payments — Record a manual / EFT / debit order payment
@@ -59,6 +68,7 @@ def record_payment(
         elif inv.amount_paid_zar > 0:
             inv.status = "partially_paid"
 
+        refresh_customer_balances(session, ctx.tenant_id, [inv.customer_id])
         session.flush()
         session.refresh(payment)
         return PaymentRead.model_validate(payment)
@@ -77,6 +87,8 @@ def list_payments(
     invoice_id: Optional[uuid.UUID] = Query(None),
     method: Optional[str] = Query(None),
     status_filter: Optional[str] = Query(None, alias="status"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: str = Query("exact", pattern="^(exact|estimated|none)$"),
 ):
     with get_session() as session:
         q = session.query(Payment).filter(Payment.tenant_id == ctx.tenant_id)
@@ -90,19 +102,46 @@ def list_payments(
         if status_filter:
             q = q.filter(Payment.status == status_filter)
 
-        total = q.count()
-        pages = max(1, (total + page_size - 1) // page_size)
-        items = (
-            q.order_by(Payment.created_at.desc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-            .all()
+        return paginate(
+            session, q, Payment.created_at, Payment.id, PaymentRead.model_validate,
+            page=page, page_size=page_size, cursor=cursor, count=count,
         )
 
-        return PaginatedResponse(
-            items=[PaymentRead.model_validate(p) for p in items],
-            total=total,
-            page=page,
-            page_size=page_size,
-            pages=pages,
-        )
+
+# ---------------------------------------------------------------------------
+# POST /payments/import — Bulk EFT / debit-order file import
+# ---------------------------------------------------------------------------
+
+@router.post("/import")
+async def import_payments(
+    request: Request,
+    ctx: AuthContext = Depends(get_auth_context),
+    fmt: str = Query("csv", alias="format", pattern="^(csv|statement)$"),
+    method: str = Query("eft", pattern="^(eft|debit_order|manual)$"),
+):
+    """Import a payment file sent as the raw request body.
+
+    The body is parsed and applied while it is being received; the response
+    is an NDJSON report with one result per input line followed by a summary.
+    """
+    report = tempfile.SpooledTemporaryFile(max_size=IMPORT_REPORT_SPOOL_BYTES)
+    try:
+        summary = await import_payment_stream(request.stream(), ctx.tenant_id, fmt, method, report)
+    except ValueError as exc:
+        report.close()
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception:
+        report.close()
+        raise
+
+    report.write(json.dumps(summary.as_dict()).encode() + b"\n")
+    report.seek(0)
+
+    def _iter_report() -> Iterator[bytes]:
+        try:
+            while chunk := report.read(64 * 1024):
+                yield chunk
+        finally:
+            report.close()
+
+    return StreamingResponse(_iter_report(), media_type="application/x-ndjson")
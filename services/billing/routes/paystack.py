@@ -1,20 +1,25 @@
 """Paystack integration — initialize, verify, webhook."""
 
+import asyncio
 import hashlib
 import hmac
+import json
 import logging
 import os
+import uuid
+from datetime import datetime, timezone
 from decimal import Decimal
 from typing import Optional
 
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, Header, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, status
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from services.common.auth import AuthContext, get_auth_context
 from services.billing.database import get_session
-from services.billing.models import Invoice, Payment
+from services.billing.models import Invoice, PaystackEvent
 from services.billing.schemas import (
-    PaymentRead,
+    PaystackEventRead,
     PaystackInitializeRequest,
     PaystackInitializeResponse,
     PaystackVerifyResponse,
@@ -155,95 +160,105 @@ async def paystack_webhook(
 ):
     """Handle Paystack webhook callbacks.
 
+    Fast path only: verify the signature, persist the raw event (deduplicated
+    on event + reference) and acknowledge.  The webhook worker pool applies
+    stored events to invoices asynchronously.
+
     This endpoint is public (bypasses entitlement guard via public_paths config).
     """
     raw_body = await request.body()
 
-    if x_paystack_signature and not _verify_webhook_signature(raw_body, x_paystack_signature):
+    if PAYSTACK_WEBHOOK_SECRET and not _verify_webhook_signature(raw_body, x_paystack_signature or ""):
         raise HTTPException(status_code=400, detail="Invalid signature")
 
-    import json
-    payload = json.loads(raw_body)
-    event = payload.get("event", "")
-    data = payload.get("data", {})
-
-    logger.info("Paystack webhook: event=%s ref=%s", event, data.get("reference"))
-
-    if event == "charge.success":
-        await _handle_charge_success(data)
-    elif event == "transfer.success":
-        logger.info("Transfer success: %s", data.get("reference"))
-    # Add more event handlers as needed
+    try:
+        payload = json.loads(raw_body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+
+    event = str(payload.get("event", ""))
+    data = payload.get("data") or {}
+    reference = str(data.get("reference") or "") or hashlib.sha256(raw_body).hexdigest()
+
+    stored = await asyncio.to_thread(_store_event, event, reference, payload)
+    logger.info(
+        "Paystack webhook: event=%s ref=%s %s",
+        event, reference, "queued" if stored else "duplicate",
+    )
+    return {"status": "accepted" if stored else "duplicate"}
+
+
+def _metadata_uuid(data: dict, key: str) -> Optional[uuid.UUID]:
+    raw = (data.get("metadata") or {}).get(key)
+    try:
+        return uuid.UUID(str(raw)) if raw else None
+    except ValueError:
+        return None
+
+
+def _store_event(event: str, reference: str, payload: dict) -> bool:
+    """Insert the raw event; returns False when it was already received."""
+    data = payload.get("data") or {}
+    stmt = (
+        pg_insert(PaystackEvent)
+        .values(
+            id=uuid.uuid4(),
+            event=event,
+            reference=reference[:200],
+            tenant_id=_metadata_uuid(data, "tenant_id"),
+            invoice_id=_metadata_uuid(data, "invoice_id"),
+            payload=payload,
+            status="pending",
+            attempts=0,
+        )
+        .on_conflict_do_nothing(index_elements=["event", "reference"])
+        .returning(PaystackEvent.id)
+    )
+    with get_session() as session:
+        return session.execute(stmt).scalar() is not None
 
-    return {"status": "accepted"}
 
+# ---------------------------------------------------------------------------
+# Webhook event inbox — inspect and replay dead-lettered events
+# ---------------------------------------------------------------------------
 
-async def _handle_charge_success(data: dict) -> None:
-    """Process a successful charge — record payment and update invoice."""
-    metadata = data.get("metadata", {})
-    invoice_id_raw = metadata.get("invoice_id")
-    tenant_id_raw = metadata.get("tenant_id")
-    if not invoice_id_raw or not tenant_id_raw:
-        logger.warning("Webhook charge.success missing invoice/tenant metadata")
-        return
+@router.get("/events", response_model=list[PaystackEventRead])
+def list_paystack_events(
+    ctx: AuthContext = Depends(get_auth_context),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    limit: int = Query(100, ge=1, le=500),
+):
+    with get_session() as session:
+        q = session.query(PaystackEvent).filter(PaystackEvent.tenant_id == ctx.tenant_id)
+        if status_filter:
+            q = q.filter(PaystackEvent.status == status_filter)
+        events = q.order_by(PaystackEvent.received_at.desc()).limit(limit).all()
+        return [PaystackEventRead.model_validate(e) for e in events]
 
-    import uuid as _uuid
-    invoice_id = _uuid.UUID(invoice_id_raw)
-    tenant_id = _uuid.UUID(tenant_id_raw)
-    amount_zar = Decimal(str(data.get("amount", 0))) / 100
-    reference = data.get("reference", "")
 
+@router.post("/events/{event_id}/retry", response_model=PaystackEventRead)
+def retry_paystack_event(
+    event_id: uuid.UUID,
+    ctx: AuthContext = Depends(get_auth_context),
+):
+    """Re-queue a dead-lettered event for another round of attempts."""
     with get_session() as session:
-        inv = (
-            session.query(Invoice)
-            .filter(Invoice.id == invoice_id, Invoice.tenant_id == tenant_id)
+        evt = (
+            session.query(PaystackEvent)
+            .filter(PaystackEvent.id == event_id, PaystackEvent.tenant_id == ctx.tenant_id)
+            .with_for_update()
             .first()
         )
-        if not inv:
-            logger.warning("Webhook: invoice %s not found", invoice_id)
-            return
-
-        payment = Payment(
-            tenant_id=tenant_id,
-            invoice_id=inv.id,
-            customer_id=inv.customer_id,
-            amount_zar=amount_zar,
-            method="card",
-            reference=reference,
-            paystack_ref=reference,
-            status="completed",
-        )
-        session.add(payment)
-
-        inv.amount_paid_zar += amount_zar
-        if inv.amount_paid_zar >= inv.total_zar:
-            inv.status = "paid"
-        elif inv.amount_paid_zar > 0:
-            inv.status = "partially_paid"
-
+        if not evt:
+            raise HTTPException(status_code=404, detail="Event not found")
+        if evt.status != "dead":
+            raise HTTPException(status_code=400, detail=f"Event is {evt.status}, not dead")
+        evt.status = "pending"
+        evt.attempts = 0
+        evt.next_attempt_at = datetime.now(timezone.utc)
         session.flush()
-        logger.info(
-            "Payment recorded: invoice=%s amount=R%.2f status=%s",
-            inv.number, amount_zar, inv.status,
-        )
+        session.refresh(evt)
+        return PaystackEventRead.model_validate(evt)
 
-        # If fully paid and was overdue, trigger reinstatement
-        if inv.status == "paid":
-            _trigger_auto_reinstate(tenant_id, inv.customer_id)
-
-
-def _trigger_auto_reinstate(tenant_id, customer_id) -> None:
-    """Notify Network service to reinstate customer service after payment."""
-    network_url = os.getenv("NETWORK_SERVICE_URL", "http://network:8005")
-    try:
-        with httpx.Client(timeout=5.0) as client:
-            client.post(
-                f"{network_url}/services/reinstate-by-customer",
-                json={"customer_id": str(customer_id)},
-                headers={
-                    "X-User-Id": "00000000-0000-0000-0000-000000000000",
-                    "X-Tenant-Id": str(tenant_id),
-                },
-            )
-    except Exception as exc:
-        logger.error("Auto-reinstate failed for customer %s: %s", customer_id, exc)
@@ -1,20 +1,45 @@
-"""Billing Reports — revenue, aging, collections."""
+"""Billing Reports — revenue, aging, collections.
 
+Every report is a fixed number of grouped queries (not one per month).
+Queries on ``invoices`` / ``payments`` bound ``created_at`` to the report
+window so the planner prunes to the matching monthly partitions.
+"""
+
+import os
 import uuid
 from datetime import date, timedelta
 from decimal import Decimal
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy import and_, case, func
+from sqlalchemy import Date, and_, case, column, func, values
 
 from services.common.auth import AuthContext, get_auth_context
 from services.billing.database import get_session
 from services.billing.models import DunningAction, Invoice, Payment, PaymentArrangement
+from services.billing.partitions import add_months
 from services.billing.schemas import AgingBucket, CollectionsReportItem, RevenueReportItem
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
+# Longest gap between an invoice being created and falling due.  The
+# collections report filters on due_date; this turns that window into a
+# created_at bound so the overdue query still prunes partitions.
+MAX_PAYMENT_TERMS_DAYS = int(os.getenv("BILLING_MAX_PAYMENT_TERMS_DAYS", "90"))
+
+
+def _report_months(months: int) -> list[date]:
+    """First day of each of the last ``months`` months, newest first."""
+    current = date.today().replace(day=1)
+    return [add_months(current, -i) for i in range(months)]
+
+
+def _monthly(session, month_col, value, *filters) -> dict[date, object]:
+    """``{month_start: value}`` for one grouped query."""
+    month = func.date_trunc("month", month_col).cast(Date)
+    rows = session.query(month.label("month"), value).filter(*filters).group_by(month).all()
+    return {row[0]: row[1] for row in rows}
+
 
 # ---------------------------------------------------------------------------
 # GET /reports/revenue — Revenue by period
@@ -25,52 +50,35 @@ def revenue_report(
     ctx: AuthContext = Depends(get_auth_context),
     months: int = Query(6, ge=1, le=24),
 ):
-    with get_session() as session:
-        today = date.today()
-        results = []
-
-        for i in range(months):
-            # Calculate month boundaries
-            first_of_month = today.replace(day=1) - timedelta(days=30 * i)
-            first_of_month = first_of_month.replace(day=1)
-            if first_of_month.month == 12:
-                next_month = first_of_month.replace(year=first_of_month.year + 1, month=1)
-            else:
-                next_month = first_of_month.replace(month=first_of_month.month + 1)
-
-            period_label = first_of_month.strftime("%Y-%m")
-
-            # Total invoiced
-            invoiced = (
-                session.query(func.coalesce(func.sum(Invoice.total_zar), 0))
-                .filter(
-                    Invoice.tenant_id == ctx.tenant_id,
-                    Invoice.created_at >= first_of_month,
-                    Invoice.created_at < next_month,
-                    Invoice.total_zar > 0,  # exclude credit notes
-                )
-                .scalar()
-            ) or Decimal("0.00")
+    periods = _report_months(months)
+    start, end = periods[-1], add_months(periods[0], 1)
 
-            # Total paid
-            paid = (
-                session.query(func.coalesce(func.sum(Payment.amount_zar), 0))
-                .filter(
-                    Payment.tenant_id == ctx.tenant_id,
-                    Payment.status == "completed",
-                    Payment.created_at >= first_of_month,
-                    Payment.created_at < next_month,
-                )
-                .scalar()
-            ) or Decimal("0.00")
+    with get_session() as session:
+        invoiced = _monthly(
+            session, Invoice.created_at, func.sum(Invoice.total_zar),
+            Invoice.tenant_id == ctx.tenant_id,
+            Invoice.created_at >= start,
+            Invoice.created_at < end,
+            Invoice.total_zar > 0,  # exclude credit notes
+        )
+        paid = _monthly(
+            session, Payment.created_at, func.sum(Payment.amount_zar),
+            Payment.tenant_id == ctx.tenant_id,
+            Payment.status == "completed",
+            Payment.created_at >= start,
+            Payment.created_at < end,
+        )
 
+        results = []
+        for month in periods:
+            month_invoiced = invoiced.get(month) or Decimal("0.00")
+            month_paid = paid.get(month) or Decimal("0.00")
             results.append(RevenueReportItem(
-                period=period_label,
-                total_invoiced_zar=invoiced,
-                total_paid_zar=paid,
-                total_outstanding_zar=max(Decimal("0.00"), invoiced - paid),
+                period=month.strftime("%Y-%m"),
+                total_invoiced_zar=month_invoiced,
+                total_paid_zar=month_paid,
+                total_outstanding_zar=max(Decimal("0.00"), month_invoiced - month_paid),
             ))
-
         return results
 
 
@@ -84,44 +92,37 @@ def aging_report(
 ):
     with get_session() as session:
         today = date.today()
-
-        # Get all unpaid invoices
-        unpaid = (
-            session.query(Invoice)
+        days = today - Invoice.due_date
+        bucket = case(
+            (days <= 0, "current"),
+            (days <= 30, "30_days"),
+            (days <= 60, "60_days"),
+            else_="90_days_plus",
+        ).label("bucket")
+
+        rows = (
+            session.query(
+                bucket,
+                func.count(Invoice.id),
+                func.sum(Invoice.total_zar - Invoice.amount_paid_zar),
+            )
             .filter(
                 Invoice.tenant_id == ctx.tenant_id,
                 Invoice.status.in_(["sent", "partially_paid", "overdue"]),
                 Invoice.total_zar > Invoice.amount_paid_zar,
             )
+            .group_by(bucket)
             .all()
         )
-
-        buckets = {
-            "current": {"count": 0, "total": Decimal("0.00")},
-            "30_days": {"count": 0, "total": Decimal("0.00")},
-            "60_days": {"count": 0, "total": Decimal("0.00")},
-            "90_days_plus": {"count": 0, "total": Decimal("0.00")},
-        }
-
-        for inv in unpaid:
-            outstanding = inv.total_zar - inv.amount_paid_zar
-            days = (today - inv.due_date).days
-
-            if days <= 0:
-                bucket = "current"
-            elif days <= 30:
-                bucket = "30_days"
-            elif days <= 60:
-                bucket = "60_days"
-            else:
-                bucket = "90_days_plus"
-
-            buckets[bucket]["count"] += 1
-            buckets[bucket]["total"] += outstanding
+        found = {row[0]: (row[1], row[2]) for row in rows}
 
         return [
-            AgingBucket(bucket=k, count=v["count"], total_zar=v["total"])
-            for k, v in buckets.items()
+            AgingBucket(
+                bucket=name,
+                count=found.get(name, (0, None))[0],
+                total_zar=found.get(name, (0, None))[1] or Decimal("0.00"),
+            )
+            for name in ("current", "30_days", "60_days", "90_days_plus")
         ]
 
 
@@ -134,78 +135,77 @@ def collections_report(
     ctx: AuthContext = Depends(get_auth_context),
     months: int = Query(6, ge=1, le=24),
 ):
-    with get_session() as session:
-        today = date.today()
-        results = []
+    periods = _report_months(months)
+    start, end = periods[-1], add_months(periods[0], 1)
 
-        for i in range(months):
-            first_of_month = today.replace(day=1) - timedelta(days=30 * i)
-            first_of_month = first_of_month.replace(day=1)
-            if first_of_month.month == 12:
-                next_month = first_of_month.replace(year=first_of_month.year + 1, month=1)
-            else:
-                next_month = first_of_month.replace(month=first_of_month.month + 1)
-
-            period_label = first_of_month.strftime("%Y-%m")
-
-            # Total overdue at that point
-            overdue = (
-                session.query(func.coalesce(
-                    func.sum(Invoice.total_zar - Invoice.amount_paid_zar), 0
-                ))
+    with get_session() as session:
+        # Outstanding on invoices that fell due in the 30 days before each month.
+        month_starts = values(column("month_start", Date), name="report_months").data(
+            [(m,) for m in periods]
+        )
+        overdue = {
+            row[0]: row[1]
+            for row in (
+                session.query(
+                    month_starts.c.month_start,
+                    func.sum(Invoice.total_zar - Invoice.amount_paid_zar),
+                )
+                .join(
+                    Invoice,
+                    and_(
+                        Invoice.due_date < month_starts.c.month_start,
+                        Invoice.due_date >= month_starts.c.month_start - 30,
+                    ),
+                )
                 .filter(
                     Invoice.tenant_id == ctx.tenant_id,
                     Invoice.status.in_(["overdue", "sent", "partially_paid"]),
-                    Invoice.due_date < first_of_month,
-                    Invoice.due_date >= first_of_month - timedelta(days=30),
+                    Invoice.due_date >= start - timedelta(days=30),
+                    Invoice.due_date < periods[0],
+                    Invoice.created_at >= start - timedelta(days=30 + MAX_PAYMENT_TERMS_DAYS),
                 )
-                .scalar()
-            ) or Decimal("0.00")
-
-            # Collected during that month from overdue
-            collected = (
-                session.query(func.coalesce(func.sum(Payment.amount_zar), 0))
-                .filter(
-                    Payment.tenant_id == ctx.tenant_id,
-                    Payment.status == "completed",
-                    Payment.created_at >= first_of_month,
-                    Payment.created_at < next_month,
-                )
-                .scalar()
-            ) or Decimal("0.00")
+                .group_by(month_starts.c.month_start)
+                .all()
+            )
+        }
 
-            rate = (collected / overdue * 100) if overdue > 0 else Decimal("0.00")
+        # Collected during each month
+        collected = _monthly(
+            session, Payment.created_at, func.sum(Payment.amount_zar),
+            Payment.tenant_id == ctx.tenant_id,
+            Payment.status == "completed",
+            Payment.created_at >= start,
+            Payment.created_at < end,
+        )
 
-            # Suspensions count
-            suspensions = (
-                session.query(func.count(DunningAction.id))
-                .filter(
-                    DunningAction.tenant_id == ctx.tenant_id,
-                    DunningAction.action_type == "auto_suspend",
-                    DunningAction.executed_at >= first_of_month,
-                    DunningAction.executed_at < next_month,
-                )
-                .scalar()
-            ) or 0
+        # Suspensions count
+        suspensions = _monthly(
+            session, DunningAction.executed_at, func.count(DunningAction.id),
+            DunningAction.tenant_id == ctx.tenant_id,
+            DunningAction.action_type == "auto_suspend",
+            DunningAction.executed_at >= start,
+            DunningAction.executed_at < end,
+        )
 
-            # Arrangements count
-            arrangements = (
-                session.query(func.count(PaymentArrangement.id))
-                .filter(
-                    PaymentArrangement.tenant_id == ctx.tenant_id,
-                    PaymentArrangement.created_at >= first_of_month,
-                    PaymentArrangement.created_at < next_month,
-                )
-                .scalar()
-            ) or 0
+        # Arrangements count
+        arrangements = _monthly(
+            session, PaymentArrangement.created_at, func.count(PaymentArrangement.id),
+            PaymentArrangement.tenant_id == ctx.tenant_id,
+            PaymentArrangement.created_at >= start,
+            PaymentArrangement.created_at < end,
+        )
 
+        results = []
+        for month in periods:
+            month_overdue = overdue.get(month) or Decimal("0.00")
+            month_collected = collected.get(month) or Decimal("0.00")
+            rate = (month_collected / month_overdue * 100) if month_overdue > 0 else Decimal("0.00")
             results.append(CollectionsReportItem(
-                period=period_label,
-                total_overdue_zar=overdue,
-                total_collected_zar=collected,
-                collection_rate=rate.quantize(Decimal("0.01")) if isinstance(rate, Decimal) else Decimal(str(round(rate, 2))),
-                suspensions=suspensions,
-                arrangements=arrangements,
+                period=month.strftime("%Y-%m"),
+                total_overdue_zar=month_overdue,
+                total_collected_zar=month_collected,
+                collection_rate=rate.quantize(Decimal("0.01")),
+                suspensions=suspensions.get(month, 0),
+                arrangements=arrangements.get(month, 0),
             ))
-
         return results
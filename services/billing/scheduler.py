@@ -0,0 +1,277 @@
+"""In-service scheduler for dunning, overdue sweeps and arrangement checks.
+
+Every Billing replica runs the scheduler loop, but only the replica holding a
+Postgres session-level advisory lock (the *leader*) executes jobs.  If the
+leader dies its connection drops, the lock is released and another replica
+takes over on its next tick.
+
+Each job works through its backlog in batches, bounded by a per-run batch cap
+and an optional items-per-second rate limit, and records one
+``billing_scheduler_runs`` row per run so throughput and lag can be tracked.
+
+Configuration (all optional):
+
+  BILLING_SCHEDULER_ENABLED            true/false (default true)
+  BILLING_SCHEDULER_TICK_SECONDS       leader check / job poll interval (default 15)
+  BILLING_SCHEDULER_LOCK_KEY           advisory lock key (default 803001)
+  BILLING_SCHEDULER_<JOB>_INTERVAL     seconds between runs of a job
+  BILLING_SCHEDULER_<JOB>_BATCH_SIZE   rows claimed per batch
+  BILLING_SCHEDULER_<JOB>_MAX_BATCHES  batches per run
+  BILLING_SCHEDULER_<JOB>_RATE         max rows per second (0 = unlimited)
+
+where ``<JOB>`` is ``DUNNING``, ``OVERDUE_SWEEP``, ``ARRANGEMENTS`` or
+``PARTITIONS`` (creates future monthly invoice/payment partitions).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from services.common.db import get_engine
+from services.billing.database import get_session
+from services.billing.models import SchedulerRun
+from services.billing.partitions import ensure_partitions_job
+from services.billing.routes.collections import (
+    arrangements_lag_seconds,
+    check_arrangements_batch,
+    dunning_lag_seconds,
+    overdue_lag_seconds,
+    process_dunning_batch,
+    sweep_overdue_batch,
+)
+
+logger = logging.getLogger("billing.scheduler")
+
+SCHEDULER_LOCK_KEY = int(os.getenv("BILLING_SCHEDULER_LOCK_KEY", "803001"))
+SCHEDULER_TICK_SECONDS = float(os.getenv("BILLING_SCHEDULER_TICK_SECONDS", "15"))
+INSTANCE_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+
+def scheduler_enabled() -> bool:
+    return os.getenv("BILLING_SCHEDULER_ENABLED", "true").lower() == "true"
+
+
+# ---------------------------------------------------------------------------
+# Job definitions
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ScheduledJob:
+    name: str
+    batch_fn: Callable[[int], int]
+    lag_fn: Callable[[], Optional[int]]
+    interval_seconds: float
+    batch_size: int
+    max_batches: int
+    rate_per_second: float
+    next_run: float = 0.0
+
+
+def _job(
+    name: str,
+    batch_fn: Callable[[int], int],
+    lag_fn: Callable[[], Optional[int]],
+    default_interval: float,
+) -> ScheduledJob:
+    prefix = f"BILLING_SCHEDULER_{name.upper()}"
+    return ScheduledJob(
+        name=name,
+        batch_fn=batch_fn,
+        lag_fn=lag_fn,
+        interval_seconds=float(os.getenv(f"{prefix}_INTERVAL", str(default_interval))),
+        batch_size=int(os.getenv(f"{prefix}_BATCH_SIZE", "200")),
+        max_batches=int(os.getenv(f"{prefix}_MAX_BATCHES", "50")),
+        rate_per_second=float(os.getenv(f"{prefix}_RATE", "0")),
+    )
+
+
+def default_jobs() -> list[ScheduledJob]:
+    return [
+        _job("dunning", process_dunning_batch, dunning_lag_seconds, 60),
+        _job("overdue_sweep", sweep_overdue_batch, overdue_lag_seconds, 900),
+        _job("arrangements", check_arrangements_batch, arrangements_lag_seconds, 3600),
+        _job("partitions", ensure_partitions_job, lambda: None, 86400),
+    ]
+
+
+def run_job(job: ScheduledJob) -> SchedulerRun:
+    """Run one job to completion (or its batch cap) and record a summary row."""
+    started_at = datetime.now(timezone.utc)
+    processed = 0
+    batches = 0
+    error: Optional[str] = None
+    lag: Optional[int] = None
+
+    try:
+        lag = job.lag_fn()
+        while batches < job.max_batches:
+            batch_started = time.monotonic()
+            count = job.batch_fn(job.batch_size)
+            batches += 1
+            processed += count
+            if count < job.batch_size:
+                break
+            if job.rate_per_second > 0:
+                wait = count / job.rate_per_second - (time.monotonic() - batch_started)
+                if wait > 0:
+                    time.sleep(wait)
+    except Exception as exc:
+        logger.exception("Scheduler job %s failed", job.name)
+        error = str(exc)
+
+    run = SchedulerRun(
+        job_name=job.name,
+        instance_id=INSTANCE_ID,
+        status="failed" if error else "completed",
+        processed=processed,
+        batches=batches,
+        lag_seconds=lag,
+        error=error,
+        started_at=started_at,
+        finished_at=datetime.now(timezone.utc),
+    )
+    try:
+        with get_session() as session:
+            session.add(run)
+    except Exception as exc:
+        logger.error("Could not record scheduler run for %s: %s", job.name, exc)
+
+    if processed:
+        logger.info(
+            "Scheduler job %s processed %d rows in %d batches (lag=%ss)",
+            job.name, processed, batches, lag,
+        )
+    return run
+
+
+# ---------------------------------------------------------------------------
+# Leader election (Postgres advisory lock)
+# ---------------------------------------------------------------------------
+
+class LeaderLock:
+    """Session-level advisory lock held on a dedicated, non-pooled-back connection."""
+
+    def __init__(self, key: int):
+        self.key = key
+        self._conn: Optional[Connection] = None
+
+    @property
+    def held(self) -> bool:
+        return self._conn is not None
+
+    def acquire(self) -> bool:
+        """Return True while this process is the leader; try to become it otherwise."""
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT 1"))
+                self._conn.commit()
+                return True
+            except Exception as exc:
+                logger.warning("Lost scheduler leader connection: %s", exc)
+                self._discard()
+
+        conn = get_engine().connect()
+        try:
+            acquired = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}
+            ).scalar()
+            conn.commit()
+        except Exception:
+            conn.invalidate()
+            conn.close()
+            raise
+
+        if acquired:
+            logger.info("Billing scheduler leadership acquired by %s", INSTANCE_ID)
+            self._conn = conn
+            return True
+        conn.close()
+        return False
+
+    def release(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            self._conn.commit()
+            self._conn.close()
+        except Exception:
+            self._discard()
+        self._conn = None
+
+    def _discard(self) -> None:
+        # Never hand a connection that may still hold the lock back to the pool.
+        if self._conn is not None:
+            try:
+                self._conn.invalidate()
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+
+# ---------------------------------------------------------------------------
+# Scheduler loop
+# ---------------------------------------------------------------------------
+
+class BillingScheduler:
+    def __init__(
+        self,
+        jobs: Optional[list[ScheduledJob]] = None,
+        tick_seconds: float = SCHEDULER_TICK_SECONDS,
+        lock_key: int = SCHEDULER_LOCK_KEY,
+    ):
+        self.jobs = jobs if jobs is not None else default_jobs()
+        self.tick_seconds = tick_seconds
+        self._lock = LeaderLock(lock_key)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock.held
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="billing-scheduler")
+            logger.info("Billing scheduler started on %s", INSTANCE_ID)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self._lock.release)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                was_leader = self._lock.held
+                if await asyncio.to_thread(self._lock.acquire):
+                    if not was_leader:
+                        for job in self.jobs:
+                            job.next_run = 0.0
+                    for job in self.jobs:
+                        if time.monotonic() >= job.next_run:
+                            await asyncio.to_thread(run_job, job)
+                            job.next_run = time.monotonic() + job.interval_seconds
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Billing scheduler tick failed: %s", exc)
+            await asyncio.sleep(self.tick_seconds)
+
+
+scheduler = BillingScheduler()
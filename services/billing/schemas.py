@@ -68,6 +68,21 @@ class CreditNoteRequest(BaseModel):
     )
 
 
+class InvoiceRenderRequest(BaseModel):
+    """Render PDFs for a billing run."""
+    invoice_ids: Optional[List[uuid.UUID]] = Field(
+        None, description="Invoices to render; omit for every unvoided invoice without a current PDF"
+    )
+    limit: int = Field(5000, ge=1, le=50000)
+
+
+class InvoiceRenderResult(BaseModel):
+    requested: int
+    rendered: int
+    cached: int
+    failed: int
+
+
 # ---------------------------------------------------------------------------
 # Payment schemas
 # ---------------------------------------------------------------------------
@@ -123,6 +138,22 @@ class PaystackVerifyResponse(BaseModel):
     channel: Optional[str] = None
 
 
+class PaystackEventRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    event: str
+    reference: str
+    tenant_id: Optional[uuid.UUID] = None
+    invoice_id: Optional[uuid.UUID] = None
+    status: str
+    attempts: int
+    next_attempt_at: datetime
+    last_error: Optional[str] = None
+    received_at: datetime
+    processed_at: Optional[datetime] = None
+
+
 # ---------------------------------------------------------------------------
 # Collections / Dunning schemas
 # ---------------------------------------------------------------------------
@@ -161,6 +192,21 @@ class ArrangementRead(BaseModel):
     created_at: datetime
 
 
+class NetworkActionRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    customer_id: uuid.UUID
+    action: str
+    reason: Optional[str] = None
+    status: str
+    attempts: int
+    next_attempt_at: datetime
+    last_error: Optional[str] = None
+    created_at: datetime
+    sent_at: Optional[datetime] = None
+
+
 # ---------------------------------------------------------------------------
 # Report schemas
 # ---------------------------------------------------------------------------
@@ -193,10 +239,12 @@ class CollectionsReportItem(BaseModel):
 
 class PaginatedResponse(BaseModel):
     items: List[Any]
-    total: int
+    total: Optional[int] = None
+    total_estimated: bool = False
     page: int
     page_size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 # ---------------------------------------------------------------------------
@@ -214,3 +262,22 @@ class DunningActionRead(BaseModel):
     executed_at: Optional[datetime] = None
     result: Optional[str] = None
     created_at: datetime
+
+
+# ---------------------------------------------------------------------------
+# Scheduler run summary
+# ---------------------------------------------------------------------------
+
+class SchedulerRunRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    job_name: str
+    instance_id: str
+    status: str
+    processed: int
+    batches: int
+    lag_seconds: Optional[int] = None
+    error: Optional[str] = None
+    started_at: datetime
+    finished_at: datetime
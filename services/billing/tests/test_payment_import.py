@@ -0,0 +1,74 @@
+"""Line parsing of payment import files (no database)."""
+
+from decimal import Decimal, InvalidOperation
+
+import pytest
+
+from services.billing.payment_import import LineParser, parse_amount
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("1500", "1500.00"),
+    ("R 1 234,56", "1234.56"),
+    ("1,234.56", "1234.56"),
+    ("399,9", "399.90"),
+    ("-250.00", "-250.00"),
+])
+def test_parse_amount(raw, expected):
+    assert parse_amount(raw) == Decimal(expected)
+
+
+@pytest.mark.parametrize("raw", ["NaN", "nan", "sNaN", "Infinity", "-inf", "", "12.5.1", "abc"])
+def test_parse_amount_rejects_non_finite_and_garbage(raw):
+    with pytest.raises(InvalidOperation):
+        parse_amount(raw)
+
+
+def _parse(fmt, lines):
+    parser = LineParser(fmt)
+    return [rec for i, raw in enumerate(lines, start=1) if (rec := parser.parse(i, raw)) is not None]
+
+
+def test_csv_lines():
+    recs = _parse("csv", [
+        "Invoice Number,Amount,Bank Reference",
+        "INV-AB12-000001,\"1 150,00\",EFT-1",
+        "INV-AB12-000002,NaN,EFT-2",
+        "INV-AB12-000003,Infinity,EFT-3",
+        "INV-AB12-000004,-10.00,EFT-4",
+        "INV-AB12-000005",
+        "",
+    ])
+    assert [(r.line, r.invoice_number, r.amount_zar, r.bank_reference, r.error) for r in recs] == [
+        (2, "INV-AB12-000001", Decimal("1150.00"), "EFT-1", None),
+        (3, None, None, None, "Malformed line"),
+        (4, None, None, None, "Malformed line"),
+        (5, "INV-AB12-000004", Decimal("-10.00"), "EFT-4", "Amount must be positive"),
+        (6, None, None, None, "Malformed line"),
+    ]
+
+
+def test_statement_lines_skip_debits_and_unmatched():
+    recs = _parse("statement", [
+        "Date,Description,Amount,Reference",
+        "2026-10-01,PAYMENT inv-ab12-000007 THANKS,\"599,00\",T1",
+        "2026-10-01,DEBIT ORDER INV-AB12-000008,-599.00,T2",
+        "2026-10-02,SALARY,15000.00,T3",
+        "2026-10-02,PAYMENT INV-AB12-000009,nan,T4",
+        "2026-10-03,PAYMENT INV-AB12-000010,899.00,",
+    ])
+    assert [(r.line, r.invoice_number, r.bank_reference, r.skip, r.error) for r in recs] == [
+        (2, "INV-AB12-000007", "T1", None, None),
+        (3, None, "T2", "Not a credit", None),
+        (4, None, "T3", "No invoice number in description", None),
+        (5, None, None, None, "Malformed line"),
+        (6, "INV-AB12-000010", "PAYMENT INV-AB12-000010", None, None),
+    ]
+    assert recs[0].amount_zar == Decimal("599.00")
+
+
+def test_header_must_have_required_columns():
+    with pytest.raises(ValueError):
+        _parse("csv", ["reference_no,date"])
+    with pytest.raises(ValueError):
+        LineParser("xlsx")
@@ -0,0 +1,215 @@
+"""Worker pool that applies stored Paystack webhook events.
+
+The webhook endpoint only persists raw events (``paystack_events``).  Workers
+claim pending events with ``FOR UPDATE SKIP LOCKED`` and apply them:
+
+  - **In order per invoice** — an event is only claimable when no earlier
+    pending event exists for the same invoice, and each worker owns a hash
+    partition of invoices.
+  - **Idempotently** — a payment is recorded at most once per Paystack
+    reference: the invoice row is locked first, then the reference is
+    claimed in ``payment_paystack_refs`` (primary key per tenant) before the
+    payment insert and balance update; an existing claim skips the event.
+  - **With retries** — failures back off exponentially; after
+    ``BILLING_WEBHOOK_MAX_ATTEMPTS`` the event is dead-lettered (``dead``)
+    and can be replayed via ``POST /payments/paystack/events/{id}/retry``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import String, and_, cast, exists, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+
+from services.billing.database import get_session
+from services.billing.ledger import refresh_customer_balances
+from services.billing.models import Invoice, Payment, PaystackEvent, PaystackReference
+from services.billing.network_client import enqueue_network_action
+
+logger = logging.getLogger("billing.webhook_worker")
+
+WEBHOOK_WORKERS = int(os.getenv("BILLING_WEBHOOK_WORKERS", "4"))
+WEBHOOK_BATCH_SIZE = int(os.getenv("BILLING_WEBHOOK_BATCH_SIZE", "50"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("BILLING_WEBHOOK_MAX_ATTEMPTS", "8"))
+WEBHOOK_POLL_SECONDS = float(os.getenv("BILLING_WEBHOOK_POLL_SECONDS", "1.0"))
+WEBHOOK_BACKOFF_BASE_SECONDS = 5
+WEBHOOK_BACKOFF_MAX_SECONDS = 3600
+
+
+# ---------------------------------------------------------------------------
+# Event application
+# ---------------------------------------------------------------------------
+
+def _apply_charge_success(session: Session, evt: PaystackEvent) -> Optional[tuple[uuid.UUID, uuid.UUID]]:
+    """Record the payment and update the invoice.
+
+    Returns ``(tenant_id, customer_id)`` when the invoice became fully paid
+    and the customer should be reinstated.
+    """
+    data = evt.payload.get("data") or {}
+    if not evt.invoice_id or not evt.tenant_id:
+        raise ValueError("charge.success missing invoice/tenant metadata")
+
+    inv = (
+        session.query(Invoice)
+        .filter(Invoice.id == evt.invoice_id, Invoice.tenant_id == evt.tenant_id)
+        .with_for_update()
+        .first()
+    )
+    if not inv:
+        raise LookupError(f"invoice {evt.invoice_id} not found")
+
+    # ``payments`` is partitioned and cannot carry a unique index on the
+    # reference; the claim row's primary key is the idempotency guard.
+    payment_id = uuid.uuid4()
+    payment_created_at = datetime.now(timezone.utc)
+    claimed = session.execute(
+        pg_insert(PaystackReference)
+        .values(
+            tenant_id=evt.tenant_id,
+            paystack_ref=evt.reference,
+            payment_id=payment_id,
+            payment_created_at=payment_created_at,
+        )
+        .on_conflict_do_nothing()
+        .returning(PaystackReference.payment_id)
+    ).scalar()
+    if claimed is None:
+        logger.info("Paystack ref %s already recorded; skipping", evt.reference)
+        return None
+
+    amount_zar = Decimal(str(data.get("amount", 0))) / 100
+    session.add(Payment(
+        id=payment_id,
+        created_at=payment_created_at,
+        tenant_id=evt.tenant_id,
+        invoice_id=inv.id,
+        customer_id=inv.customer_id,
+        amount_zar=amount_zar,
+        method="card",
+        reference=evt.reference,
+        paystack_ref=evt.reference,
+        status="completed",
+    ))
+
+    inv.amount_paid_zar += amount_zar
+    if inv.amount_paid_zar >= inv.total_zar:
+        inv.status = "paid"
+    elif inv.amount_paid_zar > 0:
+        inv.status = "partially_paid"
+    refresh_customer_balances(session, evt.tenant_id, [inv.customer_id])
+
+    logger.info(
+        "Payment recorded: invoice=%s amount=R%.2f status=%s",
+        inv.number, amount_zar, inv.status,
+    )
+    if inv.status == "paid":
+        return evt.tenant_id, inv.customer_id
+    return None
+
+
+def _backoff(attempts: int) -> timedelta:
+    seconds = min(WEBHOOK_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), WEBHOOK_BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=seconds)
+
+
+def process_event_batch(partition: int, partitions: int, batch_size: int = WEBHOOK_BATCH_SIZE) -> int:
+    """Claim and apply up to ``batch_size`` due events from one partition."""
+    now = datetime.now(timezone.utc)
+
+    earlier = aliased(PaystackEvent)
+    order_key = func.coalesce(cast(PaystackEvent.invoice_id, String), PaystackEvent.reference)
+
+    with get_session() as session:
+        events = (
+            session.query(PaystackEvent)
+            .filter(
+                PaystackEvent.status == "pending",
+                PaystackEvent.next_attempt_at <= now,
+                func.mod(func.abs(func.hashtext(order_key)), partitions) == partition,
+                ~exists().where(and_(
+                    earlier.invoice_id == PaystackEvent.invoice_id,
+                    earlier.status == "pending",
+                    earlier.received_at < PaystackEvent.received_at,
+                )),
+            )
+            .order_by(PaystackEvent.received_at.asc())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+        for evt in events:
+            evt.attempts += 1
+            try:
+                with session.begin_nested():
+                    if evt.event == "charge.success":
+                        paid = _apply_charge_success(session, evt)
+                        if paid:
+                            # Delivered by the outbox relay once this commits.
+                            enqueue_network_action(
+                                session, paid[0], [paid[1]], "reinstate", reason="paystack payment",
+                            )
+                        evt.status = "applied"
+                    else:
+                        logger.info("Ignoring Paystack event %s ref=%s", evt.event, evt.reference)
+                        evt.status = "ignored"
+                evt.processed_at = datetime.now(timezone.utc)
+                evt.last_error = None
+            except Exception as exc:
+                evt.last_error = str(exc)[:2000]
+                if evt.attempts >= WEBHOOK_MAX_ATTEMPTS:
+                    evt.status = "dead"
+                    logger.error("Paystack event %s dead-lettered: %s", evt.id, exc)
+                else:
+                    evt.next_attempt_at = now + _backoff(evt.attempts)
+                    logger.warning(
+                        "Paystack event %s failed (attempt %d): %s", evt.id, evt.attempts, exc,
+                    )
+
+    return len(events)
+
+
+# ---------------------------------------------------------------------------
+# Worker pool
+# ---------------------------------------------------------------------------
+
+_tasks: list[asyncio.Task] = []
+
+
+async def _worker(partition: int, partitions: int) -> None:
+    while True:
+        try:
+            count = await asyncio.to_thread(process_event_batch, partition, partitions)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Webhook worker %d batch failed: %s", partition, exc)
+            count = 0
+        if count < WEBHOOK_BATCH_SIZE:
+            await asyncio.sleep(WEBHOOK_POLL_SECONDS)
+
+
+def start_webhook_workers(workers: int = WEBHOOK_WORKERS) -> None:
+    if _tasks or workers <= 0:
+        return
+    for partition in range(workers):
+        _tasks.append(asyncio.create_task(
+            _worker(partition, workers), name=f"paystack-webhook-{partition}",
+        ))
+    logger.info("Started %d Paystack webhook workers", workers)
+
+
+async def stop_webhook_workers() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -0,0 +1,169 @@
+"""Scaled-integer (cents) money arithmetic shared by Billing and Sales.
+
+Amounts with at most two decimal places are converted to ``int`` cents once;
+line totals, subtotals and VAT are then integer operations, and a whole
+billing run can be totalled in one pass over flat arrays (numpy when it is
+installed, plain ints otherwise).
+
+Results are bit-for-bit what the Decimal code produced:
+
+  - ``unit_price * quantity`` and sums are exact in both representations;
+  - VAT is ``(subtotal * rate).quantize(Decimal("0.01"))`` under the default
+    context, i.e. ROUND_HALF_EVEN, which :func:`_div_half_even` reproduces on
+    the exact rational ``subtotal_cents * rate``.
+
+Any input that is not representable in cents (more than two decimal places,
+NaN, infinity) makes the call fall back to the original Decimal arithmetic.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Iterable, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+CENT = Decimal("0.01")
+
+# Below this many line items the numpy round-trip costs more than it saves.
+NUMPY_MIN_ITEMS = 256
+
+LineInput = tuple[Decimal, int]
+
+
+# ---------------------------------------------------------------------------
+# Conversion
+# ---------------------------------------------------------------------------
+
+def to_cents(value: Decimal) -> Optional[int]:
+    """``value`` as integer cents, or ``None`` if it has sub-cent precision."""
+    if not value.is_finite():
+        return None
+    scaled = value.scaleb(2)
+    if scaled != scaled.to_integral_value():
+        return None
+    return int(scaled)
+
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def _div_half_even(numerator: int, denominator: int) -> int:
+    """``numerator / denominator`` rounded half-to-even (denominator > 0)."""
+    q, r = divmod(abs(numerator), denominator)
+    twice = 2 * r
+    if twice > denominator or (twice == denominator and q % 2 == 1):
+        q += 1
+    return -q if numerator < 0 else q
+
+
+# ---------------------------------------------------------------------------
+# Scalar helpers
+# ---------------------------------------------------------------------------
+
+def vat_cents(subtotal_cents: int, rate: Decimal) -> int:
+    num, den = rate.as_integer_ratio()
+    return _div_half_even(subtotal_cents * num, den)
+
+
+def compute_vat(subtotal: Decimal, rate: Decimal) -> Decimal:
+    """``(subtotal * rate).quantize(0.01)`` with half-even rounding."""
+    cents = to_cents(subtotal)
+    if cents is None:
+        return (subtotal * rate).quantize(CENT)
+    return from_cents(vat_cents(cents, rate))
+
+
+def sum_line_totals(items: Iterable[LineInput]) -> Decimal:
+    """Exact ``sum(unit_price * quantity)``."""
+    items = list(items)
+    cents = [to_cents(price) for price, _qty in items]
+    if any(c is None for c in cents):
+        return sum((price * qty for price, qty in items), Decimal("0"))
+    return from_cents(sum(c * qty for c, (_price, qty) in zip(cents, items)))
+
+
+# ---------------------------------------------------------------------------
+# Batch totals (one call per billing run)
+# ---------------------------------------------------------------------------
+
+def batch_subtotals(groups: Sequence[Sequence[LineInput]]) -> list[Decimal]:
+    """Per-group ``sum(unit_price * quantity)`` for many invoices at once."""
+    return [from_cents(c) if c is not None else _decimal_sum(g)
+            for c, g in zip(_batch_subtotal_cents(groups), groups)]
+
+
+def batch_invoice_totals(
+    groups: Sequence[Sequence[LineInput]],
+    rate: Decimal,
+) -> list[tuple[Decimal, Decimal, Decimal]]:
+    """``(subtotal, vat, total)`` per group, rounded exactly like ``compute_vat``."""
+    subtotals = _batch_subtotal_cents(groups)
+    vats = _batch_vat_cents(subtotals, rate)
+    # Converting back to Decimal dominates the run, and a billing run has few
+    # distinct subtotals: build each (immutable) result tuple once.
+    by_cents: dict[int, tuple[Decimal, Decimal, Decimal]] = {}
+    out = []
+    for cents, vat, group in zip(subtotals, vats, groups):
+        if cents is None:
+            subtotal = _decimal_sum(group)
+            vat_zar = (subtotal * rate).quantize(CENT)
+            out.append((subtotal, vat_zar, subtotal + vat_zar))
+            continue
+        totals = by_cents.get(cents)
+        if totals is None:
+            totals = by_cents[cents] = (from_cents(cents), from_cents(vat), from_cents(cents + vat))
+        out.append(totals)
+    return out
+
+
+def _decimal_sum(group: Sequence[LineInput]) -> Decimal:
+    return sum((price * qty for price, qty in group), Decimal("0"))
+
+
+def _batch_subtotal_cents(groups: Sequence[Sequence[LineInput]]) -> list[Optional[int]]:
+    """Subtotal cents per group; ``None`` for groups that need the Decimal path."""
+    sizes = [len(group) for group in groups]
+    prices = [price for group in groups for price, _qty in group]
+    qtys = [qty for group in groups for _price, qty in group]
+
+    # A billing run reuses a handful of package prices: convert each once.
+    converted = {price: to_cents(price) for price in set(prices)}
+    cents = [converted[price] for price in prices]
+    exact_lines = None not in converted.values()
+
+    if np is not None and exact_lines and len(cents) >= NUMPY_MIN_ITEMS:
+        # int64 holds +/-9.2e16 cents, far beyond Numeric(12, 2).
+        owners = np.repeat(np.arange(len(groups)), sizes)
+        line = np.asarray(cents, dtype=np.int64) * np.asarray(qtys, dtype=np.int64)
+        sums = np.zeros(len(groups), dtype=np.int64)
+        np.add.at(sums, owners, line)
+        return sums.tolist()
+
+    totals: list[Optional[int]] = []
+    pos = 0
+    for size in sizes:
+        line_cents = cents[pos:pos + size]
+        if None in line_cents:
+            totals.append(None)
+        else:
+            totals.append(sum(c * q for c, q in zip(line_cents, qtys[pos:pos + size])))
+        pos += size
+    return totals
+
+
+def _batch_vat_cents(subtotals: list[Optional[int]], rate: Decimal) -> list[Optional[int]]:
+    num, den = rate.as_integer_ratio()
+    if np is None or None in subtotals or len(subtotals) < NUMPY_MIN_ITEMS:
+        return [None if c is None else _div_half_even(c * num, den) for c in subtotals]
+
+    # Vectorised _div_half_even.
+    scaled = np.asarray(subtotals, dtype=np.int64) * num
+    q, r = np.divmod(np.abs(scaled), den)
+    twice = 2 * r
+    q += (twice > den) | ((twice == den) & (q % 2 == 1))
+    return np.where(scaled < 0, -q, q).tolist()
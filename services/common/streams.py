@@ -0,0 +1,25 @@
+"""Incremental text decoding for streamed uploads (bulk payment and coverage files)."""
+
+from __future__ import annotations
+
+import codecs
+from typing import AsyncIterator
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Yield decoded text lines from a byte stream without buffering the body.
+
+    UTF-8 (a leading BOM is dropped, undecodable bytes are replaced); ``\\r\\n``
+    and ``\\n`` line endings; a final line without a newline is yielded too.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in stream:
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
@@ -0,0 +1,59 @@
+"""Billing-run totals: Decimal reference vs ``batch_invoice_totals``.
+
+Not collected by pytest; run from the repository root::
+
+    python services/common/tests/bench_money.py [invoices]
+"""
+
+import random
+import sys
+import timeit
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from services.common import money  # noqa: E402
+from services.common.money import CENT, batch_invoice_totals  # noqa: E402
+
+VAT = Decimal("0.15")
+PRICES = [Decimal(p) for p in ("399.00", "599.00", "899.00", "1099.00", "49.99", "150.00")]
+
+
+def _decimal_totals(groups):
+    out = []
+    for group in groups:
+        subtotal = sum((price * qty for price, qty in group), Decimal("0"))
+        vat = (subtotal * VAT).quantize(CENT)
+        out.append((subtotal, vat, subtotal + vat))
+    return out
+
+
+def main(invoices: int = 100_000) -> None:
+    rng = random.Random(7)
+    groups = [
+        [(rng.choice(PRICES), rng.randint(1, 3)) for _ in range(rng.randint(1, 4))]
+        for _ in range(invoices)
+    ]
+    expected = _decimal_totals(groups)
+    runs = {
+        "decimal": lambda: _decimal_totals(groups),
+        "cents (numpy)" if money.np is not None else "cents": lambda: batch_invoice_totals(groups, VAT),
+    }
+    assert batch_invoice_totals(groups, VAT) == expected
+    if money.np is not None:
+        numpy_module, money.np = money.np, None
+        try:
+            assert batch_invoice_totals(groups, VAT) == expected
+            best = min(timeit.repeat(lambda: batch_invoice_totals(groups, VAT), number=1, repeat=3))
+        finally:
+            money.np = numpy_module
+        print(f"{'cents (plain ints)':<20} {best * 1000:8.1f} ms")
+    for name, fn in runs.items():
+        best = min(timeit.repeat(fn, number=1, repeat=3))
+        print(f"{name:<20} {best * 1000:8.1f} ms")
+    print(f"{invoices} invoices, {sum(len(g) for g in groups)} line items")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,147 @@
+"""Cents arithmetic in ``money.py`` against the Decimal code it replaced."""
+
+from contextlib import contextmanager
+from decimal import ROUND_HALF_EVEN, ROUND_HALF_UP, Decimal
+from unittest import mock
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from services.common import money
+from services.common.money import (
+    CENT,
+    batch_invoice_totals,
+    batch_subtotals,
+    compute_vat,
+    from_cents,
+    sum_line_totals,
+    to_cents,
+)
+
+VAT = Decimal("0.15")
+
+# Numeric(12, 2) range, credit notes included.
+cents = st.integers(min_value=-(10**12 - 1), max_value=10**12 - 1)
+amounts = cents.map(from_cents)
+sub_cent_amounts = st.decimals(min_value=-10**6, max_value=10**6, places=4, allow_nan=False, allow_infinity=False)
+rates = st.sampled_from([Decimal("0.15"), Decimal("0.14"), Decimal("0.125"), Decimal("0.075"), Decimal("0")])
+lines = st.lists(st.tuples(cents.map(lambda c: from_cents(c // 1000)), st.integers(0, 50)), max_size=8)
+
+
+def _reference_vat(subtotal: Decimal, rate: Decimal) -> Decimal:
+    return (subtotal * rate).quantize(CENT)
+
+
+def _reference_totals(group, rate):
+    subtotal = sum((price * qty for price, qty in group), Decimal("0"))
+    vat = _reference_vat(subtotal, rate)
+    return subtotal, vat, subtotal + vat
+
+
+# ---------------------------------------------------------------------------
+# Scalar
+# ---------------------------------------------------------------------------
+
+@given(cents)
+def test_cents_round_trip(value):
+    assert to_cents(from_cents(value)) == value
+
+
+@given(sub_cent_amounts)
+def test_sub_cent_amounts_are_not_cents(value):
+    assert (to_cents(value) is None) == (value != value.quantize(CENT))
+
+
+@given(amounts, rates)
+def test_compute_vat_matches_decimal(subtotal, rate):
+    assert compute_vat(subtotal, rate) == _reference_vat(subtotal, rate)
+
+
+@given(sub_cent_amounts, rates)
+def test_compute_vat_falls_back_for_sub_cent_input(subtotal, rate):
+    assert compute_vat(subtotal, rate) == _reference_vat(subtotal, rate)
+
+
+@given(cents.filter(lambda c: c % 2 == 1).map(lambda c: c * 10))
+def test_exact_half_cent_rounds_to_even(subtotal_cents):
+    # An odd multiple of 10 cents times 0.15 always ends in exactly half a
+    # cent, where half-even and half-up disagree on every other value.
+    subtotal = from_cents(subtotal_cents)
+    exact = subtotal * VAT
+    assert exact.scaleb(2) % 1 in (Decimal("0.5"), Decimal("-0.5"))
+    vat = compute_vat(subtotal, VAT)
+    assert vat == exact.quantize(CENT, rounding=ROUND_HALF_EVEN)
+    assert to_cents(vat) % 2 == 0
+    assert compute_vat(-subtotal, VAT) == -vat
+
+
+@pytest.mark.parametrize("subtotal, half_even, half_up", [
+    ("0.10", "0.02", "0.02"),   # 0.015
+    ("0.30", "0.04", "0.05"),   # 0.045
+    ("-0.30", "-0.04", "-0.05"),
+    ("0.70", "0.10", "0.11"),   # 0.105
+    ("1.00", "0.15", "0.15"),
+])
+def test_half_boundaries(subtotal, half_even, half_up):
+    subtotal = Decimal(subtotal)
+    assert compute_vat(subtotal, VAT) == Decimal(half_even)
+    assert (subtotal * VAT).quantize(CENT, rounding=ROUND_HALF_UP) == Decimal(half_up)
+
+
+@given(lines)
+def test_sum_line_totals_is_exact(group):
+    assert sum_line_totals(group) == sum((p * q for p, q in group), Decimal("0"))
+
+
+# ---------------------------------------------------------------------------
+# Batch (plain ints and numpy)
+# ---------------------------------------------------------------------------
+
+BATCH_PATHS = pytest.mark.parametrize("path", ["python", "numpy"])
+
+
+@contextmanager
+def _batch_path(path):
+    """Force the plain-int or the numpy batch code for any input size."""
+    if path == "numpy":
+        if money.np is None:
+            pytest.skip("numpy not installed")
+        with mock.patch.object(money, "NUMPY_MIN_ITEMS", 0):
+            yield
+    else:
+        with mock.patch.object(money, "np", None):
+            yield
+
+
+@BATCH_PATHS
+@settings(max_examples=200)
+@given(groups=st.lists(lines, max_size=30), rate=rates)
+def test_batch_totals_match_decimal(path, groups, rate):
+    with _batch_path(path):
+        result = batch_invoice_totals(groups, rate)
+    assert result == [_reference_totals(g, rate) for g in groups]
+    for subtotal, vat, total in result:
+        assert total == subtotal + vat
+        assert vat == compute_vat(subtotal, rate)
+
+
+@BATCH_PATHS
+@given(groups=st.lists(lines, min_size=1, max_size=10), bad=sub_cent_amounts.filter(lambda d: to_cents(d) is None))
+def test_batch_falls_back_per_group_for_sub_cent_prices(path, groups, bad):
+    groups = [*groups, [(bad, 3)]]
+    with _batch_path(path):
+        assert batch_subtotals(groups) == [sum((p * q for p, q in g), Decimal("0")) for g in groups]
+        assert batch_invoice_totals(groups, VAT) == [_reference_totals(g, VAT) for g in groups]
+
+
+def test_numpy_path_matches_python_path(monkeypatch):
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(7)
+    groups = [
+        [(from_cents(int(c)), int(q)) for c, q in zip(rng.integers(-10**7, 10**7, n), rng.integers(1, 5, n))]
+        for n in rng.integers(1, 6, 2000)
+    ]
+    vectorised = batch_invoice_totals(groups, VAT)
+    monkeypatch.setattr(money, "np", None)
+    assert vectorised == batch_invoice_totals(groups, VAT)
@@ -0,0 +1,32 @@
+"""Line splitting of streamed uploads."""
+
+import asyncio
+
+from services.common.streams import iter_lines
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def _lines(*parts: bytes) -> list[str]:
+    async def collect():
+        return [line async for line in iter_lines(_chunks(*parts))]
+
+    return asyncio.run(collect())
+
+
+def test_lines_split_across_chunks():
+    assert _lines(b"a,b\r\n1,", b"2\n3,4") == ["a,b", "1,2", "3,4"]
+
+
+def test_bom_dropped_and_multibyte_character_split_between_chunks():
+    data = "﻿address\nRondebosch Café\n".encode()
+    split = data.index("é".encode()) + 1
+    assert _lines(data[:split], data[split:]) == ["address", "Rondebosch Café"]
+
+
+def test_invalid_bytes_replaced_and_empty_stream():
+    assert _lines(b"ok\n\xff\n") == ["ok", "�"]
+    assert _lines() == []
@@ -2,24 +2,43 @@
 
 Used as the default API-mode adapter when no FNO-specific subclass exists.
 FNO-specific subclasses (Vumatel, MetroFibre, etc.) override URL paths and
-payload shapes while still leveraging the common httpx session management.
+payload shapes while still leveraging the common httpx session management
+(one pooled client per FNO, see ``transport.py``).
 """
 
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict
+import os
+from typing import Any, Awaitable, Callable, Dict, Sequence, TypeVar
 
 import httpx
 
 from .base import FNOAdapter
+from .transport import get_transport, is_transient
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Batch calls whose endpoint answered 404/405 in this process; they use the
+# single-item fan-out from then on.
+_batch_unsupported: set[tuple[str, str]] = set()
+
+
+def batch_api_enabled(fno_name: str) -> bool:
+    """Whether ``FNO_<NAME>_BATCH_API`` turns on the FNO's native batch endpoints (off by default)."""
+    return os.getenv(f"FNO_{fno_name.upper()}_BATCH_API", "false").lower() == "true"
+
 
 class APIFNOAdapter(FNOAdapter):
     """Adapter for FNOs that provide a REST API."""
 
+    # place_order sends client_reference as an Idempotency-Key.
+    idempotent_orders = True
+    # Most items an FNO accepts in one native batch request.
+    batch_size: int = 50
+
     def __init__(self, fno_name: str, api_key: str, base_url: str):
         self.fno_name = fno_name
         self.api_key = api_key
@@ -31,21 +50,87 @@ class APIFNOAdapter(FNOAdapter):
 
     # -- helpers ----------------------------------------------------------
 
-    async def _get(self, path: str, params: dict | None = None) -> dict:
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.get(
-                f"{self.base_url}{path}", headers=self._headers, params=params,
-            )
-            resp.raise_for_status()
-            return resp.json()
-
-    async def _post(self, path: str, payload: dict | None = None) -> dict:
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.post(
-                f"{self.base_url}{path}", headers=self._headers, json=payload,
-            )
-            resp.raise_for_status()
-            return resp.json()
+    @property
+    def _transport(self):
+        return get_transport(self.fno_name, self.base_url, self._headers)
+
+    async def _get(self, path: str, params: dict | None = None, endpoint: str | None = None) -> dict:
+        return await self._transport.request("GET", path, endpoint=endpoint, params=params)
+
+    async def _post(
+        self, path: str, payload: dict | None = None, endpoint: str | None = None, headers: dict | None = None,
+    ) -> dict:
+        return await self._transport.request("POST", path, endpoint=endpoint, json=payload, headers=headers)
+
+    @staticmethod
+    def _failed(exc: Exception) -> Dict[str, Any]:
+        """FAILED result for ``exc``; ``retryable`` when a later attempt may succeed."""
+        return {"status": "FAILED", "error": str(exc), "retryable": is_transient(exc), "adapter_type": "api"}
+
+    @staticmethod
+    def _batch_result(item: Dict[str, Any] | None, done: str, **extra: Any) -> Dict[str, Any] | None:
+        """Per-account entry of a batch response -> single-call result shape."""
+        if item is None:
+            return None
+        if item.get("error"):
+            return {"status": "FAILED", "error": item["error"], "adapter_type": "api"}
+        return {"status": item.get("status", done), **extra, "adapter_type": "api"}
+
+    @staticmethod
+    def _batch_failed(item: Any, error: str) -> Dict[str, Any]:
+        return {"status": "FAILED", "error": error, "adapter_type": "api"}
+
+    # -- batching ---------------------------------------------------------
+
+    def _chunks(self, items: Sequence[T]) -> list[Sequence[T]]:
+        return [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+
+    async def _batched(
+        self,
+        items: Sequence[T],
+        send: Callable[[Sequence[T]], Awaitable[list[Dict[str, Any] | None]]],
+        failed: Callable[[T, str], Dict[str, Any]],
+        single: Callable[[T], Awaitable[Dict[str, Any]]],
+    ) -> list[Dict[str, Any]]:
+        """Send ``items`` to a native batch endpoint, ``batch_size`` per request.
+
+        ``send(chunk)`` returns one result per chunk item, in chunk order
+        (``None`` where the FNO gave no answer).  Chunks go out concurrently;
+        items of a failed chunk, and unanswered items, get ``failed(item, error)``.
+
+        Batch endpoints differ per partner API and are used only when
+        ``FNO_<NAME>_BATCH_API=true``.  Otherwise, and once the endpoint has
+        answered 404/405, every item goes through ``single`` (fanned out).
+        """
+        key = (self.fno_name, send.__qualname__)
+        if not batch_api_enabled(self.fno_name) or key in _batch_unsupported:
+            return await self._fan_out(items, single)
+
+        async def _send(chunk: Sequence[T]) -> Dict[str, Any]:
+            try:
+                return {"results": await send(chunk)}
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code not in (404, 405):
+                    raise
+                return {"unsupported": True}
+
+        chunks = self._chunks(items)
+        sent_chunks = await self._fan_out(chunks, _send)
+        if any(sent.get("unsupported") for sent in sent_chunks):
+            logger.warning("%s batch endpoint not available (%s); using single calls", self.fno_name, key[1])
+            _batch_unsupported.add(key)
+
+        results: list[Dict[str, Any]] = []
+        for chunk, sent in zip(chunks, sent_chunks):
+            if sent.get("unsupported"):
+                results.extend(await self._fan_out(chunk, single))
+                continue
+            answers = sent.get("results") or []
+            error = sent.get("error") or "No result returned"
+            for i, item in enumerate(chunk):
+                answer = answers[i] if i < len(answers) else None
+                results.append(answer if answer is not None else failed(item, error))
+        return results
 
     # -- interface --------------------------------------------------------
 
@@ -63,22 +148,41 @@ class APIFNOAdapter(FNOAdapter):
             logger.warning("API availability check failed for %s: %s", self.fno_name, exc)
             return {"fno": self.fno_name, "available": False, "error": str(exc), "adapter_type": "api"}
 
-    async def place_order(self, customer_data: Dict[str, Any], plan_id: str) -> Dict[str, Any]:
-        logger.info("API place_order [%s] plan=%s", self.fno_name, plan_id)
+    async def place_order(
+        self, customer_data: Dict[str, Any], plan_id: str, client_reference: str | None = None,
+    ) -> Dict[str, Any]:
+        logger.info("API place_order [%s] plan=%s ref=%s", self.fno_name, plan_id, client_reference)
         payload = {"customer": customer_data, "plan_id": plan_id}
+        headers = None
+        if client_reference:
+            payload["client_reference"] = client_reference
+            headers = {"Idempotency-Key": client_reference}
         try:
-            data = await self._post("/orders", payload)
+            data = await self._post("/orders", payload, headers=headers)
             return {"status": "SUBMITTED", "order_id": data.get("order_id", ""), "adapter_type": "api"}
         except httpx.HTTPError as exc:
-            return {"status": "FAILED", "error": str(exc), "adapter_type": "api"}
+            return self._failed(exc)
 
     async def cancel_order(self, order_id: str) -> Dict[str, Any]:
         logger.info("API cancel_order [%s] order=%s", self.fno_name, order_id)
         try:
-            data = await self._post(f"/orders/{order_id}/cancel")
+            data = await self._post(f"/orders/{order_id}/cancel", endpoint="/orders/{id}/cancel")
             return {"status": data.get("status", "CANCELLED"), "adapter_type": "api"}
         except httpx.HTTPError as exc:
-            return {"status": "FAILED", "error": str(exc), "adapter_type": "api"}
+            return self._failed(exc)
+
+    async def get_order_status(self, order_id: str) -> Dict[str, Any]:
+        try:
+            data = await self._get(f"/orders/{order_id}", endpoint="/orders/{id}")
+            return {
+                "order_id": order_id,
+                "status": data.get("status", "UNKNOWN"),
+                "scheduled_date": data.get("scheduled_date"),
+                "fno_account_id": data.get("account_id"),
+                "adapter_type": "api",
+            }
+        except httpx.HTTPError as exc:
+            return {"order_id": order_id, "status": "UNKNOWN", "error": str(exc), "adapter_type": "api"}
 
     async def check_coverage(self, latitude: str, longitude: str) -> Dict[str, Any]:
         logger.info("API check_coverage [%s] lat=%s lon=%s", self.fno_name, latitude, longitude)
@@ -107,31 +211,34 @@ class APIFNOAdapter(FNOAdapter):
                 "adapter_type": "api",
             }
         except httpx.HTTPError as exc:
-            return {"status": "FAILED", "error": str(exc), "adapter_type": "api"}
+            return self._failed(exc)
 
     async def change_speed(self, fno_account_id: str, new_profile: str) -> Dict[str, Any]:
         logger.info("API change_speed [%s] account=%s profile=%s", self.fno_name, fno_account_id, new_profile)
         try:
-            data = await self._post(f"/services/{fno_account_id}/speed", {"profile": new_profile})
+            data = await self._post(
+                f"/services/{fno_account_id}/speed", {"profile": new_profile},
+                endpoint="/services/{id}/speed",
+            )
             return {"status": "CHANGED", "new_profile": new_profile, "adapter_type": "api"}
         except httpx.HTTPError as exc:
-            return {"status": "FAILED", "error": str(exc), "adapter_type": "api"}
+            return self._failed(exc)
 
     async def suspend_service(self, fno_account_id: str) -> Dict[str, Any]:
         logger.info("API suspend_service [%s] account=%s", self.fno_name, fno_account_id)
         try:
-            await self._post(f"/services/{fno_account_id}/suspend")
+            await self._post(f"/services/{fno_account_id}/suspend", endpoint="/services/{id}/suspend")
             return {"status": "SUSPENDED", "adapter_type": "api"}
         except httpx.HTTPError as exc:
-            return {"status": "FAILED", "error": str(exc), "adapter_type": "api"}
+            return self._failed(exc)
 
     async def resume_service(self, fno_account_id: str) -> Dict[str, Any]:
         logger.info("API resume_service [%s] account=%s", self.fno_name, fno_account_id)
         try:
-            await self._post(f"/services/{fno_account_id}/resume")
+            await self._post(f"/services/{fno_account_id}/resume", endpoint="/services/{id}/resume")
             return {"status": "ACTIVE", "adapter_type": "api"}
         except httpx.HTTPError as exc:
-            return {"status": "FAILED", "error": str(exc), "adapter_type": "api"}
+            return self._failed(exc)
 
     async def report_fault(self, fno_account_id: str, description: str) -> Dict[str, Any]:
         logger.info("API report_fault [%s] account=%s", self.fno_name, fno_account_id)
@@ -139,7 +246,8 @@ class APIFNOAdapter(FNOAdapter):
             data = await self._post(
                 f"/services/{fno_account_id}/faults",
                 {"description": description},
+                endpoint="/services/{id}/faults",
             )
             return {"ticket_id": data.get("ticket_id", ""), "status": "LOGGED", "adapter_type": "api"}
         except httpx.HTTPError as exc:
-            return {"status": "FAILED", "error": str(exc), "adapter_type": "api"}
+            return self._failed(exc)
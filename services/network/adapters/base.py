@@ -5,14 +5,22 @@ may expose a REST API or only a web portal.  Concrete adapters implement
 this interface using whichever integration method the FNO supports.
 """
 
+import asyncio
+import os
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Awaitable, Callable, Dict, Sequence, TypeVar
+
+T = TypeVar("T")
+
+FNO_BATCH_CONCURRENCY = int(os.getenv("FNO_BATCH_CONCURRENCY", "8"))
 
 
 class FNOAdapter(ABC):
     """Abstract Base Class for FNO Interactions."""
 
     fno_name: str = "unknown"
+    # Whether the FNO dedupes place_order on client_reference, making a retry safe.
+    idempotent_orders: bool = False
 
     @abstractmethod
     async def check_availability(self, address: str) -> Dict[str, Any]:
@@ -23,10 +31,14 @@ class FNOAdapter(ABC):
 
     @abstractmethod
     async def place_order(
-        self, customer_data: Dict[str, Any], plan_id: str
+        self, customer_data: Dict[str, Any], plan_id: str, client_reference: str | None = None
     ) -> Dict[str, Any]:
         """Place a new installation or migration order.
 
+        ``client_reference`` is our stable id for the order.  Adapters with
+        ``idempotent_orders`` send it to the FNO, which returns the original
+        order instead of placing a second one when it sees it again.
+
         Returns dict with at least: order_id (str), status (str).
         """
 
@@ -37,6 +49,70 @@ class FNOAdapter(ABC):
         Returns dict with at least: status (str).
         """
 
+    @abstractmethod
+    async def get_order_status(self, order_id: str) -> Dict[str, Any]:
+        """Current state of an order at the FNO.
+
+        Returns dict with: order_id (str), status (str, FNO vocabulary) and,
+        when known, scheduled_date (ISO str) and fno_account_id (str).
+        """
+
+    async def get_order_statuses(self, order_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Current state of many orders, keyed by order id.
+
+        Default: :meth:`get_order_status` for each order, concurrently (API
+        adapters are held to the FNO's quota by their transport); a lookup
+        that raises is reported as status ``UNKNOWN`` with its error.
+        Adapters for FNOs with a bulk status endpoint override this.
+        """
+        results = await asyncio.gather(
+            *(self.get_order_status(order_id) for order_id in order_ids), return_exceptions=True
+        )
+        return {
+            order_id: {"order_id": order_id, "status": "UNKNOWN", "error": str(result)}
+            if isinstance(result, Exception) else result
+            for order_id, result in zip(order_ids, results)
+        }
+
+    # -- batch variants ---------------------------------------------------
+    # Defaults fan the single-item calls out (FNO_BATCH_CONCURRENCY at a
+    # time); adapters for FNOs with batch endpoints override them.  Results
+    # are in input order, one per item.
+
+    async def _fan_out(
+        self,
+        items: Sequence[T],
+        call: Callable[[T], Awaitable[Dict[str, Any]]],
+        limit: int | None = None,
+    ) -> list[Dict[str, Any]]:
+        """Run ``call(item)`` for every item concurrently, at most ``limit`` at once.
+
+        Results are in ``items`` order; a call that raises yields
+        ``{"status": "FAILED", "error": ...}`` instead of failing the batch.
+        """
+        semaphore = asyncio.Semaphore(limit or FNO_BATCH_CONCURRENCY)
+
+        async def _one(item: T) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await call(item)
+                except Exception as exc:
+                    return {"status": "FAILED", "error": str(exc)}
+
+        return list(await asyncio.gather(*(_one(item) for item in items)))
+
+    async def check_availability_many(self, addresses: Sequence[str]) -> list[Dict[str, Any]]:
+        """:meth:`check_availability` for many addresses."""
+        return await self._fan_out(addresses, self.check_availability)
+
+    async def suspend_many(self, fno_account_ids: Sequence[str]) -> list[Dict[str, Any]]:
+        """:meth:`suspend_service` for many accounts."""
+        return await self._fan_out(fno_account_ids, self.suspend_service)
+
+    async def change_speed_many(self, changes: Sequence[tuple[str, str]]) -> list[Dict[str, Any]]:
+        """:meth:`change_speed` for many ``(fno_account_id, new_profile)`` pairs."""
+        return await self._fan_out(changes, lambda change: self.change_speed(*change))
+
     @abstractmethod
     async def check_coverage(
         self, latitude: str, longitude: str
@@ -1,20 +1,26 @@
 """Browser-automation adapter for FNOs that only expose web portals.
 
 Uses Playwright (if available) to log in, navigate, and scrape results.
-Falls back to stub/mock behaviour when Playwright is not installed so that
-the rest of the service still operates.
+Actions run on warm, logged-in browser contexts from the shared
+``browser_pool`` (one pool per portal).  Falls back to stub/mock behaviour
+when Playwright is not installed so that the rest of the service still
+operates.
 """
 
 from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any, Dict
+import os
+from typing import Any, Dict, Sequence
 
 from .base import FNOAdapter
+from .browser_pool import browser_pool, playwright_available
 
 logger = logging.getLogger(__name__)
 
+PORTAL_ACTION_TIMEOUT = float(os.getenv("FNO_BROWSER_ACTION_TIMEOUT_SECONDS", "60"))
+
 
 class BrowserFNOAdapter(FNOAdapter):
     """Adapter for FNOs requiring Browser Automation (Portal scraping)."""
@@ -26,26 +32,46 @@ class BrowserFNOAdapter(FNOAdapter):
 
     # -- helpers ----------------------------------------------------------
 
-    async def _simulate_portal(self, action: str, **kwargs: Any) -> None:
-        """Placeholder for actual Playwright interaction.
+    async def _login(self, page: Any) -> None:
+        """Open the portal and sign in unless the saved session is still valid.
 
-        In production this would:
-          1. Launch a headless Chromium via ``playwright.async_api``
-          2. Navigate to ``self.portal_url``
-          3. Authenticate with ``self.credentials``
-          4. Perform the requested ``action``
+        Generic username/password form; subclasses override for portals with
+        a different login flow.
+        """
+        await page.goto(self.portal_url, wait_until="domcontentloaded")
+        password = page.locator("input[type=password]")
+        if await password.count() == 0:
+            return
+        user = page.locator("input[type=email], input[name=username], input[name=user], input[type=text]")
+        await user.first.fill(self.credentials.get("user", ""))
+        await password.first.fill(self.credentials.get("pass", ""))
+        await password.first.press("Enter")
+        await page.wait_for_load_state("networkidle")
+
+    async def _portal_action(self, page: Any, action: str, **kwargs: Any) -> None:
+        """Perform ``action`` on a logged-in page; subclasses add the real flows."""
+        await page.goto(self.portal_url, wait_until="domcontentloaded")
+
+    async def _run_portal(self, action: str, **kwargs: Any) -> None:
+        """Run ``action`` on a pooled, logged-in portal session.
+
+        Without Playwright this only simulates portal latency.
         """
         logger.info(
             "Browser automation [%s] portal=%s action=%s kwargs=%s",
             self.fno_name, self.portal_url, action, kwargs,
         )
-        await asyncio.sleep(1)  # simulate portal latency
+        if not playwright_available() or not self.portal_url:
+            await asyncio.sleep(1)  # simulate portal latency
+            return
+        async with browser_pool.session(self.fno_name, self._login) as page:
+            await asyncio.wait_for(self._portal_action(page, action, **kwargs), PORTAL_ACTION_TIMEOUT)
 
     # -- interface --------------------------------------------------------
 
     async def check_availability(self, address: str) -> Dict[str, Any]:
         logger.info("Browser check_availability [%s] address=%s", self.fno_name, address)
-        await self._simulate_portal("check_availability", address=address)
+        await self._run_portal("check_availability", address=address)
         return {
             "fno": self.fno_name,
             "available": True,
@@ -54,9 +80,11 @@ class BrowserFNOAdapter(FNOAdapter):
             "message": "Coverage confirmed via portal scraping",
         }
 
-    async def place_order(self, customer_data: Dict[str, Any], plan_id: str) -> Dict[str, Any]:
+    async def place_order(
+        self, customer_data: Dict[str, Any], plan_id: str, client_reference: str | None = None,
+    ) -> Dict[str, Any]:
         logger.info("Browser place_order [%s] plan=%s", self.fno_name, plan_id)
-        await self._simulate_portal("place_order", plan_id=plan_id)
+        await self._run_portal("place_order", plan_id=plan_id)
         return {
             "status": "QUEUED_ON_PORTAL",
             "order_id": f"BROWSER-{self.fno_name}-{id(self)}",
@@ -65,12 +93,25 @@ class BrowserFNOAdapter(FNOAdapter):
 
     async def cancel_order(self, order_id: str) -> Dict[str, Any]:
         logger.info("Browser cancel_order [%s] order=%s", self.fno_name, order_id)
-        await self._simulate_portal("cancel_order", order_id=order_id)
+        await self._run_portal("cancel_order", order_id=order_id)
         return {"status": "CANCELLATION_SUBMITTED", "adapter_type": "browser"}
 
+    async def get_order_status(self, order_id: str) -> Dict[str, Any]:
+        statuses = await self.get_order_statuses([order_id])
+        return statuses[order_id]
+
+    async def get_order_statuses(self, order_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        # One portal visit to the order list covers every order.
+        logger.info("Browser get_order_statuses [%s] orders=%d", self.fno_name, len(order_ids))
+        await self._run_portal("order_list", order_ids=list(order_ids))
+        return {
+            order_id: {"order_id": order_id, "status": "UNKNOWN", "adapter_type": "browser"}
+            for order_id in order_ids
+        }
+
     async def check_coverage(self, latitude: str, longitude: str) -> Dict[str, Any]:
         logger.info("Browser check_coverage [%s] lat=%s lon=%s", self.fno_name, latitude, longitude)
-        await self._simulate_portal("check_coverage", lat=latitude, lon=longitude)
+        await self._run_portal("check_coverage", lat=latitude, lon=longitude)
         return {
             "fno": self.fno_name,
             "available": True,
@@ -81,7 +122,7 @@ class BrowserFNOAdapter(FNOAdapter):
 
     async def provision_service(self, order_id: str, ont_serial: str | None = None) -> Dict[str, Any]:
         logger.info("Browser provision_service [%s] order=%s", self.fno_name, order_id)
-        await self._simulate_portal("provision", order_id=order_id, ont_serial=ont_serial)
+        await self._run_portal("provision", order_id=order_id, ont_serial=ont_serial)
         return {
             "status": "PROVISIONED",
             "fno_account_id": f"PORTAL-{self.fno_name}-{id(self)}",
@@ -90,22 +131,22 @@ class BrowserFNOAdapter(FNOAdapter):
 
     async def change_speed(self, fno_account_id: str, new_profile: str) -> Dict[str, Any]:
         logger.info("Browser change_speed [%s] account=%s", self.fno_name, fno_account_id)
-        await self._simulate_portal("change_speed", account=fno_account_id, profile=new_profile)
+        await self._run_portal("change_speed", account=fno_account_id, profile=new_profile)
         return {"status": "CHANGED", "new_profile": new_profile, "adapter_type": "browser"}
 
     async def suspend_service(self, fno_account_id: str) -> Dict[str, Any]:
         logger.info("Browser suspend_service [%s] account=%s", self.fno_name, fno_account_id)
-        await self._simulate_portal("suspend", account=fno_account_id)
+        await self._run_portal("suspend", account=fno_account_id)
         return {"status": "SUSPENDED", "adapter_type": "browser"}
 
     async def resume_service(self, fno_account_id: str) -> Dict[str, Any]:
         logger.info("Browser resume_service [%s] account=%s", self.fno_name, fno_account_id)
-        await self._simulate_portal("resume", account=fno_account_id)
+        await self._run_portal("resume", account=fno_account_id)
         return {"status": "ACTIVE", "adapter_type": "browser"}
 
     async def report_fault(self, fno_account_id: str, description: str) -> Dict[str, Any]:
         logger.info("Browser report_fault [%s] account=%s", self.fno_name, fno_account_id)
-        await self._simulate_portal("report_fault", account=fno_account_id, description=description)
+        await self._run_portal("report_fault", account=fno_account_id, description=description)
         return {
             "ticket_id": f"FAULT-{self.fno_name}-{id(self)}",
             "status": "LOGGED",
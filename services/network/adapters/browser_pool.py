@@ -0,0 +1,192 @@
+"""Warm Playwright browser contexts shared by portal-automation adapters.
+
+Starting Chromium and logging in to an FNO portal costs seconds, so one
+headless browser is launched per process and each portal keeps a small pool
+of logged-in browser contexts:
+
+  - at most ``FNO_BROWSER_MAX_CONTEXTS`` actions run against one portal at a
+    time; further actions wait their turn;
+  - an idle context is reused by the next action, keeping its page, cookies
+    and session;
+  - a context is closed after ``FNO_BROWSER_CONTEXT_MAX_USES`` actions or on
+    any error, and its replacement starts from the portal's last saved
+    ``storage_state`` (cookies + local storage), so it is usually still
+    logged in;
+  - if Chromium crashes, the idle contexts that belonged to it are dropped
+    and the next action relaunches the browser.
+
+Playwright is optional and opt-in: unless it is installed and
+``FNO_BROWSER_AUTOMATION=true``, :func:`playwright_available` is False and
+adapters keep their stub behaviour.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:  # pragma: no cover - optional dependency
+    async_playwright = None
+
+BROWSER_AUTOMATION = os.getenv("FNO_BROWSER_AUTOMATION", "false").lower() == "true"
+BROWSER_HEADLESS = os.getenv("FNO_BROWSER_HEADLESS", "true").lower() == "true"
+BROWSER_MAX_CONTEXTS = int(os.getenv("FNO_BROWSER_MAX_CONTEXTS", "2"))
+BROWSER_CONTEXT_MAX_USES = int(os.getenv("FNO_BROWSER_CONTEXT_MAX_USES", "50"))
+
+LoginFn = Callable[[Any], Awaitable[None]]
+
+
+def playwright_available() -> bool:
+    return BROWSER_AUTOMATION and async_playwright is not None
+
+
+class _PooledContext:
+    def __init__(self, context: Any, page: Any):
+        self.context = context
+        self.page = page
+        self.uses = 0
+        self.logged_in = False
+
+
+class _PortalPool:
+    """Idle contexts, concurrency cap and counters for one portal."""
+
+    def __init__(self, key: str, max_contexts: int, max_uses: int):
+        self.key = key
+        self.max_contexts = max_contexts
+        self.max_uses = max_uses
+        self.slots = asyncio.Semaphore(max_contexts)
+        self.idle: list[_PooledContext] = []
+        self.storage_state: Optional[dict] = None
+        self.in_use = 0
+        self.waiting = 0
+        self.actions = 0
+        self.failures = 0
+        self.created = 0
+        self.recycled = 0
+        self.logins = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "max_contexts": self.max_contexts,
+            "max_uses": self.max_uses,
+            "idle": len(self.idle),
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "actions": self.actions,
+            "failures": self.failures,
+            "contexts_created": self.created,
+            "contexts_recycled": self.recycled,
+            "logins": self.logins,
+        }
+
+
+class BrowserPool:
+    """One Chromium per process; a pool of warm contexts per portal."""
+
+    def __init__(
+        self,
+        max_contexts: int = BROWSER_MAX_CONTEXTS,
+        max_uses: int = BROWSER_CONTEXT_MAX_USES,
+        headless: bool = BROWSER_HEADLESS,
+    ):
+        self.max_contexts = max_contexts
+        self.max_uses = max_uses
+        self.headless = headless
+        self._playwright: Any = None
+        self._browser: Any = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._portals: dict[str, _PortalPool] = {}
+
+    def _portal(self, key: str) -> _PortalPool:
+        if key not in self._portals:
+            self._portals[key] = _PortalPool(key, self.max_contexts, self.max_uses)
+        return self._portals[key]
+
+    async def _ensure_browser(self) -> Any:
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+                logger.info("Launched headless Chromium for portal automation")
+        return self._browser
+
+    async def _new_context(self, portal: _PortalPool) -> _PooledContext:
+        browser = await self._ensure_browser()
+        context = await browser.new_context(storage_state=portal.storage_state)
+        portal.created += 1
+        return _PooledContext(context, await context.new_page())
+
+    def _drop_dead_contexts(self) -> None:
+        """Forget idle contexts of a browser that has crashed or disconnected."""
+        if self._browser is None or self._browser.is_connected():
+            return
+        for portal in self._portals.values():
+            portal.recycled += len(portal.idle)
+            portal.idle.clear()
+        logger.warning("Chromium disconnected; dropped idle portal contexts")
+
+    async def _close_context(self, portal: _PortalPool, pooled: _PooledContext) -> None:
+        portal.recycled += 1
+        try:
+            await pooled.context.close()
+        except Exception as exc:
+            logger.debug("Closing browser context for %s failed: %s", portal.key, exc)
+
+    @asynccontextmanager
+    async def session(self, portal_key: str, login: LoginFn) -> AsyncIterator[Any]:
+        """Yield a logged-in page for ``portal_key``; waits for a free slot."""
+        portal = self._portal(portal_key)
+        portal.waiting += 1
+        async with portal.slots:
+            portal.waiting -= 1
+            portal.in_use += 1
+            pooled: Optional[_PooledContext] = None
+            healthy = False
+            try:
+                self._drop_dead_contexts()
+                pooled = portal.idle.pop() if portal.idle else await self._new_context(portal)
+                if not pooled.logged_in:
+                    await login(pooled.page)
+                    pooled.logged_in = True
+                    portal.logins += 1
+                    portal.storage_state = await pooled.context.storage_state()
+                yield pooled.page
+                healthy = True
+            finally:
+                portal.in_use -= 1
+                portal.actions += 1
+                if pooled is not None:
+                    pooled.uses += 1
+                    if healthy and pooled.uses < portal.max_uses:
+                        portal.idle.append(pooled)
+                    else:
+                        portal.failures += int(not healthy)
+                        await self._close_context(portal, pooled)
+
+    async def close(self) -> None:
+        for portal in self._portals.values():
+            while portal.idle:
+                await self._close_context(portal, portal.idle.pop())
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def snapshot(self) -> dict:
+        return {key: portal.snapshot() for key, portal in sorted(self._portals.items())}
+
+
+browser_pool = BrowserPool()
@@ -7,7 +7,7 @@ South African cities.  They expose a REST API for ISP partners.
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Sequence
 
 from .api_adapter import APIFNOAdapter
 
@@ -33,3 +33,51 @@ class FrogfootAdapter(APIFNOAdapter):
         except Exception as exc:
             logger.warning("Frogfoot availability check failed: %s", exc)
             return {"fno": "frogfoot", "available": False, "error": str(exc), "adapter_type": "api"}
+
+    async def check_availability_many(self, addresses: Sequence[str]) -> list[Dict[str, Any]]:
+        """Batch coverage via ``POST /feasibility/check/bulk``."""
+        logger.info("Frogfoot API batch coverage check: %d addresses", len(addresses))
+
+        async def _send(chunk: Sequence[str]) -> list[Dict[str, Any] | None]:
+            data = await self._post("/feasibility/check/bulk", {"addresses": list(chunk)})
+            found = {item.get("address"): item for item in data.get("results", [])}
+            return [
+                {
+                    "fno": "frogfoot",
+                    "available": found[address].get("feasible", False),
+                    "technologies": found[address].get("technologies", ["GPON"]),
+                    "adapter_type": "api",
+                } if address in found else None
+                for address in chunk
+            ]
+
+        return await self._batched(addresses, _send, lambda address, error: {
+            "fno": "frogfoot", "available": False, "error": error, "adapter_type": "api",
+        }, self.check_availability)
+
+    async def suspend_many(self, fno_account_ids: Sequence[str]) -> list[Dict[str, Any]]:
+        """Batch suspend via ``POST /services/bulk-suspend``."""
+        logger.info("Frogfoot API batch suspend: %d accounts", len(fno_account_ids))
+
+        async def _send(chunk: Sequence[str]) -> list[Dict[str, Any] | None]:
+            data = await self._post("/services/bulk-suspend", {"service_ids": list(chunk)})
+            found = {item.get("service_id"): item for item in data.get("results", [])}
+            return [self._batch_result(found.get(account_id), "SUSPENDED") for account_id in chunk]
+
+        return await self._batched(fno_account_ids, _send, self._batch_failed, self.suspend_service)
+
+    async def change_speed_many(self, changes: Sequence[tuple[str, str]]) -> list[Dict[str, Any]]:
+        """Batch profile change via ``POST /services/bulk-speed-change``."""
+        logger.info("Frogfoot API batch speed change: %d accounts", len(changes))
+
+        async def _send(chunk: Sequence[tuple[str, str]]) -> list[Dict[str, Any] | None]:
+            data = await self._post("/services/bulk-speed-change", {"changes": [
+                {"service_id": account_id, "speed_profile": profile} for account_id, profile in chunk
+            ]})
+            found = {item.get("service_id"): item for item in data.get("results", [])}
+            return [
+                self._batch_result(found.get(account_id), "CHANGED", new_profile=profile)
+                for account_id, profile in chunk
+            ]
+
+        return await self._batched(changes, _send, self._batch_failed, lambda change: self.change_speed(*change))
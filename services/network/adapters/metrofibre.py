@@ -7,7 +7,7 @@ major metros.  They provide a REST API for ISP partners.
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Sequence
 
 from .api_adapter import APIFNOAdapter
 
@@ -34,3 +34,74 @@ class MetroFibreAdapter(APIFNOAdapter):
         except Exception as exc:
             logger.warning("MetroFibre availability check failed: %s", exc)
             return {"fno": "metrofibre", "available": False, "error": str(exc), "adapter_type": "api"}
+
+    async def get_order_statuses(self, order_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Bulk status via ``GET /orders?references=...`` (``batch_size`` per call)."""
+
+        async def _send(refs: Sequence[str]) -> list[Dict[str, Any] | None]:
+            data = await self._get("/orders", {"references": ",".join(refs)})
+            found = {item.get("reference"): item for item in data.get("orders", [])}
+            return [
+                {
+                    "order_id": ref,
+                    "status": found[ref].get("status", "UNKNOWN"),
+                    "scheduled_date": found[ref].get("install_date"),
+                    "fno_account_id": found[ref].get("service_id"),
+                    "adapter_type": "api",
+                } if ref in found else None
+                for ref in refs
+            ]
+
+        results = await self._batched(order_ids, _send, lambda ref, error: {
+            "order_id": ref, "status": "UNKNOWN", "error": error, "adapter_type": "api",
+        }, self.get_order_status)
+        return dict(zip(order_ids, results))
+
+    async def check_availability_many(self, addresses: Sequence[str]) -> list[Dict[str, Any]]:
+        """Batch coverage via ``POST /coverage/batch``."""
+        logger.info("MetroFibre API batch coverage check: %d addresses", len(addresses))
+
+        async def _send(chunk: Sequence[str]) -> list[Dict[str, Any] | None]:
+            data = await self._post("/coverage/batch", {"addresses": list(chunk)})
+            found = {item.get("address"): item for item in data.get("results", [])}
+            return [
+                {
+                    "fno": "metrofibre",
+                    "available": found[address].get("covered", False),
+                    "technologies": found[address].get("technologies", ["GPON"]),
+                    "area_name": found[address].get("estate_name"),
+                    "adapter_type": "api",
+                } if address in found else None
+                for address in chunk
+            ]
+
+        return await self._batched(addresses, _send, lambda address, error: {
+            "fno": "metrofibre", "available": False, "error": error, "adapter_type": "api",
+        }, self.check_availability)
+
+    async def suspend_many(self, fno_account_ids: Sequence[str]) -> list[Dict[str, Any]]:
+        """Batch suspend via ``POST /services/bulk/suspend``."""
+        logger.info("MetroFibre API batch suspend: %d accounts", len(fno_account_ids))
+
+        async def _send(chunk: Sequence[str]) -> list[Dict[str, Any] | None]:
+            data = await self._post("/services/bulk/suspend", {"service_ids": list(chunk)})
+            found = {item.get("service_id"): item for item in data.get("results", [])}
+            return [self._batch_result(found.get(account_id), "SUSPENDED") for account_id in chunk]
+
+        return await self._batched(fno_account_ids, _send, self._batch_failed, self.suspend_service)
+
+    async def change_speed_many(self, changes: Sequence[tuple[str, str]]) -> list[Dict[str, Any]]:
+        """Batch profile change via ``POST /services/bulk/speed``."""
+        logger.info("MetroFibre API batch speed change: %d accounts", len(changes))
+
+        async def _send(chunk: Sequence[tuple[str, str]]) -> list[Dict[str, Any] | None]:
+            data = await self._post("/services/bulk/speed", {"changes": [
+                {"service_id": account_id, "profile": profile} for account_id, profile in chunk
+            ]})
+            found = {item.get("service_id"): item for item in data.get("results", [])}
+            return [
+                self._batch_result(found.get(account_id), "CHANGED", new_profile=profile)
+                for account_id, profile in chunk
+            ]
+
+        return await self._batched(changes, _send, self._batch_failed, lambda change: self.change_speed(*change))
@@ -7,7 +7,7 @@ Western Cape.  They provide a REST API for ISP partner provisioning.
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Sequence
 
 from .api_adapter import APIFNOAdapter
 
@@ -34,3 +34,52 @@ class OctotelAdapter(APIFNOAdapter):
         except Exception as exc:
             logger.warning("Octotel availability check failed: %s", exc)
             return {"fno": "octotel", "available": False, "error": str(exc), "adapter_type": "api"}
+
+    async def check_availability_many(self, addresses: Sequence[str]) -> list[Dict[str, Any]]:
+        """Batch coverage via ``POST /coverage/lookup/batch``."""
+        logger.info("Octotel API batch coverage check: %d addresses", len(addresses))
+
+        async def _send(chunk: Sequence[str]) -> list[Dict[str, Any] | None]:
+            data = await self._post("/coverage/lookup/batch", {"addresses": list(chunk)})
+            found = {item.get("address"): item for item in data.get("results", [])}
+            return [
+                {
+                    "fno": "octotel",
+                    "available": found[address].get("fibre_available", False),
+                    "technologies": found[address].get("technologies", ["GPON"]),
+                    "area_name": found[address].get("zone_name"),
+                    "adapter_type": "api",
+                } if address in found else None
+                for address in chunk
+            ]
+
+        return await self._batched(addresses, _send, lambda address, error: {
+            "fno": "octotel", "available": False, "error": error, "adapter_type": "api",
+        }, self.check_availability)
+
+    async def suspend_many(self, fno_account_ids: Sequence[str]) -> list[Dict[str, Any]]:
+        """Batch suspend via ``POST /services/batch/suspend``."""
+        logger.info("Octotel API batch suspend: %d accounts", len(fno_account_ids))
+
+        async def _send(chunk: Sequence[str]) -> list[Dict[str, Any] | None]:
+            data = await self._post("/services/batch/suspend", {"account_numbers": list(chunk)})
+            found = {item.get("account_number"): item for item in data.get("results", [])}
+            return [self._batch_result(found.get(account_id), "SUSPENDED") for account_id in chunk]
+
+        return await self._batched(fno_account_ids, _send, self._batch_failed, self.suspend_service)
+
+    async def change_speed_many(self, changes: Sequence[tuple[str, str]]) -> list[Dict[str, Any]]:
+        """Batch profile change via ``POST /services/batch/speed``."""
+        logger.info("Octotel API batch speed change: %d accounts", len(changes))
+
+        async def _send(chunk: Sequence[tuple[str, str]]) -> list[Dict[str, Any] | None]:
+            data = await self._post("/services/batch/speed", {"changes": [
+                {"account_number": account_id, "profile": profile} for account_id, profile in chunk
+            ]})
+            found = {item.get("account_number"): item for item in data.get("results", [])}
+            return [
+                self._batch_result(found.get(account_id), "CHANGED", new_profile=profile)
+                for account_id, profile in chunk
+            ]
+
+        return await self._batched(changes, _send, self._batch_failed, lambda change: self.change_speed(*change))
@@ -32,7 +32,7 @@ class OpenserveAdapter(BrowserFNOAdapter):
 
     async def check_availability(self, address: str) -> Dict[str, Any]:
         logger.info("Openserve portal coverage check: %s", address)
-        await self._simulate_portal("feasibility_check", address=address)
+        await self._run_portal("feasibility_check", address=address)
         return {
             "fno": "openserve",
             "available": True,
@@ -41,9 +41,11 @@ class OpenserveAdapter(BrowserFNOAdapter):
             "message": "Openserve coverage confirmed via Connect portal",
         }
 
-    async def place_order(self, customer_data: Dict[str, Any], plan_id: str) -> Dict[str, Any]:
+    async def place_order(
+        self, customer_data: Dict[str, Any], plan_id: str, client_reference: str | None = None,
+    ) -> Dict[str, Any]:
         logger.info("Openserve portal order: plan=%s", plan_id)
-        await self._simulate_portal("create_order", customer=customer_data, plan=plan_id)
+        await self._run_portal("create_order", customer=customer_data, plan=plan_id)
         return {
             "status": "QUEUED_ON_PORTAL",
             "order_id": f"OS-{id(self)}",
@@ -0,0 +1,67 @@
+"""Process-wide FNO adapter instances, built once from environment config.
+
+Shared by the API routes and the job worker so both reuse the same pooled
+HTTP clients (``transport.py``) and warm browser contexts
+(``browser_pool.py``).
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Optional
+
+from .base import FNOAdapter
+from .browser_pool import browser_pool
+from .factory import FNOFactory
+from .transport import close_transports
+
+_fno_configs: Optional[Dict[str, Dict[str, Any]]] = None
+_adapters: Dict[str, FNOAdapter] = {}
+
+
+def load_fno_configs() -> Dict[str, Dict[str, Any]]:
+    """Load FNO connection configs from environment variables."""
+    return {
+        "vumatel": {
+            "api_key": os.getenv("FNO_VUMATEL_API_KEY", ""),
+            "base_url": os.getenv("FNO_VUMATEL_BASE_URL", "https://api.vumatel.co.za/v1"),
+        },
+        "openserve": {
+            "portal_url": os.getenv("FNO_OPENSERVE_PORTAL_URL", "https://connect.openserve.co.za"),
+            "credentials": {
+                "user": os.getenv("FNO_OPENSERVE_USER", ""),
+                "pass": os.getenv("FNO_OPENSERVE_PASS", ""),
+            },
+        },
+        "metrofibre": {
+            "api_key": os.getenv("FNO_METROFIBRE_API_KEY", ""),
+            "base_url": os.getenv("FNO_METROFIBRE_BASE_URL", "https://api.metrofibre.co.za/v1"),
+        },
+        "frogfoot": {
+            "api_key": os.getenv("FNO_FROGFOOT_API_KEY", ""),
+            "base_url": os.getenv("FNO_FROGFOOT_BASE_URL", "https://api.frogfoot.com/v2"),
+        },
+        "octotel": {
+            "api_key": os.getenv("FNO_OCTOTEL_API_KEY", ""),
+            "base_url": os.getenv("FNO_OCTOTEL_BASE_URL", "https://api.octotel.co.za/v1"),
+        },
+    }
+
+
+def get_adapter(fno_provider: str) -> FNOAdapter:
+    """Return the long-lived adapter for ``fno_provider`` (built on first use)."""
+    global _fno_configs
+    adapter = _adapters.get(fno_provider)
+    if adapter is None:
+        if _fno_configs is None:
+            _fno_configs = load_fno_configs()
+        adapter = FNOFactory.get_adapter(fno_provider, _fno_configs.get(fno_provider, {}))
+        _adapters[fno_provider] = adapter
+    return adapter
+
+
+async def close_adapters() -> None:
+    """Close pooled FNO HTTP clients and browser contexts (shutdown)."""
+    _adapters.clear()
+    await close_transports()
+    await browser_pool.close()
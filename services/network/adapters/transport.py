@@ -0,0 +1,255 @@
+"""Shared HTTP transport for API-based FNO adapters.
+
+One ``FNOTransport`` per FNO owns a long-lived, pooled ``httpx.AsyncClient``
+(HTTP/2 when the ``h2`` package is installed) and an ``asyncio.Semaphore``
+sized to the operator's API quota, so concurrent coverage checks and order
+calls share connections instead of opening a new client per request.
+
+Retries use exponential backoff with full jitter (``Retry-After`` is honoured
+on 429):
+
+  - 429 and connection failures are retried for every method (the request
+    was not processed);
+  - 5xx and read timeouts are retried only for GET and for POSTs carrying
+    an ``Idempotency-Key``, so an order POST is never submitted twice.
+
+:func:`is_transient` tells callers whether a request that still failed is
+worth another attempt later (the network worker re-queues those jobs).
+
+Latency per ``(fno, method, endpoint)`` is recorded in-process and exposed
+by :func:`metrics_snapshot` (``GET /fno/metrics``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    _HTTP2_AVAILABLE = False
+
+FNO_HTTP_TIMEOUT = float(os.getenv("FNO_HTTP_TIMEOUT_SECONDS", "30"))
+FNO_HTTP_RETRIES = int(os.getenv("FNO_HTTP_RETRIES", "3"))
+FNO_HTTP2 = os.getenv("FNO_HTTP2", "true").lower() == "true"
+FNO_DEFAULT_CONCURRENCY = int(os.getenv("FNO_DEFAULT_MAX_CONCURRENCY", "4"))
+
+# Concurrent in-flight requests allowed per operator (partner API quotas);
+# override with FNO_<NAME>_MAX_CONCURRENCY.
+_FNO_CONCURRENCY_DEFAULTS = {
+    "vumatel": 10,
+    "metrofibre": 5,
+    "frogfoot": 5,
+    "octotel": 4,
+}
+
+_LATENCY_SAMPLES = 512
+_RETRY_STATUSES = {500, 502, 503, 504}
+
+_transports: dict[str, "FNOTransport"] = {}
+
+
+def is_transient(exc: Exception) -> bool:
+    """Timeouts, connection errors, 429 and 5xx: the FNO may accept a later attempt."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code in _RETRY_STATUSES
+    return isinstance(exc, httpx.TransportError)
+
+
+def max_concurrency(fno_name: str) -> int:
+    env = os.getenv(f"FNO_{fno_name.upper()}_MAX_CONCURRENCY")
+    if env:
+        return max(1, int(env))
+    return _FNO_CONCURRENCY_DEFAULTS.get(fno_name, FNO_DEFAULT_CONCURRENCY)
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+class EndpointStats:
+    """Call counts and a rolling window of latencies for one endpoint."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.samples: deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self.status_counts: dict[str, int] = {}
+
+    def record(self, elapsed_ms: float, status: str, error: bool) -> None:
+        self.calls += 1
+        self.errors += int(error)
+        self.total_ms += elapsed_ms
+        self.samples.append(elapsed_ms)
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.samples)
+
+        def _pct(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 1)
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else None,
+            "p50_ms": _pct(0.50),
+            "p95_ms": _pct(0.95),
+            "p99_ms": _pct(0.99),
+            "max_ms": round(ordered[-1], 1) if ordered else None,
+            "status": dict(self.status_counts),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Transport
+# ---------------------------------------------------------------------------
+
+class FNOTransport:
+    """Pooled client, concurrency limit, retries and metrics for one FNO."""
+
+    def __init__(self, fno_name: str, base_url: str, headers: dict[str, str]):
+        self.fno_name = fno_name
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers
+        self.limit = max_concurrency(fno_name)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stats: dict[tuple[str, str], EndpointStats] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=FNO_HTTP_TIMEOUT,
+                http2=FNO_HTTP2 and _HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=self.limit,
+                    max_keepalive_connections=self.limit,
+                ),
+            )
+        return self._client
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _stats(self, method: str, endpoint: str) -> EndpointStats:
+        key = (method, endpoint)
+        if key not in self.stats:
+            self.stats[key] = EndpointStats()
+        return self.stats[key]
+
+    @staticmethod
+    def _backoff(attempt: int, resp: Optional[httpx.Response] = None) -> float:
+        if resp is not None and resp.status_code == 429:
+            retry_after = resp.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), 30.0)
+        return random.uniform(0, min(0.5 * 2 ** attempt, 10.0))
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        endpoint: Optional[str] = None,
+        params: Optional[dict] = None,
+        json: Any = None,
+        headers: Optional[dict] = None,
+    ) -> dict:
+        """Send one request with retries; raises ``httpx.HTTPError`` on failure.
+
+        Only GETs and requests carrying an ``Idempotency-Key`` header are
+        retried after the request may have reached the FNO.
+        """
+        stats = self._stats(method, endpoint or path)
+        idempotent = method == "GET" or "Idempotency-Key" in (headers or {})
+
+        for attempt in range(FNO_HTTP_RETRIES + 1):
+            last = attempt == FNO_HTTP_RETRIES
+            resp: Optional[httpx.Response] = None
+            started = time.perf_counter()
+            try:
+                async with self.semaphore:
+                    started = time.perf_counter()
+                    resp = await self.client.request(method, path, params=params, json=json, headers=headers)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as exc:
+                stats.record((time.perf_counter() - started) * 1000, type(exc).__name__, True)
+                if last:
+                    raise
+            except httpx.TransportError as exc:
+                stats.record((time.perf_counter() - started) * 1000, type(exc).__name__, True)
+                if last or not idempotent:
+                    raise
+            else:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                retryable = resp.status_code == 429 or (idempotent and resp.status_code in _RETRY_STATUSES)
+                stats.record(elapsed_ms, str(resp.status_code), resp.status_code >= 400)
+                if not retryable or last:
+                    resp.raise_for_status()
+                    return resp.json() if resp.content else {}
+
+            stats.retries += 1
+            delay = self._backoff(attempt, resp)
+            logger.warning(
+                "FNO %s %s %s failed (attempt %d/%d), retrying in %.2fs",
+                self.fno_name, method, endpoint or path, attempt + 1, FNO_HTTP_RETRIES + 1, delay,
+            )
+            await asyncio.sleep(delay)
+
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+
+def get_transport(fno_name: str, base_url: str, headers: dict[str, str]) -> FNOTransport:
+    """Return the process-wide transport for ``fno_name`` (created on first use)."""
+    transport = _transports.get(fno_name)
+    if transport is None or transport.base_url != base_url.rstrip("/"):
+        transport = FNOTransport(fno_name, base_url, headers)
+        _transports[fno_name] = transport
+    return transport
+
+
+async def close_transports() -> None:
+    for transport in list(_transports.values()):
+        await transport.close()
+    _transports.clear()
+
+
+def metrics_snapshot() -> dict:
+    return {
+        name: {
+            "max_concurrency": t.limit,
+            "http2": FNO_HTTP2 and _HTTP2_AVAILABLE,
+            "endpoints": {
+                f"{method} {endpoint}": stats.snapshot()
+                for (method, endpoint), stats in sorted(t.stats.items())
+            },
+        }
+        for name, t in sorted(_transports.items())
+    }
@@ -8,7 +8,7 @@ REST API for coverage checks, order management, and provisioning.
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Sequence
 
 from .api_adapter import APIFNOAdapter
 
@@ -49,4 +49,76 @@ class VumatelAdapter(APIFNOAdapter):
                 "adapter_type": "api",
             }
         except Exception as exc:
-            return {"status": "FAILED", "error": str(exc), "adapter_type": "api"}
+            return self._failed(exc)
+
+    async def get_order_statuses(self, order_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Bulk status via ``POST /orders/status`` (up to ``batch_size`` references per call)."""
+
+        async def _send(refs: Sequence[str]) -> list[Dict[str, Any] | None]:
+            data = await self._post("/orders/status", {"order_references": list(refs)})
+            found = {item.get("order_reference"): item for item in data.get("orders", [])}
+            return [
+                {
+                    "order_id": ref,
+                    "status": found[ref].get("status", "UNKNOWN"),
+                    "scheduled_date": found[ref].get("installation_date"),
+                    "fno_account_id": found[ref].get("vumatel_account_id"),
+                    "adapter_type": "api",
+                } if ref in found else None
+                for ref in refs
+            ]
+
+        results = await self._batched(order_ids, _send, lambda ref, error: {
+            "order_id": ref, "status": "UNKNOWN", "error": error, "adapter_type": "api",
+        }, self.get_order_status)
+        return dict(zip(order_ids, results))
+
+    async def check_availability_many(self, addresses: Sequence[str]) -> list[Dict[str, Any]]:
+        """Batch feasibility via ``POST /feasibility/batch``."""
+        logger.info("Vumatel API batch coverage check: %d addresses", len(addresses))
+
+        async def _send(chunk: Sequence[str]) -> list[Dict[str, Any] | None]:
+            data = await self._post("/feasibility/batch", {"addresses": list(chunk)})
+            found = {item.get("address"): item for item in data.get("results", [])}
+            return [
+                {
+                    "fno": "vumatel",
+                    "available": found[address].get("feasible", False),
+                    "technologies": found[address].get("technologies", ["GPON"]),
+                    "area_name": found[address].get("precinct_name"),
+                    "adapter_type": "api",
+                } if address in found else None
+                for address in chunk
+            ]
+
+        return await self._batched(addresses, _send, lambda address, error: {
+            "fno": "vumatel", "available": False, "error": error, "adapter_type": "api",
+        }, self.check_availability)
+
+    async def suspend_many(self, fno_account_ids: Sequence[str]) -> list[Dict[str, Any]]:
+        """Batch suspend via ``POST /services/suspend``."""
+        logger.info("Vumatel API batch suspend: %d accounts", len(fno_account_ids))
+
+        async def _send(chunk: Sequence[str]) -> list[Dict[str, Any] | None]:
+            data = await self._post("/services/suspend", {"vumatel_account_ids": list(chunk)})
+            found = {item.get("vumatel_account_id"): item for item in data.get("results", [])}
+            return [self._batch_result(found.get(account_id), "SUSPENDED") for account_id in chunk]
+
+        return await self._batched(fno_account_ids, _send, self._batch_failed, self.suspend_service)
+
+    async def change_speed_many(self, changes: Sequence[tuple[str, str]]) -> list[Dict[str, Any]]:
+        """Batch profile change via ``POST /services/speed``."""
+        logger.info("Vumatel API batch speed change: %d accounts", len(changes))
+
+        async def _send(chunk: Sequence[tuple[str, str]]) -> list[Dict[str, Any] | None]:
+            data = await self._post("/services/speed", {"changes": [
+                {"vumatel_account_id": account_id, "profile": profile} for account_id, profile in chunk
+            ]})
+            found = {item.get("vumatel_account_id"): item for item in data.get("results", [])}
+            return [
+                self._batch_result(found.get(account_id), "CHANGED", new_profile=profile)
+                for account_id, profile in chunk
+            ]
+
+        return await self._batched(changes, _send, self._batch_failed, lambda change: self.change_speed(*change))
+
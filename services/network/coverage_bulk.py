@@ -0,0 +1,334 @@
+"""Bulk coverage checks for address lists (estate / complex sales drives).
+
+The upload (CSV with a header row, or NDJSON) is parsed while it is being
+received and every address is dispatched as soon as its line arrives:
+
+  1. addresses are deduplicated on the live-cache location key (geohash of
+     the coordinates, else the normalized address) plus postal code — each
+     unique location is checked once and duplicates share the answer;
+  2. each location is answered from the footprint/point index (when it has
+     coordinates), then from admin ``CoverageArea`` rows matching its postal
+     code, and only the remaining FNOs go to live adapter calls through the
+     result cache;
+  3. live calls run under a per-FNO semaphore sized like the pooled HTTP
+     transport (``max_concurrency``) and at most
+     ``COVERAGE_BULK_MAX_INFLIGHT`` locations are checked at once.
+
+Results are streamed back as NDJSON in completion order — one record per
+input line (``line`` gives the source position) followed by a summary.  The
+response starts once the CSV header is validated; a problem found later in
+the upload (too many addresses, a dropped connection) ends reading with an
+``error`` record.
+
+Columns / keys (case-insensitive): ``address`` (required), ``ref`` / ``id``,
+``latitude`` / ``lat``, ``longitude`` / ``lon`` / ``lng``, ``postal_code``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select
+
+from services.common.streams import iter_lines
+from services.network.adapters.transport import max_concurrency
+from services.network.coverage_cache import location_key
+from services.network.coverage_check import area_result, index_result, live_check
+from services.network.coverage_index import lookup_coverage
+from services.network.database import get_session
+from services.network.models import CoverageArea
+from services.network.schemas import CoverageResult
+
+logger = logging.getLogger("network.coverage_bulk")
+
+COVERAGE_BULK_MAX_ADDRESSES = int(os.getenv("COVERAGE_BULK_MAX_ADDRESSES", "20000"))
+COVERAGE_BULK_MAX_INFLIGHT = int(os.getenv("COVERAGE_BULK_MAX_INFLIGHT", "200"))
+BULK_FORMATS = ("csv", "ndjson")
+
+_ADDRESS_KEYS = ("address", "full_address", "street_address")
+_REF_KEYS = ("ref", "id", "reference", "external_id")
+_LAT_KEYS = ("latitude", "lat")
+_LON_KEYS = ("longitude", "lon", "lng")
+_POSTAL_KEYS = ("postal_code", "postcode", "zip")
+
+
+@dataclass
+class BulkAddress:
+    line: int
+    address: str = ""
+    ref: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    postal_code: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class BulkSummary:
+    lines: int = 0
+    unique: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    available: int = 0
+    by_source: dict = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "summary": True,
+            "lines": self.lines,
+            "unique_locations": self.unique,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "with_coverage": self.available,
+            "answers_by_source": self.by_source,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Incremental parsing
+# ---------------------------------------------------------------------------
+
+def _pick(record: dict, keys: tuple[str, ...]) -> Optional[str]:
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return str(value).strip()
+    return None
+
+
+def _coordinate(raw: Optional[str], limit: float) -> Optional[float]:
+    if raw is None:
+        return None
+    value = float(raw)
+    if not -limit <= value <= limit:
+        raise ValueError(f"coordinate out of range: {raw}")
+    return value
+
+
+class RowParser:
+    """Turns raw lines of one upload into :class:`BulkAddress` records."""
+
+    def __init__(self, fmt: str):
+        if fmt not in BULK_FORMATS:
+            raise ValueError(f"format must be one of {BULK_FORMATS}")
+        self.fmt = fmt
+        self.header: Optional[list[str]] = None
+
+    def _record(self, line: str) -> Optional[dict]:
+        if self.fmt == "ndjson":
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("each NDJSON line must be an object")
+            return {str(k).strip().lower(): v for k, v in data.items()}
+
+        fields = next(csv.reader([line]))
+        if self.header is None:
+            self.header = [f.strip().lower().replace(" ", "_") for f in fields]
+            if not any(k in self.header for k in _ADDRESS_KEYS):
+                raise ValueError("CSV header must include an 'address' column")
+            return None
+        return dict(zip(self.header, fields))
+
+    def parse(self, number: int, line: str) -> Optional[BulkAddress]:
+        if not line.strip():
+            return None
+        try:
+            record = self._record(line)
+        except (json.JSONDecodeError, csv.Error) as exc:
+            return BulkAddress(line=number, error=f"unparseable line: {exc}")
+        if record is None:
+            return None
+
+        row = BulkAddress(line=number, ref=_pick(record, _REF_KEYS), postal_code=_pick(record, _POSTAL_KEYS))
+        row.address = _pick(record, _ADDRESS_KEYS) or ""
+        try:
+            row.latitude = _coordinate(_pick(record, _LAT_KEYS), 90)
+            row.longitude = _coordinate(_pick(record, _LON_KEYS), 180)
+        except ValueError as exc:
+            row.error = str(exc)
+        if len(row.address) < 5:
+            row.error = row.error or "address is missing or too short"
+        return row
+
+
+# ---------------------------------------------------------------------------
+# Bulk check
+# ---------------------------------------------------------------------------
+
+class BulkCoverageCheck:
+    """One bulk request: accepts rows as they are parsed, yields results as they finish."""
+
+    def __init__(self, tenant_id: uuid.UUID, providers: list[str]):
+        self.tenant_id = tenant_id
+        self.providers = providers
+        self.summary = BulkSummary()
+        self._areas: dict[str, list[CoverageArea]] = {}
+        self._locations: dict[tuple, asyncio.Task] = {}
+        self._rows: set[asyncio.Task] = set()
+        self._out: asyncio.Queue = asyncio.Queue()
+        self._fno_limits = {p: asyncio.Semaphore(max_concurrency(p)) for p in providers}
+        self._inflight = asyncio.Semaphore(COVERAGE_BULK_MAX_INFLIGHT)
+        self.reader: Optional[asyncio.Task] = None
+
+    def _load_areas(self) -> dict[str, list[CoverageArea]]:
+        by_postal: dict[str, list[CoverageArea]] = {}
+        with get_session() as session:
+            areas = session.execute(
+                select(CoverageArea).where(
+                    CoverageArea.tenant_id == self.tenant_id,
+                    CoverageArea.is_active.is_(True),
+                    CoverageArea.fno_provider.in_(self.providers),
+                    CoverageArea.postal_codes.is_not(None),
+                )
+            ).scalars().all()
+            session.expunge_all()
+        for area in areas:
+            for code in area.postal_codes or []:
+                by_postal.setdefault(code.strip(), []).append(area)
+        return by_postal
+
+    async def start(self, stream: AsyncIterator[bytes], fmt: str) -> None:
+        """Begin consuming the upload, dispatching each address as its line arrives.
+
+        Returns once a CSV header has been read and validated (a bad header
+        raises ``ValueError``); the remaining lines are read by a background
+        task, so results can be streamed while the upload is still arriving.
+        """
+        parser = RowParser(fmt)
+        self._areas = await asyncio.to_thread(self._load_areas)
+        lines = iter_lines(stream)
+        number = 0
+        if fmt == "csv":
+            async for line in lines:
+                number += 1
+                self._parse(parser, number, line)
+                if parser.header is not None:
+                    break
+        self.reader = asyncio.create_task(self._read(parser, lines, number))
+
+    async def _read(self, parser: RowParser, lines: AsyncIterator[str], number: int) -> None:
+        try:
+            async for line in lines:
+                number += 1
+                self._parse(parser, number, line)
+        except Exception as exc:
+            # The response has started: report the problem in the stream.
+            logger.warning("Bulk coverage upload stopped at line %d: %s", number, exc)
+            await self._out.put({"line": number, "status": "error", "message": str(exc)})
+
+    def _parse(self, parser: RowParser, number: int, line: str) -> None:
+        row = parser.parse(number, line)
+        if row is None:
+            return
+        if self.summary.lines >= COVERAGE_BULK_MAX_ADDRESSES:
+            raise ValueError(f"too many addresses (max {COVERAGE_BULK_MAX_ADDRESSES})")
+        self._submit(row)
+
+    def _submit(self, row: BulkAddress) -> None:
+        self.summary.lines += 1
+        if row.error:
+            self.summary.invalid += 1
+            self._out.put_nowait(self._record(row, status="invalid", message=row.error))
+            return
+
+        key = (location_key(row.address, row.latitude, row.longitude), row.postal_code)
+        location = self._locations.get(key)
+        duplicate = location is not None
+        if duplicate:
+            self.summary.duplicates += 1
+        else:
+            self.summary.unique += 1
+            location = asyncio.create_task(self._check(row))
+            self._locations[key] = location
+
+        task = asyncio.create_task(self._emit(row, location, duplicate))
+        self._rows.add(task)
+        task.add_done_callback(self._rows.discard)
+
+    async def _check(self, row: BulkAddress) -> list[CoverageResult]:
+        async with self._inflight:
+            results: list[CoverageResult] = []
+            remaining = list(self.providers)
+
+            if row.latitude is not None and row.longitude is not None:
+                indexed = await lookup_coverage(self.tenant_id, row.latitude, row.longitude, remaining)
+                results.extend(index_result(p, hit) for p, hit in indexed.items())
+                remaining = [p for p in remaining if p not in indexed]
+
+            for area in self._areas.get(row.postal_code or "", []):
+                if area.fno_provider in remaining:
+                    remaining.remove(area.fno_provider)
+                    results.append(area_result(area))
+
+            async def _live(provider: str) -> CoverageResult:
+                async with self._fno_limits[provider]:
+                    return await live_check(self.tenant_id, provider, row.address, row.latitude, row.longitude)
+
+            results.extend(await asyncio.gather(*[_live(p) for p in remaining]))
+            results.sort(key=lambda r: (not r.available, r.fno_provider))
+            return results
+
+    async def _emit(self, row: BulkAddress, location: asyncio.Task, duplicate: bool) -> None:
+        try:
+            results = await asyncio.shield(location)
+        except Exception as exc:
+            logger.warning("Bulk coverage check failed for line %d: %s", row.line, exc)
+            await self._out.put(self._record(row, status="error", message=str(exc)))
+            return
+        for result in results:
+            self.summary.by_source[result.adapter_type] = self.summary.by_source.get(result.adapter_type, 0) + 1
+        if any(r.available for r in results):
+            self.summary.available += 1
+        await self._out.put(self._record(row, status="ok", results=results, duplicate=duplicate))
+
+    @staticmethod
+    def _record(
+        row: BulkAddress,
+        status: str,
+        results: Optional[list[CoverageResult]] = None,
+        duplicate: bool = False,
+        message: Optional[str] = None,
+    ) -> dict:
+        record = {"line": row.line, "ref": row.ref, "address": row.address, "status": status}
+        if duplicate:
+            record["duplicate"] = True
+        if message:
+            record["message"] = message
+        if results is not None:
+            record["results"] = [r.model_dump() for r in results]
+        return record
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """NDJSON results in completion order, then the summary line."""
+        try:
+            while self._reading() or self._rows or not self._out.empty():
+                if self._out.empty():
+                    # Wake on the next queued result, when a row task ends or
+                    # when the upload has been read.
+                    getter = asyncio.ensure_future(self._out.get())
+                    waiting = {getter, *self._rows, *([self.reader] if self._reading() else [])}
+                    done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                    if getter not in done:
+                        getter.cancel()
+                        continue
+                    record = getter.result()
+                else:
+                    record = self._out.get_nowait()
+                yield json.dumps(record, default=str).encode() + b"\n"
+            yield json.dumps(self.summary.as_dict()).encode() + b"\n"
+        finally:
+            self.cancel()
+
+    def _reading(self) -> bool:
+        return self.reader is not None and not self.reader.done()
+
+    def cancel(self) -> None:
+        for task in [*([self.reader] if self.reader else []), *self._rows, *self._locations.values()]:
+            task.cancel()
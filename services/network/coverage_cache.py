@@ -0,0 +1,213 @@
+"""Process-local cache of live FNO ``check_availability`` results.
+
+Entries are keyed by ``(tenant, FNO, location)`` where the location is the
+geohash of the coordinates when the caller has them, otherwise the
+normalized address (case, punctuation and common street abbreviations
+folded), so "12 Main Rd, Sandton" and "12 main road sandton" share a slot.
+
+  - **Per-FNO TTL** — ``COVERAGE_CACHE_TTL_SECONDS`` (override per FNO with
+    ``COVERAGE_CACHE_<FNO>_TTL_SECONDS``) for positive results,
+    ``COVERAGE_CACHE_NEGATIVE_TTL_SECONDS`` for "not available".  Adapter
+    errors are never cached.
+  - **Stale-while-revalidate** — for ``COVERAGE_CACHE_STALE_SECONDS`` after
+    expiry the old result is still returned while a background task
+    refreshes it.
+  - **Single flight** — concurrent misses for the same key share one
+    adapter call, so a burst of identical landing-page lookups costs one
+    FNO request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("network.coverage_cache")
+
+COVERAGE_CACHE_TTL_SECONDS = float(os.getenv("COVERAGE_CACHE_TTL_SECONDS", "86400"))
+COVERAGE_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("COVERAGE_CACHE_NEGATIVE_TTL_SECONDS", "3600"))
+COVERAGE_CACHE_STALE_SECONDS = float(os.getenv("COVERAGE_CACHE_STALE_SECONDS", "3600"))
+COVERAGE_CACHE_MAX_ENTRIES = int(os.getenv("COVERAGE_CACHE_MAX_ENTRIES", "100000"))
+COVERAGE_CACHE_GEOHASH_PRECISION = int(os.getenv("COVERAGE_CACHE_GEOHASH_PRECISION", "8"))  # ~38 m
+
+Fetch = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+# ---------------------------------------------------------------------------
+# Keys
+# ---------------------------------------------------------------------------
+
+_ABBREVIATIONS = {
+    "rd": "road",
+    "st": "street",
+    "str": "street",
+    "ave": "avenue",
+    "av": "avenue",
+    "dr": "drive",
+    "cres": "crescent",
+    "cr": "crescent",
+    "ln": "lane",
+    "cl": "close",
+    "ct": "court",
+    "pl": "place",
+    "blvd": "boulevard",
+    "hwy": "highway",
+    "ext": "extension",
+    "nr": "number",
+    "no": "number",
+}
+_DROP_TOKENS = {"south", "africa", "za", "rsa"}
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_address(address: str) -> str:
+    """Fold an address to a canonical cache key form."""
+    tokens = _NON_ALNUM.sub(" ", address.lower()).split()
+    while tokens and tokens[-1] in _DROP_TOKENS:
+        tokens.pop()
+    return " ".join(_ABBREVIATIONS.get(t, t) for t in tokens)
+
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat: float, lon: float, precision: int = COVERAGE_CACHE_GEOHASH_PRECISION) -> str:
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            value = (value << 1) | (lon >= mid)
+            lon_lo, lon_hi = (mid, lon_hi) if lon >= mid else (lon_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            value = (value << 1) | (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def location_key(address: str, lat: Optional[float] = None, lon: Optional[float] = None) -> str:
+    if lat is not None and lon is not None:
+        return "gh:" + geohash(lat, lon)
+    return "addr:" + normalize_address(address)
+
+
+def fno_ttl(fno_provider: str) -> float:
+    env = os.getenv(f"COVERAGE_CACHE_{fno_provider.upper()}_TTL_SECONDS")
+    return float(env) if env else COVERAGE_CACHE_TTL_SECONDS
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _Entry:
+    data: Dict[str, Any]
+    expires_at: float
+
+
+class CoverageResultCache:
+    def __init__(self, max_entries: int = COVERAGE_CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _store(self, key: tuple, fno_provider: str, data: Dict[str, Any]) -> None:
+        if data.get("error"):
+            return
+        ttl = fno_ttl(fno_provider) if data.get("available") else COVERAGE_CACHE_NEGATIVE_TTL_SECONDS
+        self._entries[key] = _Entry(data, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _fetch(self, key: tuple, fno_provider: str, fetch: Fetch) -> asyncio.Task:
+        """Start (or join) the single in-flight fetch for ``key``."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+
+        async def _run() -> Dict[str, Any]:
+            try:
+                data = await fetch()
+                self._store(key, fno_provider, data)
+                return data
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.create_task(_run())
+        task.add_done_callback(_log_fetch_failure)
+        self._inflight[key] = task
+        return task
+
+    async def get_or_fetch(
+        self,
+        tenant_id: uuid.UUID,
+        fno_provider: str,
+        address: str,
+        fetch: Fetch,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+    ) -> tuple[Dict[str, Any], str]:
+        """Return ``(data, state)`` where state is ``hit`` / ``stale`` / ``miss``."""
+        key = (tenant_id, fno_provider, location_key(address, lat, lon))
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            if now < entry.expires_at:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.data, "hit"
+            if now < entry.expires_at + COVERAGE_CACHE_STALE_SECONDS:
+                self.stale_hits += 1
+                self._fetch(key, fno_provider, fetch)
+                return entry.data, "stale"
+            del self._entries[key]
+
+        self.misses += 1
+        # shield: a cancelled caller must not cancel the fetch others share
+        return await asyncio.shield(self._fetch(key, fno_provider, fetch)), "miss"
+
+    def invalidate(self, tenant_id: Optional[uuid.UUID] = None) -> None:
+        if tenant_id is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == tenant_id]:
+            del self._entries[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+def _log_fetch_failure(task: asyncio.Task) -> None:
+    # Also marks the exception retrieved when every waiter has gone away.
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug("Coverage fetch failed: %s", task.exception())
+
+
+coverage_cache = CoverageResultCache()
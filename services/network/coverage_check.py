@@ -0,0 +1,116 @@
+"""Per-provider coverage answers shared by the single and bulk check routes.
+
+Each helper turns one source of coverage truth — the footprint/point index,
+an admin ``CoverageArea`` row or a live (cached) FNO adapter call — into a
+:class:`CoverageResult`.  Live calls that miss the result cache are timed per
+FNO; :func:`is_slow` flags providers whose recent p95 exceeds
+``COVERAGE_SLOW_P95_MS`` so deadline-bounded checks stop waiting for them.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+import uuid
+from typing import Optional
+
+from services.network.adapters.registry import get_adapter
+from services.network.adapters.transport import EndpointStats
+from services.network.coverage_cache import coverage_cache
+from services.network.coverage_index import CoverageHit
+from services.network.models import CoverageArea
+from services.network.schemas import CoverageResult
+
+logger = logging.getLogger("network.coverage_check")
+
+COVERAGE_SLOW_P95_MS = float(os.getenv("COVERAGE_SLOW_P95_MS", "4000"))
+COVERAGE_SLOW_MIN_SAMPLES = int(os.getenv("COVERAGE_SLOW_MIN_SAMPLES", "20"))
+
+_live_latency: dict[str, EndpointStats] = {}
+
+
+def is_slow(provider: str) -> bool:
+    """True when enough recent live checks put ``provider``'s p95 over the limit."""
+    stats = _live_latency.get(provider)
+    if stats is None or len(stats.samples) < COVERAGE_SLOW_MIN_SAMPLES:
+        return False
+    return (stats.snapshot()["p95_ms"] or 0) > COVERAGE_SLOW_P95_MS
+
+
+def latency_snapshot() -> dict:
+    return {
+        provider: {**stats.snapshot(), "slow": is_slow(provider)}
+        for provider, stats in sorted(_live_latency.items())
+    }
+
+
+def index_result(provider: str, hit: Optional[CoverageHit]) -> CoverageResult:
+    if hit is None:
+        return CoverageResult(fno_provider=provider, available=False, adapter_type="index")
+    return CoverageResult(
+        fno_provider=provider,
+        available=True,
+        technology=hit.technology,
+        max_download_mbps=hit.max_download_mbps,
+        area_name=hit.area_name,
+        adapter_type="index",
+        message=f"Matched imported {hit.source}",
+    )
+
+
+def area_result(area: CoverageArea) -> CoverageResult:
+    return CoverageResult(
+        fno_provider=area.fno_provider,
+        available=True,
+        technology=area.technology,
+        max_download_mbps=area.max_download_mbps,
+        area_name=area.area_name,
+        adapter_type="cache",
+    )
+
+
+async def live_check(
+    tenant_id: uuid.UUID,
+    provider: str,
+    address: str,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+) -> CoverageResult:
+    """``check_availability`` through the live result cache; never raises."""
+    started = time.perf_counter()
+    try:
+        adapter = get_adapter(provider)
+        data, state = await coverage_cache.get_or_fetch(
+            tenant_id,
+            provider,
+            address,
+            lambda: adapter.check_availability(address),
+            latitude,
+            longitude,
+        )
+        if state == "miss":
+            _live_latency.setdefault(provider, EndpointStats()).record(
+                (time.perf_counter() - started) * 1000, "error" if data.get("error") else "ok", bool(data.get("error")),
+            )
+        adapter_type = data.get("adapter_type", "api") if state == "miss" else "cache"
+        return CoverageResult(
+            fno_provider=provider,
+            available=data.get("available", False),
+            technology=(data.get("technologies") or [None])[0] if data.get("technologies") else None,
+            max_download_mbps=data.get("max_speed_mbps"),
+            area_name=data.get("area_name"),
+            adapter_type=adapter_type,
+            message=data.get("message"),
+        )
+    except Exception as exc:
+        _live_latency.setdefault(provider, EndpointStats()).record(
+            (time.perf_counter() - started) * 1000, "exception", True,
+        )
+        logger.warning("Live coverage check failed for %s: %s", provider, exc)
+        return CoverageResult(
+            fno_provider=provider,
+            available=False,
+            adapter_type="error",
+            message=str(exc),
+        )
@@ -0,0 +1,125 @@
+"""Deadline-bounded fan-out of live coverage checks.
+
+``POST /coverage/check`` starts a live check for every unanswered FNO at once
+and waits at most the request deadline (``deadline_ms``, default
+``COVERAGE_CHECK_DEADLINE_MS``).  Providers that :func:`is_slow` flags are not
+waited for at all.  Whatever has not finished is returned as a ``pending``
+result carrying a poll token; the checks keep running in the background (and
+warm the result cache) and their answers can be fetched with
+``GET /coverage/check/{token}`` or streamed with
+``GET /coverage/check/{token}/events`` (SSE).
+
+Late results live in this API process for ``COVERAGE_LATE_RESULT_TTL_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import secrets
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from services.network.coverage_check import is_slow, live_check
+from services.network.schemas import CoverageResult
+
+logger = logging.getLogger("network.coverage_fanout")
+
+COVERAGE_CHECK_DEADLINE_MS = int(os.getenv("COVERAGE_CHECK_DEADLINE_MS", "2500"))
+COVERAGE_LATE_RESULT_TTL_SECONDS = float(os.getenv("COVERAGE_LATE_RESULT_TTL_SECONDS", "300"))
+
+
+@dataclass
+class PendingCheck:
+    token: str
+    tenant_id: uuid.UUID
+    tasks: dict[str, asyncio.Task]
+    created_at: float = field(default_factory=time.monotonic)
+
+    def results(self) -> list[CoverageResult]:
+        return [
+            task.result() if task.done() and not task.cancelled() else pending_result(provider, self.token)
+            for provider, task in self.tasks.items()
+        ]
+
+    async def iter_results(self) -> AsyncIterator[CoverageResult]:
+        """Yield each late result as soon as it is available."""
+        remaining = {task: provider for provider, task in self.tasks.items()}
+        while remaining:
+            done, _ = await asyncio.wait(list(remaining), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                provider = remaining.pop(task)
+                if task.cancelled():
+                    yield CoverageResult(fno_provider=provider, available=False, adapter_type="error",
+                                         message="Check expired before completing")
+                else:
+                    yield task.result()
+
+
+_pending: dict[str, PendingCheck] = {}
+
+
+def pending_result(provider: str, token: str) -> CoverageResult:
+    return CoverageResult(
+        fno_provider=provider,
+        available=False,
+        adapter_type="pending",
+        message="Still checking; poll the token for the result",
+        poll_token=token,
+    )
+
+
+def _expire() -> None:
+    cutoff = time.monotonic() - COVERAGE_LATE_RESULT_TTL_SECONDS
+    for token in [t for t, check in _pending.items() if check.created_at < cutoff]:
+        for task in _pending.pop(token).tasks.values():
+            task.cancel()
+
+
+def get_pending(tenant_id: uuid.UUID, token: str) -> Optional[PendingCheck]:
+    _expire()
+    check = _pending.get(token)
+    if check is None or check.tenant_id != tenant_id:
+        return None
+    return check
+
+
+async def fan_out(
+    tenant_id: uuid.UUID,
+    providers: list[str],
+    address: str,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    deadline_ms: Optional[int] = None,
+) -> list[CoverageResult]:
+    """Live-check ``providers``; results not ready by the deadline come back ``pending``.
+
+    ``deadline_ms=0`` waits for every provider (no hedging).
+    """
+    deadline_ms = COVERAGE_CHECK_DEADLINE_MS if deadline_ms is None else deadline_ms
+    tasks = {
+        p: asyncio.create_task(live_check(tenant_id, p, address, latitude, longitude))
+        for p in providers
+    }
+    if deadline_ms <= 0:
+        return list(await asyncio.gather(*tasks.values()))
+
+    awaited = [t for p, t in tasks.items() if not is_slow(p)]
+    if awaited:
+        await asyncio.wait(awaited, timeout=deadline_ms / 1000)
+
+    late = {p: t for p, t in tasks.items() if not t.done()}
+    if not late:
+        return [t.result() for t in tasks.values()]
+
+    _expire()
+    token = secrets.token_urlsafe(16)
+    _pending[token] = PendingCheck(token=token, tenant_id=tenant_id, tasks=late)
+    logger.info("Coverage check returned with %d pending provider(s): %s", len(late), ", ".join(sorted(late)))
+    return [
+        pending_result(p, token) if p in late else t.result()
+        for p, t in tasks.items()
+    ]
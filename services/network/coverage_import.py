@@ -0,0 +1,266 @@
+"""Bulk import of FNO coverage footprints and serviceable points.
+
+Reads GeoJSON (``FeatureCollection`` / ``Feature`` / bare geometry) or KML
+(``Placemark`` with ``Polygon`` / ``MultiGeometry`` / ``Point``) files as
+published by FNOs:
+
+  - Polygon / MultiPolygon features become ``coverage_footprints`` rows;
+  - Point features become ``coverage_points`` rows (address from the
+    ``address`` / ``name`` property).
+
+Feature properties ``technology``, ``max_download_mbps`` / ``max_speed`` and
+``status`` (``planned`` points are stored as not serviceable) override the
+command-line defaults.  Rows are inserted in batches; ``--replace`` first
+deletes the rows previously imported from the same source file name.
+
+Usage::
+
+    python -m services.network.coverage_import --tenant <uuid> --fno vumatel \\
+        --technology gpon [--max-speed 1000] [--replace] footprints.kml [...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import uuid
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import IO, Iterator, Optional
+
+from sqlalchemy import delete, insert
+
+from services.network.coverage_index import geometry_bbox, invalidate
+from services.network.database import get_session
+from services.network.models import CoverageFootprint, CoveragePoint
+from services.network.schemas import FNO_PROVIDERS, TECHNOLOGY_TYPES
+
+logger = logging.getLogger("network.coverage_import")
+
+IMPORT_BATCH_SIZE = 1000
+
+
+@dataclass
+class Feature:
+    geometry: dict
+    properties: dict = field(default_factory=dict)
+
+
+# ---------------------------------------------------------------------------
+# Parsers
+# ---------------------------------------------------------------------------
+
+def iter_geojson(fh: IO[bytes]) -> Iterator[Feature]:
+    data = json.load(fh)
+    kind = data.get("type")
+    if kind == "FeatureCollection":
+        for feature in data.get("features") or []:
+            if feature.get("geometry"):
+                yield Feature(feature["geometry"], feature.get("properties") or {})
+    elif kind == "Feature":
+        if data.get("geometry"):
+            yield Feature(data["geometry"], data.get("properties") or {})
+    else:
+        yield Feature(data)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _kml_coords(text: Optional[str]) -> list[list[float]]:
+    coords = []
+    for token in (text or "").split():
+        parts = token.split(",")
+        if len(parts) >= 2:
+            coords.append([float(parts[0]), float(parts[1])])
+    return coords
+
+
+def _kml_polygon(elem: ET.Element) -> list[list[list[float]]]:
+    rings = []
+    for boundary in elem:
+        name = _local(boundary.tag)
+        if name not in ("outerBoundaryIs", "innerBoundaryIs"):
+            continue
+        for node in boundary.iter():
+            if _local(node.tag) == "coordinates":
+                ring = _kml_coords(node.text)
+                if name == "outerBoundaryIs":
+                    rings.insert(0, ring)
+                else:
+                    rings.append(ring)
+    return rings
+
+
+def _placemark_features(placemark: ET.Element) -> Iterator[Feature]:
+    props: dict = {}
+    polygons: list = []
+    points: list = []
+    for node in placemark.iter():
+        tag = _local(node.tag)
+        if tag == "name" and "name" not in props:
+            props["name"] = (node.text or "").strip()
+        elif tag == "Data" and node.get("name"):
+            value = next((c.text for c in node if _local(c.tag) == "value"), None)
+            props[node.get("name")] = (value or "").strip()
+        elif tag == "SimpleData" and node.get("name"):
+            props[node.get("name")] = (node.text or "").strip()
+        elif tag == "Polygon":
+            polygons.append(_kml_polygon(node))
+        elif tag == "Point":
+            for c in node.iter():
+                if _local(c.tag) == "coordinates":
+                    coords = _kml_coords(c.text)
+                    if coords:
+                        points.append(coords[0])
+
+    if polygons:
+        yield Feature({"type": "MultiPolygon", "coordinates": polygons}, props)
+    for point in points:
+        yield Feature({"type": "Point", "coordinates": point}, props)
+
+
+def iter_kml(fh: IO[bytes]) -> Iterator[Feature]:
+    for _event, elem in ET.iterparse(fh, events=("end",)):
+        if _local(elem.tag) == "Placemark":
+            yield from _placemark_features(elem)
+            elem.clear()
+
+
+def iter_features(path: str) -> Iterator[Feature]:
+    lower = path.lower()
+    with open(path, "rb") as fh:
+        if lower.endswith(".kml"):
+            yield from iter_kml(fh)
+        elif lower.endswith((".geojson", ".json")):
+            yield from iter_geojson(fh)
+        else:
+            raise ValueError(f"Unsupported file type: {path} (expected .kml, .geojson or .json)")
+
+
+# ---------------------------------------------------------------------------
+# Import
+# ---------------------------------------------------------------------------
+
+def _speed(props: dict, default: int) -> int:
+    for key in ("max_download_mbps", "max_speed", "max_speed_mbps"):
+        if props.get(key) not in (None, ""):
+            try:
+                return int(float(props[key]))
+            except (TypeError, ValueError):
+                pass
+    return default
+
+
+def _technology(props: dict, default: str) -> str:
+    tech = str(props.get("technology") or "").lower()
+    return tech if tech in TECHNOLOGY_TYPES else default
+
+
+def import_file(
+    tenant_id: uuid.UUID,
+    fno_provider: str,
+    path: str,
+    technology: str = "gpon",
+    max_download_mbps: int = 1000,
+    replace: bool = False,
+) -> dict:
+    """Import one KML/GeoJSON file; returns counts."""
+    source = os.path.basename(path)
+    counts = {"footprints": 0, "points": 0, "skipped": 0}
+    footprints: list[dict] = []
+    points: list[dict] = []
+
+    with get_session() as session:
+        if replace:
+            for model in (CoverageFootprint, CoveragePoint):
+                session.execute(
+                    delete(model).where(
+                        model.tenant_id == tenant_id,
+                        model.fno_provider == fno_provider,
+                        model.source == source,
+                    )
+                )
+
+        def _flush() -> None:
+            if footprints:
+                session.execute(insert(CoverageFootprint), footprints)
+                footprints.clear()
+            if points:
+                session.execute(insert(CoveragePoint), points)
+                points.clear()
+
+        for feature in iter_features(path):
+            props = feature.properties
+            kind = feature.geometry.get("type")
+            try:
+                if kind in ("Polygon", "MultiPolygon"):
+                    min_lon, min_lat, max_lon, max_lat = geometry_bbox(feature.geometry)
+                    footprints.append({
+                        "id": uuid.uuid4(),
+                        "tenant_id": tenant_id,
+                        "fno_provider": fno_provider,
+                        "name": str(props.get("name") or source)[:200],
+                        "technology": _technology(props, technology),
+                        "max_download_mbps": _speed(props, max_download_mbps),
+                        "geometry": feature.geometry,
+                        "min_lon": min_lon, "min_lat": min_lat,
+                        "max_lon": max_lon, "max_lat": max_lat,
+                        "source": source,
+                        "is_active": True,
+                    })
+                    counts["footprints"] += 1
+                elif kind == "Point":
+                    lon, lat = (float(v) for v in feature.geometry["coordinates"][:2])
+                    points.append({
+                        "id": uuid.uuid4(),
+                        "tenant_id": tenant_id,
+                        "fno_provider": fno_provider,
+                        "latitude": lat,
+                        "longitude": lon,
+                        "address": (str(props.get("address") or props.get("name") or "") or None),
+                        "technology": _technology(props, technology),
+                        "max_download_mbps": _speed(props, max_download_mbps),
+                        "serviceable": str(props.get("status") or "").lower() != "planned",
+                        "source": source,
+                    })
+                    counts["points"] += 1
+                else:
+                    counts["skipped"] += 1
+            except (ValueError, TypeError, KeyError, IndexError) as exc:
+                logger.warning("Skipping feature %s in %s: %s", props.get("name"), source, exc)
+                counts["skipped"] += 1
+
+            if len(footprints) + len(points) >= IMPORT_BATCH_SIZE:
+                _flush()
+        _flush()
+
+    invalidate(tenant_id)
+    logger.info(
+        "Imported %s for %s/%s: %d footprints, %d points, %d skipped",
+        source, tenant_id, fno_provider, counts["footprints"], counts["points"], counts["skipped"],
+    )
+    return counts
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Import FNO coverage footprints (KML/GeoJSON)")
+    parser.add_argument("--tenant", required=True, type=uuid.UUID)
+    parser.add_argument("--fno", required=True, choices=sorted(FNO_PROVIDERS))
+    parser.add_argument("--technology", default="gpon", choices=sorted(TECHNOLOGY_TYPES))
+    parser.add_argument("--max-speed", type=int, default=1000, help="default max download Mbps")
+    parser.add_argument("--replace", action="store_true", help="replace rows from the same file name")
+    parser.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+    for path in args.files:
+        counts = import_file(args.tenant, args.fno, path, args.technology, args.max_speed, args.replace)
+        print(f"{path}: {counts['footprints']} footprints, {counts['points']} points, {counts['skipped']} skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""Point-in-coverage lookups over FNO footprints and serviceable points.
+
+FNO footprint polygons (``coverage_footprints``) and serviceable address
+points (``coverage_points``) are imported with
+``python -m services.network.coverage_import``.  Lookups by lat/lon never call
+an FNO API:
+
+  ``memory``  (default) each process keeps a per-tenant grid index: polygons
+              are bucketed by bounding box into ``COVERAGE_GRID_DEGREES``
+              cells and points into ~110 m cells, so a lookup tests a few
+              candidates with ray casting / haversine distance.  The index
+              is rebuilt when the tenant's data signature (row counts and
+              newest ``created_at``) changes, checked at most every
+              ``COVERAGE_INDEX_REFRESH_SECONDS``.  Builds and signature
+              checks run in a worker thread; while a refresh is in flight
+              lookups keep using the last good index, and only a tenant's
+              very first lookup waits for the build.
+  ``postgis`` queries the ``geom`` / ``geog`` columns added by
+              ``config/migrations/20261019_network_coverage_postgis.sql``
+              (GiST indexes), for data sets too large to hold in memory.
+              The blocking queries run in a worker thread.
+
+An FNO with any footprint or point data for the tenant is answered by the
+index either way (inside → available, outside → not available); FNOs with no
+data are left to the caller.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import func, select, text
+
+from services.network.database import get_session
+from services.network.models import CoverageFootprint, CoveragePoint
+
+logger = logging.getLogger("network.coverage_index")
+
+COVERAGE_INDEX_BACKEND = os.getenv("COVERAGE_INDEX_BACKEND", "memory")
+COVERAGE_GRID_DEGREES = float(os.getenv("COVERAGE_GRID_DEGREES", "0.01"))
+COVERAGE_POINT_RADIUS_METERS = float(os.getenv("COVERAGE_POINT_RADIUS_METERS", "40"))
+COVERAGE_INDEX_REFRESH_SECONDS = float(os.getenv("COVERAGE_INDEX_REFRESH_SECONDS", "60"))
+
+_POINT_CELL_DEGREES = 0.001  # ~110 m; larger than any sensible match radius
+_MAX_CELLS_PER_POLYGON = 10_000  # bigger polygons go to a linear bbox list
+_EARTH_RADIUS_M = 6_371_000.0
+
+
+@dataclass(frozen=True)
+class CoverageHit:
+    fno_provider: str
+    technology: str
+    max_download_mbps: int
+    area_name: Optional[str]
+    source: str  # footprint / point
+
+
+# ---------------------------------------------------------------------------
+# Geometry
+# ---------------------------------------------------------------------------
+
+Ring = list[tuple[float, float]]  # (lon, lat)
+
+
+def geojson_polygons(geometry: dict) -> list[list[Ring]]:
+    """Polygons of a GeoJSON Polygon/MultiPolygon as ``[[outer, *holes], ...]``."""
+    kind = geometry.get("type")
+    coords = geometry.get("coordinates") or []
+    if kind == "Polygon":
+        polygons = [coords]
+    elif kind == "MultiPolygon":
+        polygons = coords
+    else:
+        raise ValueError(f"Unsupported geometry type: {kind}")
+    return [
+        [[(float(p[0]), float(p[1])) for p in ring] for ring in polygon if len(ring) >= 3]
+        for polygon in polygons
+        if polygon
+    ]
+
+
+def geometry_bbox(geometry: dict) -> tuple[float, float, float, float]:
+    lons, lats = [], []
+    for polygon in geojson_polygons(geometry):
+        for lon, lat in polygon[0]:
+            lons.append(lon)
+            lats.append(lat)
+    if not lons:
+        raise ValueError("Empty geometry")
+    return min(lons), min(lats), max(lons), max(lats)
+
+
+def _ring_contains(ring: Ring, lon: float, lat: float) -> bool:
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i]
+        xj, yj = ring[j]
+        if (yi > lat) != (yj > lat) and lon < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * _EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class _Footprint:
+    __slots__ = ("hit", "polygons", "bbox")
+
+    def __init__(self, hit: CoverageHit, geometry: dict, bbox: tuple[float, float, float, float]):
+        self.hit = hit
+        self.polygons = geojson_polygons(geometry)
+        self.bbox = bbox
+
+    def contains(self, lon: float, lat: float) -> bool:
+        min_lon, min_lat, max_lon, max_lat = self.bbox
+        if not (min_lon <= lon <= max_lon and min_lat <= lat <= max_lat):
+            return False
+        for outer, *holes in self.polygons:
+            if _ring_contains(outer, lon, lat) and not any(_ring_contains(h, lon, lat) for h in holes):
+                return True
+        return False
+
+
+# ---------------------------------------------------------------------------
+# In-memory index
+# ---------------------------------------------------------------------------
+
+def _cell(value: float, size: float) -> int:
+    return math.floor(value / size)
+
+
+class TenantCoverageIndex:
+    """Grid index over one tenant's footprints and points."""
+
+    def __init__(self, signature: tuple = ()):
+        self.signature = signature
+        self.providers: set[str] = set()
+        self.footprints = 0
+        self.points = 0
+        self._poly_cells: dict[tuple[int, int], list[_Footprint]] = {}
+        self._large: list[_Footprint] = []
+        self._point_cells: dict[tuple[int, int], list[tuple[float, float, CoverageHit]]] = {}
+
+    def add_footprint(self, hit: CoverageHit, geometry: dict, bbox: tuple[float, float, float, float]) -> None:
+        fp = _Footprint(hit, geometry, bbox)
+        min_lon, min_lat, max_lon, max_lat = bbox
+        x0, x1 = _cell(min_lon, COVERAGE_GRID_DEGREES), _cell(max_lon, COVERAGE_GRID_DEGREES)
+        y0, y1 = _cell(min_lat, COVERAGE_GRID_DEGREES), _cell(max_lat, COVERAGE_GRID_DEGREES)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > _MAX_CELLS_PER_POLYGON:
+            self._large.append(fp)
+        else:
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    self._poly_cells.setdefault((x, y), []).append(fp)
+        self.providers.add(hit.fno_provider)
+        self.footprints += 1
+
+    def add_point(self, hit: CoverageHit, lat: float, lon: float) -> None:
+        key = (_cell(lon, _POINT_CELL_DEGREES), _cell(lat, _POINT_CELL_DEGREES))
+        self._point_cells.setdefault(key, []).append((lat, lon, hit))
+        self.providers.add(hit.fno_provider)
+        self.points += 1
+
+    def _point_hits(self, lat: float, lon: float) -> Iterator[CoverageHit]:
+        cx, cy = _cell(lon, _POINT_CELL_DEGREES), _cell(lat, _POINT_CELL_DEGREES)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for plat, plon, hit in self._point_cells.get((cx + dx, cy + dy), ()):
+                    if haversine_m(lat, lon, plat, plon) <= COVERAGE_POINT_RADIUS_METERS:
+                        yield hit
+
+    def lookup(self, lat: float, lon: float) -> list[CoverageHit]:
+        key = (_cell(lon, COVERAGE_GRID_DEGREES), _cell(lat, COVERAGE_GRID_DEGREES))
+        hits = [fp.hit for fp in self._poly_cells.get(key, ()) if fp.contains(lon, lat)]
+        hits.extend(fp.hit for fp in self._large if fp.contains(lon, lat))
+        hits.extend(self._point_hits(lat, lon))
+        return hits
+
+
+_indexes: dict[uuid.UUID, TenantCoverageIndex] = {}
+_checked_at: dict[uuid.UUID, float] = {}
+_build_lock = threading.Lock()
+_refreshing: dict[uuid.UUID, asyncio.Task] = {}
+
+
+def _signature(session, tenant_id: uuid.UUID) -> tuple:
+    fp = session.execute(
+        select(func.count(CoverageFootprint.id), func.max(CoverageFootprint.created_at))
+        .where(CoverageFootprint.tenant_id == tenant_id, CoverageFootprint.is_active.is_(True))
+    ).one()
+    pt = session.execute(
+        select(func.count(CoveragePoint.id), func.max(CoveragePoint.created_at))
+        .where(CoveragePoint.tenant_id == tenant_id, CoveragePoint.serviceable.is_(True))
+    ).one()
+    return tuple(fp) + tuple(pt)
+
+
+def build_index(tenant_id: uuid.UUID) -> TenantCoverageIndex:
+    started = time.perf_counter()
+    with get_session() as session:
+        index = TenantCoverageIndex(_signature(session, tenant_id))
+        rows = session.execute(
+            select(
+                CoverageFootprint.fno_provider, CoverageFootprint.technology,
+                CoverageFootprint.max_download_mbps, CoverageFootprint.name, CoverageFootprint.geometry,
+                CoverageFootprint.min_lon, CoverageFootprint.min_lat,
+                CoverageFootprint.max_lon, CoverageFootprint.max_lat,
+            ).where(CoverageFootprint.tenant_id == tenant_id, CoverageFootprint.is_active.is_(True))
+            .execution_options(yield_per=1000)
+        )
+        for fno, tech, speed, name, geometry, *bbox in rows:
+            try:
+                index.add_footprint(CoverageHit(fno, tech, speed, name, "footprint"), geometry, tuple(bbox))
+            except (ValueError, TypeError, IndexError) as exc:
+                logger.warning("Skipping invalid footprint %s/%s: %s", fno, name, exc)
+
+        rows = session.execute(
+            select(
+                CoveragePoint.fno_provider, CoveragePoint.technology, CoveragePoint.max_download_mbps,
+                CoveragePoint.address, CoveragePoint.latitude, CoveragePoint.longitude,
+            ).where(CoveragePoint.tenant_id == tenant_id, CoveragePoint.serviceable.is_(True))
+            .execution_options(yield_per=5000)
+        )
+        for fno, tech, speed, address, lat, lon in rows:
+            index.add_point(CoverageHit(fno, tech, speed, address, "point"), lat, lon)
+
+    logger.info(
+        "Built coverage index for tenant %s: %d footprints, %d points in %.0f ms",
+        tenant_id, index.footprints, index.points, (time.perf_counter() - started) * 1000,
+    )
+    return index
+
+
+def get_index(tenant_id: uuid.UUID) -> TenantCoverageIndex:
+    """The tenant's index, rebuilt if its data changed since the last check."""
+    now = time.monotonic()
+    index = _indexes.get(tenant_id)
+    if index is not None and now - _checked_at.get(tenant_id, 0) < COVERAGE_INDEX_REFRESH_SECONDS:
+        return index
+    with _build_lock:
+        index = _indexes.get(tenant_id)
+        if index is not None and now - _checked_at.get(tenant_id, 0) < COVERAGE_INDEX_REFRESH_SECONDS:
+            return index
+        if index is not None:
+            with get_session() as session:
+                changed = _signature(session, tenant_id) != index.signature
+            if not changed:
+                _checked_at[tenant_id] = now
+                return index
+        index = build_index(tenant_id)
+        _indexes[tenant_id] = index
+        _checked_at[tenant_id] = now
+        return index
+
+
+def _is_fresh(tenant_id: uuid.UUID) -> bool:
+    return time.monotonic() - _checked_at.get(tenant_id, 0) < COVERAGE_INDEX_REFRESH_SECONDS
+
+
+def _refresh_done(tenant_id: uuid.UUID, task: asyncio.Task) -> None:
+    if _refreshing.get(tenant_id) is task:
+        del _refreshing[tenant_id]
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Coverage index refresh for tenant %s failed", tenant_id, exc_info=task.exception())
+
+
+async def get_index_async(tenant_id: uuid.UUID) -> TenantCoverageIndex:
+    """:func:`get_index` off the event loop.
+
+    A stale index is returned immediately while one background refresh per
+    tenant runs in a worker thread; without any index yet, the caller
+    awaits that build.
+    """
+    index = _indexes.get(tenant_id)
+    if index is not None and _is_fresh(tenant_id):
+        return index
+    loop = asyncio.get_running_loop()
+    task = _refreshing.get(tenant_id)
+    if task is None or task.done() or task.get_loop() is not loop:
+        task = loop.create_task(asyncio.to_thread(get_index, tenant_id))
+        _refreshing[tenant_id] = task
+        task.add_done_callback(lambda t: _refresh_done(tenant_id, t))
+    if index is not None:
+        return index
+    return await asyncio.shield(task)
+
+
+def invalidate(tenant_id: Optional[uuid.UUID] = None) -> None:
+    if tenant_id is None:
+        _indexes.clear()
+        _checked_at.clear()
+    else:
+        _indexes.pop(tenant_id, None)
+        _checked_at.pop(tenant_id, None)
+
+
+# ---------------------------------------------------------------------------
+# PostGIS backend
+# ---------------------------------------------------------------------------
+
+_POSTGIS_LOOKUP = text(
+    """
+    SELECT fno_provider, technology, max_download_mbps, name, 'footprint'
+    FROM coverage_footprints
+    WHERE tenant_id = :tenant_id AND is_active
+      AND ST_Intersects(geom, ST_SetSRID(ST_MakePoint(:lon, :lat), 4326))
+    UNION ALL
+    SELECT fno_provider, technology, max_download_mbps, address, 'point'
+    FROM coverage_points
+    WHERE tenant_id = :tenant_id AND serviceable
+      AND ST_DWithin(geog, ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography, :radius)
+    """
+)
+
+
+def _postgis_providers(session, tenant_id: uuid.UUID) -> set[str]:
+    """FNOs with active footprints or serviceable points (as :func:`build_index` loads them)."""
+    rows = session.execute(
+        select(CoverageFootprint.fno_provider)
+        .where(CoverageFootprint.tenant_id == tenant_id, CoverageFootprint.is_active.is_(True))
+        .distinct()
+        .union(
+            select(CoveragePoint.fno_provider)
+            .where(CoveragePoint.tenant_id == tenant_id, CoveragePoint.serviceable.is_(True))
+            .distinct()
+        )
+    )
+    return {r[0] for r in rows}
+
+
+def _postgis_lookup(tenant_id: uuid.UUID, lat: float, lon: float) -> tuple[set[str], list[CoverageHit]]:
+    with get_session() as session:
+        providers = _postgis_providers(session, tenant_id)
+        rows = session.execute(
+            _POSTGIS_LOOKUP,
+            {"tenant_id": tenant_id, "lat": lat, "lon": lon, "radius": COVERAGE_POINT_RADIUS_METERS},
+        ).all()
+    return providers, [CoverageHit(*row) for row in rows]
+
+
+# ---------------------------------------------------------------------------
+# Public lookup
+# ---------------------------------------------------------------------------
+
+async def lookup_coverage(
+    tenant_id: uuid.UUID,
+    lat: float,
+    lon: float,
+    providers: Optional[Iterable[str]] = None,
+) -> dict[str, Optional[CoverageHit]]:
+    """Best hit (fastest technology) per FNO that the index can answer for.
+
+    FNOs without any indexed data are omitted; ``None`` means the FNO has
+    data but does not cover the location.
+    """
+    if COVERAGE_INDEX_BACKEND == "postgis":
+        known, hits = await asyncio.to_thread(_postgis_lookup, tenant_id, lat, lon)
+    else:
+        index = await get_index_async(tenant_id)
+        known, hits = index.providers, index.lookup(lat, lon)
+
+    wanted = known if providers is None else known & set(providers)
+    best: dict[str, Optional[CoverageHit]] = {fno: None for fno in wanted}
+    for hit in hits:
+        if hit.fno_provider in best:
+            current = best[hit.fno_provider]
+            if current is None or hit.max_download_mbps > current.max_download_mbps:
+                best[hit.fno_provider] = hit
+    return best
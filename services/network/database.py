@@ -1,20 +1,25 @@
 """Database session management for the Network service.
 
-Uses SQLAlchemy 2.0 synchronous sessions (matching the common db.py pattern)
-with tenant-scoped query helpers.
+Request handlers use :func:`get_async_session` (asyncpg, via the common async
+engine) so queries never block the event loop.  The worker and the sync
+helpers it shares with the API (job queue, RADIUS sync, usage rollups) use
+the SQLAlchemy 2.0 synchronous :func:`get_session`; handlers call those
+helpers with ``await session.run_sync(helper, ...)``.
 """
 
 import uuid
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncGenerator, Generator
 
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session, sessionmaker
 
-from services.common.db import get_engine
+from services.common.db import get_async_engine, get_engine
 from services.network.models import Base
 
 
 _session_factory: sessionmaker | None = None
+_async_session_factory: async_sessionmaker[AsyncSession] | None = None
 
 
 def _get_session_factory() -> sessionmaker:
@@ -40,6 +45,26 @@ def get_session() -> Generator[Session, None, None]:
         session.close()
 
 
+def _get_async_session_factory() -> async_sessionmaker[AsyncSession]:
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(bind=get_async_engine(), expire_on_commit=False)
+    return _async_session_factory
+
+
+@asynccontextmanager
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """Async counterpart of :func:`get_session`; commits on success, rollbacks on error."""
+    factory = _get_async_session_factory()
+    async with factory() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
 def init_tables() -> None:
     """Create all Network tables if they don't exist (dev convenience)."""
     engine = get_engine()
@@ -0,0 +1,70 @@
+"""FreeRADIUS SQL tables (``config/master_schema.sql``) as SQLAlchemy Core tables.
+
+FreeRADIUS owns these tables, so they live on their own ``MetaData`` and are
+never created by ``init_tables()``.
+"""
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, MetaData, String, Table, Text
+from sqlalchemy.dialects.postgresql import INET, UUID
+
+freeradius_metadata = MetaData()
+
+radacct = Table(
+    "radacct",
+    freeradius_metadata,
+    Column("radacctid", BigInteger, primary_key=True),
+    Column("tenant_id", UUID(as_uuid=True)),
+    Column("acctsessionid", Text, nullable=False),
+    Column("acctuniqueid", Text, nullable=False),
+    Column("username", Text, nullable=False),
+    Column("groupname", Text, nullable=False),
+    Column("nasipaddress", INET, nullable=False),
+    Column("nasportid", Text),
+    Column("acctstarttime", DateTime(timezone=True)),
+    Column("acctupdatetime", DateTime(timezone=True)),
+    Column("acctstoptime", DateTime(timezone=True)),
+    Column("acctsessiontime", BigInteger),
+    Column("acctinputoctets", BigInteger),
+    Column("acctoutputoctets", BigInteger),
+    Column("callingstationid", Text),
+    Column("acctterminatecause", Text),
+    Column("framedipaddress", INET),
+)
+
+nas = Table(
+    "nas",
+    freeradius_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("tenant_id", UUID(as_uuid=True)),
+    Column("nasname", Text, nullable=False),
+    Column("shortname", Text),
+    Column("type", Text),
+    Column("secret", Text, nullable=False),
+)
+
+
+def _attribute_table(name: str, default_op: str) -> Table:
+    return Table(
+        name,
+        freeradius_metadata,
+        Column("id", Integer, primary_key=True),
+        Column("tenant_id", UUID(as_uuid=True)),
+        Column("username", Text, nullable=False, server_default=""),
+        Column("attribute", Text, nullable=False, server_default=""),
+        Column("op", String(2), nullable=False, server_default=default_op),
+        Column("value", Text, nullable=False, server_default=""),
+    )
+
+
+radcheck = _attribute_table("radcheck", "==")
+radreply = _attribute_table("radreply", "=")
+
+radusergroup = Table(
+    "radusergroup",
+    freeradius_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("tenant_id", UUID(as_uuid=True)),
+    Column("username", Text, nullable=False, server_default=""),
+    Column("groupname", Text, nullable=False, server_default=""),
+    Column("priority", Integer, nullable=False, server_default="1"),
+)
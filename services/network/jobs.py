@@ -0,0 +1,381 @@
+"""Durable Postgres job queue for FNO orders and automation jobs.
+
+The API only writes rows: :func:`enqueue_job` adds a ``network_queue_jobs``
+row in the same transaction as the ``FNOOrder`` / ``AutomationJob`` it
+refers to.  The worker process (``python -m services.network.worker``)
+claims and runs them:
+
+  - **Claiming** — ``UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP
+    LOCKED)`` per FNO, highest ``priority`` first, then oldest ``run_at``.
+  - **Visibility timeout** — a claimed job is leased until ``locked_until``
+    (``NETWORK_JOB_VISIBILITY_SECONDS``) and the worker renews the lease
+    while it runs; if the worker dies the job becomes claimable again,
+    unless it has used up ``max_attempts`` (then it is dead-lettered).
+  - **Retries** — a handler exception re-queues the job with jittered
+    exponential backoff; after ``max_attempts`` it is ``dead`` and the
+    order/job is marked failed.  Handlers raise :class:`JobRetry` for a
+    transient FNO failure (timeout, 5xx), and :class:`JobDeadLetter` when a
+    retry could repeat a side effect, which makes the job dead at once.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from services.network.adapters.registry import get_adapter
+from services.network.database import get_session
+from services.network.models import AutomationJob, FNOOrder, QueueJob
+from services.network.order_tracking import TRACKED_ORDER_TYPES, start_tracking
+
+logger = logging.getLogger("network.jobs")
+
+JOB_MAX_ATTEMPTS = int(os.getenv("NETWORK_JOB_MAX_ATTEMPTS", "5"))
+JOB_VISIBILITY_SECONDS = int(os.getenv("NETWORK_JOB_VISIBILITY_SECONDS", "300"))
+JOB_BACKOFF_BASE_SECONDS = 10
+JOB_BACKOFF_MAX_SECONDS = 1800
+LEASE_EXHAUSTED_ERROR = "Lease expired on the last attempt (worker crashed or hung)"
+
+
+class JobRetry(Exception):
+    """The FNO call failed transiently; re-queue the job with backoff."""
+
+
+class JobDeadLetter(Exception):
+    """Do not retry this job; dead-letter it for manual reconciliation."""
+
+
+@dataclass
+class ClaimedJob:
+    id: uuid.UUID
+    kind: str
+    ref_id: uuid.UUID
+    fno_provider: str
+    attempts: int
+    max_attempts: int
+
+
+# ---------------------------------------------------------------------------
+# Queue operations
+# ---------------------------------------------------------------------------
+
+def enqueue_job(
+    session: Session,
+    tenant_id: uuid.UUID,
+    kind: str,
+    ref_id: uuid.UUID,
+    fno_provider: str,
+    priority: int = 0,
+    max_attempts: int = JOB_MAX_ATTEMPTS,
+) -> QueueJob:
+    """Queue work for ``ref_id`` in the caller's transaction."""
+    job = QueueJob(
+        tenant_id=tenant_id,
+        kind=kind,
+        ref_id=ref_id,
+        fno_provider=fno_provider,
+        priority=priority,
+        max_attempts=max_attempts,
+    )
+    session.add(job)
+    return job
+
+
+def claim_jobs(fno_provider: str, limit: int, worker_id: str) -> list[ClaimedJob]:
+    """Lease up to ``limit`` ready jobs for ``fno_provider``.
+
+    Expired leases are reclaimed, except for jobs that already used up
+    ``max_attempts`` (their worker kept crashing or hanging): those are
+    dead-lettered and their order/job marked failed.
+    """
+    if limit <= 0:
+        return []
+    now = datetime.now(timezone.utc)
+    expired = and_(QueueJob.status == "running", QueueJob.locked_until < now)
+    exhausted = (
+        select(QueueJob.id)
+        .where(QueueJob.fno_provider == fno_provider, expired, QueueJob.attempts >= QueueJob.max_attempts)
+        .with_for_update(skip_locked=True)
+    )
+    ready = (
+        select(QueueJob.id)
+        .where(
+            QueueJob.fno_provider == fno_provider,
+            or_(
+                and_(QueueJob.status == "queued", QueueJob.run_at <= now),
+                and_(expired, QueueJob.attempts < QueueJob.max_attempts),
+            ),
+        )
+        .order_by(QueueJob.priority.desc(), QueueJob.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    with get_session() as session:
+        dead = session.execute(
+            update(QueueJob)
+            .where(QueueJob.id.in_(exhausted.scalar_subquery()))
+            .values(status="dead", locked_by=None, locked_until=None, last_error=LEASE_EXHAUSTED_ERROR)
+            .returning(
+                QueueJob.id, QueueJob.kind, QueueJob.ref_id, QueueJob.fno_provider,
+                QueueJob.attempts, QueueJob.max_attempts,
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        for row in dead:
+            job = ClaimedJob(*row)
+            _mark_target_failed(session, job, LEASE_EXHAUSTED_ERROR)
+            logger.error("Job %s (%s %s) dead after %d attempts: %s",
+                         job.id, job.kind, job.ref_id, job.attempts, LEASE_EXHAUSTED_ERROR)
+        rows = session.execute(
+            update(QueueJob)
+            .where(QueueJob.id.in_(ready.scalar_subquery()))
+            .values(
+                status="running",
+                attempts=QueueJob.attempts + 1,
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=JOB_VISIBILITY_SECONDS),
+            )
+            .returning(
+                QueueJob.id, QueueJob.kind, QueueJob.ref_id, QueueJob.fno_provider,
+                QueueJob.attempts, QueueJob.max_attempts,
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+    return [ClaimedJob(*row) for row in rows]
+
+
+def extend_leases(job_ids: list[uuid.UUID], worker_id: str) -> None:
+    if not job_ids:
+        return
+    with get_session() as session:
+        session.execute(
+            update(QueueJob)
+            .where(QueueJob.id.in_(job_ids), QueueJob.locked_by == worker_id, QueueJob.status == "running")
+            .values(locked_until=datetime.now(timezone.utc) + timedelta(seconds=JOB_VISIBILITY_SECONDS))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def complete_job(job_id: uuid.UUID, worker_id: str) -> None:
+    with get_session() as session:
+        session.execute(
+            update(QueueJob)
+            .where(QueueJob.id == job_id, QueueJob.locked_by == worker_id)
+            .values(status="completed", completed_at=func.now(), locked_until=None, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _backoff(attempts: int) -> timedelta:
+    ceiling = min(JOB_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), JOB_BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
+
+
+def fail_job(job: ClaimedJob, worker_id: str, error: str, retry: bool = True) -> None:
+    """Re-queue with backoff, or dead-letter after ``max_attempts`` (or at once if not ``retry``)."""
+    dead = not retry or job.attempts >= job.max_attempts
+    with get_session() as session:
+        changed = session.execute(
+            update(QueueJob)
+            .where(QueueJob.id == job.id, QueueJob.locked_by == worker_id)
+            .values(
+                status="dead" if dead else "queued",
+                run_at=datetime.now(timezone.utc) + _backoff(job.attempts),
+                locked_by=None,
+                locked_until=None,
+                last_error=error[:2000],
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if dead and changed:
+            _mark_target_failed(session, job, error)
+    if dead:
+        logger.error("Job %s (%s %s) dead after %d attempts: %s", job.id, job.kind, job.ref_id, job.attempts, error)
+    else:
+        logger.warning("Job %s (%s %s) attempt %d failed: %s", job.id, job.kind, job.ref_id, job.attempts, error)
+
+
+def _mark_target_failed(session: Session, job: ClaimedJob, error: str) -> None:
+    now = datetime.now(timezone.utc)
+    if job.kind == "fno_order":
+        order = session.get(FNOOrder, job.ref_id)
+        if order:
+            order.status = "failed"
+            order.error_message = error
+    else:
+        auto = session.get(AutomationJob, job.ref_id)
+        if auto:
+            auto.status = "failed"
+            auto.error_message = error
+            auto.completed_at = now
+
+
+def queue_stats(tenant_id: uuid.UUID) -> list[dict]:
+    with get_session() as session:
+        rows = session.execute(
+            select(QueueJob.fno_provider, QueueJob.status, func.count(), func.min(QueueJob.run_at))
+            .where(QueueJob.tenant_id == tenant_id, QueueJob.status != "completed")
+            .group_by(QueueJob.fno_provider, QueueJob.status)
+            .order_by(QueueJob.fno_provider, QueueJob.status)
+        ).all()
+    return [
+        {"fno_provider": fno, "status": status, "count": count, "oldest_run_at": oldest}
+        for fno, status, count, oldest in rows
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Handlers
+# ---------------------------------------------------------------------------
+
+async def execute_fno_order(order_id: uuid.UUID) -> None:
+    """Call the FNO adapter for an order and record the result.
+
+    Before ``place_order`` the attempt is committed in
+    ``submit_attempted_at`` and the order id goes to the FNO as
+    ``client_reference``.  If a worker died or lost its lease after that
+    point the FNO may already have the order: adapters with
+    ``idempotent_orders`` resend the same reference, others raise
+    :class:`JobDeadLetter` rather than risk placing it twice.
+
+    A transient FAILED result raises :class:`JobRetry`; the order is only
+    marked failed once the queue gives up on the job.
+    """
+    with get_session() as session:
+        order = session.get(FNOOrder, order_id)
+        if order is None:
+            logger.warning("FNO order %s no longer exists; dropping job", order_id)
+            return
+        if order.status in ("completed", "cancelled"):
+            return
+        if order.order_type in TRACKED_ORDER_TYPES and order.fno_reference:
+            return  # already placed; status comes from order_tracking
+        fno_provider, order_type = order.fno_provider, order.order_type
+        request_payload = order.request_payload or {}
+        adapter = get_adapter(fno_provider)
+        if order_type not in ("cancellation", "speed_change"):
+            if order.submit_attempted_at is not None and not adapter.idempotent_orders:
+                raise JobDeadLetter(
+                    f"place_order for FNO order {order_id} was already attempted at "
+                    f"{order.submit_attempted_at.isoformat()}; check the {fno_provider} portal before resubmitting"
+                )
+            order.submit_attempted_at = datetime.now(timezone.utc)
+
+    if order_type == "cancellation":
+        result = await adapter.cancel_order(request_payload.get("fno_order_id", ""))
+    elif order_type == "speed_change":
+        result = await adapter.change_speed(
+            request_payload.get("fno_account_id", ""),
+            request_payload.get("new_profile", ""),
+        )
+    else:
+        result = await adapter.place_order(
+            request_payload.get("customer", {}), request_payload.get("plan_id", ""), client_reference=str(order_id),
+        )
+    _raise_if_transient(result)
+
+    new_status = "completed" if result.get("status") not in ("FAILED",) else "failed"
+    with get_session() as session:
+        order = session.get(FNOOrder, order_id)
+        if order:
+            order.response_payload = result
+            order.error_message = result.get("error")
+            if new_status == "completed" and order_type in TRACKED_ORDER_TYPES and result.get("order_id"):
+                # Accepted, not done: polled until the FNO reports activation
+                start_tracking(session, order, result)
+                return
+            order.status = new_status
+            if new_status == "completed":
+                order.completed_date = datetime.now(timezone.utc)
+                order.fno_reference = result.get("order_id", result.get("fno_account_id"))
+
+
+def _raise_if_transient(result: dict) -> None:
+    if result.get("status") == "FAILED" and result.get("retryable"):
+        raise JobRetry(result.get("error") or "FNO call failed")
+
+
+def _batch_summary(results: list[dict]) -> dict:
+    """Result payload for a bulk automation job; ``error`` only if some items failed."""
+    failed = sum(1 for r in results if r.get("status") == "FAILED" or r.get("error"))
+    summary = {"total": len(results), "failed": failed, "results": results}
+    if failed:
+        summary["error"] = f"{failed} of {len(results)} items failed"
+    return summary
+
+
+async def run_automation_job(job_id: uuid.UUID) -> None:
+    """Execute an automation job and record its result.
+
+    ``started_at`` is committed before the adapter call, so for
+    ``place_order`` it doubles as the attempt marker of
+    :func:`execute_fno_order`: a retried job resends its id as
+    ``client_reference`` to an FNO with ``idempotent_orders`` and is
+    dead-lettered otherwise.
+    """
+    with get_session() as session:
+        job = session.get(AutomationJob, job_id)
+        if job is None:
+            logger.warning("Automation job %s no longer exists; dropping", job_id)
+            return
+        if job.status in ("completed", "failed"):
+            return
+        fno_provider, job_type = job.fno_provider, job.job_type
+        request_payload = job.request_payload or {}
+        adapter = get_adapter(fno_provider)
+        if job_type == "place_order" and job.started_at is not None and not adapter.idempotent_orders:
+            raise JobDeadLetter(
+                f"place_order for automation job {job_id} was already attempted at "
+                f"{job.started_at.isoformat()}; check the {fno_provider} portal before resubmitting"
+            )
+        job.status = "processing"
+        job.started_at = job.started_at or datetime.now(timezone.utc)
+
+    new_status = "completed"
+    if job_type == "coverage_check":
+        result = await adapter.check_availability(request_payload.get("address", ""))
+    elif job_type == "place_order":
+        result = await adapter.place_order(
+            request_payload.get("customer", {}), request_payload.get("plan_id", ""), client_reference=str(job_id),
+        )
+    elif job_type == "provision":
+        result = await adapter.provision_service(request_payload.get("order_id", ""), request_payload.get("ont_serial"))
+    elif job_type == "suspend":
+        result = await adapter.suspend_service(request_payload.get("fno_account_id", ""))
+    elif job_type == "resume":
+        result = await adapter.resume_service(request_payload.get("fno_account_id", ""))
+    elif job_type == "fault_report":
+        result = await adapter.report_fault(request_payload.get("fno_account_id", ""), request_payload.get("description", ""))
+    elif job_type == "bulk_coverage_check":
+        result = _batch_summary(await adapter.check_availability_many(request_payload.get("addresses", [])))
+    elif job_type == "bulk_suspend":
+        result = _batch_summary(await adapter.suspend_many(request_payload.get("fno_account_ids", [])))
+    elif job_type == "bulk_speed_change":
+        result = _batch_summary(await adapter.change_speed_many([
+            (c.get("fno_account_id", ""), c.get("new_profile", "")) for c in request_payload.get("changes", [])
+        ]))
+    else:
+        result = {"error": f"Unknown job type: {job_type}"}
+        new_status = "failed"
+    _raise_if_transient(result)
+
+    with get_session() as session:
+        job = session.get(AutomationJob, job_id)
+        if job:
+            job.status = new_status
+            job.result_payload = result
+            job.error_message = result.get("error")
+            job.completed_at = datetime.now(timezone.utc)
+
+
+HANDLERS = {
+    "fno_order": execute_fno_order,
+    "automation_job": run_automation_job,
+}
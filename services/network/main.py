@@ -11,7 +11,9 @@ import os
 from fastapi import FastAPI
 
 from services.common.entitlements import EntitlementGuard
+from services.network.adapters.registry import close_adapters
 from services.network.database import init_tables
+from services.network.radius_sessions import RADIUS_SESSION_INDEX, session_tracker
 
 # Route modules
 from services.network.routes.radius import router as radius_router
@@ -44,6 +46,14 @@ async def startup() -> None:
     if os.getenv("AUTO_CREATE_TABLES", "false").lower() == "true":
         logger.info("Auto-creating network tables …")
         init_tables()
+    if RADIUS_SESSION_INDEX:
+        session_tracker.start()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await session_tracker.stop()
+    await close_adapters()
 
 
 @app.middleware("http")
@@ -1,20 +1,24 @@
 """SQLAlchemy models for the Network service."""
 
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
+    Date,
     DateTime,
     Enum as SAEnum,
+    Float,
     ForeignKey,
     Index,
     Integer,
     String,
     Text,
     func,
+    text,
 )
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
@@ -59,6 +63,26 @@ RADIUS_ACCOUNT_STATUS = SAEnum(
     name="radius_account_status", create_type=True,
 )
 
+RADIUS_COA_ACTION = SAEnum(
+    "disconnect", "coa",
+    name="radius_coa_action", create_type=True,
+)
+
+RADIUS_COA_STATUS = SAEnum(
+    "pending", "acked", "nacked", "failed",
+    name="radius_coa_status", create_type=True,
+)
+
+QUEUE_JOB_KIND = SAEnum(
+    "fno_order", "automation_job",
+    name="queue_job_kind", create_type=True,
+)
+
+QUEUE_JOB_STATUS = SAEnum(
+    "queued", "running", "completed", "dead",
+    name="queue_job_status", create_type=True,
+)
+
 AUTOMATION_JOB_STATUS = SAEnum(
     "queued", "processing", "completed", "failed",
     name="automation_job_status", create_type=True,
@@ -116,12 +140,13 @@ class NetworkService(Base):
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False,
     )
 
-    # Relationships
+    # Relationships — never loaded implicitly (handlers use async sessions);
+    # ask for them with joinedload()/selectinload() where needed.
     radius_account: Mapped[Optional["RadiusAccount"]] = relationship(
-        back_populates="service", uselist=False, lazy="joined",
+        back_populates="service", uselist=False, lazy="raise",
     )
     fno_orders: Mapped[list["FNOOrder"]] = relationship(
-        back_populates="service", order_by="FNOOrder.created_at.desc()", lazy="selectin",
+        back_populates="service", order_by="FNOOrder.created_at.desc()", lazy="raise",
     )
 
     __table_args__ = (
@@ -163,7 +188,7 @@ class RadiusAccount(Base):
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False,
     )
 
-    service: Mapped["NetworkService"] = relationship(back_populates="radius_account")
+    service: Mapped["NetworkService"] = relationship(back_populates="radius_account", lazy="raise")
 
     __table_args__ = (
         Index("ix_radius_accounts_tenant", "tenant_id"),
@@ -171,6 +196,41 @@ class RadiusAccount(Base):
     )
 
 
+class RadiusCoARequest(Base):
+    """Queued Disconnect-Request / CoA-Request for a subscriber's NAS.
+
+    Written in the same transaction as the status change that needs it
+    (e.g. bulk suspend) and sent to the NAS asynchronously.
+    """
+    __tablename__ = "radius_coa_requests"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4,
+    )
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    service_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    radius_account_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+
+    username: Mapped[str] = mapped_column(String(100), nullable=False)
+    nas_ip_address: Mapped[Optional[str]] = mapped_column(String(45), nullable=True)
+    action: Mapped[str] = mapped_column(RADIUS_COA_ACTION, nullable=False)
+    reason: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
+    status: Mapped[str] = mapped_column(RADIUS_COA_STATUS, default="pending", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False,
+    )
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_radius_coa_requests_pending", "status", "created_at"),
+        Index("ix_radius_coa_requests_tenant", "tenant_id", "created_at"),
+    )
+
+
 class FNOOrder(Base):
     """Tracks orders placed with Fibre Network Operators."""
     __tablename__ = "fno_orders"
@@ -196,6 +256,14 @@ class FNOOrder(Base):
     request_payload: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
     response_payload: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Set (and committed) before the worker calls place_order; see jobs.execute_fno_order
+    submit_attempted_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Status tracking at the FNO (order_tracking.py); NULL next_poll_at = not tracked
+    fno_status: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    next_poll_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_polled_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    poll_failures: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False,
@@ -204,12 +272,43 @@ class FNOOrder(Base):
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False,
     )
 
-    service: Mapped["NetworkService"] = relationship(back_populates="fno_orders")
+    service: Mapped["NetworkService"] = relationship(back_populates="fno_orders", lazy="raise")
 
     __table_args__ = (
         Index("ix_fno_orders_tenant", "tenant_id"),
         Index("ix_fno_orders_service", "tenant_id", "service_id"),
         Index("ix_fno_orders_status", "tenant_id", "status"),
+        Index(
+            "ix_fno_orders_next_poll", "next_poll_at",
+            postgresql_where=text("next_poll_at IS NOT NULL"),
+        ),
+    )
+
+
+class FNOOrderEvent(Base):
+    """One observed status transition of an FNO order."""
+    __tablename__ = "fno_order_events"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4,
+    )
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    order_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("fno_orders.id", ondelete="CASCADE"), nullable=False,
+    )
+    from_status: Mapped[Optional[str]] = mapped_column(ORDER_STATUS, nullable=True)
+    to_status: Mapped[str] = mapped_column(ORDER_STATUS, nullable=False)
+    fno_status: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    scheduled_date: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    source: Mapped[str] = mapped_column(String(20), default="poll", nullable=False)  # submit / poll / manual
+    payload: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False,
+    )
+
+    __table_args__ = (
+        Index("ix_fno_order_events_order", "order_id", "created_at"),
+        Index("ix_fno_order_events_tenant", "tenant_id", "created_at"),
     )
 
 
@@ -241,6 +340,67 @@ class CoverageArea(Base):
     )
 
 
+class CoverageFootprint(Base):
+    """FNO footprint polygon (GeoJSON Polygon / MultiPolygon, WGS84 lon/lat).
+
+    ``min_lon``..``max_lat`` is the bounding box used to bucket the polygon in
+    the in-memory coverage index.
+    """
+    __tablename__ = "coverage_footprints"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4,
+    )
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+
+    fno_provider: Mapped[str] = mapped_column(FNO_PROVIDER, nullable=False)
+    name: Mapped[str] = mapped_column(String(200), nullable=False)
+    technology: Mapped[str] = mapped_column(TECHNOLOGY_TYPE, nullable=False)
+    max_download_mbps: Mapped[int] = mapped_column(Integer, default=1000, nullable=False)
+    geometry: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    min_lon: Mapped[float] = mapped_column(Float, nullable=False)
+    min_lat: Mapped[float] = mapped_column(Float, nullable=False)
+    max_lon: Mapped[float] = mapped_column(Float, nullable=False)
+    max_lat: Mapped[float] = mapped_column(Float, nullable=False)
+    source: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False,
+    )
+
+    __table_args__ = (
+        Index("ix_coverage_footprints_tenant", "tenant_id", "fno_provider"),
+    )
+
+
+class CoveragePoint(Base):
+    """Serviceable (or planned) address point published by an FNO."""
+    __tablename__ = "coverage_points"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4,
+    )
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+
+    fno_provider: Mapped[str] = mapped_column(FNO_PROVIDER, nullable=False)
+    latitude: Mapped[float] = mapped_column(Float, nullable=False)
+    longitude: Mapped[float] = mapped_column(Float, nullable=False)
+    address: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    technology: Mapped[str] = mapped_column(TECHNOLOGY_TYPE, nullable=False)
+    max_download_mbps: Mapped[int] = mapped_column(Integer, default=1000, nullable=False)
+    serviceable: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    source: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False,
+    )
+
+    __table_args__ = (
+        Index("ix_coverage_points_tenant", "tenant_id", "fno_provider"),
+    )
+
+
 class AutomationJob(Base):
     """Logs FNO automation jobs (API or browser-based)."""
     __tablename__ = "automation_jobs"
@@ -269,3 +429,131 @@ class AutomationJob(Base):
         Index("ix_automation_jobs_tenant", "tenant_id"),
         Index("ix_automation_jobs_status", "tenant_id", "status"),
     )
+
+
+class QueueJob(Base):
+    """Durable work item for the network job worker.
+
+    Points at an ``FNOOrder`` or ``AutomationJob`` (``kind`` + ``ref_id``).
+    Workers claim ready rows with ``FOR UPDATE SKIP LOCKED`` and hold them
+    until ``locked_until``; a row whose lease expired is claimable again.
+    """
+    __tablename__ = "network_queue_jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4,
+    )
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    kind: Mapped[str] = mapped_column(QUEUE_JOB_KIND, nullable=False)
+    ref_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    fno_provider: Mapped[str] = mapped_column(FNO_PROVIDER, nullable=False)
+
+    priority: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # higher runs first
+    status: Mapped[str] = mapped_column(QUEUE_JOB_STATUS, default="queued", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=5, nullable=False)
+    run_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False,
+    )
+    locked_by: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False,
+    )
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_network_queue_jobs_ready", "fno_provider", "priority", "run_at",
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+        Index("ix_network_queue_jobs_ref", "kind", "ref_id"),
+        Index("ix_network_queue_jobs_tenant", "tenant_id", "status"),
+    )
+
+
+class RadiusUsageHourly(Base):
+    """Per-subscriber data usage per hour, rolled up from radacct deltas."""
+    __tablename__ = "radius_usage_hourly"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    username: Mapped[str] = mapped_column(String(255), primary_key=True)
+    hour: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    service_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+
+    input_octets: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    output_octets: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    session_seconds: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+    __table_args__ = (
+        Index("ix_radius_usage_hourly_tenant_hour", "tenant_id", "hour"),
+    )
+
+
+class RadiusUsageDaily(Base):
+    """Per-subscriber data usage per local day (``RADIUS_USAGE_TIMEZONE``)."""
+    __tablename__ = "radius_usage_daily"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    username: Mapped[str] = mapped_column(String(255), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    service_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+
+    input_octets: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    output_octets: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    session_seconds: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+    __table_args__ = (
+        Index("ix_radius_usage_daily_tenant_day", "tenant_id", "day"),
+    )
+
+
+class RadiusUsageCheckpoint(Base):
+    """Last counters rolled up for one radacct row, so each update adds only its delta."""
+    __tablename__ = "radius_usage_checkpoints"
+
+    radacctid: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    input_octets: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    output_octets: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    session_seconds: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    last_update: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    closed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+
+    __table_args__ = (
+        Index("ix_radius_usage_checkpoints_closed", "last_update", postgresql_where=text("closed")),
+    )
+
+
+class RadiusSyncPending(Base):
+    """A subscriber whose radcheck/radreply/radusergroup rows need re-syncing.
+
+    One row per user however many changes were made; ``due_at`` is set by
+    the first change so later ones within the window are coalesced.
+    """
+    __tablename__ = "radius_sync_pending"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    username: Mapped[str] = mapped_column(String(100), primary_key=True)
+    due_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False,
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        Index("ix_radius_sync_pending_due", "due_at"),
+    )
+
+
+class RadiusUsageCursor(Base):
+    """Durable radacct read position of the usage rollup."""
+    __tablename__ = "radius_usage_cursor"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    last_update: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_radacctid: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False,
+    )
@@ -0,0 +1,379 @@
+"""FNO order state machine and batched status polling.
+
+Once an installation or migration order is accepted by the FNO
+(:func:`start_tracking`, called from ``jobs.execute_fno_order``) it is polled
+until it reaches a terminal state.  The network worker runs
+:func:`poll_orders`:
+
+  1. claims up to ``FNO_TRACK_BATCH_SIZE`` orders whose ``next_poll_at`` has
+     passed (``FOR UPDATE SKIP LOCKED``, pushing ``next_poll_at`` out by
+     ``FNO_TRACK_LEASE_SECONDS`` so a crashed worker's orders come back);
+  2. asks each FNO for all of its orders at once through
+     ``adapter.get_order_statuses`` — concurrent single lookups by default,
+     a bulk endpoint where the adapter has one enabled;
+  3. maps each FNO status onto ``order_status`` and applies it only if
+     :data:`ORDER_TRANSITIONS` allows it (terminal states are final);
+  4. writes every order with one ``UPDATE ... FROM (VALUES ...)`` guarded by
+     the status it was claimed with (a manual update in between wins), and
+     inserts an ``fno_order_events`` row per observed change.
+
+Poll intervals grow with order age (about age / ``FNO_TRACK_AGE_FACTOR``,
+clamped to ``FNO_TRACK_MIN_INTERVAL_SECONDS`` ..
+``FNO_TRACK_MAX_INTERVAL_SECONDS``), drop to the minimum while an
+installation is in progress or due within a day, back off on poll errors and
+carry ±10% jitter (inside the clamp).  Orders older than ``FNO_TRACK_MAX_AGE_DAYS`` stop being
+polled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, Integer, String, Text, cast, column, func, insert, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session
+
+from services.network.adapters.registry import get_adapter
+from services.network.database import get_session
+from services.network.models import ORDER_STATUS, FNOOrder, FNOOrderEvent
+
+logger = logging.getLogger("network.order_tracking")
+
+FNO_ORDER_TRACKING = os.getenv("FNO_ORDER_TRACKING", "true").lower() == "true"
+FNO_TRACK_POLL_SECONDS = float(os.getenv("FNO_TRACK_POLL_SECONDS", "30"))
+FNO_TRACK_BATCH_SIZE = int(os.getenv("FNO_TRACK_BATCH_SIZE", "500"))
+FNO_TRACK_LEASE_SECONDS = int(os.getenv("FNO_TRACK_LEASE_SECONDS", "300"))
+FNO_TRACK_MIN_INTERVAL_SECONDS = int(os.getenv("FNO_TRACK_MIN_INTERVAL_SECONDS", "300"))
+FNO_TRACK_MAX_INTERVAL_SECONDS = int(os.getenv("FNO_TRACK_MAX_INTERVAL_SECONDS", "43200"))
+FNO_TRACK_AGE_FACTOR = float(os.getenv("FNO_TRACK_AGE_FACTOR", "24"))
+FNO_TRACK_MAX_AGE_DAYS = int(os.getenv("FNO_TRACK_MAX_AGE_DAYS", "90"))
+
+TRACKED_ORDER_TYPES = ("new_installation", "migration")
+TERMINAL_STATUSES = frozenset({"completed", "failed", "cancelled"})
+
+# Allowed moves between order_status values; "scheduled" -> "scheduled" is a
+# reschedule.  Anything not listed (e.g. backwards to "submitted") is ignored.
+ORDER_TRANSITIONS: dict[str, frozenset[str]] = {
+    "submitted": frozenset({"accepted", "scheduled", "in_progress", "completed", "failed", "cancelled"}),
+    "accepted": frozenset({"scheduled", "in_progress", "completed", "failed", "cancelled"}),
+    "scheduled": frozenset({"scheduled", "in_progress", "completed", "failed", "cancelled"}),
+    "in_progress": frozenset({"scheduled", "completed", "failed", "cancelled"}),
+}
+
+# FNO vocabularies (upper-cased) onto order_status.
+FNO_STATUS_MAP = {
+    "SUBMITTED": "submitted",
+    "RECEIVED": "submitted",
+    "PENDING": "submitted",
+    "QUEUED_ON_PORTAL": "submitted",
+    "ACCEPTED": "accepted",
+    "APPROVED": "accepted",
+    "VALIDATED": "accepted",
+    "FEASIBLE": "accepted",
+    "SCHEDULED": "scheduled",
+    "INSTALL_SCHEDULED": "scheduled",
+    "APPOINTMENT_BOOKED": "scheduled",
+    "RESCHEDULED": "scheduled",
+    "IN_PROGRESS": "in_progress",
+    "INSTALLING": "in_progress",
+    "INSTALLED": "in_progress",
+    "ONT_INSTALLED": "in_progress",
+    "ACTIVE": "completed",
+    "ACTIVATED": "completed",
+    "ONT_ACTIVATED": "completed",
+    "PROVISIONED": "completed",
+    "COMPLETED": "completed",
+    "REJECTED": "failed",
+    "FAILED": "failed",
+    "NOT_FEASIBLE": "failed",
+    "CANCELLED": "cancelled",
+    "CANCELED": "cancelled",
+}
+
+
+def map_fno_status(fno_status: Optional[str]) -> Optional[str]:
+    if not fno_status:
+        return None
+    return FNO_STATUS_MAP.get(fno_status.strip().upper().replace(" ", "_").replace("-", "_"))
+
+
+def can_transition(current: str, new: str) -> bool:
+    return new in ORDER_TRANSITIONS.get(current, frozenset())
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def poll_interval(
+    created_at: datetime,
+    now: datetime,
+    status: str,
+    scheduled_date: Optional[datetime] = None,
+    failures: int = 0,
+) -> timedelta:
+    """How long to wait before polling an order again."""
+    seconds = (now - created_at).total_seconds() / FNO_TRACK_AGE_FACTOR
+    due_soon = scheduled_date is not None and scheduled_date - now < timedelta(days=1)
+    if status == "in_progress" or (status == "scheduled" and due_soon):
+        seconds = FNO_TRACK_MIN_INTERVAL_SECONDS
+    seconds *= 2 ** min(failures, 10) * random.uniform(0.9, 1.1)
+    return timedelta(seconds=min(max(seconds, FNO_TRACK_MIN_INTERVAL_SECONDS), FNO_TRACK_MAX_INTERVAL_SECONDS))
+
+
+# ---------------------------------------------------------------------------
+# Submit
+# ---------------------------------------------------------------------------
+
+def start_tracking(session: Session, order: FNOOrder, result: dict[str, Any]) -> None:
+    """Record the FNO's answer to a placed order and schedule the first poll."""
+    now = datetime.now(timezone.utc)
+    previous = order.status
+    order.fno_reference = result.get("order_id") or order.fno_reference
+    order.fno_status = result.get("status")
+    status = map_fno_status(order.fno_status) or "submitted"
+    order.status = status if previous == status or can_transition(previous, status) else previous
+    if order.status == "completed":
+        order.completed_date = now
+    order.poll_failures = 0
+    order.next_poll_at = (
+        None if order.status in TERMINAL_STATUSES
+        else now + timedelta(seconds=FNO_TRACK_MIN_INTERVAL_SECONDS)
+    )
+    session.add(FNOOrderEvent(
+        tenant_id=order.tenant_id,
+        order_id=order.id,
+        from_status=previous,
+        to_status=order.status,
+        fno_status=order.fno_status,
+        scheduled_date=order.scheduled_date,
+        source="submit",
+        payload=result,
+    ))
+
+
+# ---------------------------------------------------------------------------
+# Poll
+# ---------------------------------------------------------------------------
+
+@dataclass
+class TrackedOrder:
+    id: uuid.UUID
+    tenant_id: uuid.UUID
+    fno_provider: str
+    status: str
+    fno_reference: str
+    fno_status: Optional[str]
+    scheduled_date: Optional[datetime]
+    created_at: datetime
+    poll_failures: int
+
+
+@dataclass
+class PollOutcome:
+    order: TrackedOrder
+    status: str
+    fno_status: Optional[str]
+    scheduled_date: Optional[datetime]
+    completed_date: Optional[datetime]
+    next_poll_at: Optional[datetime]
+    poll_failures: int
+    error_message: Optional[str] = None
+    event: Optional[dict[str, Any]] = None
+
+
+def claim_due_orders(limit: int = FNO_TRACK_BATCH_SIZE) -> list[TrackedOrder]:
+    now = datetime.now(timezone.utc)
+    due = (
+        select(FNOOrder.id)
+        .where(
+            FNOOrder.next_poll_at <= now,
+            FNOOrder.fno_reference.is_not(None),
+            FNOOrder.status.not_in(TERMINAL_STATUSES),
+        )
+        .order_by(FNOOrder.next_poll_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    with get_session() as session:
+        return [
+            TrackedOrder(*row)
+            for row in session.execute(
+                update(FNOOrder)
+                .where(FNOOrder.id.in_(due.scalar_subquery()))
+                .values(next_poll_at=now + timedelta(seconds=FNO_TRACK_LEASE_SECONDS))
+                .returning(
+                    FNOOrder.id, FNOOrder.tenant_id, FNOOrder.fno_provider, FNOOrder.status,
+                    FNOOrder.fno_reference, FNOOrder.fno_status, FNOOrder.scheduled_date,
+                    FNOOrder.created_at, FNOOrder.poll_failures,
+                )
+                .execution_options(synchronize_session=False)
+            )
+        ]
+
+
+def evaluate(order: TrackedOrder, result: dict[str, Any], now: datetime) -> PollOutcome:
+    """Apply one FNO status answer to an order (pure; no I/O)."""
+    fno_status = str(result.get("status") or "UNKNOWN")[:50]
+    mapped = map_fno_status(fno_status)
+    too_old = now - order.created_at > timedelta(days=FNO_TRACK_MAX_AGE_DAYS)
+    if result.get("error") or (mapped is None and fno_status.upper() == "UNKNOWN"):
+        failures = order.poll_failures + (1 if result.get("error") else 0)
+        if too_old:
+            logger.warning("Order %s unanswered after %d days; no longer polling", order.id, FNO_TRACK_MAX_AGE_DAYS)
+        return PollOutcome(
+            order=order,
+            status=order.status,
+            fno_status=order.fno_status,
+            scheduled_date=order.scheduled_date,
+            completed_date=None,
+            next_poll_at=(
+                None if too_old
+                else now + poll_interval(order.created_at, now, order.status, order.scheduled_date, failures)
+            ),
+            poll_failures=failures,
+        )
+
+    status = order.status
+    if mapped and mapped != order.status and can_transition(order.status, mapped):
+        status = mapped
+    elif mapped and mapped != order.status:
+        logger.debug("Ignoring %s transition %s -> %s for order %s", order.fno_provider, order.status, mapped, order.id)
+    scheduled_date = _parse_datetime(result.get("scheduled_date")) or order.scheduled_date
+
+    changed = (
+        status != order.status
+        or fno_status != order.fno_status
+        or scheduled_date != order.scheduled_date
+    )
+    if too_old and status not in TERMINAL_STATUSES:
+        logger.warning("Order %s still %s after %d days; no longer polling", order.id, status, FNO_TRACK_MAX_AGE_DAYS)
+    return PollOutcome(
+        order=order,
+        status=status,
+        fno_status=fno_status,
+        scheduled_date=scheduled_date,
+        completed_date=now if status == "completed" and order.status != "completed" else None,
+        next_poll_at=(
+            None if status in TERMINAL_STATUSES or too_old
+            else now + poll_interval(order.created_at, now, status, scheduled_date)
+        ),
+        poll_failures=0,
+        error_message=(
+            result.get("message") or f"FNO reported {fno_status}"
+            if status == "failed" and order.status != "failed" else None
+        ),
+        event={
+            "tenant_id": order.tenant_id,
+            "order_id": order.id,
+            "from_status": order.status,
+            "to_status": status,
+            "fno_status": fno_status,
+            "scheduled_date": scheduled_date,
+            "source": "poll",
+            "payload": result,
+        } if changed else None,
+    )
+
+
+async def _poll_provider(fno_provider: str, orders: list[TrackedOrder]) -> list[PollOutcome]:
+    adapter = get_adapter(fno_provider)
+    references = list(dict.fromkeys(o.fno_reference for o in orders))
+    try:
+        statuses = await adapter.get_order_statuses(references)
+    except Exception as exc:
+        logger.warning("Status poll of %d %s orders failed: %s", len(references), fno_provider, exc)
+        statuses = {ref: {"status": "UNKNOWN", "error": str(exc)} for ref in references}
+    now = datetime.now(timezone.utc)
+    return [
+        evaluate(o, statuses.get(o.fno_reference) or {"status": "UNKNOWN", "error": "No status returned"}, now)
+        for o in orders
+    ]
+
+
+def record_outcomes(outcomes: list[PollOutcome]) -> int:
+    """Write all outcomes in one UPDATE; returns the number of events recorded."""
+    if not outcomes:
+        return 0
+    data = values(
+        column("id", PG_UUID(as_uuid=True)),
+        column("expected_status", String),
+        column("status", String),
+        column("fno_status", String),
+        column("scheduled_date", DateTime(timezone=True)),
+        column("completed_date", DateTime(timezone=True)),
+        column("next_poll_at", DateTime(timezone=True)),
+        column("poll_failures", Integer),
+        column("error_message", Text),
+        name="poll_outcomes",
+    ).data([
+        (
+            o.order.id, o.order.status, o.status, o.fno_status, o.scheduled_date,
+            o.completed_date, o.next_poll_at, o.poll_failures, o.error_message,
+        )
+        for o in outcomes
+    ])
+    now = datetime.now(timezone.utc)
+    with get_session() as session:
+        updated = set(session.execute(
+            update(FNOOrder)
+            .where(
+                FNOOrder.id == data.c.id,
+                FNOOrder.status == cast(data.c.expected_status, ORDER_STATUS),
+            )
+            .values(
+                status=cast(data.c.status, ORDER_STATUS),
+                fno_status=data.c.fno_status,
+                # all-NULL VALUES columns come back as text
+                scheduled_date=cast(data.c.scheduled_date, DateTime(timezone=True)),
+                completed_date=func.coalesce(cast(data.c.completed_date, DateTime(timezone=True)), FNOOrder.completed_date),
+                next_poll_at=cast(data.c.next_poll_at, DateTime(timezone=True)),
+                last_polled_at=now,
+                poll_failures=data.c.poll_failures,
+                error_message=func.coalesce(data.c.error_message, FNOOrder.error_message),
+            )
+            .returning(FNOOrder.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+        events = [o.event for o in outcomes if o.event and o.order.id in updated]
+        if events:
+            session.execute(insert(FNOOrderEvent), events)
+    return len(events)
+
+
+async def poll_orders(limit: int = FNO_TRACK_BATCH_SIZE) -> int:
+    """Poll one batch of due orders; returns the number of orders polled."""
+    orders = await asyncio.to_thread(claim_due_orders, limit)
+    if not orders:
+        return 0
+
+    by_provider: dict[str, list[TrackedOrder]] = defaultdict(list)
+    for order in orders:
+        by_provider[order.fno_provider].append(order)
+    results = await asyncio.gather(*[_poll_provider(p, batch) for p, batch in by_provider.items()])
+    outcomes = [outcome for batch in results for outcome in batch]
+    events = await asyncio.to_thread(record_outcomes, outcomes)
+
+    logger.info(
+        "Polled %d FNO orders (%s): %d changes, %d errors",
+        len(orders), ", ".join(f"{p}={len(b)}" for p, b in sorted(by_provider.items())),
+        events, sum(1 for o in outcomes if o.poll_failures),
+    )
+    return len(orders)
@@ -0,0 +1,536 @@
+"""RADIUS Dynamic Authorization (RFC 5176) client and CoA request queue.
+
+Suspensions, reinstatements and speed changes write ``radius_coa_requests``
+rows in the same transaction as the status change (:func:`enqueue_coa`, or
+the set-based bulk helper in ``routes/services.py``).  The network worker
+drains the queue with :func:`process_coa_batch`:
+
+  1. claims up to ``RADIUS_COA_BATCH_SIZE`` pending rows (``FOR UPDATE SKIP
+     LOCKED``; ``sent_at`` doubles as a lease so a crashed worker's rows are
+     retried after ``RADIUS_COA_LEASE_SECONDS``).  Rows whose user still has
+     a ``radius_sync_pending`` entry are left for a later batch: the
+     Disconnect only goes out once ``radius_sync.py`` has written the
+     suspension to radcheck, so the CPE cannot re-authenticate with the old
+     credentials;
+  2. looks up the subscribers' open radacct sessions and rate limits in two
+     queries and builds one packet per session — Disconnect-Request (code
+     40) for ``disconnect``, CoA-Request (code 43, Mikrotik-Rate-Limit) for
+     ``coa``;
+  3. sends every packet concurrently through :class:`CoAClient`, which keeps
+     one UDP socket per NAS, at most ``RADIUS_COA_MAX_INFLIGHT_PER_NAS``
+     outstanding identifiers per NAS, and retransmits the identical packet
+     every ``RADIUS_COA_TIMEOUT_SECONDS`` up to ``RADIUS_COA_RETRIES`` times.
+     IPv6 NAS and framed addresses go out as NAS-IPv6-Address /
+     Framed-IPv6-Prefix; an address that cannot be encoded becomes an
+     ``error`` result for that session rather than an exception;
+  4. writes all outcomes back with one ``UPDATE ... FROM (VALUES ...)``.
+
+A NAK with Error-Cause 503 (Session-Context-Not-Found) counts as done — the
+session is already gone.  Timeouts are retried up to
+``RADIUS_COA_MAX_ATTEMPTS`` before the row is marked ``failed``.
+
+NAS secrets come from ``RADIUS_COA_NAS_SECRETS`` (``ip=secret,...``), then
+the FreeRADIUS ``nas`` table, then ``RADIUS_COA_SECRET``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import ipaddress
+import logging
+import os
+import secrets
+import struct
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import String, Text, cast, column, exists, or_, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session
+
+from services.network.database import get_session
+from services.network.freeradius import nas, radacct
+from services.network.models import RADIUS_COA_STATUS, RadiusAccount, RadiusCoARequest, RadiusSyncPending
+
+logger = logging.getLogger("network.radius_coa")
+
+RADIUS_COA_SENDER = os.getenv("RADIUS_COA_SENDER", "true").lower() in ("1", "true", "yes")
+RADIUS_COA_PORT = int(os.getenv("RADIUS_COA_PORT", "3799"))
+RADIUS_COA_SECRET = os.getenv("RADIUS_COA_SECRET", "")
+RADIUS_COA_NAS_SECRETS = os.getenv("RADIUS_COA_NAS_SECRETS", "")
+RADIUS_COA_TIMEOUT_SECONDS = float(os.getenv("RADIUS_COA_TIMEOUT_SECONDS", "3"))
+RADIUS_COA_RETRIES = int(os.getenv("RADIUS_COA_RETRIES", "2"))
+RADIUS_COA_MAX_INFLIGHT_PER_NAS = min(255, int(os.getenv("RADIUS_COA_MAX_INFLIGHT_PER_NAS", "32")))
+RADIUS_COA_BATCH_SIZE = int(os.getenv("RADIUS_COA_BATCH_SIZE", "500"))
+RADIUS_COA_MAX_ATTEMPTS = int(os.getenv("RADIUS_COA_MAX_ATTEMPTS", "5"))
+RADIUS_COA_LEASE_SECONDS = int(os.getenv("RADIUS_COA_LEASE_SECONDS", "60"))
+RADIUS_COA_POLL_SECONDS = float(os.getenv("RADIUS_COA_POLL_SECONDS", "2"))
+
+# RFC 5176 codes
+DISCONNECT_REQUEST, DISCONNECT_ACK, DISCONNECT_NAK = 40, 41, 42
+COA_REQUEST, COA_ACK, COA_NAK = 43, 44, 45
+
+# Attribute types
+ATTR_USER_NAME = 1
+ATTR_NAS_IP_ADDRESS = 4
+ATTR_FRAMED_IP_ADDRESS = 8
+ATTR_VENDOR_SPECIFIC = 26
+ATTR_ACCT_SESSION_ID = 44
+ATTR_EVENT_TIMESTAMP = 55
+ATTR_NAS_IPV6_ADDRESS = 95
+ATTR_FRAMED_IPV6_PREFIX = 97
+ATTR_ERROR_CAUSE = 101
+
+VENDOR_MIKROTIK = 14988
+MIKROTIK_RATE_LIMIT = 8
+
+ERROR_SESSION_CONTEXT_NOT_FOUND = 503
+
+
+# ---------------------------------------------------------------------------
+# Packets
+# ---------------------------------------------------------------------------
+
+def _attr(attr_type: int, value: bytes) -> bytes:
+    if len(value) > 253:
+        raise ValueError(f"RADIUS attribute {attr_type} too long ({len(value)} bytes)")
+    return struct.pack("!BB", attr_type, len(value) + 2) + value
+
+
+def _nas_address_attr(nas_ip_address: str) -> bytes:
+    address = ipaddress.ip_address(nas_ip_address)
+    if address.version == 6:
+        return _attr(ATTR_NAS_IPV6_ADDRESS, address.packed)
+    return _attr(ATTR_NAS_IP_ADDRESS, address.packed)
+
+
+def _framed_address_attr(framed_ip_address: str) -> bytes:
+    """Framed-IP-Address, or Framed-IPv6-Prefix (RFC 3162) for IPv6 addresses/prefixes."""
+    interface = ipaddress.ip_interface(framed_ip_address)
+    if interface.version == 4:
+        return _attr(ATTR_FRAMED_IP_ADDRESS, interface.ip.packed)
+    prefix_len = interface.network.prefixlen
+    prefix = interface.network.network_address.packed[:(prefix_len + 7) // 8]
+    return _attr(ATTR_FRAMED_IPV6_PREFIX, struct.pack("!BB", 0, prefix_len) + prefix)
+
+
+def encode_attributes(
+    username: str,
+    nas_ip_address: Optional[str] = None,
+    acct_session_id: Optional[str] = None,
+    framed_ip_address: Optional[str] = None,
+    rate_limit: Optional[str] = None,
+) -> bytes:
+    """Encode the request attributes; raises ``ValueError`` for malformed addresses or oversized values."""
+    parts = [_attr(ATTR_USER_NAME, username.encode())]
+    if acct_session_id:
+        parts.append(_attr(ATTR_ACCT_SESSION_ID, acct_session_id.encode()))
+    if nas_ip_address:
+        parts.append(_nas_address_attr(nas_ip_address))
+    if framed_ip_address:
+        parts.append(_framed_address_attr(framed_ip_address))
+    if rate_limit:
+        vsa = struct.pack("!IBB", VENDOR_MIKROTIK, MIKROTIK_RATE_LIMIT, len(rate_limit) + 2) + rate_limit.encode()
+        parts.append(_attr(ATTR_VENDOR_SPECIFIC, vsa))
+    parts.append(_attr(ATTR_EVENT_TIMESTAMP, struct.pack("!I", int(time.time()))))
+    return b"".join(parts)
+
+
+def build_request(code: int, identifier: int, secret: bytes, attributes: bytes) -> bytes:
+    """Request Authenticator = MD5(Code | Id | Length | 16 zero octets | Attributes | Secret)."""
+    length = 20 + len(attributes)
+    header = struct.pack("!BBH", code, identifier, length)
+    authenticator = hashlib.md5(header + b"\x00" * 16 + attributes + secret).digest()
+    return header + authenticator + attributes
+
+
+def parse_attributes(data: bytes) -> dict[int, list[bytes]]:
+    attrs: dict[int, list[bytes]] = {}
+    pos = 0
+    while pos + 2 <= len(data):
+        attr_type, attr_len = data[pos], data[pos + 1]
+        if attr_len < 2 or pos + attr_len > len(data):
+            break
+        attrs.setdefault(attr_type, []).append(data[pos + 2:pos + attr_len])
+        pos += attr_len
+    return attrs
+
+
+def verify_response(response: bytes, request_authenticator: bytes, secret: bytes) -> bool:
+    """Response Authenticator = MD5(Code | Id | Length | Request Authenticator | Attributes | Secret)."""
+    if len(response) < 20:
+        return False
+    expected = hashlib.md5(response[:4] + request_authenticator + response[20:] + secret).digest()
+    return secrets.compare_digest(expected, response[4:20])
+
+
+@dataclass
+class CoAResult:
+    nas_ip_address: str
+    status: str  # ack / nak / timeout / error
+    error_cause: Optional[int] = None
+    message: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status == "ack" or (
+            self.status == "nak" and self.error_cause == ERROR_SESSION_CONTEXT_NOT_FOUND
+        )
+
+
+# ---------------------------------------------------------------------------
+# UDP client
+# ---------------------------------------------------------------------------
+
+class _NasEndpoint(asyncio.DatagramProtocol):
+    """One UDP socket to one NAS, multiplexing up to 255 outstanding identifiers."""
+
+    def __init__(self, nas_ip: str, port: int, secret: bytes, max_inflight: int) -> None:
+        self.nas_ip = nas_ip
+        self.port = port
+        self.secret = secret
+        self.slots = asyncio.Semaphore(max_inflight)
+        self.free_ids: deque[int] = deque(range(256))
+        self.waiting: dict[int, tuple[bytes, asyncio.Future]] = {}
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.sent = 0
+        self.retransmits = 0
+
+    async def open(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(lambda: self, remote_addr=(self.nas_ip, self.port))
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if len(data) < 20:
+            return
+        pending = self.waiting.get(data[1])
+        if pending is None:
+            return
+        request_auth, future = pending
+        if future.done():
+            return
+        if not verify_response(data, request_auth, self.secret):
+            logger.warning("Dropping CoA reply from %s with bad authenticator", self.nas_ip)
+            return
+        future.set_result(data)
+
+    def error_received(self, exc: Exception) -> None:
+        logger.debug("UDP error from NAS %s: %s", self.nas_ip, exc)
+
+    async def request(self, code: int, attributes: bytes) -> CoAResult:
+        async with self.slots:
+            identifier = self.free_ids.popleft()
+            packet = build_request(code, identifier, self.secret, attributes)
+            future: asyncio.Future = asyncio.get_running_loop().create_future()
+            self.waiting[identifier] = (packet[4:20], future)
+            try:
+                for attempt in range(RADIUS_COA_RETRIES + 1):
+                    self.transport.sendto(packet)
+                    self.sent += 1
+                    self.retransmits += int(attempt > 0)
+                    try:
+                        reply = await asyncio.wait_for(asyncio.shield(future), RADIUS_COA_TIMEOUT_SECONDS)
+                        break
+                    except asyncio.TimeoutError:
+                        continue
+                else:
+                    return CoAResult(self.nas_ip, "timeout", message=f"No reply after {RADIUS_COA_RETRIES + 1} tries")
+            finally:
+                self.waiting.pop(identifier, None)
+                self.free_ids.append(identifier)
+
+        reply_code = reply[0]
+        cause_values = parse_attributes(reply[20:]).get(ATTR_ERROR_CAUSE)
+        cause = struct.unpack("!I", cause_values[0])[0] if cause_values and len(cause_values[0]) == 4 else None
+        if reply_code in (DISCONNECT_ACK, COA_ACK):
+            return CoAResult(self.nas_ip, "ack")
+        if reply_code in (DISCONNECT_NAK, COA_NAK):
+            return CoAResult(self.nas_ip, "nak", error_cause=cause, message=f"NAK error-cause={cause}")
+        return CoAResult(self.nas_ip, "error", message=f"Unexpected reply code {reply_code}")
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+
+
+def _configured_secrets() -> dict[str, str]:
+    mapping = {}
+    for item in RADIUS_COA_NAS_SECRETS.split(","):
+        if "=" in item:
+            ip, secret = item.split("=", 1)
+            mapping[ip.strip()] = secret.strip()
+    return mapping
+
+
+def _nas_table_secret(nas_ip: str) -> Optional[str]:
+    try:
+        with get_session() as session:
+            return session.execute(
+                select(nas.c.secret).where(nas.c.nasname == nas_ip).limit(1)
+            ).scalar()
+    except Exception as exc:
+        logger.debug("NAS secret lookup for %s failed: %s", nas_ip, exc)
+        return None
+
+
+class CoAClient:
+    """Sends Disconnect/CoA requests; one :class:`_NasEndpoint` per NAS."""
+
+    def __init__(self, port: int = RADIUS_COA_PORT, max_inflight: int = RADIUS_COA_MAX_INFLIGHT_PER_NAS) -> None:
+        self.port = port
+        self.max_inflight = max_inflight
+        self._endpoints: dict[str, _NasEndpoint] = {}
+        self._secrets = _configured_secrets()
+        self._lock = asyncio.Lock()
+
+    async def _secret(self, nas_ip: str) -> Optional[str]:
+        if nas_ip not in self._secrets:
+            self._secrets[nas_ip] = await asyncio.to_thread(_nas_table_secret, nas_ip) or RADIUS_COA_SECRET
+        return self._secrets[nas_ip] or None
+
+    async def _endpoint(self, nas_ip: str) -> Optional[_NasEndpoint]:
+        endpoint = self._endpoints.get(nas_ip)
+        if endpoint is None:
+            async with self._lock:
+                endpoint = self._endpoints.get(nas_ip)
+                if endpoint is None:
+                    secret = await self._secret(nas_ip)
+                    if not secret:
+                        return None
+                    endpoint = _NasEndpoint(nas_ip, self.port, secret.encode(), self.max_inflight)
+                    await endpoint.open()
+                    self._endpoints[nas_ip] = endpoint
+        return endpoint
+
+    async def send(
+        self,
+        nas_ip: str,
+        code: int,
+        username: str,
+        acct_session_id: Optional[str] = None,
+        framed_ip_address: Optional[str] = None,
+        rate_limit: Optional[str] = None,
+    ) -> CoAResult:
+        """Encode and send one request; every failure comes back as an ``error`` result."""
+        try:
+            attributes = encode_attributes(username, nas_ip, acct_session_id, framed_ip_address, rate_limit)
+            endpoint = await self._endpoint(nas_ip)
+            if endpoint is None:
+                return CoAResult(nas_ip, "error", message="No shared secret configured for NAS")
+            return await endpoint.request(code, attributes)
+        except (OSError, ValueError) as exc:
+            return CoAResult(nas_ip, "error", message=str(exc))
+
+    async def disconnect(self, nas_ip: str, username: str, acct_session_id: Optional[str] = None,
+                         framed_ip_address: Optional[str] = None) -> CoAResult:
+        return await self.send(nas_ip, DISCONNECT_REQUEST, username, acct_session_id, framed_ip_address)
+
+    async def change_rate(self, nas_ip: str, username: str, rate_limit: Optional[str],
+                          acct_session_id: Optional[str] = None) -> CoAResult:
+        return await self.send(nas_ip, COA_REQUEST, username, acct_session_id, rate_limit=rate_limit)
+
+    def snapshot(self) -> dict:
+        return {
+            ip: {
+                "inflight": len(e.waiting),
+                "sent": e.sent,
+                "retransmits": e.retransmits,
+            }
+            for ip, e in sorted(self._endpoints.items())
+        }
+
+    async def close(self) -> None:
+        for endpoint in self._endpoints.values():
+            endpoint.close()
+        self._endpoints.clear()
+
+
+coa_client = CoAClient()
+
+
+# ---------------------------------------------------------------------------
+# Queue
+# ---------------------------------------------------------------------------
+
+def enqueue_coa(session: Session, account: RadiusAccount, action: str, reason: Optional[str] = None) -> RadiusCoARequest:
+    """Queue a Disconnect (``disconnect``) or CoA (``coa``) for ``account`` in the caller's transaction."""
+    request = RadiusCoARequest(
+        tenant_id=account.tenant_id,
+        service_id=account.service_id,
+        radius_account_id=account.id,
+        username=account.username,
+        nas_ip_address=account.nas_ip_address,
+        action=action,
+        reason=reason,
+    )
+    session.add(request)
+    return request
+
+
+@dataclass
+class _Claimed:
+    id: uuid.UUID
+    tenant_id: uuid.UUID
+    radius_account_id: uuid.UUID
+    username: str
+    nas_ip_address: Optional[str]
+    action: str
+    attempts: int
+
+
+@dataclass
+class _Target:
+    nas_ip_address: str
+    acct_session_id: Optional[str] = None
+    framed_ip_address: Optional[str] = None
+
+
+def claim_coa_requests(limit: int = RADIUS_COA_BATCH_SIZE) -> tuple[list[_Claimed], dict, dict]:
+    """Lease pending requests and load their open sessions and rate limits."""
+    now = datetime.now(timezone.utc)
+    ready = (
+        select(RadiusCoARequest.id)
+        .where(
+            RadiusCoARequest.status == "pending",
+            or_(
+                RadiusCoARequest.sent_at.is_(None),
+                RadiusCoARequest.sent_at < now - timedelta(seconds=RADIUS_COA_LEASE_SECONDS),
+            ),
+            # Wait until radcheck/radreply reflect the change that queued the
+            # request, or the CPE re-authenticates against the old rows.
+            ~exists().where(
+                RadiusSyncPending.tenant_id == RadiusCoARequest.tenant_id,
+                RadiusSyncPending.username == RadiusCoARequest.username,
+            ),
+        )
+        .order_by(RadiusCoARequest.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    with get_session() as session:
+        claimed = [
+            _Claimed(*row)
+            for row in session.execute(
+                update(RadiusCoARequest)
+                .where(RadiusCoARequest.id.in_(ready.scalar_subquery()))
+                .values(sent_at=now, attempts=RadiusCoARequest.attempts + 1)
+                .returning(
+                    RadiusCoARequest.id, RadiusCoARequest.tenant_id, RadiusCoARequest.radius_account_id,
+                    RadiusCoARequest.username, RadiusCoARequest.nas_ip_address, RadiusCoARequest.action,
+                    RadiusCoARequest.attempts,
+                )
+                .execution_options(synchronize_session=False)
+            )
+        ]
+        if not claimed:
+            return [], {}, {}
+
+        users = {(c.tenant_id, c.username) for c in claimed}
+        sessions: dict[tuple, list[_Target]] = {}
+        for tenant_id, username, nas_ip, session_id, framed_ip in session.execute(
+            select(
+                radacct.c.tenant_id, radacct.c.username, radacct.c.nasipaddress,
+                radacct.c.acctsessionid, radacct.c.framedipaddress,
+            ).where(
+                radacct.c.acctstoptime.is_(None),
+                radacct.c.username.in_({u for _t, u in users}),
+            )
+        ):
+            if (tenant_id, username) in users:
+                sessions.setdefault((tenant_id, username), []).append(
+                    _Target(str(nas_ip), session_id, str(framed_ip) if framed_ip else None)
+                )
+        rate_limits = dict(session.execute(
+            select(RadiusAccount.id, RadiusAccount.mikrotik_rate_limit).where(
+                RadiusAccount.id.in_({c.radius_account_id for c in claimed if c.action == "coa"})
+            )
+        ).all())
+    return claimed, sessions, rate_limits
+
+
+def record_coa_results(outcomes: list[tuple[uuid.UUID, str, Optional[str]]]) -> None:
+    """Write ``(request_id, status, last_error)`` outcomes in one statement."""
+    if not outcomes:
+        return
+    data = values(
+        column("id", PG_UUID(as_uuid=True)),
+        column("status", String),
+        column("last_error", Text),
+        name="coa_outcomes",
+    ).data(outcomes)
+    with get_session() as session:
+        session.execute(
+            update(RadiusCoARequest)
+            .where(RadiusCoARequest.id == data.c.id)
+            .values(status=cast(data.c.status, RADIUS_COA_STATUS), last_error=data.c.last_error)
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def _send_request(
+    client: CoAClient,
+    request: _Claimed,
+    targets: list[_Target],
+    rate_limit: Optional[str],
+) -> tuple[uuid.UUID, str, Optional[str]]:
+    if not targets:
+        return request.id, "acked", "No active session"
+
+    if request.action == "disconnect":
+        results = await asyncio.gather(*[
+            client.disconnect(t.nas_ip_address, request.username, t.acct_session_id, t.framed_ip_address)
+            for t in targets
+        ])
+    else:
+        results = await asyncio.gather(*[
+            client.change_rate(t.nas_ip_address, request.username, rate_limit, t.acct_session_id)
+            for t in targets
+        ])
+
+    if all(r.done for r in results):
+        return request.id, "acked", None
+    errors = "; ".join(f"{r.nas_ip_address}: {r.message or r.status}" for r in results if not r.done)
+    if any(r.status == "nak" and not r.done for r in results):
+        return request.id, "nacked", errors
+    if request.attempts >= RADIUS_COA_MAX_ATTEMPTS:
+        return request.id, "failed", errors
+    return request.id, "pending", errors
+
+
+async def process_coa_batch(client: CoAClient = coa_client) -> int:
+    """Claim, send and record one batch; returns the number of requests handled."""
+    claimed, sessions, rate_limits = await asyncio.to_thread(claim_coa_requests)
+    if not claimed:
+        return 0
+
+    def _targets(request: _Claimed) -> list[_Target]:
+        found = sessions.get((request.tenant_id, request.username))
+        if found:
+            return found
+        # No accounting session known: fall back to the account's NAS by User-Name.
+        return [_Target(request.nas_ip_address)] if request.nas_ip_address and request.action == "disconnect" else []
+
+    results = await asyncio.gather(*[
+        _send_request(client, r, _targets(r), rate_limits.get(r.radius_account_id)) for r in claimed
+    ], return_exceptions=True)
+    # One unexpected failure must not stop the rest of the batch being
+    # recorded, or every request in it would be resent after the lease.
+    outcomes = []
+    for request, result in zip(claimed, results):
+        if isinstance(result, BaseException):
+            logger.error("CoA request %s failed", request.id, exc_info=result)
+            status = "failed" if request.attempts >= RADIUS_COA_MAX_ATTEMPTS else "pending"
+            result = (request.id, status, str(result)[:500] or type(result).__name__)
+        outcomes.append(result)
+    await asyncio.to_thread(record_coa_results, outcomes)
+
+    counts: dict[str, int] = {}
+    for _id, status, _err in outcomes:
+        counts[status] = counts.get(status, 0) + 1
+    logger.info("CoA batch: %d requests %s", len(claimed), counts)
+    return len(claimed)
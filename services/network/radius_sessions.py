@@ -0,0 +1,363 @@
+"""In-memory index of live RADIUS sessions, fed incrementally from ``radacct``.
+
+NOC dashboards poll session lists and counts constantly; answering each poll
+from ``radacct`` would scan a table that grows with every interim update.
+Instead each network API process keeps a :class:`SessionIndex` of open
+sessions keyed by tenant, username and NAS:
+
+  - **Initial load** — every row with ``acctstoptime IS NULL``.
+  - **Incremental poll** — every ``RADIUS_SESSION_POLL_SECONDS``, rows with
+    ``radacctid`` above the id watermark (new sessions) or ``acctupdatetime``
+    at/after the update watermark minus a small overlap (interim updates and
+    stops; FreeRADIUS sets ``acctupdatetime`` on both).  Stopped rows leave
+    the index, open rows are upserted.  Both watermarks come from the rows
+    themselves, so DB/app clock skew does not matter.
+  - **Reconciliation** — every ``RADIUS_SESSION_RECONCILE_SECONDS`` the open
+    ``radacctid`` set is re-read to drop sessions closed or deleted behind the
+    poller's back, and sessions without an update for
+    ``RADIUS_SESSION_STALE_SECONDS`` (NAS rebooted without an Accounting-Stop)
+    are dropped.
+
+Until the first load completes (or with ``RADIUS_SESSION_INDEX=false``)
+queries fall back to reading ``radacct`` directly.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import or_, select
+
+from services.network.database import get_session
+from services.network.freeradius import radacct
+
+logger = logging.getLogger("network.radius_sessions")
+
+RADIUS_SESSION_INDEX = os.getenv("RADIUS_SESSION_INDEX", "true").lower() == "true"
+RADIUS_SESSION_POLL_SECONDS = float(os.getenv("RADIUS_SESSION_POLL_SECONDS", "5"))
+RADIUS_SESSION_RECONCILE_SECONDS = float(os.getenv("RADIUS_SESSION_RECONCILE_SECONDS", "300"))
+RADIUS_SESSION_STALE_SECONDS = float(os.getenv("RADIUS_SESSION_STALE_SECONDS", "1800"))
+RADIUS_SESSION_POLL_OVERLAP = timedelta(seconds=float(os.getenv("RADIUS_SESSION_POLL_OVERLAP_SECONDS", "5")))
+RADIUS_SESSION_BATCH_SIZE = int(os.getenv("RADIUS_SESSION_BATCH_SIZE", "5000"))
+
+_COLUMNS = (
+    radacct.c.radacctid,
+    radacct.c.tenant_id,
+    radacct.c.username,
+    radacct.c.nasipaddress,
+    radacct.c.acctsessionid,
+    radacct.c.framedipaddress,
+    radacct.c.callingstationid,
+    radacct.c.acctstarttime,
+    radacct.c.acctupdatetime,
+    radacct.c.acctstoptime,
+    radacct.c.acctsessiontime,
+    radacct.c.acctinputoctets,
+    radacct.c.acctoutputoctets,
+)
+
+
+@dataclass
+class LiveSession:
+    radacctid: int
+    tenant_id: Optional[uuid.UUID]
+    username: str
+    nas_ip_address: str
+    session_id: str
+    framed_ip_address: Optional[str]
+    calling_station_id: Optional[str]
+    start_time: Optional[datetime]
+    update_time: Optional[datetime]
+    session_time: int
+    input_octets: int
+    output_octets: int
+
+    @classmethod
+    def from_row(cls, row) -> "LiveSession":
+        return cls(
+            radacctid=row.radacctid,
+            tenant_id=row.tenant_id,
+            username=row.username,
+            nas_ip_address=str(row.nasipaddress),
+            session_id=row.acctsessionid,
+            framed_ip_address=str(row.framedipaddress) if row.framedipaddress else None,
+            calling_station_id=row.callingstationid,
+            start_time=row.acctstarttime,
+            update_time=row.acctupdatetime or row.acctstarttime,
+            session_time=row.acctsessiontime or 0,
+            input_octets=row.acctinputoctets or 0,
+            output_octets=row.acctoutputoctets or 0,
+        )
+
+    def uptime_seconds(self, now: datetime) -> int:
+        if self.start_time is None:
+            return self.session_time
+        return max(self.session_time, int((now - self.start_time).total_seconds()))
+
+    def as_info(self, now: datetime) -> dict:
+        return {
+            "username": self.username,
+            "nas_ip_address": self.nas_ip_address,
+            "framed_ip_address": self.framed_ip_address,
+            "session_id": self.session_id,
+            "uptime_seconds": self.uptime_seconds(now),
+            "input_octets": self.input_octets,
+            "output_octets": self.output_octets,
+            "calling_station_id": self.calling_station_id,
+            "start_time": self.start_time,
+            "last_update": self.update_time,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+class SessionIndex:
+    """Open sessions by ``radacctid`` with secondary indexes per tenant, user and NAS."""
+
+    def __init__(self) -> None:
+        self.by_id: dict[int, LiveSession] = {}
+        self.by_tenant: dict[Optional[uuid.UUID], set[int]] = {}
+        self.by_user: dict[tuple, set[int]] = {}
+        self.by_nas: dict[tuple, set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def _link(self, s: LiveSession) -> None:
+        self.by_tenant.setdefault(s.tenant_id, set()).add(s.radacctid)
+        self.by_user.setdefault((s.tenant_id, s.username), set()).add(s.radacctid)
+        self.by_nas.setdefault((s.tenant_id, s.nas_ip_address), set()).add(s.radacctid)
+
+    def _unlink(self, s: LiveSession) -> None:
+        for index, key in (
+            (self.by_tenant, s.tenant_id),
+            (self.by_user, (s.tenant_id, s.username)),
+            (self.by_nas, (s.tenant_id, s.nas_ip_address)),
+        ):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(s.radacctid)
+                if not ids:
+                    del index[key]
+
+    def upsert(self, session: LiveSession) -> None:
+        old = self.by_id.get(session.radacctid)
+        if old is not None:
+            if (old.tenant_id, old.username, old.nas_ip_address) == (
+                session.tenant_id, session.username, session.nas_ip_address,
+            ):
+                self.by_id[session.radacctid] = session
+                return
+            self._unlink(old)
+        self.by_id[session.radacctid] = session
+        self._link(session)
+
+    def remove(self, radacctid: int) -> None:
+        old = self.by_id.pop(radacctid, None)
+        if old is not None:
+            self._unlink(old)
+
+    def query(
+        self,
+        tenant_id: uuid.UUID,
+        username: Optional[str] = None,
+        nas_ip_address: Optional[str] = None,
+    ) -> list[LiveSession]:
+        if username is not None:
+            ids = self.by_user.get((tenant_id, username), set())
+        elif nas_ip_address is not None:
+            ids = self.by_nas.get((tenant_id, nas_ip_address), set())
+        else:
+            ids = self.by_tenant.get(tenant_id, set())
+        sessions = [self.by_id[i] for i in ids]
+        if username is not None and nas_ip_address is not None:
+            sessions = [s for s in sessions if s.nas_ip_address == nas_ip_address]
+        return sessions
+
+    def counts(self, tenant_id: uuid.UUID) -> dict:
+        ids = self.by_tenant.get(tenant_id, set())
+        return {
+            "total": len(ids),
+            "subscribers": len({self.by_id[i].username for i in ids}),
+            "by_nas": {
+                nas: len(nas_ids)
+                for (t, nas), nas_ids in sorted(self.by_nas.items(), key=lambda kv: kv[0][1])
+                if t == tenant_id
+            },
+        }
+
+
+# ---------------------------------------------------------------------------
+# Tracker
+# ---------------------------------------------------------------------------
+
+class SessionTracker:
+    """Keeps a :class:`SessionIndex` in step with ``radacct``."""
+
+    def __init__(self) -> None:
+        self.index = SessionIndex()
+        self.ready = False
+        self.max_id = 0
+        self.max_update: Optional[datetime] = None
+        self.last_poll_at: Optional[float] = None
+        self.last_reconcile_at: Optional[float] = None
+        self.polls = 0
+        self.rows_applied = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def _advance(self, row) -> None:
+        self.max_id = max(self.max_id, row.radacctid)
+        for ts in (row.acctupdatetime, row.acctstoptime, row.acctstarttime):
+            if ts is not None and (self.max_update is None or ts > self.max_update):
+                self.max_update = ts
+
+    def _apply(self, rows) -> None:
+        for row in rows:
+            self._advance(row)
+            if row.acctstoptime is not None:
+                self.index.remove(row.radacctid)
+            else:
+                self.index.upsert(LiveSession.from_row(row))
+        self.rows_applied += len(rows)
+
+    def load(self) -> None:
+        """Full load of open sessions into a fresh index, swapped in at the end."""
+        index = SessionIndex()
+        max_id, max_update = 0, None
+        with get_session() as session:
+            max_id = session.execute(select(radacct.c.radacctid).order_by(radacct.c.radacctid.desc()).limit(1)).scalar() or 0
+            result = session.execute(
+                select(*_COLUMNS).where(radacct.c.acctstoptime.is_(None))
+                .execution_options(yield_per=RADIUS_SESSION_BATCH_SIZE)
+            )
+            for row in result:
+                index.upsert(LiveSession.from_row(row))
+                ts = row.acctupdatetime or row.acctstarttime
+                if ts is not None and (max_update is None or ts > max_update):
+                    max_update = ts
+        self.index, self.max_id, self.max_update = index, max_id, max_update
+        self.ready = True
+        self.last_reconcile_at = time.monotonic()
+        logger.info("Loaded %d open RADIUS sessions (radacctid watermark %d)", len(index), max_id)
+
+    def fetch_changes(self) -> list:
+        """``radacct`` rows changed since the watermarks (runs in a worker thread)."""
+        changed = radacct.c.radacctid > self.max_id
+        if self.max_update is not None:
+            changed = or_(changed, radacct.c.acctupdatetime >= self.max_update - RADIUS_SESSION_POLL_OVERLAP)
+        with get_session() as session:
+            return session.execute(select(*_COLUMNS).where(changed).order_by(radacct.c.radacctid)).all()
+
+    def fetch_open_ids(self) -> set[int]:
+        with get_session() as session:
+            return set(session.execute(
+                select(radacct.c.radacctid).where(radacct.c.acctstoptime.is_(None))
+                .execution_options(yield_per=RADIUS_SESSION_BATCH_SIZE)
+            ).scalars())
+
+    def reconcile(self, open_ids: set[int]) -> int:
+        """Drop sessions no longer open in ``radacct`` or silent for too long."""
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=RADIUS_SESSION_STALE_SECONDS)
+        dropped = 0
+        for radacctid, s in list(self.index.by_id.items()):
+            if radacctid not in open_ids or (s.update_time is not None and s.update_time < stale_before):
+                self.index.remove(radacctid)
+                dropped += 1
+        self.last_reconcile_at = time.monotonic()
+        if dropped:
+            logger.info("Session reconciliation dropped %d closed/stale sessions", dropped)
+        return dropped
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # DB reads run in a thread; the index is only mutated on the
+                # event loop, so request handlers never see it half-updated.
+                if not self.ready:
+                    await asyncio.to_thread(self.load)
+                else:
+                    self._apply(await asyncio.to_thread(self.fetch_changes))
+                    self.polls += 1
+                    self.last_poll_at = time.monotonic()
+                    if time.monotonic() - (self.last_reconcile_at or 0) >= RADIUS_SESSION_RECONCILE_SECONDS:
+                        self.reconcile(await asyncio.to_thread(self.fetch_open_ids))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error("RADIUS session index refresh failed: %s", exc)
+            await asyncio.sleep(RADIUS_SESSION_POLL_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="radius-session-index")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            "ready": self.ready,
+            "open_sessions": len(self.index),
+            "radacctid_watermark": self.max_id,
+            "update_watermark": self.max_update,
+            "polls": self.polls,
+            "rows_applied": self.rows_applied,
+            "seconds_since_poll": round(now - self.last_poll_at, 1) if self.last_poll_at else None,
+            "seconds_since_reconcile": round(now - self.last_reconcile_at, 1) if self.last_reconcile_at else None,
+        }
+
+
+session_tracker = SessionTracker()
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def _query_db(tenant_id: uuid.UUID, username: Optional[str], nas_ip_address: Optional[str]) -> list[LiveSession]:
+    q = select(*_COLUMNS).where(radacct.c.tenant_id == tenant_id, radacct.c.acctstoptime.is_(None))
+    if username is not None:
+        q = q.where(radacct.c.username == username)
+    if nas_ip_address is not None:
+        q = q.where(radacct.c.nasipaddress == nas_ip_address)
+    with get_session() as session:
+        return [LiveSession.from_row(row) for row in session.execute(q)]
+
+
+async def active_sessions(
+    tenant_id: uuid.UUID,
+    username: Optional[str] = None,
+    nas_ip_address: Optional[str] = None,
+) -> list[LiveSession]:
+    if session_tracker.ready:
+        return session_tracker.index.query(tenant_id, username, nas_ip_address)
+    return await asyncio.to_thread(_query_db, tenant_id, username, nas_ip_address)
+
+
+def _counts_db(tenant_id: uuid.UUID) -> dict:
+    index = SessionIndex()
+    for s in _query_db(tenant_id, None, None):
+        index.upsert(s)
+    return index.counts(tenant_id)
+
+
+async def session_counts(tenant_id: uuid.UUID) -> dict:
+    if session_tracker.ready:
+        return session_tracker.index.counts(tenant_id)
+    return await asyncio.to_thread(_counts_db, tenant_id)
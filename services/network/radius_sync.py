@@ -0,0 +1,313 @@
+"""Sync ``radius_accounts`` into FreeRADIUS's ``radcheck`` / ``radreply`` / ``radusergroup``.
+
+FreeRADIUS authorizes subscribers from its own SQL tables, so every account,
+profile and status change has to be reflected there.  Changes are not
+written through one row at a time:
+
+  1. whatever changes an account calls :func:`queue_sync` in the same
+     transaction, which upserts one ``radius_sync_pending`` row per user —
+     ``due_at`` comes from the first change, so a burst of changes to the
+     same user within ``RADIUS_SYNC_COALESCE_SECONDS`` is synced once;
+  2. the network worker calls :func:`process_sync_batch`, which claims due
+     users (``FOR UPDATE SKIP LOCKED``), reads their accounts and current
+     FreeRADIUS rows in one query per table, and writes only the
+     difference — one ``INSERT ... ON CONFLICT DO UPDATE`` and one
+     ``DELETE`` per table for the whole batch;
+  3. the pending rows are deleted in the same transaction.  A change that
+     commits while its user is being synced waits on the row lock and then
+     queues the user again.
+
+The desired rows are a pure function of the account, so syncing is
+idempotent.  Only the attributes in :data:`MANAGED_CHECK` and
+:data:`MANAGED_REPLY` are touched; hand-added attributes survive.  All of a
+user's ``radusergroup`` rows are managed.
+
+:func:`full_resync` walks every user known to either side in
+``(tenant_id, username)`` keyset chunks of ``RADIUS_SYNC_RESYNC_CHUNK`` and
+applies the same diff, so an in-sync tree costs reads only.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import Table, delete, func, literal_column, select, tuple_, union, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from services.network.database import get_session
+from services.network.freeradius import radcheck, radreply, radusergroup
+from services.network.models import RadiusAccount, RadiusSyncPending
+
+logger = logging.getLogger("network.radius_sync")
+
+RADIUS_SYNC = os.getenv("RADIUS_SYNC", "true").lower() == "true"
+RADIUS_SYNC_POLL_SECONDS = float(os.getenv("RADIUS_SYNC_POLL_SECONDS", "1"))
+RADIUS_SYNC_COALESCE_SECONDS = float(os.getenv("RADIUS_SYNC_COALESCE_SECONDS", "2"))
+RADIUS_SYNC_BATCH_SIZE = int(os.getenv("RADIUS_SYNC_BATCH_SIZE", "1000"))
+RADIUS_SYNC_RESYNC_CHUNK = int(os.getenv("RADIUS_SYNC_RESYNC_CHUNK", "2000"))
+RADIUS_SYNC_MAX_BACKOFF_SECONDS = int(os.getenv("RADIUS_SYNC_MAX_BACKOFF_SECONDS", "300"))
+# Suspended users are moved to this group (e.g. a walled garden) when set;
+# otherwise they are rejected with Auth-Type := Reject.
+RADIUS_SYNC_SUSPENDED_GROUP = os.getenv("RADIUS_SYNC_SUSPENDED_GROUP", "")
+
+MANAGED_CHECK = ("Cleartext-Password", "Crypt-Password", "Auth-Type")
+MANAGED_REPLY = ("Mikrotik-Rate-Limit",)
+
+UserKey = tuple[uuid.UUID, str]
+
+
+# ---------------------------------------------------------------------------
+# Desired state
+# ---------------------------------------------------------------------------
+
+def password_attribute(stored: str) -> str:
+    """``$id$salt$hash`` values are crypt(3) hashes; anything else is cleartext."""
+    return "Crypt-Password" if stored.startswith("$") else "Cleartext-Password"
+
+
+def account_rows(account) -> tuple[list[tuple[str, str, str]], list[tuple[str, str, str]], list[tuple[str, int]]]:
+    """(radcheck, radreply, radusergroup) rows for one account.
+
+    Disabled accounts have no rows at all, so FreeRADIUS rejects them as
+    unknown users.
+    """
+    if account.status == "disabled":
+        return [], [], []
+    check = [(password_attribute(account.password_hash), ":=", account.password_hash)]
+    if account.status == "suspended":
+        if RADIUS_SYNC_SUSPENDED_GROUP:
+            return check, [], [(RADIUS_SYNC_SUSPENDED_GROUP, 1)]
+        return check + [("Auth-Type", ":=", "Reject")], [], []
+    reply = [("Mikrotik-Rate-Limit", "=", account.mikrotik_rate_limit)] if account.mikrotik_rate_limit else []
+    return check, reply, [(account.profile_name, 1)]
+
+
+# ---------------------------------------------------------------------------
+# Diff and apply
+# ---------------------------------------------------------------------------
+
+def _sync_table(
+    session: Session,
+    table: Table,
+    key_name: str,
+    value_names: tuple[str, ...],
+    users: list[UserKey],
+    desired: dict[tuple, tuple],
+    managed: Optional[tuple[str, ...]] = None,
+) -> tuple[int, int]:
+    """Make ``table``'s rows for ``users`` equal ``desired``; returns (upserted, deleted)."""
+    key_col = table.c[key_name]
+    q = select(
+        table.c.id, table.c.tenant_id, table.c.username, key_col, *[table.c[n] for n in value_names],
+    ).where(tuple_(table.c.tenant_id, table.c.username).in_(users))
+    if managed is not None:
+        q = q.where(key_col.in_(managed))
+
+    current: dict[tuple, tuple] = {}
+    stale: list[int] = []
+    for row in session.execute(q):
+        key = (row[1], row[2], row[3])
+        current[key] = tuple(row[4:])
+        if key not in desired:
+            stale.append(row[0])
+
+    upserts = [
+        dict(zip(("tenant_id", "username", key_name, *value_names), (*key, *value)))
+        for key, value in desired.items()
+        if current.get(key) != value
+    ]
+    if stale:
+        session.execute(delete(table).where(table.c.id.in_(stale)))
+    if upserts:
+        stmt = pg_insert(table).values(upserts)
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=["tenant_id", "username", key_name],
+            set_={n: stmt.excluded[n] for n in value_names},
+        ))
+    return len(upserts), len(stale)
+
+
+def sync_users(session: Session, users: list[UserKey]) -> dict[str, int]:
+    """Bring the FreeRADIUS rows of ``users`` in line with their accounts."""
+    accounts = session.execute(
+        select(RadiusAccount).where(tuple_(RadiusAccount.tenant_id, RadiusAccount.username).in_(users))
+    ).scalars().all()
+
+    check: dict[tuple, tuple] = {}
+    reply: dict[tuple, tuple] = {}
+    groups: dict[tuple, tuple] = {}
+    for account in accounts:
+        user = (account.tenant_id, account.username)
+        account_check, account_reply, account_groups = account_rows(account)
+        check.update({(*user, attr): (op, value) for attr, op, value in account_check})
+        reply.update({(*user, attr): (op, value) for attr, op, value in account_reply})
+        groups.update({(*user, group): (priority,) for group, priority in account_groups})
+
+    stats = {"users": len(users), "upserted": 0, "deleted": 0}
+    for table, key_name, value_names, desired, managed in (
+        (radcheck, "attribute", ("op", "value"), check, MANAGED_CHECK),
+        (radreply, "attribute", ("op", "value"), reply, MANAGED_REPLY),
+        (radusergroup, "groupname", ("priority",), groups, None),
+    ):
+        upserted, deleted = _sync_table(session, table, key_name, value_names, users, desired, managed)
+        stats["upserted"] += upserted
+        stats["deleted"] += deleted
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Change queue
+# ---------------------------------------------------------------------------
+
+def queue_sync(session: Session, users: Iterable[UserKey]) -> None:
+    """Queue ``(tenant_id, username)`` pairs for sync in the caller's transaction."""
+    rows = [
+        {"tenant_id": tenant_id, "username": username,
+         "due_at": func.now() + timedelta(seconds=RADIUS_SYNC_COALESCE_SECONDS)}
+        for tenant_id, username in dict.fromkeys(users)
+    ]
+    if not rows:
+        return
+    stmt = pg_insert(RadiusSyncPending).values(rows)
+    # DO UPDATE (not DO NOTHING) so a change racing an in-progress sync of
+    # the same user waits for it and is queued again afterwards.
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "username"],
+        set_={"changed_at": func.now()},
+    ))
+
+
+def process_sync_batch(limit: int = RADIUS_SYNC_BATCH_SIZE) -> int:
+    """Sync one batch of due users; returns the number of users synced."""
+    users: list[UserKey] = []
+    try:
+        with get_session() as session:
+            users = [
+                (tenant_id, username)
+                for tenant_id, username in session.execute(
+                    select(RadiusSyncPending.tenant_id, RadiusSyncPending.username)
+                    .where(RadiusSyncPending.due_at <= func.now())
+                    .order_by(RadiusSyncPending.due_at)
+                    .limit(limit)
+                    .with_for_update(skip_locked=True)
+                )
+            ]
+            if not users:
+                return 0
+            stats = sync_users(session, users)
+            session.execute(
+                delete(RadiusSyncPending).where(
+                    tuple_(RadiusSyncPending.tenant_id, RadiusSyncPending.username).in_(users)
+                )
+            )
+    except Exception:
+        if users:
+            _defer(users)
+        raise
+
+    if stats["upserted"] or stats["deleted"]:
+        logger.info("RADIUS sync: %d users, %d rows upserted, %d deleted",
+                    stats["users"], stats["upserted"], stats["deleted"])
+    return len(users)
+
+
+def _defer(users: list[UserKey]) -> None:
+    """Back off a batch that failed so it does not block the queue."""
+    with get_session() as session:
+        session.execute(
+            update(RadiusSyncPending)
+            .where(tuple_(RadiusSyncPending.tenant_id, RadiusSyncPending.username).in_(users))
+            .values(
+                attempts=RadiusSyncPending.attempts + 1,
+                due_at=func.now() + literal_column("interval '1 second'") * func.least(
+                    func.power(2, RadiusSyncPending.attempts + 1), RADIUS_SYNC_MAX_BACKOFF_SECONDS,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+def pending_status(tenant_id: Optional[uuid.UUID] = None) -> dict:
+    with get_session() as session:
+        q = select(
+            func.count(),
+            func.min(RadiusSyncPending.due_at),
+            func.max(RadiusSyncPending.attempts),
+        )
+        if tenant_id is not None:
+            q = q.where(RadiusSyncPending.tenant_id == tenant_id)
+        count, oldest_due, max_attempts = session.execute(q).one()
+    return {"pending": count, "oldest_due_at": oldest_due, "max_attempts": max_attempts or 0}
+
+
+# ---------------------------------------------------------------------------
+# Full resync
+# ---------------------------------------------------------------------------
+
+def _next_users(
+    session: Session,
+    after: Optional[UserKey],
+    limit: int,
+    tenant_id: Optional[uuid.UUID],
+) -> list[UserKey]:
+    """The next ``limit`` users after ``after`` present on either side."""
+    accounts = RadiusAccount.__table__
+    branches = []
+    for table, managed in (
+        (accounts, None),
+        (radcheck, radcheck.c.attribute.in_(MANAGED_CHECK)),
+        (radreply, radreply.c.attribute.in_(MANAGED_REPLY)),
+        (radusergroup, None),
+    ):
+        q = select(table.c.tenant_id, table.c.username).distinct().where(table.c.tenant_id.is_not(None))
+        if managed is not None:
+            q = q.where(managed)
+        if tenant_id is not None:
+            q = q.where(table.c.tenant_id == tenant_id)
+        if after is not None:
+            q = q.where(tuple_(table.c.tenant_id, table.c.username) > tuple_(*after))
+        # Each branch is limited on its own index; the first ``limit`` keys
+        # of the union are always among them.
+        sub = q.order_by(table.c.tenant_id, table.c.username).limit(limit).subquery()
+        branches.append(select(sub.c.tenant_id, sub.c.username))
+
+    merged = union(*branches).subquery()
+    return [
+        (t, u) for t, u in session.execute(
+            select(merged.c.tenant_id, merged.c.username)
+            .order_by(merged.c.tenant_id, merged.c.username)
+            .limit(limit)
+        )
+    ]
+
+
+def full_resync(tenant_id: Optional[uuid.UUID] = None, chunk_size: int = RADIUS_SYNC_RESYNC_CHUNK) -> dict[str, int]:
+    """Diff every user (of ``tenant_id``, or all tenants) and fix what differs."""
+    totals = {"users": 0, "upserted": 0, "deleted": 0, "chunks": 0}
+    after: Optional[UserKey] = None
+    started = datetime.now(timezone.utc)
+    while True:
+        with get_session() as session:
+            users = _next_users(session, after, chunk_size, tenant_id)
+            if not users:
+                break
+            stats = sync_users(session, users)
+        for key in ("users", "upserted", "deleted"):
+            totals[key] += stats[key]
+        totals["chunks"] += 1
+        after = users[-1]
+        if len(users) < chunk_size:
+            break
+
+    logger.info(
+        "RADIUS full resync%s: %d users in %d chunks, %d rows upserted, %d deleted (%.1fs)",
+        f" for tenant {tenant_id}" if tenant_id else "",
+        totals["users"], totals["chunks"], totals["upserted"], totals["deleted"],
+        (datetime.now(timezone.utc) - started).total_seconds(),
+    )
+    return totals
@@ -0,0 +1,327 @@
+"""Hourly and daily per-subscriber usage rollups from ``radacct``.
+
+Fair-use and out-of-bundle billing need usage per subscriber per period;
+summing raw interim updates on demand is far too slow.  The network worker
+runs :func:`run_rollup` every ``RADIUS_USAGE_ROLLUP_SECONDS``:
+
+  1. ``radacct`` rows are read in ``(acctupdatetime, radacctid)`` keyset order
+     from the durable cursor (``radius_usage_cursor``), starting
+     ``RADIUS_USAGE_OVERLAP_SECONDS`` early to pick up rows written late;
+  2. each row is compared with its checkpoint (``radius_usage_checkpoints``,
+     the counters already rolled up for that ``radacctid``) and only the
+     delta is added — re-reading a row adds nothing;
+  3. a counter lower than its checkpoint means the NAS reset it (or the
+     session restarted under the same id), so the whole current value is
+     the delta; a new ``radacctid`` (new session) starts from zero;
+  4. a delta is spread over the hours between the previous and the current
+     update, then added to ``radius_usage_hourly`` and
+     ``radius_usage_daily`` (local day in ``RADIUS_USAGE_TIMEZONE``) with
+     ``INSERT ... ON CONFLICT DO UPDATE SET x = x + excluded.x``.
+
+Checkpoints, rollups and the cursor are written in one transaction per
+batch under a transaction-level advisory lock, so concurrent workers never
+double count.  Checkpoints of closed sessions are purged after
+``RADIUS_USAGE_CHECKPOINT_RETENTION_DAYS``.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import String, delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from services.network.database import get_session
+from services.network.freeradius import radacct
+from services.network.models import (
+    RadiusAccount,
+    RadiusUsageCheckpoint,
+    RadiusUsageCursor,
+    RadiusUsageDaily,
+    RadiusUsageHourly,
+)
+
+logger = logging.getLogger("network.radius_usage")
+
+RADIUS_USAGE_ROLLUP = os.getenv("RADIUS_USAGE_ROLLUP", "true").lower() == "true"
+RADIUS_USAGE_ROLLUP_SECONDS = float(os.getenv("RADIUS_USAGE_ROLLUP_SECONDS", "60"))
+RADIUS_USAGE_BATCH_SIZE = int(os.getenv("RADIUS_USAGE_BATCH_SIZE", "5000"))
+RADIUS_USAGE_MAX_BATCHES = int(os.getenv("RADIUS_USAGE_MAX_BATCHES", "50"))
+RADIUS_USAGE_OVERLAP = timedelta(seconds=float(os.getenv("RADIUS_USAGE_OVERLAP_SECONDS", "30")))
+RADIUS_USAGE_TIMEZONE = ZoneInfo(os.getenv("RADIUS_USAGE_TIMEZONE", "Africa/Johannesburg"))
+RADIUS_USAGE_CHECKPOINT_RETENTION_DAYS = int(os.getenv("RADIUS_USAGE_CHECKPOINT_RETENTION_DAYS", "3"))
+RADIUS_USAGE_LOCK_KEY = int(os.getenv("RADIUS_USAGE_LOCK_KEY", "805001"))
+
+_CURSOR_NAME = "radacct"
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+Counters = tuple[int, int, int]  # input octets, output octets, session seconds
+
+
+# ---------------------------------------------------------------------------
+# Delta arithmetic
+# ---------------------------------------------------------------------------
+
+def counter_delta(current: Counters, previous: Counters) -> Counters:
+    """Per-counter increase; a counter that went backwards was reset."""
+    return tuple(c - p if c >= p else c for c, p in zip(current, previous))  # type: ignore[return-value]
+
+
+def _hour_floor(ts: datetime) -> datetime:
+    return ts.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def split_by_hour(start: Optional[datetime], end: datetime, delta: Counters) -> list[tuple[datetime, Counters]]:
+    """Spread ``delta`` over the UTC hours between ``start`` and ``end`` pro rata.
+
+    Integer shares; the last hour takes the rounding remainder so the parts
+    always sum to ``delta``.
+    """
+    if start is None or start >= end or _hour_floor(start) == _hour_floor(end):
+        return [(_hour_floor(end), delta)]
+
+    span = (end - start).total_seconds()
+    parts: list[tuple[datetime, Counters]] = []
+    assigned = [0, 0, 0]
+    hour = _hour_floor(start)
+    while hour <= end:
+        nxt = hour + timedelta(hours=1)
+        if nxt > end:
+            share = tuple(d - a for d, a in zip(delta, assigned))
+        else:
+            fraction = (min(nxt, end) - max(hour, start)).total_seconds() / span
+            share = tuple(int(d * fraction) for d in delta)
+            assigned = [a + s for a, s in zip(assigned, share)]
+        if any(share):
+            parts.append((hour, share))  # type: ignore[arg-type]
+        hour = nxt
+    return parts
+
+
+def local_day(hour: datetime) -> date:
+    return hour.astimezone(RADIUS_USAGE_TIMEZONE).date()
+
+
+# ---------------------------------------------------------------------------
+# Rollup
+# ---------------------------------------------------------------------------
+
+def _upsert_usage(session: Session, model, key: str, buckets: dict, services: dict) -> None:
+    if not buckets:
+        return
+    rows = [
+        {
+            "tenant_id": tenant_id,
+            "username": username,
+            key: period,
+            "service_id": services.get((tenant_id, username)),
+            "input_octets": inp,
+            "output_octets": out,
+            "session_seconds": secs,
+        }
+        for (tenant_id, username, period), (inp, out, secs) in buckets.items()
+    ]
+    stmt = pg_insert(model).values(rows)
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "username", key],
+        set_={
+            "input_octets": model.input_octets + stmt.excluded.input_octets,
+            "output_octets": model.output_octets + stmt.excluded.output_octets,
+            "session_seconds": model.session_seconds + stmt.excluded.session_seconds,
+            "service_id": func.coalesce(stmt.excluded.service_id, model.service_id),
+        },
+    ))
+
+
+def rollup_batch(session: Session, after: tuple[datetime, int]) -> tuple[int, Optional[tuple[datetime, int]]]:
+    """Roll up one batch of radacct rows after ``after``; returns (rows, new position)."""
+    rows = session.execute(
+        select(
+            radacct.c.radacctid, radacct.c.tenant_id, radacct.c.username,
+            radacct.c.acctstarttime, radacct.c.acctupdatetime, radacct.c.acctstoptime,
+            radacct.c.acctinputoctets, radacct.c.acctoutputoctets, radacct.c.acctsessiontime,
+        )
+        .where(
+            radacct.c.acctupdatetime.is_not(None),
+            tuple_(radacct.c.acctupdatetime, radacct.c.radacctid) > tuple_(*after),
+        )
+        .order_by(radacct.c.acctupdatetime, radacct.c.radacctid)
+        .limit(RADIUS_USAGE_BATCH_SIZE)
+    ).all()
+    if not rows:
+        return 0, None
+
+    checkpoints = {
+        cp.radacctid: cp
+        for cp in session.execute(
+            select(RadiusUsageCheckpoint).where(RadiusUsageCheckpoint.radacctid.in_([r.radacctid for r in rows]))
+        ).scalars()
+    }
+    services = {
+        (tenant_id, username): service_id
+        for tenant_id, username, service_id in session.execute(
+            select(RadiusAccount.tenant_id, RadiusAccount.username, RadiusAccount.service_id).where(
+                RadiusAccount.tenant_id.in_({r.tenant_id for r in rows if r.tenant_id}),
+                RadiusAccount.username.in_({r.username for r in rows}),
+            )
+        )
+    }
+
+    hourly: dict[tuple, list[int]] = defaultdict(lambda: [0, 0, 0])
+    daily: dict[tuple, list[int]] = defaultdict(lambda: [0, 0, 0])
+    new_checkpoints: dict[int, dict] = {}
+    for r in rows:
+        current: Counters = (r.acctinputoctets or 0, r.acctoutputoctets or 0, r.acctsessiontime or 0)
+        cp = checkpoints.get(r.radacctid)
+        previous: Counters = (cp.input_octets, cp.output_octets, cp.session_seconds) if cp else (0, 0, 0)
+        since = cp.last_update if cp else r.acctstarttime
+        until = r.acctstoptime or r.acctupdatetime
+
+        delta = counter_delta(current, previous)
+        if any(delta) and r.tenant_id is not None:
+            for hour, share in split_by_hour(since, until, delta):
+                for bucket in (hourly[(r.tenant_id, r.username, hour)], daily[(r.tenant_id, r.username, local_day(hour))]):
+                    for i, value in enumerate(share):
+                        bucket[i] += value
+
+        new_checkpoints[r.radacctid] = {
+            "radacctid": r.radacctid,
+            "input_octets": current[0],
+            "output_octets": current[1],
+            "session_seconds": current[2],
+            "last_update": max(until, cp.last_update) if cp else until,
+            "closed": r.acctstoptime is not None,
+        }
+
+    stmt = pg_insert(RadiusUsageCheckpoint).values(list(new_checkpoints.values()))
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=["radacctid"],
+        set_={
+            "input_octets": stmt.excluded.input_octets,
+            "output_octets": stmt.excluded.output_octets,
+            "session_seconds": stmt.excluded.session_seconds,
+            "last_update": stmt.excluded.last_update,
+            "closed": stmt.excluded.closed,
+        },
+    ))
+    _upsert_usage(session, RadiusUsageHourly, "hour", hourly, services)
+    _upsert_usage(session, RadiusUsageDaily, "day", daily, services)
+
+    last = rows[-1]
+    return len(rows), (last.acctupdatetime, last.radacctid)
+
+
+def run_rollup() -> int:
+    """Roll up radacct changes since the cursor; returns rows processed."""
+    total = 0
+    position: Optional[tuple[datetime, int]] = None
+    for _ in range(RADIUS_USAGE_MAX_BATCHES):
+        with get_session() as session:
+            if not session.execute(select(func.pg_try_advisory_xact_lock(RADIUS_USAGE_LOCK_KEY))).scalar():
+                logger.debug("Usage rollup locked by another worker")
+                break
+            cursor = session.get(RadiusUsageCursor, _CURSOR_NAME)
+            if cursor is None:
+                cursor = RadiusUsageCursor(name=_CURSOR_NAME, last_update=_EPOCH, last_radacctid=0)
+                session.add(cursor)
+            if position is None:
+                position = (cursor.last_update - RADIUS_USAGE_OVERLAP, 0)
+
+            count, new_position = rollup_batch(session, position)
+            if new_position is None:
+                break
+            total += count
+            position = new_position
+            if new_position > (cursor.last_update, cursor.last_radacctid):
+                cursor.last_update, cursor.last_radacctid = new_position
+        if count < RADIUS_USAGE_BATCH_SIZE:
+            break
+
+    if total:
+        logger.info("Usage rollup processed %d radacct rows", total)
+    return total
+
+
+def purge_checkpoints() -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=RADIUS_USAGE_CHECKPOINT_RETENTION_DAYS)
+    with get_session() as session:
+        return session.execute(
+            delete(RadiusUsageCheckpoint).where(
+                RadiusUsageCheckpoint.closed.is_(True),
+                RadiusUsageCheckpoint.last_update < cutoff,
+            )
+        ).rowcount
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def usage_buckets(
+    tenant_id: uuid.UUID,
+    username: str,
+    granularity: str,
+    start: datetime,
+    end: datetime,
+) -> list[dict]:
+    model, column = (
+        (RadiusUsageHourly, RadiusUsageHourly.hour) if granularity == "hourly"
+        else (RadiusUsageDaily, RadiusUsageDaily.day)
+    )
+    lower = start if granularity == "hourly" else start.astimezone(RADIUS_USAGE_TIMEZONE).date()
+    upper = end if granularity == "hourly" else end.astimezone(RADIUS_USAGE_TIMEZONE).date()
+    with get_session() as session:
+        rows = session.execute(
+            select(column, model.input_octets, model.output_octets, model.session_seconds)
+            .where(model.tenant_id == tenant_id, model.username == username, column >= lower, column <= upper)
+            .order_by(column)
+        ).all()
+    return [
+        {
+            "period": period,
+            "input_octets": inp,
+            "output_octets": out,
+            "total_octets": inp + out,
+            "session_seconds": secs,
+        }
+        for period, inp, out, secs in rows
+    ]
+
+
+def top_usage(tenant_id: uuid.UUID, start: date, end: date, limit: int) -> list[dict]:
+    total = func.sum(RadiusUsageDaily.input_octets + RadiusUsageDaily.output_octets)
+    with get_session() as session:
+        rows = session.execute(
+            select(
+                RadiusUsageDaily.username,
+                func.max(RadiusUsageDaily.service_id.cast(String)),
+                func.sum(RadiusUsageDaily.input_octets),
+                func.sum(RadiusUsageDaily.output_octets),
+                total,
+            )
+            .where(
+                RadiusUsageDaily.tenant_id == tenant_id,
+                RadiusUsageDaily.day >= start,
+                RadiusUsageDaily.day <= end,
+            )
+            .group_by(RadiusUsageDaily.username)
+            .order_by(total.desc())
+            .limit(limit)
+        ).all()
+    return [
+        {
+            "username": username,
+            "service_id": service_id,
+            "input_octets": int(inp),
+            "output_octets": int(out),
+            "total_octets": int(tot),
+        }
+        for username, service_id, inp, out, tot in rows
+    ]
@@ -1,29 +1,38 @@
 """Coverage check and coverage area management routes.
 
-Provides multi-FNO coverage lookups — first checking the local cache,
-then falling back to live FNO adapter calls for each provider.
+Provides multi-FNO coverage lookups — first the footprint/point index
+(when coordinates are given), then the local coverage-area cache, then live
+FNO adapter calls for each remaining provider (through the live result
+cache in ``coverage_cache.py``).
 """
 
 import asyncio
+import json
 import logging
 import uuid
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select, func
 
 from services.common.auth import AuthContext, get_auth_context
 from services.network.adapters.factory import FNOFactory
-from services.network.database import get_session
+from services.network.coverage_bulk import BulkCoverageCheck
+from services.network.coverage_cache import coverage_cache
+from services.network.coverage_check import area_result, index_result, latency_snapshot
+from services.network.coverage_fanout import fan_out, get_pending
+from services.network.coverage_index import lookup_coverage
+from services.network.database import get_async_session
 from services.network.models import CoverageArea
 from services.network.schemas import (
     CoverageAreaCreate,
     CoverageAreaRead,
     CoverageCheckRequest,
     CoverageResult,
+    FNO_PROVIDERS,
     PaginatedResponse,
 )
-from services.network.routes.fno import _get_adapter
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/coverage", tags=["Coverage"])
@@ -33,6 +42,21 @@ router = APIRouter(prefix="/coverage", tags=["Coverage"])
 # MULTI-FNO COVERAGE CHECK
 # ---------------------------------------------------------------------------
 
+@router.get("/lookup", response_model=list[CoverageResult])
+async def lookup_coverage_by_location(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    fno_provider: Optional[list[str]] = Query(None),
+    auth: AuthContext = Depends(get_auth_context),
+):
+    """Index-only coverage lookup by coordinates (never calls FNO APIs)."""
+    providers = [p.lower() for p in fno_provider] if fno_provider else None
+    indexed = await lookup_coverage(auth.tenant_id, lat, lon, providers)
+    results = [index_result(p, hit) for p, hit in indexed.items()]
+    results.sort(key=lambda r: (not r.available, r.fno_provider))
+    return results
+
+
 @router.post("/check", response_model=list[CoverageResult])
 async def check_coverage(
     payload: CoverageCheckRequest,
@@ -40,15 +64,27 @@ async def check_coverage(
 ):
     """Check fibre coverage across all (or selected) SA FNOs.
 
-    1. First checks local coverage_areas cache.
-    2. Falls back to live FNO adapter calls for providers not in cache.
+    1. With latitude/longitude: answers from the footprint/point index for
+       every FNO that has imported coverage data.
+    2. Checks local coverage_areas cache.
+    3. Falls back to live FNO adapter calls for providers still unanswered;
+       recent live results (keyed by normalized address or geohash) are
+       served from the result cache.  Live checks are bounded by
+       ``deadline_ms``: late providers come back as ``pending`` with a
+       ``poll_token`` for ``GET /coverage/check/{token}`` (or ``/events``).
     """
     target_providers = payload.fno_providers or FNOFactory.list_providers()
     results: list[CoverageResult] = []
-
-    # Step 1: Check local cache
     cached_providers: set[str] = set()
-    with get_session() as session:
+
+    # Step 1: Footprint / serviceable-point index
+    if payload.latitude is not None and payload.longitude is not None:
+        indexed = await lookup_coverage(auth.tenant_id, payload.latitude, payload.longitude, target_providers)
+        results.extend(index_result(provider, hit) for provider, hit in indexed.items())
+        target_providers = [p for p in target_providers if p not in indexed]
+
+    # Step 2: Check local cache
+    async with get_async_session() as session:
         q = select(CoverageArea).where(
             CoverageArea.tenant_id == auth.tenant_id,
             CoverageArea.is_active.is_(True),
@@ -60,53 +96,96 @@ async def check_coverage(
         if payload.postal_code:
             q = q.where(CoverageArea.postal_codes.contains([payload.postal_code]))
 
-        areas = session.execute(q).scalars().all()
+        areas = (await session.scalars(q)).all()
         for area in areas:
             if area.fno_provider in target_providers:
                 cached_providers.add(area.fno_provider)
-                results.append(CoverageResult(
-                    fno_provider=area.fno_provider,
-                    available=True,
-                    technology=area.technology,
-                    max_download_mbps=area.max_download_mbps,
-                    area_name=area.area_name,
-                    adapter_type="cache",
-                ))
-
-    # Step 2: Live checks for providers not found in cache
+                results.append(area_result(area))
+
+    # Step 3: Live checks for providers not found in index or cache
     uncached = [p for p in target_providers if p not in cached_providers]
     if uncached:
-        async def _live_check(provider: str) -> CoverageResult:
-            try:
-                adapter = _get_adapter(provider)
-                data = await adapter.check_availability(payload.address)
-                adapter_type = data.get("adapter_type", "api")
-                return CoverageResult(
-                    fno_provider=provider,
-                    available=data.get("available", False),
-                    technology=(data.get("technologies") or [None])[0] if data.get("technologies") else None,
-                    max_download_mbps=data.get("max_speed_mbps"),
-                    area_name=data.get("area_name"),
-                    adapter_type=adapter_type,
-                    message=data.get("message"),
-                )
-            except Exception as exc:
-                logger.warning("Live coverage check failed for %s: %s", provider, exc)
-                return CoverageResult(
-                    fno_provider=provider,
-                    available=False,
-                    adapter_type="error",
-                    message=str(exc),
-                )
-
-        live_results = await asyncio.gather(*[_live_check(p) for p in uncached])
-        results.extend(live_results)
+        results.extend(await fan_out(
+            auth.tenant_id, uncached, payload.address,
+            payload.latitude, payload.longitude, payload.deadline_ms,
+        ))
 
     # Sort: available first, then by FNO name
     results.sort(key=lambda r: (not r.available, r.fno_provider))
     return results
 
 
+@router.get("/check/{token}", response_model=list[CoverageResult])
+async def get_late_coverage_results(
+    token: str,
+    auth: AuthContext = Depends(get_auth_context),
+):
+    """Results for providers that were still pending when a check returned."""
+    check = get_pending(auth.tenant_id, token)
+    if not check:
+        raise HTTPException(status_code=404, detail="Unknown or expired coverage token")
+    results = check.results()
+    results.sort(key=lambda r: (not r.available, r.fno_provider))
+    return results
+
+
+@router.get("/check/{token}/events")
+async def stream_late_coverage_results(
+    token: str,
+    auth: AuthContext = Depends(get_auth_context),
+):
+    """Server-sent events: one ``result`` event per late provider, then ``done``."""
+    check = get_pending(auth.tenant_id, token)
+    if not check:
+        raise HTTPException(status_code=404, detail="Unknown or expired coverage token")
+
+    async def _events():
+        async for result in check.iter_results():
+            yield f"event: result\ndata: {json.dumps(result.model_dump())}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/latency")
+async def coverage_latency(auth: AuthContext = Depends(get_auth_context)):
+    """Per-FNO live check latency for this API process (``slow`` = not awaited)."""
+    return latency_snapshot()
+
+
+class _BulkResponse(StreamingResponse):
+    """NDJSON stream that starts while the upload is still being read.
+
+    ``StreamingResponse`` listens on ``receive()`` for a disconnect while it
+    sends, which would swallow request body chunks the check is still
+    reading; this one starts listening only once the upload has been read.
+    """
+
+    def __init__(self, check: BulkCoverageCheck):
+        super().__init__(check.stream(), media_type="application/x-ndjson")
+        self.check = check
+
+    async def listen_for_disconnect(self, receive) -> None:
+        await asyncio.wait({self.check.reader})
+        await super().listen_for_disconnect(receive)
+
+
+@router.get("/cache/stats")
+async def coverage_cache_stats(auth: AuthContext = Depends(get_auth_context)):
+    """Live coverage result cache counters for this API process."""
+    return coverage_cache.snapshot()
+
+
+@router.delete("/cache", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_coverage_cache(auth: AuthContext = Depends(get_auth_context)):
+    """Drop this tenant's cached live coverage results."""
+    coverage_cache.invalidate(auth.tenant_id)
+
+
 # ---------------------------------------------------------------------------
 # COVERAGE AREAS — CRUD (admin-managed cache)
 # ---------------------------------------------------------------------------
@@ -117,7 +196,7 @@ async def create_coverage_area(
     auth: AuthContext = Depends(get_auth_context),
 ):
     """Add a pre-cached coverage area entry."""
-    with get_session() as session:
+    async with get_async_session() as session:
         area = CoverageArea(
             tenant_id=auth.tenant_id,
             fno_provider=payload.fno_provider,
@@ -130,8 +209,8 @@ async def create_coverage_area(
             is_active=payload.is_active,
         )
         session.add(area)
-        session.flush()
-        session.refresh(area)
+        await session.flush()
+        await session.refresh(area)
         logger.info("Created coverage area %s [%s/%s]", area.area_name, area.fno_provider, area.province)
         return CoverageAreaRead.model_validate(area)
 
@@ -147,7 +226,7 @@ async def list_coverage_areas(
     active_only: bool = True,
 ):
     """List coverage areas for the current tenant."""
-    with get_session() as session:
+    async with get_async_session() as session:
         q = select(CoverageArea).where(CoverageArea.tenant_id == auth.tenant_id)
         count_q = select(func.count(CoverageArea.id)).where(CoverageArea.tenant_id == auth.tenant_id)
 
@@ -164,12 +243,12 @@ async def list_coverage_areas(
             q = q.where(CoverageArea.city.ilike(f"%{city}%"))
             count_q = count_q.where(CoverageArea.city.ilike(f"%{city}%"))
 
-        total = session.execute(count_q).scalar() or 0
-        rows = session.execute(
+        total = await session.scalar(count_q) or 0
+        rows = (await session.scalars(
             q.order_by(CoverageArea.fno_provider, CoverageArea.province, CoverageArea.city)
             .offset((page - 1) * page_size)
             .limit(page_size)
-        ).scalars().all()
+        )).all()
 
         return PaginatedResponse(
             items=[CoverageAreaRead.model_validate(r) for r in rows],
@@ -184,13 +263,13 @@ async def get_coverage_area(
     area_id: uuid.UUID,
     auth: AuthContext = Depends(get_auth_context),
 ):
-    with get_session() as session:
-        area = session.execute(
+    async with get_async_session() as session:
+        area = await session.scalar(
             select(CoverageArea).where(
                 CoverageArea.id == area_id,
                 CoverageArea.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not area:
             raise HTTPException(status_code=404, detail="Coverage area not found")
         return CoverageAreaRead.model_validate(area)
@@ -202,14 +281,47 @@ async def delete_coverage_area(
     auth: AuthContext = Depends(get_auth_context),
 ):
     """Soft-delete: deactivate a coverage area."""
-    with get_session() as session:
-        area = session.execute(
+    async with get_async_session() as session:
+        area = await session.scalar(
             select(CoverageArea).where(
                 CoverageArea.id == area_id,
                 CoverageArea.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not area:
             raise HTTPException(status_code=404, detail="Coverage area not found")
         area.is_active = False
         logger.info("Deactivated coverage area %s", area_id)
+
+
+@router.post("/bulk")
+async def bulk_check_coverage(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    fno_provider: Optional[list[str]] = Query(None),
+    auth: AuthContext = Depends(get_auth_context),
+):
+    """Check a CSV or NDJSON list of addresses sent as the raw request body.
+
+    Addresses are dispatched while the upload is received, and the response
+    starts as soon as the header is validated: an NDJSON stream with one
+    record per input line, in completion order, followed by a summary.
+    """
+    if fmt is None:
+        fmt = "ndjson" if "json" in request.headers.get("content-type", "") else "csv"
+    providers = [p.lower() for p in fno_provider] if fno_provider else FNOFactory.list_providers()
+    unknown = [p for p in providers if p not in FNO_PROVIDERS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Invalid FNO provider: {', '.join(unknown)}")
+
+    check = BulkCoverageCheck(auth.tenant_id, providers)
+    try:
+        await check.start(request.stream(), fmt)
+    except ValueError as exc:
+        check.cancel()
+        raise HTTPException(status_code=400, detail=str(exc))
+    except BaseException:
+        check.cancel()
+        raise
+    return _BulkResponse(check)
+
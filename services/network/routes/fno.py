@@ -1,26 +1,34 @@
 """FNO order management and automation routes.
 
 Handles placing orders with SA FNOs (Vumatel, Openserve, MetroFibre,
-Frogfoot, Octotel), tracking order status, and running automation jobs.
+Frogfoot, Octotel), tracking order status (polled by the worker, see
+``order_tracking.py``), and running automation jobs.
+Orders and jobs are queued in ``network_queue_jobs`` and executed by the
+network worker (``services/network/worker.py``), not in the API process.
 """
 
+import asyncio
 import logging
-import os
 import uuid
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select, func
 
 from services.common.auth import AuthContext, get_auth_context
+from services.network.adapters.browser_pool import browser_pool
 from services.network.adapters.factory import FNOFactory
-from services.network.database import get_session
-from services.network.models import AutomationJob, FNOOrder, NetworkService
+from services.network.adapters.registry import get_adapter
+from services.network.adapters.transport import metrics_snapshot
+from services.network.database import get_async_session
+from services.network.jobs import enqueue_job, queue_stats
+from services.network.models import AutomationJob, FNOOrder, FNOOrderEvent, NetworkService
+from services.network.order_tracking import TERMINAL_STATUSES
 from services.network.schemas import (
     AutomationJobCreate,
     AutomationJobRead,
     FNOOrderCreate,
+    FNOOrderEventRead,
     FNOOrderRead,
     FNOOrderUpdate,
     PaginatedResponse,
@@ -30,45 +38,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/fno", tags=["FNO Orders"])
 
 
-# ---------------------------------------------------------------------------
-# FNO config — loaded from env or defaults for dev
-# ---------------------------------------------------------------------------
-
-def _load_fno_configs() -> Dict[str, Dict[str, Any]]:
-    """Load FNO connection configs from environment variables."""
-    return {
-        "vumatel": {
-            "api_key": os.getenv("FNO_VUMATEL_API_KEY", ""),
-            "base_url": os.getenv("FNO_VUMATEL_BASE_URL", "https://api.vumatel.co.za/v1"),
-        },
-        "openserve": {
-            "portal_url": os.getenv("FNO_OPENSERVE_PORTAL_URL", "https://connect.openserve.co.za"),
-            "credentials": {
-                "user": os.getenv("FNO_OPENSERVE_USER", ""),
-                "pass": os.getenv("FNO_OPENSERVE_PASS", ""),
-            },
-        },
-        "metrofibre": {
-            "api_key": os.getenv("FNO_METROFIBRE_API_KEY", ""),
-            "base_url": os.getenv("FNO_METROFIBRE_BASE_URL", "https://api.metrofibre.co.za/v1"),
-        },
-        "frogfoot": {
-            "api_key": os.getenv("FNO_FROGFOOT_API_KEY", ""),
-            "base_url": os.getenv("FNO_FROGFOOT_BASE_URL", "https://api.frogfoot.com/v2"),
-        },
-        "octotel": {
-            "api_key": os.getenv("FNO_OCTOTEL_API_KEY", ""),
-            "base_url": os.getenv("FNO_OCTOTEL_BASE_URL", "https://api.octotel.co.za/v1"),
-        },
-    }
-
-
-def _get_adapter(fno_provider: str):
-    configs = _load_fno_configs()
-    config = configs.get(fno_provider, {})
-    return FNOFactory.get_adapter(fno_provider, config)
-
-
 # ---------------------------------------------------------------------------
 # FNO ORDERS — CRUD
 # ---------------------------------------------------------------------------
@@ -76,18 +45,17 @@ def _get_adapter(fno_provider: str):
 @router.post("/orders", response_model=FNOOrderRead, status_code=status.HTTP_201_CREATED)
 async def create_fno_order(
     payload: FNOOrderCreate,
-    background_tasks: BackgroundTasks,
     auth: AuthContext = Depends(get_auth_context),
 ):
     """Create and submit an order to an FNO (new install, migration, speed change, cancel)."""
-    with get_session() as session:
+    async with get_async_session() as session:
         # Verify service exists
-        svc = session.execute(
+        svc = await session.scalar(
             select(NetworkService).where(
                 NetworkService.id == payload.service_id,
                 NetworkService.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not svc:
             raise HTTPException(status_code=404, detail="Network service not found")
 
@@ -100,62 +68,20 @@ async def create_fno_order(
             request_payload=payload.request_payload,
         )
         session.add(order)
-        session.flush()
-        session.refresh(order)
-
-        order_id = order.id
-        fno = payload.fno_provider
-        order_type = payload.order_type
+        await session.flush()
+        await session.refresh(order)
 
-        logger.info("Created FNO order %s [%s/%s] for service %s", order_id, fno, order_type, payload.service_id)
-
-        # Dispatch async FNO call
-        background_tasks.add_task(
-            _execute_fno_order, order_id, fno, order_type, payload.request_payload or {}, auth.tenant_id,
+        # Submitted to the FNO by the network worker
+        await session.run_sync(
+            enqueue_job, auth.tenant_id, "fno_order", order.id, payload.fno_provider, priority=payload.priority,
+        )
+        logger.info(
+            "Queued FNO order %s [%s/%s] for service %s",
+            order.id, payload.fno_provider, payload.order_type, payload.service_id,
         )
         return FNOOrderRead.model_validate(order)
 
 
-async def _execute_fno_order(
-    order_id: uuid.UUID,
-    fno_provider: str,
-    order_type: str,
-    request_payload: dict,
-    tenant_id: uuid.UUID,
-):
-    """Background task: call FNO adapter and update order status."""
-    adapter = _get_adapter(fno_provider)
-    try:
-        if order_type == "new_installation":
-            result = await adapter.place_order(request_payload.get("customer", {}), request_payload.get("plan_id", ""))
-        elif order_type == "cancellation":
-            result = await adapter.cancel_order(request_payload.get("fno_order_id", ""))
-        elif order_type == "speed_change":
-            result = await adapter.change_speed(
-                request_payload.get("fno_account_id", ""),
-                request_payload.get("new_profile", ""),
-            )
-        else:
-            result = await adapter.place_order(request_payload.get("customer", {}), request_payload.get("plan_id", ""))
-
-        new_status = "completed" if result.get("status") not in ("FAILED",) else "failed"
-    except Exception as exc:
-        logger.error("FNO order %s failed: %s", order_id, exc)
-        result = {"error": str(exc)}
-        new_status = "failed"
-
-    # Persist result
-    with get_session() as session:
-        order = session.get(FNOOrder, order_id)
-        if order:
-            order.status = new_status
-            order.response_payload = result
-            order.error_message = result.get("error")
-            if new_status == "completed":
-                order.completed_date = datetime.now(timezone.utc)
-                order.fno_reference = result.get("order_id", result.get("fno_account_id"))
-
-
 @router.get("/orders", response_model=PaginatedResponse)
 async def list_fno_orders(
     auth: AuthContext = Depends(get_auth_context),
@@ -166,7 +92,7 @@ async def list_fno_orders(
     fno_provider: Optional[str] = None,
 ):
     """List FNO orders for the current tenant."""
-    with get_session() as session:
+    async with get_async_session() as session:
         q = select(FNOOrder).where(FNOOrder.tenant_id == auth.tenant_id)
         count_q = select(func.count(FNOOrder.id)).where(FNOOrder.tenant_id == auth.tenant_id)
 
@@ -180,12 +106,12 @@ async def list_fno_orders(
             q = q.where(FNOOrder.fno_provider == fno_provider.lower())
             count_q = count_q.where(FNOOrder.fno_provider == fno_provider.lower())
 
-        total = session.execute(count_q).scalar() or 0
-        rows = session.execute(
+        total = await session.scalar(count_q) or 0
+        rows = (await session.scalars(
             q.order_by(FNOOrder.created_at.desc())
             .offset((page - 1) * page_size)
             .limit(page_size)
-        ).scalars().all()
+        )).all()
 
         return PaginatedResponse(
             items=[FNOOrderRead.model_validate(r) for r in rows],
@@ -200,13 +126,13 @@ async def get_fno_order(
     order_id: uuid.UUID,
     auth: AuthContext = Depends(get_auth_context),
 ):
-    with get_session() as session:
-        order = session.execute(
+    async with get_async_session() as session:
+        order = await session.scalar(
             select(FNOOrder).where(
                 FNOOrder.id == order_id,
                 FNOOrder.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not order:
             raise HTTPException(status_code=404, detail="FNO order not found")
         return FNOOrderRead.model_validate(order)
@@ -219,21 +145,84 @@ async def update_fno_order(
     auth: AuthContext = Depends(get_auth_context),
 ):
     """Manually update an FNO order (e.g. webhook callback, manual override)."""
-    with get_session() as session:
-        order = session.execute(
+    async with get_async_session() as session:
+        order = await session.scalar(
             select(FNOOrder).where(
                 FNOOrder.id == order_id,
                 FNOOrder.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not order:
             raise HTTPException(status_code=404, detail="FNO order not found")
 
-        for field, value in payload.model_dump(exclude_unset=True).items():
+        previous = order.status
+        changes = payload.model_dump(exclude_unset=True)
+        for field, value in changes.items():
             setattr(order, field, value)
 
-        session.flush()
-        session.refresh(order)
+        if order.status != previous or "scheduled_date" in changes:
+            if order.status in TERMINAL_STATUSES:
+                order.next_poll_at = None
+            session.add(FNOOrderEvent(
+                tenant_id=auth.tenant_id,
+                order_id=order.id,
+                from_status=previous,
+                to_status=order.status,
+                fno_status=order.fno_status,
+                scheduled_date=order.scheduled_date,
+                source="manual",
+                payload=payload.model_dump(mode="json", exclude_unset=True),
+            ))
+
+        await session.flush()
+        await session.refresh(order)
+        return FNOOrderRead.model_validate(order)
+
+
+@router.get("/orders/{order_id}/events", response_model=list[FNOOrderEventRead])
+async def list_fno_order_events(
+    order_id: uuid.UUID,
+    auth: AuthContext = Depends(get_auth_context),
+):
+    """Status history of an order (submission, polled FNO changes, manual updates)."""
+    async with get_async_session() as session:
+        order_exists = await session.scalar(
+            select(FNOOrder.id).where(
+                FNOOrder.id == order_id,
+                FNOOrder.tenant_id == auth.tenant_id,
+            )
+        )
+        if not order_exists:
+            raise HTTPException(status_code=404, detail="FNO order not found")
+        events = (await session.scalars(
+            select(FNOOrderEvent)
+            .where(FNOOrderEvent.order_id == order_id)
+            .order_by(FNOOrderEvent.created_at)
+        )).all()
+        return [FNOOrderEventRead.model_validate(e) for e in events]
+
+
+@router.post("/orders/{order_id}/poll", response_model=FNOOrderRead, status_code=status.HTTP_202_ACCEPTED)
+async def poll_fno_order(
+    order_id: uuid.UUID,
+    auth: AuthContext = Depends(get_auth_context),
+):
+    """Ask the worker to check this order's FNO status on its next tracking pass."""
+    async with get_async_session() as session:
+        order = await session.scalar(
+            select(FNOOrder).where(
+                FNOOrder.id == order_id,
+                FNOOrder.tenant_id == auth.tenant_id,
+            )
+        )
+        if not order:
+            raise HTTPException(status_code=404, detail="FNO order not found")
+        if not order.fno_reference or order.status in TERMINAL_STATUSES:
+            raise HTTPException(status_code=409, detail=f"Order is not being tracked (status: {order.status})")
+        order.next_poll_at = func.now()
+        order.poll_failures = 0
+        await session.flush()
+        await session.refresh(order)
         return FNOOrderRead.model_validate(order)
 
 
@@ -244,14 +233,13 @@ async def update_fno_order(
 @router.post("/automation/jobs", response_model=AutomationJobRead, status_code=status.HTTP_202_ACCEPTED)
 async def start_automation_job(
     payload: AutomationJobCreate,
-    background_tasks: BackgroundTasks,
     auth: AuthContext = Depends(get_auth_context),
 ):
     """Trigger a generic FNO automation job (coverage check, provisioning, etc.)."""
-    adapter = _get_adapter(payload.fno_provider)
+    adapter = get_adapter(payload.fno_provider)
     adapter_type = "api" if hasattr(adapter, "api_key") else "browser"
 
-    with get_session() as session:
+    async with get_async_session() as session:
         job = AutomationJob(
             tenant_id=auth.tenant_id,
             fno_provider=payload.fno_provider,
@@ -260,62 +248,15 @@ async def start_automation_job(
             request_payload=payload.request_payload,
         )
         session.add(job)
-        session.flush()
-        session.refresh(job)
-        job_id = job.id
-
-    background_tasks.add_task(_run_automation_job, job_id, payload.fno_provider, payload.job_type, payload.request_payload or {})
-    logger.info("Dispatched automation job %s [%s/%s] via %s", job_id, payload.fno_provider, payload.job_type, adapter_type)
-
-    with get_session() as session:
-        job = session.get(AutomationJob, job_id)
+        await session.flush()
+        await session.run_sync(
+            enqueue_job, auth.tenant_id, "automation_job", job.id, payload.fno_provider, priority=payload.priority,
+        )
+        await session.refresh(job)
+        logger.info("Queued automation job %s [%s/%s] via %s", job.id, payload.fno_provider, payload.job_type, adapter_type)
         return AutomationJobRead.model_validate(job)
 
 
-async def _run_automation_job(
-    job_id: uuid.UUID,
-    fno_provider: str,
-    job_type: str,
-    request_payload: dict,
-):
-    """Execute the automation job in background."""
-    adapter = _get_adapter(fno_provider)
-    result: dict = {}
-    new_status = "completed"
-
-    try:
-        if job_type == "coverage_check":
-            result = await adapter.check_availability(request_payload.get("address", ""))
-        elif job_type == "place_order":
-            result = await adapter.place_order(request_payload.get("customer", {}), request_payload.get("plan_id", ""))
-        elif job_type == "provision":
-            result = await adapter.provision_service(request_payload.get("order_id", ""), request_payload.get("ont_serial"))
-        elif job_type == "suspend":
-            result = await adapter.suspend_service(request_payload.get("fno_account_id", ""))
-        elif job_type == "resume":
-            result = await adapter.resume_service(request_payload.get("fno_account_id", ""))
-        elif job_type == "fault_report":
-            result = await adapter.report_fault(request_payload.get("fno_account_id", ""), request_payload.get("description", ""))
-        else:
-            result = {"error": f"Unknown job type: {job_type}"}
-            new_status = "failed"
-    except Exception as exc:
-        logger.error("Automation job %s failed: %s", job_id, exc)
-        result = {"error": str(exc)}
-        new_status = "failed"
-
-    with get_session() as session:
-        job = session.get(AutomationJob, job_id)
-        if job:
-            job.status = new_status
-            job.result_payload = result
-            job.error_message = result.get("error")
-            now = datetime.now(timezone.utc)
-            if not job.started_at:
-                job.started_at = now
-            job.completed_at = now
-
-
 @router.get("/automation/jobs", response_model=PaginatedResponse)
 async def list_automation_jobs(
     auth: AuthContext = Depends(get_auth_context),
@@ -324,7 +265,7 @@ async def list_automation_jobs(
     status_filter: Optional[str] = Query(None, alias="status"),
     fno_provider: Optional[str] = None,
 ):
-    with get_session() as session:
+    async with get_async_session() as session:
         q = select(AutomationJob).where(AutomationJob.tenant_id == auth.tenant_id)
         count_q = select(func.count(AutomationJob.id)).where(AutomationJob.tenant_id == auth.tenant_id)
 
@@ -335,12 +276,12 @@ async def list_automation_jobs(
             q = q.where(AutomationJob.fno_provider == fno_provider.lower())
             count_q = count_q.where(AutomationJob.fno_provider == fno_provider.lower())
 
-        total = session.execute(count_q).scalar() or 0
-        rows = session.execute(
+        total = await session.scalar(count_q) or 0
+        rows = (await session.scalars(
             q.order_by(AutomationJob.created_at.desc())
             .offset((page - 1) * page_size)
             .limit(page_size)
-        ).scalars().all()
+        )).all()
 
         return PaginatedResponse(
             items=[AutomationJobRead.model_validate(r) for r in rows],
@@ -355,13 +296,13 @@ async def get_automation_job(
     job_id: uuid.UUID,
     auth: AuthContext = Depends(get_auth_context),
 ):
-    with get_session() as session:
-        job = session.execute(
+    async with get_async_session() as session:
+        job = await session.scalar(
             select(AutomationJob).where(
                 AutomationJob.id == job_id,
                 AutomationJob.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not job:
             raise HTTPException(status_code=404, detail="Automation job not found")
         return AutomationJobRead.model_validate(job)
@@ -371,3 +312,19 @@ async def get_automation_job(
 async def list_fno_providers():
     """Return list of registered FNO providers."""
     return {"providers": FNOFactory.list_providers()}
+
+
+@router.get("/queue")
+async def fno_queue_stats(
+    auth: AuthContext = Depends(get_auth_context),
+):
+    """Outstanding queued/running/dead jobs per FNO for the current tenant."""
+    return {"jobs": await asyncio.to_thread(queue_stats, auth.tenant_id)}
+
+
+@router.get("/metrics")
+async def fno_metrics(
+    auth: AuthContext = Depends(get_auth_context),
+):
+    """Per-FNO API latency/retry counters and browser-pool usage per portal."""
+    return {"fnos": metrics_snapshot(), "browser_portals": browser_pool.snapshot()}
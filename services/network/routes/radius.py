@@ -4,22 +4,30 @@ Manages RADIUS credentials (radcheck/radusergroup) and live session
 queries (radacct) for PPPoE/IPoE subscriber authentication.
 """
 
+import asyncio
 import logging
 import uuid
+from datetime import date, datetime, timedelta, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select, func
 
 from services.common.auth import AuthContext, get_auth_context
-from services.network.database import get_session
+from services.network.database import get_async_session
 from services.network.models import RadiusAccount, NetworkService
+from services.network.radius_coa import coa_client, enqueue_coa
+from services.network.radius_sessions import active_sessions, session_counts, session_tracker
+from services.network.radius_sync import full_resync, pending_status, queue_sync
+from services.network.radius_usage import RADIUS_USAGE_TIMEZONE, top_usage, usage_buckets
 from services.network.schemas import (
     PaginatedResponse,
     RadiusAccountCreate,
     RadiusAccountRead,
     RadiusAccountUpdate,
     RadiusSessionInfo,
+    RadiusUsageReport,
+    RadiusUsageTop,
 )
 
 logger = logging.getLogger(__name__)
@@ -36,33 +44,33 @@ async def create_radius_account(
     auth: AuthContext = Depends(get_auth_context),
 ):
     """Provision a new RADIUS account linked to a network service."""
-    with get_session() as session:
+    async with get_async_session() as session:
         # Verify service exists and belongs to tenant
-        svc = session.execute(
+        svc = await session.scalar(
             select(NetworkService).where(
                 NetworkService.id == payload.service_id,
                 NetworkService.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not svc:
             raise HTTPException(status_code=404, detail="Network service not found")
 
         # Check for duplicate username within tenant
-        existing = session.execute(
+        existing = await session.scalar(
             select(RadiusAccount).where(
                 RadiusAccount.tenant_id == auth.tenant_id,
                 RadiusAccount.username == payload.username,
             )
-        ).scalar_one_or_none()
+        )
         if existing:
             raise HTTPException(status_code=409, detail="RADIUS username already exists for this tenant")
 
         # Check service doesn't already have a RADIUS account
-        existing_for_svc = session.execute(
+        existing_for_svc = await session.scalar(
             select(RadiusAccount).where(
                 RadiusAccount.service_id == payload.service_id,
             )
-        ).scalar_one_or_none()
+        )
         if existing_for_svc:
             raise HTTPException(status_code=409, detail="Service already has a RADIUS account")
 
@@ -78,8 +86,9 @@ async def create_radius_account(
             nas_port_id=payload.nas_port_id,
         )
         session.add(account)
-        session.flush()
-        session.refresh(account)
+        await session.run_sync(queue_sync, [(account.tenant_id, account.username)])
+        await session.flush()
+        await session.refresh(account)
         logger.info("Created RADIUS account %s for service %s", account.username, payload.service_id)
         return RadiusAccountRead.model_validate(account)
 
@@ -97,7 +106,7 @@ async def list_radius_accounts(
     status_filter: Optional[str] = Query(None, alias="status"),
 ):
     """List RADIUS accounts for the current tenant."""
-    with get_session() as session:
+    async with get_async_session() as session:
         q = select(RadiusAccount).where(RadiusAccount.tenant_id == auth.tenant_id)
         count_q = select(func.count(RadiusAccount.id)).where(RadiusAccount.tenant_id == auth.tenant_id)
 
@@ -109,12 +118,12 @@ async def list_radius_accounts(
             q = q.where(RadiusAccount.status == status_filter)
             count_q = count_q.where(RadiusAccount.status == status_filter)
 
-        total = session.execute(count_q).scalar() or 0
-        rows = session.execute(
+        total = await session.scalar(count_q) or 0
+        rows = (await session.scalars(
             q.order_by(RadiusAccount.created_at.desc())
             .offset((page - 1) * page_size)
             .limit(page_size)
-        ).scalars().all()
+        )).all()
 
         return PaginatedResponse(
             items=[RadiusAccountRead.model_validate(r) for r in rows],
@@ -133,13 +142,13 @@ async def get_radius_account(
     account_id: uuid.UUID,
     auth: AuthContext = Depends(get_auth_context),
 ):
-    with get_session() as session:
-        account = session.execute(
+    async with get_async_session() as session:
+        account = await session.scalar(
             select(RadiusAccount).where(
                 RadiusAccount.id == account_id,
                 RadiusAccount.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not account:
             raise HTTPException(status_code=404, detail="RADIUS account not found")
         return RadiusAccountRead.model_validate(account)
@@ -156,13 +165,13 @@ async def update_radius_account(
     auth: AuthContext = Depends(get_auth_context),
 ):
     """Update RADIUS account (password, profile, status, etc.)."""
-    with get_session() as session:
-        account = session.execute(
+    async with get_async_session() as session:
+        account = await session.scalar(
             select(RadiusAccount).where(
                 RadiusAccount.id == account_id,
                 RadiusAccount.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not account:
             raise HTTPException(status_code=404, detail="RADIUS account not found")
 
@@ -170,15 +179,88 @@ async def update_radius_account(
         if "password" in updates:
             updates["password_hash"] = updates.pop("password")
 
+        was_active = account.status == "active"
+        old_rate_limit = account.mikrotik_rate_limit
         for field, value in updates.items():
             setattr(account, field, value)
 
-        session.flush()
-        session.refresh(account)
+        # Live sessions keep their old authorization until the NAS is told.
+        if was_active and account.status != "active":
+            await session.run_sync(enqueue_coa, account, "disconnect", f"Account {account.status}")
+        elif account.status == "active" and (not was_active or account.mikrotik_rate_limit != old_rate_limit):
+            await session.run_sync(
+                enqueue_coa, account, "coa", "Account reactivated" if not was_active else "Rate limit changed",
+            )
+        await session.run_sync(queue_sync, [(account.tenant_id, account.username)])
+
+        await session.flush()
+        await session.refresh(account)
         logger.info("Updated RADIUS account %s", account.username)
         return RadiusAccountRead.model_validate(account)
 
 
+# ---------------------------------------------------------------------------
+# USAGE (hourly / daily rollups of radacct)
+# ---------------------------------------------------------------------------
+
+@router.get("/accounts/{account_id}/usage", response_model=RadiusUsageReport)
+async def get_radius_account_usage(
+    account_id: uuid.UUID,
+    auth: AuthContext = Depends(get_auth_context),
+    granularity: str = Query("daily", pattern="^(hourly|daily)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """Data usage for one subscriber from the rollup tables.
+
+    Defaults to the last 24 hours (hourly) or the last 30 days (daily).
+    """
+    async with get_async_session() as session:
+        account = await session.scalar(
+            select(RadiusAccount).where(
+                RadiusAccount.id == account_id,
+                RadiusAccount.tenant_id == auth.tenant_id,
+            )
+        )
+        if not account:
+            raise HTTPException(status_code=404, detail="RADIUS account not found")
+        username, service_id = account.username, account.service_id
+
+    end = end or datetime.now(timezone.utc)
+    start = start or end - (timedelta(hours=24) if granularity == "hourly" else timedelta(days=30))
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    buckets = await asyncio.to_thread(usage_buckets, auth.tenant_id, username, granularity, start, end)
+    input_octets = sum(b["input_octets"] for b in buckets)
+    output_octets = sum(b["output_octets"] for b in buckets)
+    return RadiusUsageReport(
+        username=username,
+        service_id=service_id,
+        granularity=granularity,
+        start=start,
+        end=end,
+        input_octets=input_octets,
+        output_octets=output_octets,
+        total_octets=input_octets + output_octets,
+        buckets=buckets,
+    )
+
+
+@router.get("/usage/top", response_model=list[RadiusUsageTop])
+async def get_top_usage(
+    auth: AuthContext = Depends(get_auth_context),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """Heaviest subscribers by total octets over local days (default: today)."""
+    today = datetime.now(RADIUS_USAGE_TIMEZONE).date()
+    start, end = start or today, end or today
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return await asyncio.to_thread(top_usage, auth.tenant_id, start, end, limit)
+
+
 # ---------------------------------------------------------------------------
 # DISCONNECT session (CoA / PoD)
 # ---------------------------------------------------------------------------
@@ -190,32 +272,50 @@ async def disconnect_radius_session(
 ):
     """Send a RADIUS Disconnect-Request (Packet of Disconnect) for active sessions.
 
-    In production this would send a CoA/PoD packet to the NAS via a RADIUS
-    client library (e.g. pyrad).  Currently returns a stub response.
+    Sent immediately, one request per open radacct session; without a known
+    session the request goes to the account's NAS by User-Name only.
     """
-    with get_session() as session:
-        account = session.execute(
+    async with get_async_session() as session:
+        account = await session.scalar(
             select(RadiusAccount).where(
                 RadiusAccount.id == account_id,
                 RadiusAccount.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not account:
             raise HTTPException(status_code=404, detail="RADIUS account not found")
+        username, nas_ip_address = account.username, account.nas_ip_address
 
-        logger.info(
-            "Sending PoD for %s to NAS %s",
-            account.username,
-            account.nas_ip_address or "unknown",
-        )
-        # TODO: integrate pyrad to send actual PoD
+    live = await active_sessions(auth.tenant_id, username=username)
+    targets = [(s.nas_ip_address, s.session_id, s.framed_ip_address) for s in live]
+    if not targets and nas_ip_address:
+        targets = [(nas_ip_address, None, None)]
+    if not targets:
         return {
-            "username": account.username,
-            "nas_ip_address": account.nas_ip_address,
-            "status": "DISCONNECT_SENT",
-            "message": "Packet of Disconnect sent to NAS",
+            "username": username,
+            "nas_ip_address": nas_ip_address,
+            "status": "NO_ACTIVE_SESSION",
+            "message": "No active session and no NAS recorded for this account",
+            "results": [],
         }
 
+    logger.info("Sending PoD for %s to %d session(s)", username, len(targets))
+    results = await asyncio.gather(*[
+        coa_client.disconnect(nas_ip, username, session_id, framed_ip)
+        for nas_ip, session_id, framed_ip in targets
+    ])
+    done = all(r.done for r in results)
+    return {
+        "username": username,
+        "nas_ip_address": nas_ip_address,
+        "status": "DISCONNECT_ACKED" if done else "DISCONNECT_FAILED",
+        "message": "Packet of Disconnect acknowledged by NAS" if done else "One or more NAS did not acknowledge",
+        "results": [
+            {"nas_ip_address": r.nas_ip_address, "status": r.status, "error_cause": r.error_cause, "message": r.message}
+            for r in results
+        ],
+    }
+
 
 # ---------------------------------------------------------------------------
 # ACTIVE SESSIONS (read from radacct)
@@ -225,26 +325,43 @@ async def disconnect_radius_session(
 async def get_active_sessions(
     auth: AuthContext = Depends(get_auth_context),
     username: Optional[str] = None,
+    nas_ip_address: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
 ):
-    """Query radacct for live RADIUS sessions.
+    """Live RADIUS sessions (open radacct rows), newest first.
 
-    In production this would query the FreeRADIUS radacct table or a
-    session cache.  Currently returns illustrative stub data.
+    Served from the in-memory session index (``radius_sessions.py``), which
+    follows radacct incrementally; falls back to radacct until it is loaded.
     """
-    # TODO: query radacct table directly via raw SQL or dedicated view
-    logger.info("Querying active RADIUS sessions for tenant %s", auth.tenant_id)
-    sessions: list[dict] = []
-    if username:
-        sessions.append(
-            {
-                "username": username,
-                "nas_ip_address": "154.22.8.5",
-                "framed_ip_address": "100.64.1.12",
-                "session_id": "sess-001",
-                "uptime_seconds": 51720,
-                "input_octets": 4_523_000,
-                "output_octets": 12_500_000,
-                "calling_station_id": "AA:BB:CC:DD:EE:FF",
-            }
-        )
-    return [RadiusSessionInfo(**s) for s in sessions]
+    sessions = await active_sessions(auth.tenant_id, username, nas_ip_address)
+    sessions.sort(key=lambda s: s.start_time or datetime.min.replace(tzinfo=timezone.utc), reverse=True)
+    now = datetime.now(timezone.utc)
+    return [RadiusSessionInfo(**s.as_info(now)) for s in sessions[:limit]]
+
+
+@router.get("/sessions/count")
+async def count_active_sessions(auth: AuthContext = Depends(get_auth_context)):
+    """Open session, subscriber and per-NAS counts for the current tenant."""
+    return await session_counts(auth.tenant_id)
+
+
+@router.get("/sessions/index")
+async def session_index_status(auth: AuthContext = Depends(get_auth_context)):
+    """Watermarks and freshness of this process's session index."""
+    return session_tracker.snapshot()
+
+
+# ---------------------------------------------------------------------------
+# FREERADIUS SYNC (radcheck / radreply / radusergroup)
+# ---------------------------------------------------------------------------
+
+@router.get("/sync")
+async def radius_sync_status(auth: AuthContext = Depends(get_auth_context)):
+    """Users of the current tenant still waiting to be synced to FreeRADIUS."""
+    return await asyncio.to_thread(pending_status, auth.tenant_id)
+
+
+@router.post("/sync/full")
+async def radius_full_resync(auth: AuthContext = Depends(get_auth_context)):
+    """Diff every RADIUS account of the tenant against FreeRADIUS and fix drift."""
+    return await asyncio.to_thread(full_resync, auth.tenant_id)
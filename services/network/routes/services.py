@@ -3,6 +3,7 @@
 CRUD for network services plus operational endpoints:
   - suspend / reinstate individual services
   - suspend / reinstate ALL services for a customer (used by Billing)
+  - bulk suspend / reinstate for many customers in one call (Billing outbox)
   - speed upgrade / downgrade
 """
 
@@ -12,12 +13,19 @@ from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, func
+from sqlalchemy import column, func, insert, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session, joinedload
 
 from services.common.auth import AuthContext, get_auth_context
-from services.network.database import generate_service_reference, get_session
-from services.network.models import NetworkService, RadiusAccount
+from services.network.database import generate_service_reference, get_async_session
+from services.network.models import NetworkService, RadiusAccount, RadiusCoARequest
+from services.network.radius_coa import enqueue_coa
+from services.network.radius_sync import queue_sync
 from services.network.schemas import (
+    BulkCustomerActionRequest,
+    BulkCustomerActionResponse,
+    BulkCustomerActionResult,
     BulkCustomerReinstateRequest,
     BulkCustomerSuspendRequest,
     NetworkServiceCreate,
@@ -43,7 +51,7 @@ async def create_service(
     auth: AuthContext = Depends(get_auth_context),
 ):
     """Register a new network service for a customer."""
-    with get_session() as session:
+    async with get_async_session() as session:
         ref = generate_service_reference(auth.tenant_id)
         service = NetworkService(
             tenant_id=auth.tenant_id,
@@ -65,8 +73,8 @@ async def create_service(
             ont_serial=payload.ont_serial,
         )
         session.add(service)
-        session.flush()
-        session.refresh(service)
+        await session.flush()
+        await session.refresh(service)
         logger.info("Created network service %s [%s] for customer %s", ref, service.id, payload.customer_id)
         return NetworkServiceRead.model_validate(service)
 
@@ -86,7 +94,7 @@ async def list_services(
     search: Optional[str] = None,
 ):
     """List network services for the current tenant."""
-    with get_session() as session:
+    async with get_async_session() as session:
         q = select(NetworkService).where(NetworkService.tenant_id == auth.tenant_id)
         count_q = select(func.count(NetworkService.id)).where(NetworkService.tenant_id == auth.tenant_id)
 
@@ -112,12 +120,12 @@ async def list_services(
                 | NetworkService.city.ilike(like)
             )
 
-        total = session.execute(count_q).scalar() or 0
-        rows = session.execute(
+        total = await session.scalar(count_q) or 0
+        rows = (await session.scalars(
             q.order_by(NetworkService.created_at.desc())
             .offset((page - 1) * page_size)
             .limit(page_size)
-        ).scalars().all()
+        )).all()
 
         return PaginatedResponse(
             items=[NetworkServiceRead.model_validate(r) for r in rows],
@@ -136,13 +144,13 @@ async def get_service(
     service_id: uuid.UUID,
     auth: AuthContext = Depends(get_auth_context),
 ):
-    with get_session() as session:
-        svc = session.execute(
+    async with get_async_session() as session:
+        svc = await session.scalar(
             select(NetworkService).where(
                 NetworkService.id == service_id,
                 NetworkService.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not svc:
             raise HTTPException(status_code=404, detail="Network service not found")
         return NetworkServiceRead.model_validate(svc)
@@ -158,24 +166,147 @@ async def update_service(
     payload: NetworkServiceUpdate,
     auth: AuthContext = Depends(get_auth_context),
 ):
-    with get_session() as session:
-        svc = session.execute(
+    async with get_async_session() as session:
+        svc = await session.scalar(
             select(NetworkService).where(
                 NetworkService.id == service_id,
                 NetworkService.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not svc:
             raise HTTPException(status_code=404, detail="Network service not found")
 
         for field, value in payload.model_dump(exclude_unset=True).items():
             setattr(svc, field, value)
 
-        session.flush()
-        session.refresh(svc)
+        await session.flush()
+        await session.refresh(svc)
         return NetworkServiceRead.model_validate(svc)
 
 
+# ---------------------------------------------------------------------------
+# BULK SUSPEND / REINSTATE for many customers — called by Billing outbox
+# ---------------------------------------------------------------------------
+# Registered before the /{service_id}/... routes so "bulk" is never parsed
+# as a service id.
+
+# action -> (service status from, service status to, RADIUS status, CoA action)
+_CUSTOMER_TRANSITIONS = {
+    "suspend": ("active", "suspended", "suspended", "disconnect"),
+    "reinstate": ("suspended", "active", "active", "coa"),
+}
+
+
+def set_customer_services_status(
+    session: Session,
+    tenant_id: uuid.UUID,
+    customer_ids: list[uuid.UUID],
+    action: str,
+    reason: Optional[str] = None,
+) -> list[BulkCustomerActionResult]:
+    """Suspend or reinstate every service of ``customer_ids`` with set-based SQL.
+
+    One ``UPDATE network_services ... FROM (VALUES ...)`` changes the services,
+    one ``UPDATE radius_accounts ... FROM (VALUES ...)`` changes their RADIUS
+    accounts, and one multi-row INSERT queues a Disconnect-Request (suspend)
+    or CoA-Request (reinstate) per account.  Returns one result per distinct
+    customer, in request order.
+    """
+    from_status, to_status, radius_status, coa_action = _CUSTOMER_TRANSITIONS[action]
+    customer_ids = list(dict.fromkeys(customer_ids))
+    results = {c: BulkCustomerActionResult(customer_id=c) for c in customer_ids}
+
+    customers = values(
+        column("customer_id", PG_UUID(as_uuid=True)), name="bulk_customers",
+    ).data([(c,) for c in customer_ids])
+    services = session.execute(
+        update(NetworkService)
+        .where(
+            NetworkService.tenant_id == tenant_id,
+            NetworkService.customer_id == customers.c.customer_id,
+            NetworkService.status == from_status,
+        )
+        .values(
+            status=to_status,
+            suspended_at=datetime.now(timezone.utc) if action == "suspend" else None,
+        )
+        .returning(NetworkService.id, NetworkService.customer_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not services:
+        return list(results.values())
+
+    for _service_id, customer_id in services:
+        results[customer_id].services_updated += 1
+
+    changed = values(
+        column("service_id", PG_UUID(as_uuid=True)),
+        column("customer_id", PG_UUID(as_uuid=True)),
+        name="changed_services",
+    ).data([tuple(row) for row in services])
+    accounts = session.execute(
+        update(RadiusAccount)
+        .where(RadiusAccount.service_id == changed.c.service_id)
+        .values(status=radius_status)
+        .returning(
+            RadiusAccount.id,
+            RadiusAccount.service_id,
+            RadiusAccount.username,
+            RadiusAccount.nas_ip_address,
+            changed.c.customer_id,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    coa_rows = []
+    for account_id, service_id, username, nas_ip, customer_id in accounts:
+        results[customer_id].radius_accounts_updated += 1
+        results[customer_id].coa_queued += 1
+        coa_rows.append({
+            "tenant_id": tenant_id,
+            "service_id": service_id,
+            "radius_account_id": account_id,
+            "username": username,
+            "nas_ip_address": nas_ip,
+            "action": coa_action,
+            "reason": reason,
+        })
+    if coa_rows:
+        session.execute(insert(RadiusCoARequest), coa_rows)
+        queue_sync(session, [(tenant_id, row["username"]) for row in coa_rows])
+
+    return list(results.values())
+
+
+@router.post("/bulk/{action}", response_model=BulkCustomerActionResponse)
+async def bulk_customer_action(
+    action: str,
+    payload: BulkCustomerActionRequest,
+    auth: AuthContext = Depends(get_auth_context),
+):
+    """Suspend or reinstate ALL services for many customers in one transaction."""
+    if action not in _CUSTOMER_TRANSITIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown bulk action '{action}'")
+
+    async with get_async_session() as session:
+        results = await session.run_sync(
+            set_customer_services_status, auth.tenant_id, payload.customer_ids, action, payload.reason,
+        )
+
+    services_updated = sum(r.services_updated for r in results)
+    coa_queued = sum(r.coa_queued for r in results)
+    logger.info(
+        "Bulk %s: %d customers, %d services, %d CoA requests queued reason=%s",
+        action, len(results), services_updated, coa_queued, payload.reason,
+    )
+    return BulkCustomerActionResponse(
+        action=action,
+        services_updated=services_updated,
+        coa_queued=coa_queued,
+        results=results,
+    )
+
+
 # ---------------------------------------------------------------------------
 # SUSPEND / REINSTATE — individual service
 # ---------------------------------------------------------------------------
@@ -187,13 +318,15 @@ async def suspend_service(
     auth: AuthContext = Depends(get_auth_context),
 ):
     """Suspend an individual network service (sets RADIUS to suspended)."""
-    with get_session() as session:
-        svc = session.execute(
-            select(NetworkService).where(
+    async with get_async_session() as session:
+        svc = await session.scalar(
+            select(NetworkService)
+            .options(joinedload(NetworkService.radius_account))
+            .where(
                 NetworkService.id == service_id,
                 NetworkService.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not svc:
             raise HTTPException(status_code=404, detail="Network service not found")
         if svc.status == "suspended":
@@ -205,14 +338,14 @@ async def suspend_service(
         svc.suspended_at = datetime.now(timezone.utc)
 
         # Also suspend RADIUS account
-        radius = session.execute(
-            select(RadiusAccount).where(RadiusAccount.service_id == service_id)
-        ).scalar_one_or_none()
+        radius = svc.radius_account
         if radius:
             radius.status = "suspended"
+            await session.run_sync(enqueue_coa, radius, "disconnect", payload.reason)
+            await session.run_sync(queue_sync, [(radius.tenant_id, radius.username)])
 
-        session.flush()
-        session.refresh(svc)
+        await session.flush()
+        await session.refresh(svc)
         logger.info("Suspended service %s reason=%s", service_id, payload.reason)
         return NetworkServiceRead.model_validate(svc)
 
@@ -224,13 +357,15 @@ async def reinstate_service(
     auth: AuthContext = Depends(get_auth_context),
 ):
     """Reinstate a suspended network service."""
-    with get_session() as session:
-        svc = session.execute(
-            select(NetworkService).where(
+    async with get_async_session() as session:
+        svc = await session.scalar(
+            select(NetworkService)
+            .options(joinedload(NetworkService.radius_account))
+            .where(
                 NetworkService.id == service_id,
                 NetworkService.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not svc:
             raise HTTPException(status_code=404, detail="Network service not found")
         if svc.status != "suspended":
@@ -240,20 +375,20 @@ async def reinstate_service(
         svc.suspended_at = None
 
         # Reactivate RADIUS
-        radius = session.execute(
-            select(RadiusAccount).where(RadiusAccount.service_id == service_id)
-        ).scalar_one_or_none()
+        radius = svc.radius_account
         if radius:
             radius.status = "active"
+            await session.run_sync(enqueue_coa, radius, "coa", payload.reason)
+            await session.run_sync(queue_sync, [(radius.tenant_id, radius.username)])
 
-        session.flush()
-        session.refresh(svc)
+        await session.flush()
+        await session.refresh(svc)
         logger.info("Reinstated service %s reason=%s", service_id, payload.reason)
         return NetworkServiceRead.model_validate(svc)
 
 
 # ---------------------------------------------------------------------------
-# BULK SUSPEND / REINSTATE by customer — called by Billing service
+# SUSPEND / REINSTATE by customer — called by Billing service
 # ---------------------------------------------------------------------------
 
 @router.post("/suspend-by-customer")
@@ -265,35 +400,18 @@ async def suspend_all_customer_services(
 
     Called by the Billing service when a customer's account is past due.
     """
-    with get_session() as session:
-        services = session.execute(
-            select(NetworkService).where(
-                NetworkService.tenant_id == auth.tenant_id,
-                NetworkService.customer_id == payload.customer_id,
-                NetworkService.status == "active",
-            )
-        ).scalars().all()
-
-        now = datetime.now(timezone.utc)
-        suspended_count = 0
-        for svc in services:
-            svc.status = "suspended"
-            svc.suspended_at = now
-            # Suspend RADIUS
-            radius = session.execute(
-                select(RadiusAccount).where(RadiusAccount.service_id == svc.id)
-            ).scalar_one_or_none()
-            if radius:
-                radius.status = "suspended"
-            suspended_count += 1
+    async with get_async_session() as session:
+        result = (await session.run_sync(
+            set_customer_services_status, auth.tenant_id, [payload.customer_id], "suspend", payload.reason,
+        ))[0]
 
         logger.info(
             "Bulk suspended %d services for customer %s reason=%s",
-            suspended_count, payload.customer_id, payload.reason,
+            result.services_updated, payload.customer_id, payload.reason,
         )
         return {
             "customer_id": str(payload.customer_id),
-            "suspended_count": suspended_count,
+            "suspended_count": result.services_updated,
             "reason": payload.reason,
         }
 
@@ -307,34 +425,18 @@ async def reinstate_all_customer_services(
 
     Called by the Billing service after payment is received.
     """
-    with get_session() as session:
-        services = session.execute(
-            select(NetworkService).where(
-                NetworkService.tenant_id == auth.tenant_id,
-                NetworkService.customer_id == payload.customer_id,
-                NetworkService.status == "suspended",
-            )
-        ).scalars().all()
-
-        reinstated_count = 0
-        for svc in services:
-            svc.status = "active"
-            svc.suspended_at = None
-            # Reactivate RADIUS
-            radius = session.execute(
-                select(RadiusAccount).where(RadiusAccount.service_id == svc.id)
-            ).scalar_one_or_none()
-            if radius:
-                radius.status = "active"
-            reinstated_count += 1
+    async with get_async_session() as session:
+        result = (await session.run_sync(
+            set_customer_services_status, auth.tenant_id, [payload.customer_id], "reinstate", payload.reason,
+        ))[0]
 
         logger.info(
             "Bulk reinstated %d services for customer %s reason=%s",
-            reinstated_count, payload.customer_id, payload.reason,
+            result.services_updated, payload.customer_id, payload.reason,
         )
         return {
             "customer_id": str(payload.customer_id),
-            "reinstated_count": reinstated_count,
+            "reinstated_count": result.services_updated,
             "reason": payload.reason,
         }
 
@@ -350,13 +452,15 @@ async def change_service_speed(
     auth: AuthContext = Depends(get_auth_context),
 ):
     """Change the speed profile for a network service and its RADIUS account."""
-    with get_session() as session:
-        svc = session.execute(
-            select(NetworkService).where(
+    async with get_async_session() as session:
+        svc = await session.scalar(
+            select(NetworkService)
+            .options(joinedload(NetworkService.radius_account))
+            .where(
                 NetworkService.id == service_id,
                 NetworkService.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not svc:
             raise HTTPException(status_code=404, detail="Network service not found")
         if svc.status not in ("active", "provisioning"):
@@ -371,15 +475,16 @@ async def change_service_speed(
             svc.speed_profile_name = payload.speed_profile_name
 
         # Update RADIUS profile
-        radius = session.execute(
-            select(RadiusAccount).where(RadiusAccount.service_id == service_id)
-        ).scalar_one_or_none()
+        radius = svc.radius_account
         if radius and payload.speed_profile_name:
             radius.profile_name = payload.speed_profile_name
             radius.mikrotik_rate_limit = f"{payload.download_speed_mbps}M/{payload.upload_speed_mbps}M"
+            if radius.status == "active":
+                await session.run_sync(enqueue_coa, radius, "coa", "Speed change")
+            await session.run_sync(queue_sync, [(radius.tenant_id, radius.username)])
 
-        session.flush()
-        session.refresh(svc)
+        await session.flush()
+        await session.refresh(svc)
         logger.info(
             "Speed change for service %s: %d/%d → %d/%d",
             service_id, old_down, old_up,
@@ -398,13 +503,13 @@ async def activate_service(
     auth: AuthContext = Depends(get_auth_context),
 ):
     """Mark a service as active after FNO installation is complete."""
-    with get_session() as session:
-        svc = session.execute(
+    async with get_async_session() as session:
+        svc = await session.scalar(
             select(NetworkService).where(
                 NetworkService.id == service_id,
                 NetworkService.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not svc:
             raise HTTPException(status_code=404, detail="Network service not found")
         if svc.status not in ("pending", "provisioning"):
@@ -413,8 +518,8 @@ async def activate_service(
         svc.status = "active"
         svc.activated_at = datetime.now(timezone.utc)
 
-        session.flush()
-        session.refresh(svc)
+        await session.flush()
+        await session.refresh(svc)
         logger.info("Activated service %s", service_id)
         return NetworkServiceRead.model_validate(svc)
 
@@ -429,13 +534,15 @@ async def terminate_service(
     auth: AuthContext = Depends(get_auth_context),
 ):
     """Permanently terminate a network service."""
-    with get_session() as session:
-        svc = session.execute(
-            select(NetworkService).where(
+    async with get_async_session() as session:
+        svc = await session.scalar(
+            select(NetworkService)
+            .options(joinedload(NetworkService.radius_account))
+            .where(
                 NetworkService.id == service_id,
                 NetworkService.tenant_id == auth.tenant_id,
             )
-        ).scalar_one_or_none()
+        )
         if not svc:
             raise HTTPException(status_code=404, detail="Network service not found")
         if svc.status == "terminated":
@@ -445,13 +552,12 @@ async def terminate_service(
         svc.terminated_at = datetime.now(timezone.utc)
 
         # Disable RADIUS
-        radius = session.execute(
-            select(RadiusAccount).where(RadiusAccount.service_id == service_id)
-        ).scalar_one_or_none()
+        radius = svc.radius_account
         if radius:
             radius.status = "disabled"
+            await session.run_sync(queue_sync, [(radius.tenant_id, radius.username)])
 
-        session.flush()
-        session.refresh(svc)
+        await session.flush()
+        await session.refresh(svc)
         logger.info("Terminated service %s", service_id)
         return NetworkServiceRead.model_validate(svc)
@@ -1,8 +1,8 @@
 """Pydantic v2 schemas for the Network service."""
 
 import uuid
-from datetime import datetime
-from typing import Any, Optional
+from datetime import date, datetime
+from typing import Any, Optional, Union
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
@@ -167,8 +167,37 @@ class RadiusSessionInfo(BaseModel):
     input_octets: int
     output_octets: int
     calling_station_id: Optional[str] = None
+    start_time: Optional[datetime] = None
+    last_update: Optional[datetime] = None
 
 
+class RadiusUsageBucket(BaseModel):
+    period: Union[datetime, date]  # hour start (UTC) or local day
+    input_octets: int
+    output_octets: int
+    total_octets: int
+    session_seconds: int
+
+
+class RadiusUsageReport(BaseModel):
+    username: str
+    service_id: uuid.UUID
+    granularity: str
+    start: datetime
+    end: datetime
+    input_octets: int
+    output_octets: int
+    total_octets: int
+    buckets: list[RadiusUsageBucket]
+
+
+class RadiusUsageTop(BaseModel):
+    username: str
+    service_id: Optional[uuid.UUID] = None
+    input_octets: int
+    output_octets: int
+    total_octets: int
+
 # ---------------------------------------------------------------------------
 # FNO Order schemas
 # ---------------------------------------------------------------------------
@@ -179,6 +208,7 @@ class FNOOrderCreate(BaseModel):
     order_type: str
     scheduled_date: Optional[datetime] = None
     request_payload: Optional[dict[str, Any]] = None
+    priority: int = Field(0, ge=-100, le=100)
 
     @field_validator("fno_provider")
     @classmethod
@@ -216,8 +246,11 @@ class FNOOrderRead(BaseModel):
     order_type: str
     status: str
     fno_reference: Optional[str]
+    fno_status: Optional[str] = None
     scheduled_date: Optional[datetime]
     completed_date: Optional[datetime]
+    next_poll_at: Optional[datetime] = None
+    last_polled_at: Optional[datetime] = None
     request_payload: Optional[dict[str, Any]]
     response_payload: Optional[dict[str, Any]]
     error_message: Optional[str]
@@ -225,6 +258,20 @@ class FNOOrderRead(BaseModel):
     updated_at: datetime
 
 
+class FNOOrderEventRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    order_id: uuid.UUID
+    from_status: Optional[str]
+    to_status: str
+    fno_status: Optional[str]
+    scheduled_date: Optional[datetime]
+    source: str
+    payload: Optional[dict[str, Any]]
+    created_at: datetime
+
+
 # ---------------------------------------------------------------------------
 # Coverage schemas
 # ---------------------------------------------------------------------------
@@ -234,7 +281,10 @@ class CoverageCheckRequest(BaseModel):
     city: Optional[str] = None
     province: Optional[str] = None
     postal_code: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     fno_providers: Optional[list[str]] = None  # filter to specific FNOs
+    deadline_ms: Optional[int] = Field(None, ge=0, le=60000)  # 0 = wait for every FNO
 
     @field_validator("fno_providers")
     @classmethod
@@ -253,8 +303,9 @@ class CoverageResult(BaseModel):
     technology: Optional[str] = None
     max_download_mbps: Optional[int] = None
     area_name: Optional[str] = None
-    adapter_type: str = "cache"  # cache / api / browser
+    adapter_type: str = "cache"  # index / cache / api / browser / pending / error
     message: Optional[str] = None
+    poll_token: Optional[str] = None  # set on pending results
 
 
 class CoverageAreaCreate(BaseModel):
@@ -316,6 +367,7 @@ class AutomationJobCreate(BaseModel):
     fno_provider: str
     job_type: str = Field(min_length=1, max_length=50)
     request_payload: Optional[dict[str, Any]] = None
+    priority: int = Field(0, ge=-100, le=100)
 
     @field_validator("fno_provider")
     @classmethod
@@ -367,6 +419,26 @@ class BulkCustomerReinstateRequest(BaseModel):
     reason: Optional[str] = None
 
 
+class BulkCustomerActionRequest(BaseModel):
+    """Suspend or reinstate all services of many customers in one call."""
+    customer_ids: list[uuid.UUID] = Field(min_length=1, max_length=5000)
+    reason: Optional[str] = Field(None, max_length=255)
+
+
+class BulkCustomerActionResult(BaseModel):
+    customer_id: uuid.UUID
+    services_updated: int = 0
+    radius_accounts_updated: int = 0
+    coa_queued: int = 0
+
+
+class BulkCustomerActionResponse(BaseModel):
+    action: str
+    services_updated: int
+    coa_queued: int
+    results: list[BulkCustomerActionResult]
+
+
 class SpeedChangeRequest(BaseModel):
     download_speed_mbps: int = Field(ge=1, le=10000)
     upload_speed_mbps: int = Field(ge=1, le=10000)
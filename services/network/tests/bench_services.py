@@ -0,0 +1,194 @@
+"""Services endpoints: blocking sync sessions vs async sessions with eager RADIUS loading.
+
+Not collected by pytest; needs a PostgreSQL server.  Run from the repository
+root (a scratch database is created and dropped)::
+
+    TEST_DATABASE_URL=postgresql://... python services/network/tests/bench_services.py [services]
+
+``blocking`` replays the handler shape before the async change: a sync
+``get_session()`` inside the ``async def`` and a second ``select(RadiusAccount)``
+per service.  ``async`` calls the current route handlers.  Both run speed
+change, suspend and reinstate for every service, ``CONCURRENCY`` services at a
+time, while a heartbeat task measures how long the event loop stalls.
+"""
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.engine import make_url
+
+ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(ROOT))
+
+from services.common.auth import AuthContext  # noqa: E402
+from services.common.db import get_async_engine, get_engine  # noqa: E402
+from services.network import database  # noqa: E402
+from services.network.freeradius import freeradius_metadata  # noqa: E402
+from services.network.models import Base, NetworkService, RadiusAccount  # noqa: E402
+from services.network.radius_coa import enqueue_coa  # noqa: E402
+from services.network.radius_sync import queue_sync  # noqa: E402
+from services.network.routes import services as routes  # noqa: E402
+from services.network.schemas import (  # noqa: E402
+    NetworkServiceRead,
+    ServiceReinstateRequest,
+    ServiceSuspendRequest,
+    SpeedChangeRequest,
+)
+
+CONCURRENCY = 10
+MIGRATIONS = ROOT / "config" / "migrations"
+NETWORK_MIGRATIONS = ("20261019_network_radius_sync.sql", "20261019_network_radacct_indexes.sql")
+ACTIONS = ("speed-change", "suspend", "reinstate")
+SPEED = SpeedChangeRequest(download_speed_mbps=200, upload_speed_mbps=100, speed_profile_name="200M")
+
+
+# ---------------------------------------------------------------------------
+# Handlers
+# ---------------------------------------------------------------------------
+
+async def _blocking(action: str, service_id: uuid.UUID, auth: AuthContext) -> NetworkServiceRead:
+    """Pre-change handler: sync session on the event loop, service and account fetched separately."""
+    with database.get_session() as session:
+        svc = session.execute(
+            select(NetworkService).where(NetworkService.id == service_id, NetworkService.tenant_id == auth.tenant_id)
+        ).scalar_one()
+        radius = session.execute(
+            select(RadiusAccount).where(RadiusAccount.service_id == service_id)
+        ).scalar_one()
+        if action == "speed-change":
+            svc.download_speed_mbps, svc.upload_speed_mbps = SPEED.download_speed_mbps, SPEED.upload_speed_mbps
+            svc.speed_profile_name = radius.profile_name = SPEED.speed_profile_name
+            radius.mikrotik_rate_limit = "200M/100M"
+            enqueue_coa(session, radius, "coa", reason="Speed change")
+        elif action == "suspend":
+            svc.status = radius.status = "suspended"
+            enqueue_coa(session, radius, "disconnect", "bench")
+        else:
+            svc.status = radius.status = "active"
+            enqueue_coa(session, radius, "coa", "bench")
+        queue_sync(session, [(radius.tenant_id, radius.username)])
+        session.flush()
+        session.refresh(svc)
+        return NetworkServiceRead.model_validate(svc)
+
+
+async def _async(action: str, service_id: uuid.UUID, auth: AuthContext) -> NetworkServiceRead:
+    if action == "speed-change":
+        return await routes.change_service_speed(service_id, SPEED, auth)
+    if action == "suspend":
+        return await routes.suspend_service(service_id, ServiceSuspendRequest(reason="bench"), auth)
+    return await routes.reinstate_service(service_id, ServiceReinstateRequest(reason="bench"), auth)
+
+
+# ---------------------------------------------------------------------------
+# Harness
+# ---------------------------------------------------------------------------
+
+def _seed(engine, tenant_id: uuid.UUID, count: int, label: str) -> list[uuid.UUID]:
+    with engine.begin() as conn:
+        rows = conn.execute(
+            NetworkService.__table__.insert().returning(NetworkService.id),
+            [
+                dict(
+                    id=uuid.uuid4(), tenant_id=tenant_id, customer_id=uuid.uuid4(), service_reference=f"SVC-{label}-{i}",
+                    status="active", technology="gpon", fno_provider="vumatel",
+                    download_speed_mbps=100, upload_speed_mbps=100,
+                    address_line1="1 Main Rd", city="Cape Town", province="western_cape", postal_code="8001",
+                )
+                for i in range(count)
+            ],
+        ).scalars().all()
+        conn.execute(RadiusAccount.__table__.insert(), [
+            dict(
+                id=uuid.uuid4(), tenant_id=tenant_id, service_id=service_id, username=f"{label}{i}@isp",
+                password_hash="secret", profile_name="100M", mikrotik_rate_limit="100M/100M",
+                nas_ip_address="10.0.0.1",
+            )
+            for i, service_id in enumerate(rows)
+        ])
+    return list(rows)
+
+
+async def _run(handler, service_ids: list[uuid.UUID], auth: AuthContext, statements: list[int]):
+    """Wall time, p99 and worst event-loop stall in ms, and SQL statements per request.
+
+    The first service is a warm-up (connection pool, statement caches) and is
+    not measured.
+    """
+    warmup, *service_ids = service_ids
+    for action in ACTIONS:
+        await handler(action, warmup, auth)
+    statements[0] = 0
+
+    stalls: list[float] = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append(max(time.perf_counter() - started - 0.001, 0.0))
+
+    gate = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(service_id):
+        async with gate:
+            for action in ACTIONS:
+                await handler(action, service_id, auth)
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*[one(s) for s in service_ids])
+    elapsed = time.perf_counter() - started
+    done.set()
+    await beat
+    stalls.sort()
+    per_request = statements[0] / (len(service_ids) * len(ACTIONS))
+    return elapsed * 1000, stalls[int(len(stalls) * 0.99)] * 1000, stalls[-1] * 1000, per_request
+
+
+def main(services: int = 200) -> None:
+    admin_url = os.getenv("TEST_DATABASE_URL") or sys.exit("set TEST_DATABASE_URL")
+    admin = create_engine(admin_url, isolation_level="AUTOCOMMIT")
+    name = f"network_bench_{uuid.uuid4().hex[:8]}"
+    with admin.connect() as conn:
+        conn.execute(text(f'CREATE DATABASE "{name}"'))
+    os.environ["DATABASE_URL"] = make_url(admin_url).set(database=name).render_as_string(hide_password=False)
+    try:
+        engine = get_engine()
+        Base.metadata.create_all(engine)
+        freeradius_metadata.create_all(engine)
+        with engine.begin() as conn:
+            for migration in NETWORK_MIGRATIONS:
+                conn.exec_driver_sql((MIGRATIONS / migration).read_text())
+
+        statements = [0]
+
+        def count(*_args):
+            statements[0] += 1
+
+        event.listen(engine, "before_cursor_execute", count)
+        event.listen(get_async_engine().sync_engine, "before_cursor_execute", count)
+
+        auth = AuthContext(user_id=uuid.uuid4(), tenant_id=uuid.uuid4())
+        print(f"{'':<10} {'wall ms':>9} {'p99 stall':>10} {'max stall':>10} {'stmts/req':>10}")
+        for label, handler in (("blocking", _blocking), ("async", _async)):
+            service_ids = _seed(engine, auth.tenant_id, services + 1, label)
+            wall, p99, worst, per_request = asyncio.run(_run(handler, service_ids, auth, statements))
+            print(f"{label:<10} {wall:9.1f} {p99:10.1f} {worst:10.1f} {per_request:10.1f}")
+        print(f"{services} services, {services * len(ACTIONS)} requests, concurrency {CONCURRENCY}")
+    finally:
+        get_engine().dispose()
+        with admin.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+        admin.dispose()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
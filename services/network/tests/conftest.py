@@ -0,0 +1,95 @@
+"""Shared fixtures for the Network service tests.
+
+Tests that touch the database need a PostgreSQL server: point
+``TEST_DATABASE_URL`` at one (any database the user may ``CREATE DATABASE``
+from) and each test run gets its own scratch database, built from the
+models, the FreeRADIUS tables and the ``config/migrations/20261019_network_*``
+migrations.  Without ``TEST_DATABASE_URL`` those tests are skipped.
+"""
+
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+from services.network import database
+from services.network.freeradius import freeradius_metadata
+from services.network.models import Base, NetworkService, RadiusAccount
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+MIGRATIONS = Path(__file__).resolve().parents[3] / "config" / "migrations"
+# Migrations the models do not already cover (unique indexes on FreeRADIUS tables).
+NETWORK_MIGRATIONS = ("20261019_network_radius_sync.sql", "20261019_network_radacct_indexes.sql")
+
+
+@pytest.fixture(scope="session")
+def pg_engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+    admin = create_engine(TEST_DATABASE_URL, isolation_level="AUTOCOMMIT")
+    name = f"network_test_{uuid.uuid4().hex[:8]}"
+    with admin.connect() as conn:
+        conn.execute(text(f'CREATE DATABASE "{name}"'))
+    engine = create_engine(make_url(TEST_DATABASE_URL).set(database=name))
+    try:
+        Base.metadata.create_all(engine)
+        freeradius_metadata.create_all(engine)
+        with engine.begin() as conn:
+            for migration in NETWORK_MIGRATIONS:
+                conn.exec_driver_sql((MIGRATIONS / migration).read_text())
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+        admin.dispose()
+
+
+@pytest.fixture
+def db(pg_engine, monkeypatch):
+    """Empty tables, with ``database.get_session()`` bound to the scratch database."""
+    tables = [t.name for t in (*Base.metadata.sorted_tables, *freeradius_metadata.sorted_tables)]
+    with pg_engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE {', '.join(tables)} CASCADE"))
+    factory = sessionmaker(bind=pg_engine, expire_on_commit=False)
+    monkeypatch.setattr(database, "_session_factory", factory)
+    return factory
+
+
+@pytest.fixture
+def make_service():
+    """Factory for a network service, flushed in the caller's session."""
+
+    def make(session, tenant_id=None, fno_provider="vumatel"):
+        svc = NetworkService(
+            tenant_id=tenant_id or uuid.uuid4(), customer_id=uuid.uuid4(), service_reference="SVC-1",
+            status="active", technology="gpon", fno_provider=fno_provider,
+            download_speed_mbps=100, upload_speed_mbps=100,
+            address_line1="1 Main Rd", city="Cape Town", province="western_cape", postal_code="8001",
+        )
+        session.add(svc)
+        session.flush()
+        return svc
+
+    return make
+
+
+@pytest.fixture
+def make_account(make_service):
+    """Factory for a service plus RADIUS account, flushed in the caller's session."""
+
+    def make(session, username="user@isp", nas_ip="10.0.0.1"):
+        svc = make_service(session)
+        account = RadiusAccount(
+            tenant_id=svc.tenant_id, service_id=svc.id, username=username, password_hash="secret",
+            profile_name="100M", mikrotik_rate_limit="100M/100M", nas_ip_address=nas_ip,
+        )
+        session.add(account)
+        session.flush()
+        return account
+
+    return make
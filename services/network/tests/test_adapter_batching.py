@@ -0,0 +1,73 @@
+"""Native batch endpoints are opt-in per FNO and fall back to single calls."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from services.network.adapters import api_adapter
+from services.network.adapters.vumatel import VumatelAdapter
+
+
+class StubVumatel(VumatelAdapter):
+    """Answers ``_post`` from ``batch`` (a status code or a response body); records paths."""
+
+    def __init__(self, batch):
+        super().__init__(api_key="k", base_url="http://vumatel.test")
+        self.batch = batch
+        self.paths = []
+
+    async def _post(self, path, payload=None, endpoint=None, headers=None):
+        self.paths.append(path)
+        if path == "/services/suspend":
+            if isinstance(self.batch, int):
+                request = httpx.Request("POST", self.base_url + path)
+                raise httpx.HTTPStatusError("", request=request, response=httpx.Response(self.batch, request=request))
+            return self.batch
+        return {}
+
+
+@pytest.fixture(autouse=True)
+def forget_unsupported(monkeypatch):
+    monkeypatch.setattr(api_adapter, "_batch_unsupported", set())
+
+
+def test_batch_endpoint_off_by_default(monkeypatch):
+    monkeypatch.delenv("FNO_VUMATEL_BATCH_API", raising=False)
+    adapter = StubVumatel({"results": []})
+    results = asyncio.run(adapter.suspend_many(["A", "B"]))
+    assert [r["status"] for r in results] == ["SUSPENDED", "SUSPENDED"]
+    assert sorted(adapter.paths) == ["/services/A/suspend", "/services/B/suspend"]
+
+
+def test_batch_endpoint_used_when_enabled(monkeypatch):
+    monkeypatch.setenv("FNO_VUMATEL_BATCH_API", "true")
+    adapter = StubVumatel({"results": [
+        {"vumatel_account_id": "A"}, {"vumatel_account_id": "B", "error": "not active"},
+    ]})
+    results = asyncio.run(adapter.suspend_many(["A", "B", "C"]))
+    assert adapter.paths == ["/services/suspend"]
+    assert results[0]["status"] == "SUSPENDED"
+    assert results[1] == {"status": "FAILED", "error": "not active", "adapter_type": "api"}
+    assert results[2]["status"] == "FAILED"  # not in the response
+
+
+@pytest.mark.parametrize("status", [404, 405])
+def test_missing_batch_endpoint_falls_back_to_single_calls(monkeypatch, status):
+    monkeypatch.setenv("FNO_VUMATEL_BATCH_API", "true")
+    adapter = StubVumatel(status)
+    results = asyncio.run(adapter.suspend_many(["A", "B"]))
+    assert [r["status"] for r in results] == ["SUSPENDED", "SUSPENDED"]
+
+    # Remembered: the next call skips the batch endpoint.
+    adapter.paths.clear()
+    asyncio.run(adapter.suspend_many(["C"]))
+    assert adapter.paths == ["/services/C/suspend"]
+
+
+def test_batch_server_error_fails_the_chunk(monkeypatch):
+    monkeypatch.setenv("FNO_VUMATEL_BATCH_API", "true")
+    adapter = StubVumatel(503)
+    results = asyncio.run(adapter.suspend_many(["A", "B"]))
+    assert adapter.paths == ["/services/suspend"]
+    assert all(r["status"] == "FAILED" for r in results)
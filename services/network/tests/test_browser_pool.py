@@ -0,0 +1,167 @@
+"""Warm browser-context pool against a stub FNO portal served by the test.
+
+The portal is a small ``http.server``: ``/`` shows a username/password form
+until the browser has the session cookie that ``POST /login`` sets, and it
+counts form logins and page views.  Real Chromium (via Playwright) drives it,
+with ``BrowserFNOAdapter._login`` unchanged.
+"""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from services.network.adapters.browser_adapter import BrowserFNOAdapter  # noqa: E402
+from services.network.adapters.browser_pool import BrowserPool  # noqa: E402
+
+LOGIN_PAGE = b"""<!doctype html><title>Portal</title>
+<form method="post" action="/login">
+  <input type="text" name="username"> <input type="password" name="password">
+  <button type="submit">Sign in</button>
+</form>"""
+ORDERS_PAGE = b"<!doctype html><title>Portal</title><h1>Orders</h1>"
+
+
+class PortalHandler(BaseHTTPRequestHandler):
+    def _send(self, status, body=b"", headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.views += 1
+        logged_in = "session=ok" in (self.headers.get("Cookie") or "")
+        self._send(200, ORDERS_PAGE if logged_in else LOGIN_PAGE)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.form_logins += 1
+        self._send(303, headers=[("Set-Cookie", "session=ok; Path=/"), ("Location", "/")])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def portal():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PortalHandler)
+    server.form_logins = server.views = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _adapter(portal):
+    return BrowserFNOAdapter("openserve", portal.url, {"user": "ops", "pass": "secret"})
+
+
+async def _act(pool, adapter, fail=False):
+    async with pool.session("openserve", adapter._login) as page:
+        await page.goto(adapter.portal_url)
+        assert await page.locator("h1").inner_text() == "Orders"
+        if fail:
+            raise RuntimeError("portal error")
+        return page
+
+
+def _run(pool, scenario):
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await pool.close()
+
+    return asyncio.run(main())
+
+
+def test_checkout_and_return_reuses_warm_context(portal):
+    pool, adapter = BrowserPool(max_contexts=2, max_uses=50), _adapter(portal)
+
+    async def scenario():
+        return await _act(pool, adapter), await _act(pool, adapter)
+
+    first, second = _run(pool, scenario)
+    assert first is second
+    assert portal.form_logins == 1
+    stats = pool.snapshot()["openserve"]
+    assert stats["contexts_created"] == 1 and stats["actions"] == 2 and stats["in_use"] == 0
+
+
+def test_concurrency_is_capped_per_portal(portal):
+    pool, adapter = BrowserPool(max_contexts=2, max_uses=50), _adapter(portal)
+    peak = {"in_use": 0, "waiting": 0}
+
+    async def action():
+        async with pool.session("openserve", adapter._login) as page:
+            stats = pool.snapshot()["openserve"]
+            peak["in_use"] = max(peak["in_use"], stats["in_use"])
+            peak["waiting"] = max(peak["waiting"], stats["waiting"])
+            await page.goto(adapter.portal_url)
+
+    async def scenario():
+        await asyncio.gather(*[action() for _ in range(5)])
+
+    _run(pool, scenario)
+    assert peak["in_use"] == 2 and peak["waiting"] >= 1
+    stats = pool.snapshot()["openserve"]
+    assert stats["contexts_created"] == 2 and stats["actions"] == 5
+
+
+def test_context_recycled_after_max_uses_keeps_session(portal):
+    pool, adapter = BrowserPool(max_contexts=1, max_uses=2), _adapter(portal)
+
+    async def scenario():
+        pages = [await _act(pool, adapter) for _ in range(3)]
+        return pages, await pages[2].context.cookies()
+
+    pages, cookies = _run(pool, scenario)
+    assert pages[0] is pages[1] and pages[2] is not pages[1]
+    # The replacement starts from the saved storage_state: no second form login.
+    assert [(c["name"], c["value"]) for c in cookies] == [("session", "ok")]
+    assert portal.form_logins == 1
+    stats = pool.snapshot()["openserve"]
+    assert stats["contexts_created"] == 2 and stats["contexts_recycled"] == 2 and stats["failures"] == 0
+
+
+def test_failed_action_discards_context(portal):
+    pool, adapter = BrowserPool(max_contexts=1, max_uses=50), _adapter(portal)
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await _act(pool, adapter, fail=True)
+        failed = pool.snapshot()["openserve"]
+        await _act(pool, adapter)
+        return failed
+
+    failed = _run(pool, scenario)
+    assert failed["failures"] == 1 and failed["contexts_recycled"] == 1 and failed["idle"] == 0
+    assert pool.snapshot()["openserve"]["contexts_created"] == 2
+    assert portal.form_logins == 1
+
+
+def test_browser_crash_relaunches_and_drops_dead_contexts(portal):
+    pool, adapter = BrowserPool(max_contexts=2, max_uses=50), _adapter(portal)
+
+    async def scenario():
+        before = await _act(pool, adapter)
+        crashed = pool._browser
+        await crashed.close()  # disconnects like a Chromium crash
+        after = await _act(pool, adapter)
+        return before, after, crashed, pool._browser
+
+    before, after, crashed, relaunched = _run(pool, scenario)
+    assert relaunched is not crashed
+    assert after is not before
+    assert portal.form_logins == 1
+    stats = pool.snapshot()["openserve"]
+    assert stats["failures"] == 0 and stats["contexts_created"] == 2
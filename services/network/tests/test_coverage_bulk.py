@@ -0,0 +1,103 @@
+"""Bulk coverage endpoint: results stream back while the upload is still arriving."""
+
+import asyncio
+import json
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from services.common.auth import AuthContext, get_auth_context
+from services.network import coverage_bulk
+from services.network.routes import coverage
+from services.network.schemas import CoverageResult
+
+HEADER = b"ref,address\n"
+
+
+@pytest.fixture
+def app(db, monkeypatch):
+    async def live_check(tenant_id, provider, address, latitude=None, longitude=None):
+        return CoverageResult(fno_provider=provider, available=True, adapter_type="api")
+
+    monkeypatch.setattr(coverage_bulk, "live_check", live_check)
+    app = FastAPI()
+    app.include_router(coverage.router)
+    app.dependency_overrides[get_auth_context] = lambda: AuthContext(user_id=uuid.uuid4(), tenant_id=uuid.uuid4())
+    return app
+
+
+def _post(app, body, params="fno_provider=vumatel"):
+    async def call():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://network") as client:
+            return await client.post(f"/coverage/bulk?{params}", content=body, headers={"content-type": "text/csv"})
+
+    return asyncio.run(call())
+
+
+def _records(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_rows_results_and_summary(app):
+    body = HEADER + b"A,1 Main Road Cape Town\nB,1 main road  cape town\nC,x\n"
+    response = _post(app, body)
+    assert response.status_code == 200
+    *rows, summary = _records(response)
+    by_ref = {r["ref"]: r for r in rows}
+    assert by_ref["A"]["status"] == "ok" and by_ref["A"]["results"][0]["available"]
+    assert by_ref["B"]["duplicate"] and by_ref["C"]["status"] == "invalid"
+    assert summary["lines"] == 3 and summary["unique_locations"] == 1 and summary["duplicates"] == 1
+
+
+def test_bad_header_is_rejected_before_streaming(app):
+    response = _post(app, b"name,city\nA,Cape Town\n")
+    assert response.status_code == 400 and "address" in response.json()["detail"]
+
+
+def test_upload_errors_after_start_end_the_stream(app, monkeypatch):
+    monkeypatch.setattr(coverage_bulk, "COVERAGE_BULK_MAX_ADDRESSES", 1)
+    response = _post(app, HEADER + b"A,1 Main Road Cape Town\nB,2 Main Road Cape Town\n")
+    assert response.status_code == 200
+    records = _records(response)
+    assert {"line": 3, "status": "error", "message": "too many addresses (max 1)"} in records
+    assert records[-1]["summary"] and records[-1]["lines"] == 1
+
+
+def test_response_starts_before_upload_ends(app):
+    """Raw ASGI: the rest of the body is only sent once the first result has arrived."""
+    first_result = asyncio.Event()
+    sent = []
+
+    async def scenario():
+        chunks = [HEADER + b"A,1 Main Road Cape Town\n", b"B,2 Main Road Cape Town\n"]
+
+        async def receive():
+            if len(chunks) == 1:
+                await asyncio.wait_for(first_result.wait(), 5)
+            if chunks:
+                body = chunks.pop(0)
+                return {"type": "http.request", "body": body, "more_body": bool(chunks)}
+            await asyncio.Event().wait()  # no disconnect; cancelled when the response ends
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.body" and b'"ref": "A"' in message.get("body", b""):
+                first_result.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": "/coverage/bulk", "raw_path": b"/coverage/bulk",
+            "query_string": b"fno_provider=vumatel", "root_path": "",
+            "headers": [(b"host", b"network"), (b"content-type", b"text/csv")],
+            "client": ("127.0.0.1", 1), "server": ("network", 80),
+        }
+        await asyncio.wait_for(app(scope, receive, send), 10)
+
+    asyncio.run(scenario())
+    assert sent[0]["type"] == "http.response.start" and sent[0]["status"] == 200
+    body = b"".join(m.get("body", b"") for m in sent[1:])
+    refs = [json.loads(line).get("ref") for line in body.splitlines()]
+    assert refs[:2] == ["A", "B"] and json.loads(body.splitlines()[-1])["lines"] == 2
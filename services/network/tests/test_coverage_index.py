@@ -0,0 +1,94 @@
+"""Coverage index lookups stay off the event loop."""
+
+import asyncio
+import threading
+import uuid
+
+import pytest
+
+from services.network import coverage_index
+from services.network.coverage_index import CoverageHit, TenantCoverageIndex, lookup_coverage
+from services.network.models import CoverageFootprint, CoveragePoint
+
+SQUARE = {"type": "Polygon", "coordinates": [[[18.0, -34.0], [18.1, -34.0], [18.1, -33.9], [18.0, -33.9], [18.0, -34.0]]]}
+
+
+def _index(signature, speed):
+    index = TenantCoverageIndex(signature)
+    index.add_footprint(CoverageHit("vumatel", "gpon", speed, "Area", "footprint"), SQUARE, (18.0, -34.0, 18.1, -33.9))
+    return index
+
+
+@pytest.fixture(autouse=True)
+def _clean_index():
+    coverage_index.invalidate()
+    yield
+    coverage_index.invalidate()
+
+
+def test_lookup_inside_and_outside():
+    tenant = uuid.uuid4()
+    coverage_index._indexes[tenant] = _index(("v1",), 100)
+    coverage_index._checked_at[tenant] = coverage_index.time.monotonic()
+
+    inside = asyncio.run(lookup_coverage(tenant, -33.95, 18.05))
+    outside = asyncio.run(lookup_coverage(tenant, -33.5, 18.05))
+    assert inside["vumatel"].max_download_mbps == 100
+    assert outside == {"vumatel": None}
+
+
+def test_stale_index_served_while_refresh_runs_in_thread(monkeypatch):
+    tenant = uuid.uuid4()
+    coverage_index._indexes[tenant] = _index(("v1",), 100)
+    coverage_index._checked_at[tenant] = 0.0  # stale
+    release, build_threads = threading.Event(), []
+
+    def slow_get_index(tenant_id):
+        build_threads.append(threading.current_thread())
+        release.wait(5)
+        coverage_index._indexes[tenant_id] = _index(("v2",), 1000)
+        coverage_index._checked_at[tenant_id] = coverage_index.time.monotonic()
+        return coverage_index._indexes[tenant_id]
+
+    monkeypatch.setattr(coverage_index, "get_index", slow_get_index)
+
+    async def scenario():
+        # Both lookups answer from the old index without waiting for the build,
+        # and share a single refresh.
+        first = await lookup_coverage(tenant, -33.95, 18.05)
+        second = await lookup_coverage(tenant, -33.95, 18.05)
+        refresh = coverage_index._refreshing[tenant]
+        release.set()
+        await refresh
+        third = await lookup_coverage(tenant, -33.95, 18.05)
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first["vumatel"].max_download_mbps == 100
+    assert second["vumatel"].max_download_mbps == 100
+    assert third["vumatel"].max_download_mbps == 1000
+    assert len(build_threads) == 1 and build_threads[0] is not threading.main_thread()
+
+
+def test_first_lookup_waits_for_build(monkeypatch):
+    tenant = uuid.uuid4()
+    monkeypatch.setattr(coverage_index, "get_index", lambda tenant_id: _index(("v1",), 100))
+    assert asyncio.run(lookup_coverage(tenant, -33.95, 18.05, ["vumatel", "openserve"]))["vumatel"] is not None
+
+
+def test_postgis_providers_skip_inactive_and_unserviceable(db):
+    tenant = uuid.uuid4()
+    with db.begin() as session:
+        for fno, active in (("vumatel", True), ("octotel", False)):
+            session.add(CoverageFootprint(
+                tenant_id=tenant, fno_provider=fno, name="Area", technology="gpon", geometry=SQUARE,
+                min_lon=18.0, min_lat=-34.0, max_lon=18.1, max_lat=-33.9, is_active=active,
+            ))
+        for fno, serviceable in (("metrofibre", True), ("frogfoot", False)):
+            session.add(CoveragePoint(
+                tenant_id=tenant, fno_provider=fno, latitude=-33.95, longitude=18.05, technology="gpon",
+                serviceable=serviceable,
+            ))
+
+    with db() as session:
+        assert coverage_index._postgis_providers(session, tenant) == {"vumatel", "metrofibre"}
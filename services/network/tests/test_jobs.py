@@ -0,0 +1,191 @@
+"""FNO order placement is not repeated when a job is retried."""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from services.network import jobs
+from services.network.adapters.transport import is_transient
+from services.network.jobs import (
+    ClaimedJob,
+    JobDeadLetter,
+    JobRetry,
+    claim_jobs,
+    enqueue_job,
+    execute_fno_order,
+    fail_job,
+    run_automation_job,
+)
+from services.network.models import AutomationJob, FNOOrder, QueueJob
+
+
+class StubAdapter:
+    """Records place_order calls; ``crash`` raises after the FNO 'received' the order."""
+
+    def __init__(self, idempotent_orders, crash=False, result=None):
+        self.idempotent_orders = idempotent_orders
+        self.crash = crash
+        self.result = result
+        self.calls = []
+
+    async def place_order(self, customer_data, plan_id, client_reference=None):
+        self.calls.append(client_reference)
+        if self.crash:
+            raise ConnectionResetError("worker lost the FNO connection")
+        return self.result or {"status": "SUBMITTED", "order_id": f"FNO-{client_reference}"}
+
+
+@pytest.fixture
+def order_id(db, make_service):
+    with db.begin() as session:
+        svc = make_service(session)
+        order = FNOOrder(
+            tenant_id=svc.tenant_id, service_id=svc.id, fno_provider="vumatel", order_type="new_installation",
+            status="submitted", request_payload={"customer": {"name": "A"}, "plan_id": "100M"},
+        )
+        session.add(order)
+        session.flush()
+        return order.id
+
+
+def _use(monkeypatch, adapter):
+    monkeypatch.setattr(jobs, "get_adapter", lambda fno_provider: adapter)
+
+
+def test_place_order_sends_order_id_and_records_attempt(db, order_id, monkeypatch):
+    adapter = StubAdapter(idempotent_orders=True)
+    _use(monkeypatch, adapter)
+    asyncio.run(execute_fno_order(order_id))
+
+    assert adapter.calls == [str(order_id)]
+    with db() as session:
+        order = session.get(FNOOrder, order_id)
+        assert order.submit_attempted_at is not None
+        assert order.fno_reference == f"FNO-{order_id}"
+        assert order.status == "submitted" and order.next_poll_at is not None
+
+
+def test_retry_resends_same_reference_to_idempotent_fno(db, order_id, monkeypatch):
+    adapter = StubAdapter(idempotent_orders=True, crash=True)
+    _use(monkeypatch, adapter)
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(execute_fno_order(order_id))
+    adapter.crash = False
+    asyncio.run(execute_fno_order(order_id))
+
+    assert adapter.calls == [str(order_id), str(order_id)]
+    with db() as session:
+        assert session.get(FNOOrder, order_id).fno_reference == f"FNO-{order_id}"
+
+
+def test_retry_dead_letters_when_fno_cannot_dedupe(db, order_id, monkeypatch):
+    adapter = StubAdapter(idempotent_orders=False, crash=True)
+    _use(monkeypatch, adapter)
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(execute_fno_order(order_id))
+    adapter.crash = False
+    with pytest.raises(JobDeadLetter):
+        asyncio.run(execute_fno_order(order_id))
+    assert len(adapter.calls) == 1
+
+
+def test_dead_letter_skips_remaining_attempts(db, order_id):
+    with db.begin() as session:
+        order = session.get(FNOOrder, order_id)
+        job = enqueue_job(session, order.tenant_id, "fno_order", order_id, "vumatel")
+        session.flush()
+        job_id = job.id
+        job.status, job.attempts, job.locked_by = "running", 1, "w1"
+
+    fail_job(ClaimedJob(job_id, "fno_order", order_id, "vumatel", 1, 5), "w1", "check the portal", retry=False)
+    with db() as session:
+        assert session.get(QueueJob, job_id).status == "dead"
+        order = session.get(FNOOrder, order_id)
+        assert order.status == "failed" and order.error_message == "check the portal"
+
+
+def test_unknown_order_is_dropped(db, monkeypatch):
+    _use(monkeypatch, StubAdapter(idempotent_orders=True))
+    assert asyncio.run(execute_fno_order(uuid.uuid4())) is None
+
+
+def test_transient_failure_is_retried_not_failed(db, order_id, monkeypatch):
+    _use(monkeypatch, StubAdapter(True, result={"status": "FAILED", "error": "ReadTimeout", "retryable": True}))
+    with pytest.raises(JobRetry):
+        asyncio.run(execute_fno_order(order_id))
+    with db() as session:
+        assert session.get(FNOOrder, order_id).status == "submitted"
+
+
+def test_permanent_failure_marks_order_failed(db, order_id, monkeypatch):
+    _use(monkeypatch, StubAdapter(True, result={"status": "FAILED", "error": "422 Unprocessable", "retryable": False}))
+    asyncio.run(execute_fno_order(order_id))
+    with db() as session:
+        order = session.get(FNOOrder, order_id)
+        assert order.status == "failed" and order.error_message == "422 Unprocessable"
+
+
+@pytest.mark.parametrize("exc, transient", [
+    (httpx.ReadTimeout("slow"), True),
+    (httpx.ConnectError("refused"), True),
+    (httpx.HTTPStatusError("", request=httpx.Request("POST", "http://fno"),
+                           response=httpx.Response(503)), True),
+    (httpx.HTTPStatusError("", request=httpx.Request("POST", "http://fno"),
+                           response=httpx.Response(422)), False),
+    (ValueError("bad json"), False),
+])
+def test_is_transient(exc, transient):
+    assert is_transient(exc) is transient
+
+
+def test_claim_dead_letters_expired_lease_on_last_attempt(db, order_id):
+    expired = datetime.now(timezone.utc) - timedelta(minutes=1)
+    with db.begin() as session:
+        order = session.get(FNOOrder, order_id)
+        exhausted = enqueue_job(session, order.tenant_id, "fno_order", order_id, "vumatel", max_attempts=3)
+        retryable = enqueue_job(session, order.tenant_id, "fno_order", order_id, "vumatel", max_attempts=3)
+        session.flush()
+        exhausted.status, exhausted.attempts, exhausted.locked_until = "running", 3, expired
+        retryable.status, retryable.attempts, retryable.locked_until = "running", 2, expired
+        exhausted_id, retryable_id = exhausted.id, retryable.id
+
+    claimed = claim_jobs("vumatel", 10, "w2")
+    assert [(j.id, j.attempts) for j in claimed] == [(retryable_id, 3)]
+    with db() as session:
+        assert session.get(QueueJob, exhausted_id).status == "dead"
+        assert session.get(FNOOrder, order_id).status == "failed"
+
+
+@pytest.fixture
+def automation_job_id(db):
+    with db.begin() as session:
+        job = AutomationJob(
+            tenant_id=uuid.uuid4(), fno_provider="openserve", job_type="place_order", adapter_type="browser",
+            request_payload={"customer": {"name": "A"}, "plan_id": "100M"},
+        )
+        session.add(job)
+        session.flush()
+        return job.id
+
+
+def test_automation_place_order_sends_job_id(db, automation_job_id, monkeypatch):
+    adapter = StubAdapter(idempotent_orders=True)
+    _use(monkeypatch, adapter)
+    asyncio.run(run_automation_job(automation_job_id))
+    assert adapter.calls == [str(automation_job_id)]
+    with db() as session:
+        assert session.get(AutomationJob, automation_job_id).status == "completed"
+
+
+def test_automation_place_order_retry_dead_letters_when_fno_cannot_dedupe(db, automation_job_id, monkeypatch):
+    adapter = StubAdapter(idempotent_orders=False, crash=True)
+    _use(monkeypatch, adapter)
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(run_automation_job(automation_job_id))
+    adapter.crash = False
+    with pytest.raises(JobDeadLetter):
+        asyncio.run(run_automation_job(automation_job_id))
+    assert len(adapter.calls) == 1
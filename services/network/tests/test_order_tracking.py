@@ -0,0 +1,253 @@
+"""FNO order state machine, poll intervals and batched status polling."""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from services.network import order_tracking
+from services.network.adapters.api_adapter import APIFNOAdapter
+from services.network.models import FNOOrder, FNOOrderEvent
+from services.network.order_tracking import (
+    ORDER_TRANSITIONS,
+    TERMINAL_STATUSES,
+    TrackedOrder,
+    can_transition,
+    evaluate,
+    map_fno_status,
+    poll_interval,
+    poll_orders,
+    record_outcomes,
+)
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+def _tracked(status="submitted", age=timedelta(days=1), **kwargs):
+    fields = dict(
+        id=uuid.uuid4(), tenant_id=uuid.uuid4(), fno_provider="vumatel", status=status,
+        fno_reference="VUM-1", fno_status=None, scheduled_date=None, created_at=NOW - age, poll_failures=0,
+    )
+    fields.update(kwargs)
+    return TrackedOrder(**fields)
+
+
+# ---------------------------------------------------------------------------
+# Transition map
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("fno_status, expected", [
+    ("ACTIVE", "completed"),
+    ("install scheduled", "scheduled"),
+    ("Not-Feasible", "failed"),
+    ("QUEUED_ON_PORTAL", "submitted"),
+    ("WHATEVER", None),
+    (None, None),
+])
+def test_map_fno_status(fno_status, expected):
+    assert map_fno_status(fno_status) == expected
+
+
+def test_terminal_states_are_final():
+    for terminal in TERMINAL_STATUSES:
+        assert terminal not in ORDER_TRANSITIONS
+        assert not any(can_transition(terminal, target) for target in ("submitted", "scheduled", "completed"))
+
+
+@pytest.mark.parametrize("current, new, allowed", [
+    ("submitted", "accepted", True),
+    ("accepted", "submitted", False),
+    ("scheduled", "scheduled", True),
+    ("in_progress", "scheduled", True),
+    ("in_progress", "accepted", False),
+    ("scheduled", "cancelled", True),
+])
+def test_can_transition(current, new, allowed):
+    assert can_transition(current, new) is allowed
+
+
+# ---------------------------------------------------------------------------
+# Adaptive interval
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(order_tracking.random, "uniform", lambda a, b: 1.0)
+
+
+def test_interval_grows_with_age(no_jitter):
+    young = poll_interval(NOW - timedelta(days=1), NOW, "accepted")
+    old = poll_interval(NOW - timedelta(days=5), NOW, "accepted")
+    assert young == timedelta(hours=1)
+    assert old == timedelta(hours=5)
+
+
+def test_interval_clamped(no_jitter):
+    assert poll_interval(NOW - timedelta(minutes=1), NOW, "submitted") == timedelta(
+        seconds=order_tracking.FNO_TRACK_MIN_INTERVAL_SECONDS)
+    assert poll_interval(NOW - timedelta(days=60), NOW, "accepted") == timedelta(
+        seconds=order_tracking.FNO_TRACK_MAX_INTERVAL_SECONDS)
+
+
+def test_interval_minimum_while_installing_or_due(no_jitter):
+    minimum = timedelta(seconds=order_tracking.FNO_TRACK_MIN_INTERVAL_SECONDS)
+    created = NOW - timedelta(days=10)
+    assert poll_interval(created, NOW, "in_progress") == minimum
+    assert poll_interval(created, NOW, "scheduled", NOW + timedelta(hours=6)) == minimum
+    assert poll_interval(created, NOW, "scheduled", NOW + timedelta(days=3)) > minimum
+
+
+def test_interval_backs_off_on_failures(no_jitter):
+    created = NOW - timedelta(days=1)
+    assert poll_interval(created, NOW, "accepted", failures=2) == 4 * poll_interval(created, NOW, "accepted")
+
+
+@pytest.mark.parametrize("jitter", [0.9, 1.1])
+def test_jitter_stays_inside_clamp(monkeypatch, jitter):
+    monkeypatch.setattr(order_tracking.random, "uniform", lambda a, b: jitter)
+    longest = poll_interval(NOW - timedelta(days=80), NOW, "accepted", failures=3)
+    shortest = poll_interval(NOW, NOW, "submitted")
+    assert longest == timedelta(seconds=order_tracking.FNO_TRACK_MAX_INTERVAL_SECONDS)
+    assert shortest == timedelta(seconds=order_tracking.FNO_TRACK_MIN_INTERVAL_SECONDS)
+
+
+# ---------------------------------------------------------------------------
+# evaluate (pure)
+# ---------------------------------------------------------------------------
+
+def test_evaluate_applies_allowed_transition(no_jitter):
+    order = _tracked("accepted")
+    outcome = evaluate(order, {"status": "INSTALL_SCHEDULED", "scheduled_date": "2026-10-25T08:00:00Z"}, NOW)
+    assert outcome.status == "scheduled"
+    assert outcome.scheduled_date == datetime(2026, 10, 25, 8, tzinfo=timezone.utc)
+    assert outcome.event["from_status"] == "accepted" and outcome.event["to_status"] == "scheduled"
+    assert outcome.next_poll_at is not None
+
+
+def test_evaluate_ignores_backwards_transition(no_jitter):
+    outcome = evaluate(_tracked("scheduled", fno_status="SCHEDULED"), {"status": "PENDING"}, NOW)
+    assert outcome.status == "scheduled"
+    assert outcome.fno_status == "PENDING"  # raw FNO status still recorded
+
+
+def test_evaluate_completion_is_terminal(no_jitter):
+    outcome = evaluate(_tracked("in_progress"), {"status": "ACTIVE"}, NOW)
+    assert outcome.status == "completed" and outcome.completed_date == NOW
+    assert outcome.next_poll_at is None
+
+
+def test_evaluate_failure_records_message(no_jitter):
+    outcome = evaluate(_tracked("accepted"), {"status": "REJECTED", "message": "No duct"}, NOW)
+    assert outcome.status == "failed" and outcome.error_message == "No duct"
+
+
+def test_evaluate_error_backs_off_without_event(no_jitter):
+    # Inside FNO_TRACK_MAX_AGE_DAYS: an error schedules another poll.
+    order = _tracked("accepted", poll_failures=1)
+    outcome = evaluate(order, {"status": "UNKNOWN", "error": "timeout"}, NOW)
+    assert outcome.status == "accepted" and outcome.event is None
+    assert outcome.poll_failures == 2
+    assert outcome.next_poll_at - NOW == 4 * poll_interval(order.created_at, NOW, "accepted")
+
+
+def test_evaluate_stops_polling_old_orders(no_jitter):
+    age = timedelta(days=order_tracking.FNO_TRACK_MAX_AGE_DAYS + 1)
+    outcome = evaluate(_tracked("accepted", age=age, fno_status="ACCEPTED"), {"status": "ACCEPTED"}, NOW)
+    assert outcome.next_poll_at is None and outcome.event is None
+
+
+def test_evaluate_error_stops_polling_old_orders(no_jitter):
+    age = timedelta(days=order_tracking.FNO_TRACK_MAX_AGE_DAYS + 1)
+    outcome = evaluate(_tracked("accepted", age=age, poll_failures=3), {"status": "UNKNOWN", "error": "timeout"}, NOW)
+    assert outcome.next_poll_at is None and outcome.event is None
+    assert outcome.status == "accepted" and outcome.poll_failures == 4
+
+
+# ---------------------------------------------------------------------------
+# Database
+# ---------------------------------------------------------------------------
+
+class StubAdapter:
+    """Answers ``get_order_statuses`` from a dict and records each call."""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.calls = []
+
+    async def get_order_statuses(self, order_ids):
+        self.calls.append(list(order_ids))
+        return {ref: self.statuses[ref] for ref in order_ids if ref in self.statuses}
+
+
+class LookupAdapter(APIFNOAdapter):
+    """No bulk endpoint; ``ERR`` references raise."""
+
+    def __init__(self):
+        super().__init__(fno_name="lookup", api_key="k", base_url="http://fno.test")
+
+    async def get_order_status(self, order_id):
+        if order_id.startswith("ERR"):
+            raise RuntimeError("portal timeout")
+        return {"order_id": order_id, "status": "ACCEPTED"}
+
+
+def _make_order(session, make_service, reference, status="accepted", provider="vumatel"):
+    svc = make_service(session, fno_provider=provider)
+    order = FNOOrder(
+        tenant_id=svc.tenant_id, service_id=svc.id, fno_provider=provider, order_type="new_installation",
+        status=status, fno_reference=reference, next_poll_at=datetime.now(timezone.utc) - timedelta(seconds=1),
+    )
+    session.add(order)
+    session.flush()
+    return order.id
+
+
+def test_poll_orders_batches_per_provider_and_records_events(db, make_service, monkeypatch):
+    adapters = {
+        "vumatel": StubAdapter({"V-1": {"status": "SCHEDULED"}, "V-2": {"status": "ACTIVE"}}),
+        "frogfoot": StubAdapter({}),
+    }
+    monkeypatch.setattr(order_tracking, "get_adapter", adapters.__getitem__)
+    with db.begin() as session:
+        v1 = _make_order(session, make_service, "V-1")
+        v2 = _make_order(session, make_service, "V-2", status="in_progress")
+        f1 = _make_order(session, make_service, "F-1", provider="frogfoot")
+        done = _make_order(session, make_service, "V-3", status="completed")
+
+    assert asyncio.run(poll_orders()) == 3
+    assert sorted(adapters["vumatel"].calls[0]) == ["V-1", "V-2"]
+    assert len(adapters["vumatel"].calls) == 1 and adapters["frogfoot"].calls == [["F-1"]]
+
+    with db() as session:
+        orders = {o.id: o for o in session.scalars(select(FNOOrder))}
+        events = session.execute(select(FNOOrderEvent.order_id, FNOOrderEvent.to_status)).all()
+    assert orders[v1].status == "scheduled" and orders[v1].next_poll_at is not None
+    assert orders[v2].status == "completed" and orders[v2].completed_date and orders[v2].next_poll_at is None
+    # No answer from the FNO: unchanged, one failure, backed off.
+    assert orders[f1].status == "accepted" and orders[f1].poll_failures == 1
+    assert orders[done].last_polled_at is None
+    assert sorted(events) == sorted([(v1, "scheduled"), (v2, "completed")])
+
+
+def test_default_get_order_statuses_reports_failed_lookups():
+    statuses = asyncio.run(LookupAdapter().get_order_statuses(["A-1", "ERR-2"]))
+    assert statuses["A-1"]["status"] == "ACCEPTED"
+    assert statuses["ERR-2"] == {"order_id": "ERR-2", "status": "UNKNOWN", "error": "portal timeout"}
+
+
+def test_record_outcomes_skips_orders_changed_since_claim(db, make_service):
+    with db.begin() as session:
+        order_id = _make_order(session, make_service, "V-1")
+    claimed = order_tracking.claim_due_orders()
+    assert [o.id for o in claimed] == [order_id]
+    # A manual update between claim and record wins.
+    with db.begin() as session:
+        session.get(FNOOrder, order_id).status = "cancelled"
+
+    outcome = evaluate(claimed[0], {"status": "SCHEDULED"}, datetime.now(timezone.utc))
+    assert record_outcomes([outcome]) == 0
+    with db() as session:
+        assert session.get(FNOOrder, order_id).status == "cancelled"
+        assert session.scalar(select(FNOOrderEvent.id)) is None
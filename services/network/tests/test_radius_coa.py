@@ -0,0 +1,165 @@
+"""RFC 5176 client against a stub UDP NAS, plus batch outcome recording."""
+
+import asyncio
+import hashlib
+import ipaddress
+import struct
+
+import pytest
+from sqlalchemy import select
+
+from services.network import radius_coa
+from services.network.models import RadiusCoARequest
+from services.network.radius_coa import (
+    ATTR_ERROR_CAUSE,
+    ATTR_FRAMED_IP_ADDRESS,
+    ATTR_FRAMED_IPV6_PREFIX,
+    ATTR_NAS_IP_ADDRESS,
+    ATTR_NAS_IPV6_ADDRESS,
+    ATTR_USER_NAME,
+    CoAClient,
+    DISCONNECT_ACK,
+    DISCONNECT_NAK,
+    DISCONNECT_REQUEST,
+    ERROR_SESSION_CONTEXT_NOT_FOUND,
+    encode_attributes,
+    enqueue_coa,
+    parse_attributes,
+    process_coa_batch,
+)
+
+SECRET = b"s3cret"
+
+
+# ---------------------------------------------------------------------------
+# Attribute encoding
+# ---------------------------------------------------------------------------
+
+def test_encode_ipv4_addresses():
+    attrs = parse_attributes(encode_attributes("u", "10.0.0.1", framed_ip_address="100.64.0.9"))
+    assert attrs[ATTR_USER_NAME] == [b"u"]
+    assert attrs[ATTR_NAS_IP_ADDRESS] == [ipaddress.ip_address("10.0.0.1").packed]
+    assert attrs[ATTR_FRAMED_IP_ADDRESS] == [ipaddress.ip_address("100.64.0.9").packed]
+
+
+def test_encode_ipv6_addresses():
+    attrs = parse_attributes(encode_attributes("u", "2001:db8::1", framed_ip_address="2001:db8:1::/56"))
+    assert attrs[ATTR_NAS_IPV6_ADDRESS] == [ipaddress.ip_address("2001:db8::1").packed]
+    assert attrs[ATTR_FRAMED_IPV6_PREFIX] == [b"\x00\x38" + ipaddress.ip_address("2001:db8:1::").packed[:7]]
+    assert ATTR_NAS_IP_ADDRESS not in attrs
+
+
+def test_encode_rejects_malformed_address():
+    with pytest.raises(ValueError):
+        encode_attributes("u", "not-an-ip")
+
+
+# ---------------------------------------------------------------------------
+# Stub NAS
+# ---------------------------------------------------------------------------
+
+class _StubNas(asyncio.DatagramProtocol):
+    """Answers Disconnect-Requests according to ``mode``.
+
+    ``ack`` / ``nak`` reply at once; ``drop_first`` ignores the first packet
+    of each identifier (the client must retransmit); ``bad_auth`` signs
+    replies with the wrong secret.
+    """
+
+    def __init__(self, mode: str) -> None:
+        self.mode = mode
+        self.received: list[bytes] = []
+        self.transport = None
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.received.append(data)
+        if self.mode == "drop_first" and sum(p[1] == data[1] for p in self.received) == 1:
+            return
+        code, attrs = DISCONNECT_ACK, b""
+        if self.mode == "nak":
+            code = DISCONNECT_NAK
+            attrs = struct.pack("!BBI", ATTR_ERROR_CAUSE, 6, ERROR_SESSION_CONTEXT_NOT_FOUND)
+        secret = b"wrong" if self.mode == "bad_auth" else SECRET
+        header = struct.pack("!BBH", code, data[1], 20 + len(attrs))
+        authenticator = hashlib.md5(header + data[4:20] + attrs + secret).digest()
+        self.transport.sendto(header + authenticator + attrs, addr)
+
+
+async def _disconnect_via_stub(mode: str, **kwargs):
+    loop = asyncio.get_running_loop()
+    transport, nas = await loop.create_datagram_endpoint(lambda: _StubNas(mode), local_addr=("127.0.0.1", 0))
+    client = CoAClient(port=transport.get_extra_info("sockname")[1])
+    try:
+        result = await client.disconnect("127.0.0.1", "user@isp", "sess-1", **kwargs)
+        return result, nas.received, client.snapshot()
+    finally:
+        await client.close()
+        transport.close()
+
+
+@pytest.fixture
+def stub_client(monkeypatch):
+    monkeypatch.setattr(radius_coa, "RADIUS_COA_NAS_SECRETS", f"127.0.0.1={SECRET.decode()}")
+    monkeypatch.setattr(radius_coa, "RADIUS_COA_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(radius_coa, "RADIUS_COA_RETRIES", 2)
+    return lambda mode, **kwargs: asyncio.run(_disconnect_via_stub(mode, **kwargs))
+
+
+def test_disconnect_ack(stub_client):
+    result, received, _stats = stub_client("ack")
+    assert result.status == "ack" and result.done
+    assert len(received) == 1
+    packet = received[0]
+    assert packet[0] == DISCONNECT_REQUEST
+    # Request Authenticator is computed over zeroed authenticator and secret.
+    assert packet[4:20] == hashlib.md5(packet[:4] + b"\x00" * 16 + packet[20:] + SECRET).digest()
+    assert parse_attributes(packet[20:])[ATTR_USER_NAME] == [b"user@isp"]
+
+
+def test_disconnect_nak_session_gone_counts_as_done(stub_client):
+    result, _received, _stats = stub_client("nak")
+    assert result.status == "nak"
+    assert result.error_cause == ERROR_SESSION_CONTEXT_NOT_FOUND
+    assert result.done
+
+
+def test_timeout_retransmits_identical_packet(stub_client):
+    result, received, stats = stub_client("drop_first")
+    assert result.status == "ack"
+    assert len(received) == 2 and received[0] == received[1]
+    assert stats["127.0.0.1"]["retransmits"] == 1
+
+
+def test_bad_authenticator_is_ignored(stub_client):
+    result, received, _stats = stub_client("bad_auth")
+    assert result.status == "timeout"
+    assert len(received) == radius_coa.RADIUS_COA_RETRIES + 1
+
+
+def test_malformed_framed_address_is_an_error_result(stub_client):
+    result, received, _stats = stub_client("ack", framed_ip_address="999.1.1.1")
+    assert result.status == "error" and not result.done
+    assert received == []
+
+
+# ---------------------------------------------------------------------------
+# Batch recording
+# ---------------------------------------------------------------------------
+
+class _ExplodingClient:
+    async def disconnect(self, nas_ip, username, acct_session_id=None, framed_ip_address=None):
+        raise RuntimeError("boom")
+
+
+def test_batch_records_outcome_when_a_send_raises(db, make_account):
+    with db.begin() as session:
+        account = make_account(session)
+        enqueue_coa(session, account, "disconnect")
+    assert asyncio.run(process_coa_batch(_ExplodingClient())) == 1
+    with db() as session:
+        request = session.scalar(select(RadiusCoARequest))
+    assert request.status == "pending"
+    assert "boom" in request.last_error
@@ -0,0 +1,134 @@
+"""radcheck/radreply sync and its ordering against the CoA queue."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from services.network import radius_coa, radius_sync
+from services.network.freeradius import radcheck, radusergroup
+from services.network.models import RadiusAccount, RadiusSyncPending
+from services.network.radius_coa import CoAResult, enqueue_coa, process_coa_batch
+from services.network.radius_sync import account_rows, process_sync_batch, queue_sync
+
+
+class _Account:
+    def __init__(self, status="active", password_hash="secret", profile_name="100M", rate="100M/100M"):
+        self.status = status
+        self.password_hash = password_hash
+        self.profile_name = profile_name
+        self.mikrotik_rate_limit = rate
+
+
+def test_account_rows_active():
+    check, reply, groups = account_rows(_Account())
+    assert check == [("Cleartext-Password", ":=", "secret")]
+    assert reply == [("Mikrotik-Rate-Limit", "=", "100M/100M")]
+    assert groups == [("100M", 1)]
+
+
+def test_account_rows_suspended_rejects(monkeypatch):
+    monkeypatch.setattr(radius_sync, "RADIUS_SYNC_SUSPENDED_GROUP", "")
+    check, reply, groups = account_rows(_Account(status="suspended", password_hash="$6$salt$hash"))
+    assert check == [("Crypt-Password", ":=", "$6$salt$hash"), ("Auth-Type", ":=", "Reject")]
+    assert reply == [] and groups == []
+
+
+def test_account_rows_suspended_walled_garden(monkeypatch):
+    monkeypatch.setattr(radius_sync, "RADIUS_SYNC_SUSPENDED_GROUP", "walled-garden")
+    check, reply, groups = account_rows(_Account(status="suspended"))
+    assert ("Auth-Type", ":=", "Reject") not in check
+    assert groups == [("walled-garden", 1)]
+
+
+def test_account_rows_disabled_removes_everything():
+    assert account_rows(_Account(status="disabled")) == ([], [], [])
+
+
+# ---------------------------------------------------------------------------
+# Database
+# ---------------------------------------------------------------------------
+
+def _radcheck(db, account):
+    with db() as session:
+        return {
+            (attr, value)
+            for attr, value in session.execute(
+                select(radcheck.c.attribute, radcheck.c.value).where(
+                    radcheck.c.tenant_id == account.tenant_id, radcheck.c.username == account.username,
+                )
+            )
+        }
+
+
+def test_sync_writes_and_diffs(db, make_account, monkeypatch):
+    monkeypatch.setattr(radius_sync, "RADIUS_SYNC_COALESCE_SECONDS", 0)
+    monkeypatch.setattr(radius_sync, "RADIUS_SYNC_SUSPENDED_GROUP", "")
+    with db.begin() as session:
+        account = make_account(session)
+        queue_sync(session, [(account.tenant_id, account.username)])
+    assert process_sync_batch() == 1
+    assert _radcheck(db, account) == {("Cleartext-Password", "secret")}
+
+    with db.begin() as session:
+        session.get(RadiusAccount, account.id).status = "suspended"
+        queue_sync(session, [(account.tenant_id, account.username)] * 3)
+    assert process_sync_batch() == 1
+    assert _radcheck(db, account) == {("Cleartext-Password", "secret"), ("Auth-Type", "Reject")}
+    with db() as session:
+        assert session.scalar(select(RadiusSyncPending).limit(1)) is None
+        assert session.execute(select(radusergroup)).all() == []
+
+
+class _RecordingClient:
+    """Stands in for the UDP client; snapshots radcheck when a Disconnect goes out."""
+
+    def __init__(self, db, account):
+        self.db = db
+        self.account = account
+        self.radcheck_at_send = []
+
+    async def disconnect(self, nas_ip, username, acct_session_id=None, framed_ip_address=None):
+        self.radcheck_at_send.append(await asyncio.to_thread(_radcheck, self.db, self.account))
+        return CoAResult(nas_ip, "ack")
+
+
+def test_disconnect_waits_for_radcheck_sync(db, make_account, monkeypatch):
+    """A suspension's Disconnect is only sent after radcheck rejects the user."""
+    monkeypatch.setattr(radius_sync, "RADIUS_SYNC_SUSPENDED_GROUP", "")
+    monkeypatch.setattr(radius_sync, "RADIUS_SYNC_COALESCE_SECONDS", 0)
+    with db.begin() as session:
+        account = make_account(session)
+        queue_sync(session, [(account.tenant_id, account.username)])
+    process_sync_batch()
+
+    # Suspend: status change, CoA row and sync row in one transaction, with
+    # the sync held back for the coalescing window as in production.
+    monkeypatch.setattr(radius_sync, "RADIUS_SYNC_COALESCE_SECONDS", 3600)
+    with db.begin() as session:
+        suspended = session.get(RadiusAccount, account.id)
+        suspended.status = "suspended"
+        enqueue_coa(session, suspended, "disconnect", "non-payment")
+        queue_sync(session, [(account.tenant_id, account.username)])
+
+    client = _RecordingClient(db, account)
+    assert asyncio.run(process_coa_batch(client)) == 0
+    assert client.radcheck_at_send == []
+
+    with db.begin() as session:
+        session.get(RadiusSyncPending, (account.tenant_id, account.username)).due_at = radius_sync.func.now()
+    assert process_sync_batch() == 1
+    assert asyncio.run(process_coa_batch(client)) == 1
+    assert client.radcheck_at_send == [{("Cleartext-Password", "secret"), ("Auth-Type", "Reject")}]
+
+
+@pytest.mark.parametrize("pending", [True, False])
+def test_claim_skips_users_with_pending_sync(db, make_account, monkeypatch, pending):
+    monkeypatch.setattr(radius_sync, "RADIUS_SYNC_COALESCE_SECONDS", 3600)
+    with db.begin() as session:
+        account = make_account(session)
+        enqueue_coa(session, account, "disconnect")
+        if pending:
+            queue_sync(session, [(account.tenant_id, account.username)])
+    claimed, _sessions, _rates = radius_coa.claim_coa_requests()
+    assert [c.username for c in claimed] == ([] if pending else [account.username])
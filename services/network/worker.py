@@ -0,0 +1,225 @@
+"""Network job worker — runs queued FNO orders and automation jobs.
+
+Run as a separate process so slow FNO APIs and portals never hold up the
+API::
+
+    python -m services.network.worker
+
+One claim loop per FNO keeps at most ``NETWORK_WORKER_CONCURRENCY`` jobs
+(override per FNO with ``NETWORK_WORKER_<FNO>_CONCURRENCY``) in flight, and a
+heartbeat renews the leases of running jobs.  The worker also runs the
+RADIUS usage rollup (``radius_usage.py``) every
+``RADIUS_USAGE_ROLLUP_SECONDS`` and drains the RADIUS CoA/Disconnect queue
+(``radius_coa.py``) and the radcheck/radreply sync queue (``radius_sync.py``),
+and polls FNOs for the status of open orders (``order_tracking.py``).
+SIGTERM/SIGINT stop claiming
+and wait up to ``NETWORK_WORKER_SHUTDOWN_GRACE_SECONDS`` for running jobs;
+anything still running is picked up again after its lease expires.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+
+from services.network.adapters.registry import close_adapters
+from services.network.jobs import (
+    HANDLERS,
+    JOB_VISIBILITY_SECONDS,
+    ClaimedJob,
+    JobDeadLetter,
+    claim_jobs,
+    complete_job,
+    extend_leases,
+    fail_job,
+)
+from services.network.order_tracking import (
+    FNO_ORDER_TRACKING,
+    FNO_TRACK_BATCH_SIZE,
+    FNO_TRACK_POLL_SECONDS,
+    poll_orders,
+)
+from services.network.radius_coa import (
+    RADIUS_COA_BATCH_SIZE,
+    RADIUS_COA_POLL_SECONDS,
+    RADIUS_COA_SENDER,
+    coa_client,
+    process_coa_batch,
+)
+from services.network.radius_sync import (
+    RADIUS_SYNC,
+    RADIUS_SYNC_BATCH_SIZE,
+    RADIUS_SYNC_POLL_SECONDS,
+    process_sync_batch,
+)
+from services.network.radius_usage import (
+    RADIUS_USAGE_ROLLUP,
+    RADIUS_USAGE_ROLLUP_SECONDS,
+    purge_checkpoints,
+    run_rollup,
+)
+from services.network.schemas import FNO_PROVIDERS
+
+logger = logging.getLogger("network.worker")
+
+WORKER_CONCURRENCY = int(os.getenv("NETWORK_WORKER_CONCURRENCY", "2"))
+WORKER_POLL_SECONDS = float(os.getenv("NETWORK_WORKER_POLL_SECONDS", "1.0"))
+WORKER_SHUTDOWN_GRACE = float(os.getenv("NETWORK_WORKER_SHUTDOWN_GRACE_SECONDS", "30"))
+
+
+def fno_concurrency(fno_provider: str) -> int:
+    env = os.getenv(f"NETWORK_WORKER_{fno_provider.upper()}_CONCURRENCY")
+    return max(1, int(env)) if env else WORKER_CONCURRENCY
+
+
+class Worker:
+    def __init__(self) -> None:
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.stopping = asyncio.Event()
+        self.inflight: dict[uuid.UUID, asyncio.Task] = {}
+
+    async def _run_job(self, job: ClaimedJob) -> None:
+        try:
+            await HANDLERS[job.kind](job.ref_id)
+        except JobDeadLetter as exc:
+            await asyncio.to_thread(fail_job, job, self.worker_id, str(exc), False)
+        except Exception as exc:
+            await asyncio.to_thread(fail_job, job, self.worker_id, f"{type(exc).__name__}: {exc}")
+        else:
+            await asyncio.to_thread(complete_job, job.id, self.worker_id)
+        finally:
+            self.inflight.pop(job.id, None)
+
+    async def _claim_loop(self, fno_provider: str) -> None:
+        limit = fno_concurrency(fno_provider)
+        running: set[asyncio.Task] = set()
+        stop = asyncio.create_task(self.stopping.wait())
+        try:
+            while not self.stopping.is_set():
+                jobs: list[ClaimedJob] = []
+                try:
+                    jobs = await asyncio.to_thread(claim_jobs, fno_provider, limit - len(running), self.worker_id)
+                except Exception as exc:
+                    logger.error("Claiming %s jobs failed: %s", fno_provider, exc)
+                for job in jobs:
+                    task = asyncio.create_task(self._run_job(job))
+                    self.inflight[job.id] = task
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+
+                if jobs and len(running) < limit:
+                    continue
+                # Sleep until a slot frees up, the poll interval passes or we stop.
+                await asyncio.wait(
+                    [stop, *running], timeout=WORKER_POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED,
+                )
+        finally:
+            stop.cancel()
+
+    async def _heartbeat(self) -> None:
+        interval = max(1.0, JOB_VISIBILITY_SECONDS / 3)
+        while not self.stopping.is_set():
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.to_thread(extend_leases, list(self.inflight), self.worker_id)
+            except Exception as exc:
+                logger.error("Lease renewal failed: %s", exc)
+
+    async def _usage_rollup(self) -> None:
+        while not self.stopping.is_set():
+            try:
+                await asyncio.to_thread(run_rollup)
+                await asyncio.to_thread(purge_checkpoints)
+            except Exception as exc:
+                logger.error("RADIUS usage rollup failed: %s", exc)
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=RADIUS_USAGE_ROLLUP_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _coa_sender(self) -> None:
+        while not self.stopping.is_set():
+            handled = 0
+            try:
+                handled = await process_coa_batch()
+            except Exception as exc:
+                logger.error("RADIUS CoA batch failed: %s", exc)
+            if handled >= RADIUS_COA_BATCH_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=RADIUS_COA_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _radius_sync(self) -> None:
+        while not self.stopping.is_set():
+            synced = 0
+            try:
+                synced = await asyncio.to_thread(process_sync_batch)
+            except Exception as exc:
+                logger.error("RADIUS sync batch failed: %s", exc)
+            if synced >= RADIUS_SYNC_BATCH_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=RADIUS_SYNC_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _order_tracking(self) -> None:
+        while not self.stopping.is_set():
+            polled = 0
+            try:
+                polled = await poll_orders()
+            except Exception as exc:
+                logger.error("FNO order status poll failed: %s", exc)
+            if polled >= FNO_TRACK_BATCH_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=FNO_TRACK_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stopping.set)
+
+        logger.info("Network worker %s started", self.worker_id)
+        loops = [asyncio.create_task(self._claim_loop(fno)) for fno in sorted(FNO_PROVIDERS)]
+        heartbeat = asyncio.create_task(self._heartbeat())
+        if RADIUS_USAGE_ROLLUP:
+            loops.append(asyncio.create_task(self._usage_rollup()))
+        if RADIUS_COA_SENDER:
+            loops.append(asyncio.create_task(self._coa_sender()))
+        if RADIUS_SYNC:
+            loops.append(asyncio.create_task(self._radius_sync()))
+        if FNO_ORDER_TRACKING:
+            loops.append(asyncio.create_task(self._order_tracking()))
+        await self.stopping.wait()
+
+        logger.info("Network worker stopping; %d jobs in flight", len(self.inflight))
+        await asyncio.gather(*loops, return_exceptions=True)
+        if self.inflight:
+            await asyncio.wait(list(self.inflight.values()), timeout=WORKER_SHUTDOWN_GRACE)
+        heartbeat.cancel()
+        await coa_client.close()
+        await close_adapters()
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s [network-worker] %(name)s — %(message)s",
+    )
+    asyncio.run(Worker().run())
+
+
+if __name__ == "__main__":
+    main()
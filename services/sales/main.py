@@ -13,6 +13,7 @@ from sqlalchemy import bindparam, text
 from services.common.auth import AuthContext, get_auth_context, get_current_tenant_id
 from services.common.db import get_engine
 from services.common.entitlements import EntitlementGuard
+from services.common.money import sum_line_totals
 
 app = FastAPI(title="CoreConnect Sales Service", version="1.0.0")
 guard = EntitlementGuard(module_id="sales")
@@ -332,12 +333,12 @@ def _calculate_quote_totals(items: Optional[List[QuoteItem]]) -> Dict[str, Decim
     total_once_off = Decimal("0")
     if not items:
         return {"total_monthly": total_monthly, "total_once_off": total_once_off}
-    for item in items:
-        line_total = item.unit_price_zar * item.quantity
-        if item.charge_type.lower() == "once_off":
-            total_once_off += line_total
-        else:
-            total_monthly += line_total
+    once_off = [(i.unit_price_zar, i.quantity) for i in items if i.charge_type.lower() == "once_off"]
+    monthly = [(i.unit_price_zar, i.quantity) for i in items if i.charge_type.lower() != "once_off"]
+    if monthly:
+        total_monthly = sum_line_totals(monthly)
+    if once_off:
+        total_once_off = sum_line_totals(once_off)
     return {"total_monthly": total_monthly, "total_once_off": total_once_off}
 
 